@@ -22,7 +22,49 @@ class ConfigurationService:
         "always_ask_commands": [
             "rm -rf", "format C:", "del /s", "curl -X POST", "sh", "bash", "powershell"
         ],
-        "git_agent_always_live": False
+        "git_agent_always_live": False,
+        "routing": {
+            "hedge": False,
+            "hedge_min_delay": 1.0,
+            "hedge_max_delay": 15.0,
+            "failure_threshold": 3,
+            "cooldown_seconds": 60,
+            "ewma_alpha": 0.2,
+            "state_path": ".firefly/provider_health.json"
+        },
+        "embedding_cache": {
+            "enabled": True,
+            "path": ".firefly/embeddings",
+            "max_entries": 20000
+        },
+        "memory": {
+            "flush_interval": 1.0,
+            "compact_threshold": 500,
+            "compact_interval": 300,
+            "default_ttl": 0,
+            "expire_interval": 60,
+            "exact_filter_limit": 2048,
+            "index": {
+                "hnsw_threshold": 50000,
+                "ivf_threshold": 1000000,
+                "hnsw_m": 32,
+                "ef_construction": 200,
+                "ef_search": 64,
+                "nlist": 0,
+                "nprobe": 16,
+                "pq_m": 0,
+                "purge_ratio": 0.2
+            }
+        },
+        "event_dispatch": {
+            "telegram_input": {"concurrency": 2, "max_queue": 100, "overflow": "block"},
+            "email_input": {"concurrency": 2, "max_queue": 100, "overflow": "block"},
+            "sms_input": {"concurrency": 2, "max_queue": 100, "overflow": "block"},
+            "webhook_event": {"concurrency": 2, "max_queue": 200, "overflow": "block"},
+            "ide_chat": {"concurrency": 1, "max_queue": 50, "overflow": "block"},
+            "system_event": {"concurrency": 1, "max_queue": 50, "overflow": "coalesce", "coalesce_field": "path"},
+            "git_event": {"concurrency": 1, "max_queue": 20, "overflow": "coalesce", "coalesce_field": "type"}
+        }
     }
 
     def __init__(self, config_path: str = "options.json"):
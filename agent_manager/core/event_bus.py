@@ -1,19 +1,141 @@
-from threading import Lock
-from typing import Callable, Dict, List, Any
+from collections import deque
+from dataclasses import dataclass
+from threading import Condition, Lock, Thread
+from typing import Callable, Dict, Hashable, List, Any, Optional
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("FireflyEventBus")
 
+# Backpressure policies applied when a topic queue is full
+POLICY_BLOCK = "block"              # Publisher waits for a free slot
+POLICY_DROP_NEWEST = "drop_newest"  # Incoming event is discarded
+POLICY_DROP_OLDEST = "drop_oldest"  # Oldest pending event is discarded
+POLICY_COALESCE = "coalesce"        # Pending event with the same key is replaced
+POLICIES = (POLICY_BLOCK, POLICY_DROP_NEWEST, POLICY_DROP_OLDEST, POLICY_COALESCE)
+
+@dataclass
+class TopicPolicy:
+    """
+    Dispatch settings for a single event type.
+    """
+    concurrency: int = 1
+    max_queue: int = 100
+    overflow: str = POLICY_BLOCK
+    coalesce_key: Optional[Callable[[Any], Hashable]] = None
+
+class _TopicDispatcher:
+    """
+    Bounded queue plus a fixed pool of worker threads for one event type.
+    With concurrency=1 events are delivered in publish order.
+    """
+    def __init__(self, bus: "EventBusService", event_type: str, policy: TopicPolicy):
+        self.bus = bus
+        self.event_type = event_type
+        self.policy = policy
+        self._queue: deque = deque()  # entries are [key, data]
+        self._cond = Condition()
+        self._running = True
+        self._in_flight = 0
+        self.stats = {"queued": 0, "dispatched": 0, "dropped": 0, "coalesced": 0}
+        self._workers = []
+        for i in range(max(1, policy.concurrency)):
+            t = Thread(target=self._worker_loop, name=f"EventBus-{event_type}-{i}", daemon=True)
+            t.start()
+            self._workers.append(t)
+
+    def submit(self, data: Any) -> bool:
+        """Queue an event. Returns False if it was dropped."""
+        policy = self.policy
+        key = policy.coalesce_key(data) if policy.coalesce_key else None
+
+        with self._cond:
+            if not self._running:
+                return False
+
+            if policy.overflow == POLICY_COALESCE and key is not None:
+                for entry in self._queue:
+                    if entry[0] == key:
+                        entry[1] = data
+                        self.stats["coalesced"] += 1
+                        return True
+
+            if len(self._queue) >= policy.max_queue:
+                if policy.overflow == POLICY_DROP_NEWEST:
+                    self.stats["dropped"] += 1
+                    logger.warning(f"Queue full for {self.event_type}. Dropping new event.")
+                    return False
+                elif policy.overflow in (POLICY_DROP_OLDEST, POLICY_COALESCE):
+                    self._queue.popleft()
+                    self.stats["dropped"] += 1
+                    logger.warning(f"Queue full for {self.event_type}. Dropping oldest event.")
+                else:
+                    while self._running and len(self._queue) >= policy.max_queue:
+                        self._cond.wait()
+                    if not self._running:
+                        return False
+
+            self._queue.append([key, data])
+            self.stats["queued"] += 1
+            self._cond.notify_all()
+        return True
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                while self._running and not self._queue:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                _, data = self._queue.popleft()
+                self._in_flight += 1
+                self._cond.notify_all()
+
+            self.bus._dispatch(self.event_type, data)
+            with self._cond:
+                self._in_flight -= 1
+                self.stats["dispatched"] += 1
+                self._cond.notify_all()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._queue)
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the queue has been drained and dispatched."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not self._queue and self._in_flight == 0,
+                timeout=timeout
+            )
+
+    def stop(self, timeout: float = 1.0):
+        with self._cond:
+            self._running = False
+            self._queue.clear()
+            self._cond.notify_all()
+        for t in self._workers:
+            t.join(timeout=timeout)
+
 class EventBusService:
     """
     Central event bus for the agent system.
     Follows a simple Publish-Subscribe pattern.
+
+    By default subscribers run inline on the publisher's thread. Topics can be
+    switched to a bounded worker pool with `configure_topic` (or bus-wide with
+    `async_dispatch=True`) so slow subscribers do not stall the publisher.
+    `publish_sync` always delivers inline, for callers that need ordering.
     """
-    def __init__(self):
+    def __init__(self, async_dispatch: bool = False, default_policy: Optional[TopicPolicy] = None):
         self._subscribers: Dict[str, List[Callable]] = {}
         self._lock = Lock()
+        self.async_dispatch = async_dispatch
+        self.default_policy = default_policy or TopicPolicy()
+        self._policies: Dict[str, TopicPolicy] = {}
+        self._dispatchers: Dict[str, _TopicDispatcher] = {}
+        self._closed = False
 
     def subscribe(self, event_type: str, callback: Callable[[Any], None]):
         """Subscribe a callback function to a specific event type."""
@@ -23,18 +145,120 @@ class EventBusService:
             self._subscribers[event_type].append(callback)
         logger.info(f"Subscribed to event: {event_type}")
 
+    def configure_topic(self, event_type: str, concurrency: int = 1, max_queue: int = 100,
+                        overflow: str = POLICY_BLOCK, coalesce_key: Optional[Callable[[Any], Hashable]] = None):
+        """
+        Dispatch an event type through a bounded worker pool.
+
+        Args:
+            event_type: The event type to configure.
+            concurrency: Number of worker threads delivering this event type.
+            max_queue: Maximum number of pending events before `overflow` applies.
+            overflow: One of 'block', 'drop_newest', 'drop_oldest' or 'coalesce'.
+            coalesce_key: For 'coalesce', maps event data to a key; a pending event
+                with the same key is replaced by the newer one.
+        """
+        if overflow not in POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow}'. Expected one of {POLICIES}.")
+
+        policy = TopicPolicy(concurrency=concurrency, max_queue=max_queue, overflow=overflow, coalesce_key=coalesce_key)
+        with self._lock:
+            self._policies[event_type] = policy
+            old = self._dispatchers.pop(event_type, None)
+        if old:
+            old.stop()
+        logger.info(f"Configured async dispatch for {event_type}: {policy.concurrency} worker(s), queue={policy.max_queue}, overflow={policy.overflow}")
+
+    def apply_config(self, topics: Dict[str, Dict[str, Any]]):
+        """
+        Configure several topics from a settings mapping (e.g. options.json 'event_dispatch').
+        Each entry accepts concurrency, max_queue, overflow and coalesce_field, where
+        coalesce_field names the payload key used to coalesce pending events.
+        """
+        for event_type, settings in (topics or {}).items():
+            field_name = settings.get("coalesce_field")
+            coalesce_key = (lambda data, f=field_name: data.get(f) if isinstance(data, dict) else None) if field_name else None
+            try:
+                self.configure_topic(
+                    event_type,
+                    concurrency=int(settings.get("concurrency", 1)),
+                    max_queue=int(settings.get("max_queue", 100)),
+                    overflow=settings.get("overflow", POLICY_BLOCK),
+                    coalesce_key=coalesce_key
+                )
+            except (ValueError, TypeError) as e:
+                logger.error(f"Invalid dispatch settings for {event_type}: {e}")
+
     def publish(self, event_type: str, data: Any):
         """Publish an event to all subscribers."""
         with self._lock:
             if event_type not in self._subscribers:
                 # No subscribers for this event
                 return
-
-            subscribers = self._subscribers[event_type][:] # Copy list to avoid modification issues during iteration
+            dispatcher = self._get_dispatcher(event_type)
 
         logger.info(f"Publishing event: {event_type}")
+        if dispatcher:
+            dispatcher.submit(data)
+        else:
+            self._dispatch(event_type, data)
+
+    def publish_sync(self, event_type: str, data: Any):
+        """Publish an event and run all subscribers inline, bypassing any worker pool."""
+        with self._lock:
+            if event_type not in self._subscribers:
+                return
+
+        logger.info(f"Publishing event (sync): {event_type}")
+        self._dispatch(event_type, data)
+
+    def _get_dispatcher(self, event_type: str) -> Optional[_TopicDispatcher]:
+        """Return the worker pool for an event type, creating it lazily. Caller holds the lock."""
+        if self._closed:
+            return None
+        dispatcher = self._dispatchers.get(event_type)
+        if dispatcher:
+            return dispatcher
+
+        policy = self._policies.get(event_type)
+        if policy is None and self.async_dispatch:
+            policy = self.default_policy
+        if policy is None:
+            return None
+
+        dispatcher = _TopicDispatcher(self, event_type, policy)
+        self._dispatchers[event_type] = dispatcher
+        return dispatcher
+
+    def _dispatch(self, event_type: str, data: Any):
+        """Invoke every subscriber of an event type on the current thread."""
+        with self._lock:
+            subscribers = self._subscribers.get(event_type, [])[:] # Copy list to avoid modification issues during iteration
+
         for callback in subscribers:
             try:
                 callback(event_type, data)
             except Exception as e:
                 logger.error(f"Error in subscriber callback for {event_type}: {e}")
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """Queue statistics per asynchronously dispatched event type."""
+        with self._lock:
+            dispatchers = dict(self._dispatchers)
+        return {name: {**d.stats, "pending": d.pending()} for name, d in dispatchers.items()}
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every queued event has been delivered."""
+        with self._lock:
+            dispatchers = list(self._dispatchers.values())
+        return all(d.join(timeout=timeout) for d in dispatchers)
+
+    def shutdown(self, timeout: float = 1.0):
+        """Stop all worker pools. Pending events are discarded."""
+        with self._lock:
+            self._closed = True
+            dispatchers = list(self._dispatchers.values())
+            self._dispatchers.clear()
+        for d in dispatchers:
+            d.stop(timeout=timeout)
+        logger.info("Event bus shut down.")
@@ -0,0 +1,349 @@
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import logging
+import math
+import threading
+import time
+
+import faiss
+import numpy as np
+
+logger = logging.getLogger("FireflyMemoryIndex")
+
+TIER_FLAT = "flat"
+TIER_HNSW = "hnsw"
+TIER_IVF = "ivf"
+
+TIER_ORDER = [TIER_FLAT, TIER_HNSW, TIER_IVF]
+
+def _id_selector(ids: np.ndarray):
+    ids = np.ascontiguousarray(ids, dtype='int64')
+    selector = faiss.IDSelectorBatch(len(ids), faiss.swig_ptr(ids))
+    selector._ids = ids # The selector does not own the buffer
+    return selector
+
+class TieredIndex:
+    """
+    FAISS index that grows with the memory.
+    Vectors are stored under stable 64-bit ids (IndexIDMap2) on top of a base
+    index that starts as exact IndexFlatL2 and is promoted to IndexHNSWFlat,
+    then to IndexIVFFlat (or IVFPQ when pq_m is set) as the vector count
+    crosses the configured thresholds. The replacement is built and trained on
+    a background thread from a copy of the vectors; adds and deletions made
+    meanwhile are journaled and replayed onto it at swap time. Recall against exact search is measured on each
+    promotion and query latency is tracked for get_stats().
+
+    Deleting from a Flat index is immediate. HNSW and IVF keep tombstones that
+    are excluded from search and purged by a background rebuild once they make
+    up purge_ratio of the index.
+    """
+    DEFAULT_SETTINGS = {
+        "hnsw_threshold": 50000,
+        "ivf_threshold": 1000000,
+        "hnsw_m": 32,
+        "ef_construction": 200,
+        "ef_search": 64,
+        "nlist": 0, # 0 = 4 * sqrt(n)
+        "nprobe": 16,
+        "pq_m": 0, # 0 = IVFFlat, otherwise IVFPQ with this many sub-quantizers
+        "purge_ratio": 0.2,
+        "recall_sample": 50,
+        "recall_k": 10
+    }
+
+    def __init__(self, dimension: int, settings: Optional[Dict[str, Any]] = None):
+        self.settings = dict(self.DEFAULT_SETTINGS)
+        self.settings.update(settings or {})
+        self.dimension = dimension
+        self.index = self._wrap(faiss.IndexFlatL2(dimension))
+        self.tombstones: Set[int] = set()
+        self._lock = threading.RLock()
+        self._builder: Optional[threading.Thread] = None
+        self._journal: Optional[List[Tuple[str, Any, Any]]] = None # Changes made during a build
+        self._latencies = deque(maxlen=500)
+        self._last_build: Dict[str, Any] = {}
+
+    @staticmethod
+    def _wrap(base):
+        # faiss keeps a Python reference to the base index, so ownership stays with Python
+        return faiss.IndexIDMap2(base)
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def reset(self, dimension: int):
+        with self._lock:
+            self.dimension = dimension
+            self.index = self._wrap(faiss.IndexFlatL2(dimension))
+            self.tombstones = set()
+            self._last_build = {}
+
+    def load(self, index):
+        """
+        Adopt an index read from disk, re-applying the search knobs.
+        Indexes saved before ids were introduced are positional; they are
+        wrapped so that each vector keeps its old position as its id.
+        """
+        owner = index
+        index = faiss.downcast_index(owner)
+        if index is not owner and owner.this.own():
+            # downcast_index returns a non-owning view of the same native index;
+            # move ownership to it, or the index is freed along with `owner`
+            owner.this.disown()
+            index.this.own(True)
+        if not isinstance(index, faiss.IndexIDMap2):
+            xs = index.reconstruct_n(0, index.ntotal) if index.ntotal else np.zeros((0, index.d), dtype='float32')
+            wrapped = self._wrap(faiss.IndexFlatL2(index.d))
+            if len(xs):
+                wrapped.add_with_ids(xs, np.arange(len(xs), dtype='int64'))
+            index = wrapped
+        with self._lock:
+            self.dimension = index.d
+            self.index = index
+            self.tombstones = set()
+            self._apply_search_params(self._base(index))
+        self._maybe_rebuild()
+
+    @property
+    def tier(self) -> str:
+        return self._tier_of(self._base(self.index))
+
+    @property
+    def ntotal(self) -> int:
+        return self.index.ntotal - len(self.tombstones)
+
+    @staticmethod
+    def _base(index):
+        return faiss.downcast_index(index.index)
+
+    @staticmethod
+    def _tier_of(base) -> str:
+        if isinstance(base, faiss.IndexHNSW):
+            return TIER_HNSW
+        if isinstance(base, faiss.IndexIVF):
+            return TIER_IVF
+        return TIER_FLAT
+
+    def _apply_search_params(self, base):
+        if isinstance(base, faiss.IndexHNSW):
+            base.hnsw.efSearch = self.settings["ef_search"]
+        elif isinstance(base, faiss.IndexIVF):
+            base.nprobe = self.settings["nprobe"]
+
+    def _search_params(self, selector):
+        base = self._base(self.index)
+        if isinstance(base, faiss.IndexHNSW):
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=self.settings["ef_search"])
+        if isinstance(base, faiss.IndexIVF):
+            return faiss.SearchParametersIVF(sel=selector, nprobe=self.settings["nprobe"])
+        return faiss.SearchParameters(sel=selector)
+
+    # ------------------------------------------------------------------
+    # Data path
+    # ------------------------------------------------------------------
+
+    def ids(self) -> np.ndarray:
+        """Ids currently stored (including tombstoned ones)."""
+        with self._lock:
+            return faiss.vector_to_array(self.index.id_map).copy()
+
+    def add(self, vecs: np.ndarray, ids: np.ndarray):
+        ids = np.asarray(ids, dtype='int64')
+        with self._lock:
+            self.index.add_with_ids(vecs, ids)
+            if self._journal is not None:
+                self._journal.append(("add", np.array(vecs, dtype='float32'), ids.copy()))
+        self._maybe_rebuild()
+
+    def remove(self, ids: Iterable[int]):
+        ids = np.fromiter(ids, dtype='int64')
+        if not len(ids):
+            return
+        with self._lock:
+            self._remove_locked(ids)
+            if self._journal is not None:
+                self._journal.append(("remove", None, ids))
+        self._maybe_rebuild()
+
+    def _remove_locked(self, ids: np.ndarray):
+        if self.tier == TIER_FLAT:
+            self.index.remove_ids(_id_selector(ids))
+        else:
+            # Tombstone only stored ids; unknown ones would skew ntotal and the purge ratio
+            stored = faiss.vector_to_array(self.index.id_map)
+            self.tombstones.update(int(i) for i in ids[np.isin(ids, stored)])
+
+    def reconstruct(self, ids: Iterable[int]) -> np.ndarray:
+        with self._lock:
+            rows = [self.index.reconstruct(int(i)) for i in ids]
+        return np.vstack(rows) if rows else np.zeros((0, self.dimension), dtype='float32')
+
+    def search(self, vecs: np.ndarray, k: int, candidates: Optional[np.ndarray] = None):
+        """
+        k-NN search over stored ids. With candidates, only those ids are considered
+        (pre-filtering inside FAISS); tombstones are always excluded.
+        """
+        start = time.perf_counter()
+        with self._lock:
+            selector = None
+            if candidates is not None:
+                selector = _id_selector(candidates)
+            elif self.tombstones:
+                excluded = _id_selector(np.fromiter(self.tombstones, dtype='int64'))
+                selector = faiss.IDSelectorNot(excluded)
+                selector._inner = excluded # Not owned by IDSelectorNot
+            if selector is None:
+                result = self.index.search(vecs, k)
+            else:
+                result = self.index.search(vecs, k, params=self._search_params(selector))
+        self._latencies.append(time.perf_counter() - start)
+        return result
+
+    def clone(self):
+        with self._lock:
+            return faiss.clone_index(self.index)
+
+    # ------------------------------------------------------------------
+    # Promotion
+    # ------------------------------------------------------------------
+
+    def _target_tier(self, n: int) -> str:
+        if n >= self.settings["ivf_threshold"]:
+            return TIER_IVF
+        if n >= self.settings["hnsw_threshold"]:
+            return TIER_HNSW
+        return TIER_FLAT
+
+    def _maybe_rebuild(self):
+        """Start a background build when a promotion is due or tombstones pile up."""
+        with self._lock:
+            current = self.tier
+            target = self._target_tier(self.ntotal)
+            if TIER_ORDER.index(target) < TIER_ORDER.index(current):
+                target = current # Never demote
+            purge = self.index.ntotal and len(self.tombstones) >= self.settings["purge_ratio"] * self.index.ntotal
+            if target == current and not purge:
+                return
+            if self._builder and self._builder.is_alive():
+                return
+            self._builder = threading.Thread(target=self._promote, args=(target,), name="FireflyIndexBuild", daemon=True)
+            self._builder.start()
+
+    def _build(self, tier: str, xs: np.ndarray, ids: np.ndarray):
+        s = self.settings
+        d = self.dimension
+        if tier == TIER_HNSW:
+            base = faiss.IndexHNSWFlat(d, s["hnsw_m"])
+            base.hnsw.efConstruction = s["ef_construction"]
+        elif tier == TIER_IVF:
+            nlist = s["nlist"] or max(1, int(4 * math.sqrt(max(1, len(xs)))))
+            quantizer = faiss.IndexFlatL2(d)
+            pq_m = s["pq_m"]
+            if pq_m and d % pq_m == 0:
+                base = faiss.IndexIVFPQ(quantizer, d, nlist, pq_m, 8)
+            else:
+                if pq_m:
+                    logger.warning(f"pq_m={pq_m} does not divide dimension {d}; using IVFFlat.")
+                base = faiss.IndexIVFFlat(quantizer, d, nlist)
+            # ~64 points per centroid is plenty for k-means
+            sample = xs if len(xs) <= nlist * 64 else xs[np.random.choice(len(xs), nlist * 64, replace=False)]
+            base.train(sample)
+            base.make_direct_map() # Keeps reconstruct() available for clone/compaction
+        else:
+            base = faiss.IndexFlatL2(d)
+        self._apply_search_params(base)
+        index = self._wrap(base)
+        if len(xs):
+            index.add_with_ids(xs, ids)
+        return index
+
+    def _measure_recall(self, index, xs: np.ndarray, ids: np.ndarray) -> Optional[float]:
+        """recall@k of the new index against exact search, using stored vectors as queries."""
+        count = min(self.settings["recall_sample"], len(xs))
+        k = min(self.settings["recall_k"], len(xs))
+        if count == 0 or k == 0:
+            return None
+        queries = xs[np.random.choice(len(xs), count, replace=False)]
+        exact = faiss.IndexFlatL2(xs.shape[1])
+        exact.add(xs)
+        _, truth = exact.search(queries, k)
+        _, approx = index.search(queries, k)
+        found = sum(len(set(ids[t].tolist()) & set(a.tolist())) for t, a in zip(truth, approx))
+        return found / float(count * k)
+
+    def _promote(self, tier: str):
+        try:
+            start = time.time()
+            with self._lock:
+                source = self.index
+                built_n = source.ntotal
+                all_ids = faiss.vector_to_array(source.id_map).copy()
+                xs = self._base(source).reconstruct_n(0, built_n) if built_n else np.zeros((0, self.dimension), dtype='float32')
+                dropped = set(self.tombstones)
+                # Row positions in the source shift on deletes, so later changes
+                # are replayed by id rather than copied by position
+                self._journal = []
+
+            keep = np.array([i not in dropped for i in all_ids.tolist()], dtype=bool)
+            xs, ids = xs[keep], all_ids[keep]
+
+            logger.info(f"Building {tier} memory index over {len(ids)} vectors...")
+            index = self._build(tier, xs, ids)
+            recall = self._measure_recall(index, xs, ids) if tier != TIER_FLAT else 1.0
+
+            with self._lock:
+                if self.index is not source:
+                    logger.info("Memory index was replaced during build; discarding it.")
+                    return
+                self.index = index
+                self.tombstones = set()
+                # Replay the adds and deletions made while we were building
+                present = set(ids.tolist())
+                for op, vecs, op_ids in self._journal:
+                    if op == "add":
+                        index.add_with_ids(vecs, op_ids)
+                        present.update(op_ids.tolist())
+                    else:
+                        hit = [i for i in op_ids.tolist() if i in present]
+                        present.difference_update(hit)
+                        if hit:
+                            self._remove_locked(np.array(hit, dtype='int64'))
+                self._last_build = {
+                    "tier": tier,
+                    "vectors": len(ids),
+                    "purged": len(dropped),
+                    "build_seconds": round(time.time() - start, 3),
+                    "recall_at_k": recall,
+                    "recall_k": self.settings["recall_k"]
+                }
+            logger.info(f"Memory index rebuilt as {tier} in {self._last_build['build_seconds']}s (recall@{self.settings['recall_k']}={recall}).")
+        except Exception as e:
+            logger.error(f"Memory index rebuild to {tier} failed: {e}")
+        finally:
+            with self._lock:
+                self._journal = None
+
+    def wait_for_build(self, timeout: Optional[float] = None):
+        builder = self._builder
+        if builder:
+            builder.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self._latencies)
+
+        def pct(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 3)
+
+        return {
+            "tier": self.tier,
+            "vectors": self.ntotal,
+            "tombstones": len(self.tombstones),
+            "building": bool(self._builder and self._builder.is_alive()),
+            "query_ms_p50": pct(0.5),
+            "query_ms_p95": pct(0.95),
+            "queries_sampled": len(latencies),
+            "last_build": dict(self._last_build)
+        }
@@ -1,105 +1,519 @@
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+import base64
 import json
 import logging
 import os
+import sqlite3
+import threading
+import time
 
 import faiss
 import numpy as np
 
+from agent_manager.core.memory_index import TieredIndex
+
 logger = logging.getLogger("FireflyMemoryService")
 
+# Metadata fields stored as their own columns so they can be filtered in SQL
+COLUMN_FIELDS = ("session", "type")
+
 class MemoryService:
     """
     Project-Firefly Semantic Memory.
     Uses FAISS for vector search and an LLM for embeddings.
     Indexes thoughts, commands, and code context.
+
+    Every memory has a stable 64-bit id shared by the FAISS index (IndexIDMap2)
+    and a SQLite sidecar holding text, metadata, timestamps and expiry. Queries
+    can be pre-filtered by session, type and time range; memories can be deleted
+    or expire after a TTL.
+
+    Vector writes go to an append-only log (one JSONL record per item carrying its
+    id, vector and metadata). A background thread fsyncs the log every
+    flush_interval seconds, sweeps expired memories and compacts the log into the
+    FAISS snapshot once it grows past compact_threshold records or compact_interval
+    seconds. Startup loads the snapshot and replays the log tail onto it.
     """
-    def __init__(self, model_client, memory_path: Optional[str] = None):
+    DEFAULT_SETTINGS = {
+        "flush_interval": 1.0,
+        "compact_threshold": 500,
+        "compact_interval": 300.0,
+        "default_ttl": 0, # Seconds; 0 keeps memories forever
+        "expire_interval": 60.0,
+        "exact_filter_limit": 2048, # Filtered candidate sets up to this size are ranked exactly
+        "index": {}
+    }
+
+    def __init__(self, model_client, memory_path: Optional[str] = None, config_service=None):
         self.model_client = model_client
         self.root_path = Path(memory_path or ".firefly/memory")
         self.index_file = self.root_path / "firefly_index.faiss"
-        self.metadata_file = self.root_path / "firefly_metadata.json"
+        self.metadata_file = self.root_path / "firefly_metadata.json" # Legacy, migrated into the db
+        self.db_file = self.root_path / "firefly_memory.db"
+        self.wal_file = self.root_path / "firefly_wal.jsonl"
+
+        settings = dict(self.DEFAULT_SETTINGS)
+        if config_service:
+            settings.update(config_service.get("memory", {}) or {})
+        self.flush_interval = settings["flush_interval"]
+        self.compact_threshold = settings["compact_threshold"]
+        self.compact_interval = settings["compact_interval"]
+        self.default_ttl = settings["default_ttl"]
+        self.expire_interval = settings["expire_interval"]
+        self.exact_filter_limit = settings["exact_filter_limit"]
 
         self.dimension = 1536 # Default for OpenAI 'text-embedding-3-small'
-        self.index = None
-        self.metadata = [] # List of dicts matching index IDs
+        self.index = TieredIndex(self.dimension, settings["index"])
+        self.db: Optional[sqlite3.Connection] = None
+        self._next_id = 0
+
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        self._wal = None
+        self._wal_records = 0
+        self._wal_dirty = False
+        self._last_compact = time.time()
+        self._last_expire = 0.0
+        self._stop_event = threading.Event()
 
         self._initialize_storage()
 
+        self._worker = threading.Thread(target=self._background_loop, name="FireflyMemoryWAL", daemon=True)
+        self._worker.start()
+
     def _initialize_storage(self):
         self.root_path.mkdir(parents=True, exist_ok=True)
-        if self.index_file.exists() and self.metadata_file.exists():
+        self._open_db()
+
+        if self.index_file.exists():
             try:
-                self.index = faiss.read_index(str(self.index_file))
-                with open(self.metadata_file, 'r', encoding='utf-8') as f:
-                    self.metadata = json.load(f)
-                logger.info(f"Memory loaded: {len(self.metadata)} items.")
+                self.index.load(faiss.read_index(str(self.index_file)))
+                self.dimension = self.index.dimension
             except Exception as e:
                 logger.error(f"Failed to load memory index: {e}")
                 self._create_empty_index()
-        else:
-            self._create_empty_index()
+        self._migrate_legacy_metadata()
+
+        self._replay_wal()
+        self._drop_orphans()
+        self._next_id = max(self._next_id, self._max_db_id() + 1)
+        self._wal = open(self.wal_file, 'a', encoding='utf-8')
+        logger.info(f"Memory loaded: {self.count()} items.")
+
+    def _open_db(self):
+        self.db = sqlite3.connect(str(self.db_file), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS memories (
+                id INTEGER PRIMARY KEY,
+                session TEXT,
+                type TEXT,
+                created_at REAL NOT NULL,
+                expires_at REAL,
+                text TEXT NOT NULL,
+                meta TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_memories_session ON memories(session, created_at);
+            CREATE INDEX IF NOT EXISTS idx_memories_type ON memories(type, created_at);
+            CREATE INDEX IF NOT EXISTS idx_memories_expires ON memories(expires_at) WHERE expires_at IS NOT NULL;
+        """)
+        self.db.commit()
+
+    def _migrate_legacy_metadata(self):
+        """Move the positional metadata list of older versions into the db (id = position)."""
+        if not self.metadata_file.exists():
+            return
+        try:
+            with open(self.metadata_file, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+            self._insert_rows([(i, self._row_from_meta(meta, None)) for i, meta in enumerate(legacy)])
+            self.db.commit()
+            os.replace(self.metadata_file, self.metadata_file.with_suffix(".json.migrated"))
+            logger.info(f"Migrated {len(legacy)} legacy memory records.")
+        except Exception as e:
+            logger.error(f"Failed to migrate legacy memory metadata: {e}")
 
     def _create_empty_index(self):
-        # We start with FlatL2 for simplicity.
-        # For very large codebases, HNSW is better.
-        self.index = faiss.IndexFlatL2(self.dimension)
-        self.metadata = []
+        # Starts as exact FlatL2; TieredIndex promotes to HNSW/IVF as memory grows
+        self.index.reset(self.dimension)
+        self.db.execute("DELETE FROM memories")
+        self.db.commit()
         logger.info("Created new empty memory index.")
 
-    def upsert(self, text: str, meta: Dict[str, Any]):
+    # ------------------------------------------------------------------
+    # Metadata rows
+    # ------------------------------------------------------------------
+
+    def _row_from_meta(self, meta: Dict[str, Any], ttl: Optional[float]) -> Dict[str, Any]:
+        """Split a stored meta dict into columns; created_at/expires_at default from now/ttl."""
+        extra = dict(meta)
+        text = extra.pop("text", "")
+        created_at = extra.pop("created_at", None) or time.time()
+        expires_at = extra.pop("expires_at", None)
+        if expires_at is None:
+            ttl = self.default_ttl if ttl is None else ttl
+            expires_at = created_at + ttl if ttl else None
+        row = {"text": text, "created_at": created_at, "expires_at": expires_at}
+        for name in COLUMN_FIELDS:
+            value = extra.pop(name, None)
+            row[name] = str(value) if value is not None else None
+        row["meta"] = json.dumps(extra)
+        return row
+
+    @staticmethod
+    def _meta_from_row(row: Tuple) -> Dict[str, Any]:
+        memory_id, session, kind, created_at, expires_at, text, meta = row
+        result = {"id": memory_id, "text": text, **json.loads(meta), "created_at": created_at}
+        if session is not None:
+            result["session"] = session
+        if kind is not None:
+            result["type"] = kind
+        if expires_at is not None:
+            result["expires_at"] = expires_at
+        return result
+
+    def _insert_rows(self, rows: List[Tuple[int, Dict[str, Any]]], replace: bool = True):
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        self.db.executemany(
+            f"{verb} INTO memories (id, session, type, created_at, expires_at, text, meta) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(i, r["session"], r["type"], r["created_at"], r["expires_at"], r["text"], r["meta"]) for i, r in rows]
+        )
+
+    def _max_db_id(self) -> int:
+        value = self.db.execute("SELECT MAX(id) FROM memories").fetchone()[0]
+        return -1 if value is None else value
+
+    def _drop_orphans(self):
+        """Vectors whose metadata is gone were deleted after the last snapshot."""
+        ids = self.index.ids()
+        if not len(ids):
+            return
+        self._next_id = max(self._next_id, int(ids.max()) + 1)
+        known = {row[0] for row in self.db.execute("SELECT id FROM memories")}
+        orphans = [i for i in ids.tolist() if i not in known]
+        if orphans:
+            self.index.remove(orphans)
+
+    # ------------------------------------------------------------------
+    # Write-ahead log
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _encode_record(memory_id: int, vector: np.ndarray, row: Dict[str, Any]) -> str:
+        packed = base64.b64encode(vector.astype('<f4').tobytes()).decode('ascii')
+        return json.dumps({"id": memory_id, "vector": packed, "row": row}) + "\n"
+
+    def _replay_wal(self):
+        """
+        Apply log records past the snapshot. Records carry their id, so vectors
+        already in the snapshot are skipped, and a torn final line is cut off.
+        Records from before ids existed carry a positional "seq" and a "meta" dict.
+        """
+        if not self.wal_file.exists():
+            return
+
+        present = set(self.index.ids().tolist())
+        applied, good_offset, torn = 0, 0, False
+        with open(self.wal_file, 'rb') as f:
+            for raw in f:
+                try:
+                    if not raw.endswith(b"\n"):
+                        raise ValueError("incomplete record")
+                    record = json.loads(raw)
+                    if "delete" not in record:
+                        vector = np.frombuffer(base64.b64decode(record["vector"]), dtype='<f4')
+                except (ValueError, KeyError):
+                    torn = True
+                    break
+                good_offset += len(raw)
+                self._wal_records += 1
+
+                if "delete" in record:
+                    self._delete_ids(record["delete"], log=False)
+                    continue
+
+                memory_id = record.get("id", record.get("seq"))
+                if self.index.ntotal == 0 and vector.shape[0] != self.dimension:
+                    self.dimension = vector.shape[0]
+                    self.index.reset(self.dimension)
+                if vector.shape[0] != self.dimension:
+                    logger.error(f"Memory log record {memory_id} has dimension {vector.shape[0]}. Stopping replay.")
+                    break
+                if memory_id not in present:
+                    self.index.add(vector.reshape(1, -1), [memory_id])
+                    present.add(memory_id)
+                # The db usually has the row already (it is committed right after the log append)
+                row = record.get("row") or self._row_from_meta(record.get("meta", {}), None)
+                self._insert_rows([(memory_id, row)], replace=False)
+                self._next_id = max(self._next_id, memory_id + 1)
+                applied += 1
+        self.db.commit()
+
+        if torn:
+            logger.warning("Truncating incomplete memory log tail.")
+            with open(self.wal_file, 'r+b') as f:
+                f.truncate(good_offset)
+        if applied:
+            logger.info(f"Replayed {applied} memory log record(s).")
+
+    def _write_wal(self, lines: List[str]):
+        self._wal.write("".join(lines))
+        self._wal.flush()
+        self._wal_records += len(lines)
+        self._wal_dirty = True
+
+    def _background_loop(self):
+        while not self._stop_event.wait(self.flush_interval):
+            try:
+                self.flush()
+                if time.time() - self._last_expire >= self.expire_interval:
+                    self.expire()
+                due = self._wal_records >= self.compact_threshold or (
+                    self._wal_records and time.time() - self._last_compact >= self.compact_interval
+                )
+                if due:
+                    self.save()
+            except Exception as e:
+                logger.error(f"Memory background flush failed: {e}")
+
+    def flush(self):
+        """fsync the write-ahead log."""
+        with self._lock:
+            if self._wal and self._wal_dirty:
+                os.fsync(self._wal.fileno())
+                self._wal_dirty = False
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def upsert(self, text: str, meta: Dict[str, Any], ttl: Optional[float] = None):
         """Vectorize and store text in the index."""
+        return bool(self.upsert_batch([(text, meta)], ttl=ttl))
+
+    def upsert_batch(self, items: List[Tuple[str, Dict[str, Any]]], ttl: Optional[float] = None):
+        """
+        Vectorize several (text, meta) pairs with one embedding call and store them.
+        `session` and `type` in meta become filterable columns; ttl (seconds)
+        overrides memory.default_ttl. Returns the new ids, or False on failure.
+        """
+        if not items:
+            return []
         try:
-            embedding = self.model_client.embed(text)
-            vec = np.array([embedding]).astype('float32')
+            embeddings = self.model_client.embed_batch([text for text, _ in items])
+            vecs = np.array(embeddings).astype('float32')
+            rows = [self._row_from_meta({**meta, "text": text}, ttl) for text, meta in items]
 
-            # If dimensions mismatch (e.g. model changed), reset index
-            if vec.shape[1] != self.dimension:
-                logger.warning(f"Embedding dimension mismatch ({vec.shape[1]} vs {self.dimension}). Recreating index.")
-                self.dimension = vec.shape[1]
-                self._create_empty_index()
-                # Retry once
-                return self.upsert(text, meta)
-
-            self.index.add(vec)
-            self.metadata.append({
-                "text": text,
-                **meta
-            })
-            self.save()
-            return True
+            with self._lock:
+                # If dimensions mismatch (e.g. model changed), reset index
+                reset = vecs.shape[1] != self.dimension
+                if reset:
+                    logger.warning(f"Embedding dimension mismatch ({vecs.shape[1]} vs {self.dimension}). Recreating index.")
+                    self.dimension = vecs.shape[1]
+                    self._create_empty_index()
+
+                ids = list(range(self._next_id, self._next_id + len(items)))
+                self._next_id += len(items)
+                if not reset:
+                    self._write_wal([self._encode_record(i, v, r) for i, v, r in zip(ids, vecs, rows)])
+                self.index.add(vecs, ids)
+                self._insert_rows(list(zip(ids, rows)))
+                self.db.commit()
+
+            if reset:
+                # The old snapshot and log no longer apply
+                self.save()
+            return ids
         except Exception as e:
             logger.error(f"Failed to upsert memory: {e}")
             return False
 
-    def query(self, query_text: str, top_k: int = 5) -> List[Dict[str, Any]]:
-        """Search memory for relevant context."""
+    def _filter_sql(self, session: Optional[str], type: Optional[str], since: Optional[float],
+                    until: Optional[float]) -> Tuple[str, List[Any]]:
+        clauses, params = ["(expires_at IS NULL OR expires_at > ?)"], [time.time()]
+        for column, value in (("session", session), ("type", type)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(str(value))
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(until)
+        return " AND ".join(clauses), params
+
+    def query(self, query_text: str, top_k: int = 5, session: Optional[str] = None, type: Optional[str] = None,
+              since: Optional[float] = None, until: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Search memory for relevant context.
+        With session/type/time filters only matching memories are ranked: small
+        candidate sets exactly, larger ones through a FAISS id selector.
+        """
         if self.index.ntotal == 0:
             return []
 
         try:
             embedding = self.model_client.embed(query_text)
             vec = np.array([embedding]).astype('float32')
+            filtered = any(v is not None for v in (session, type, since, until))
 
-            distances, indices = self.index.search(vec, top_k)
+            with self._lock:
+                where, params = self._filter_sql(session, type, since, until)
+                if filtered:
+                    candidates = np.array([r[0] for r in self.db.execute(f"SELECT id FROM memories WHERE {where}", params)], dtype='int64')
+                    if not len(candidates):
+                        return []
+                    if len(candidates) <= self.exact_filter_limit:
+                        ranked = self._rank_exact(vec, candidates, top_k)
+                    else:
+                        distances, ids = self.index.search(vec, top_k, candidates=candidates)
+                        ranked = [(int(i), float(d)) for i, d in zip(ids[0], distances[0]) if i != -1]
+                else:
+                    # Over-fetch a little: expired rows not yet swept are dropped below
+                    distances, ids = self.index.search(vec, top_k * 2)
+                    ranked = [(int(i), float(d)) for i, d in zip(ids[0], distances[0]) if i != -1]
+
+                rows = self._fetch([i for i, _ in ranked], where, params)
 
             results = []
-            for i, idx in enumerate(indices[0]):
-                if idx != -1 and idx < len(self.metadata):
-                    res = self.metadata[idx].copy()
-                    res["score"] = float(distances[0][i])
+            for memory_id, distance in ranked:
+                if memory_id in rows:
+                    res = rows[memory_id]
+                    res["score"] = distance
                     results.append(res)
+                if len(results) == top_k:
+                    break
             return results
         except Exception as e:
             logger.error(f"Failed to query memory: {e}")
             return []
 
+    def _rank_exact(self, vec: np.ndarray, candidates: np.ndarray, top_k: int) -> List[Tuple[int, float]]:
+        vectors = self.index.reconstruct(candidates)
+        distances = ((vectors - vec) ** 2).sum(axis=1)
+        order = np.argsort(distances)[:top_k]
+        return [(int(candidates[i]), float(distances[i])) for i in order]
+
+    def _fetch(self, ids: List[int], where: str, params: List[Any]) -> Dict[int, Dict[str, Any]]:
+        if not ids:
+            return {}
+        marks = ",".join("?" * len(ids))
+        cursor = self.db.execute(
+            f"SELECT id, session, type, created_at, expires_at, text, meta FROM memories WHERE id IN ({marks}) AND {where}",
+            ids + params
+        )
+        return {row[0]: self._meta_from_row(row) for row in cursor}
+
+    def get(self, memory_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self.db.execute(
+                "SELECT id, session, type, created_at, expires_at, text, meta FROM memories WHERE id = ?", (memory_id,)
+            ).fetchone()
+        return self._meta_from_row(row) if row else None
+
+    def count(self, session: Optional[str] = None, type: Optional[str] = None) -> int:
+        """Number of live (unexpired) memories, optionally filtered."""
+        with self._lock:
+            where, params = self._filter_sql(session, type, None, None)
+            return self.db.execute(f"SELECT COUNT(*) FROM memories WHERE {where}", params).fetchone()[0]
+
+    def _delete_ids(self, ids: Iterable[int], log: bool = True) -> int:
+        ids = [int(i) for i in ids]
+        if not ids:
+            return 0
+        with self._lock:
+            if log and self._wal:
+                self._write_wal([json.dumps({"delete": ids}) + "\n"])
+            removed = 0
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                removed += self.db.execute(f"DELETE FROM memories WHERE id IN ({','.join('?' * len(chunk))})", chunk).rowcount
+            self.db.commit()
+            self.index.remove(ids)
+        return removed
+
+    def delete(self, ids: Iterable[int]) -> int:
+        """Delete memories by id. Returns how many existed."""
+        return self._delete_ids(ids)
+
+    def delete_where(self, session: Optional[str] = None, type: Optional[str] = None,
+                     before: Optional[float] = None) -> int:
+        """Delete every memory matching the filters (e.g. a finished session)."""
+        if session is None and type is None and before is None:
+            raise ValueError("delete_where needs at least one filter.")
+        with self._lock:
+            where, params = self._filter_sql(session, type, None, before)
+            ids = [r[0] for r in self.db.execute(f"SELECT id FROM memories WHERE {where}", params)]
+        return self._delete_ids(ids)
+
+    def expire(self) -> int:
+        """Delete memories whose TTL has passed."""
+        self._last_expire = time.time()
+        with self._lock:
+            ids = [r[0] for r in self.db.execute(
+                "SELECT id FROM memories WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+            )]
+        if ids:
+            logger.info(f"Expiring {len(ids)} memories.")
+        return self._delete_ids(ids)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Index tier, size, query latency percentiles and last promotion recall."""
+        stats = self.index.stats()
+        stats["log_records"] = self._wal_records
+        stats["memories"] = self.count()
+        return stats
+
     def save(self):
-        """Persist index and metadata to disk."""
-        try:
-            faiss.write_index(self.index, str(self.index_file))
-            with open(self.metadata_file, 'w', encoding='utf-8') as f:
-                json.dump(self.metadata, f, indent=2)
-        except Exception as e:
-            logger.error(f"Failed to save memory: {e}")
+        """
+        Compact the log into a fresh snapshot.
+        The index is written beside the live file and swapped in with an atomic rename;
+        log records appended meanwhile are carried over. Metadata lives in the db.
+        """
+        with self._compact_lock:
+            try:
+                with self._lock:
+                    if self._wal is None:
+                        return
+                    index = self.index.clone()
+                    self._wal.flush()
+                    wal_offset = self._wal.tell()
+
+                tmp_index = self.index_file.with_suffix(".faiss.tmp")
+                faiss.write_index(index, str(tmp_index))
+                os.replace(tmp_index, self.index_file)
+
+                with self._lock:
+                    self._wal.flush()
+                    with open(self.wal_file, 'rb') as f:
+                        f.seek(wal_offset)
+                        tail = f.read()
+                    tmp_wal = self.wal_file.with_suffix(".jsonl.tmp")
+                    with open(tmp_wal, 'wb') as f:
+                        f.write(tail)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    self._wal.close()
+                    os.replace(tmp_wal, self.wal_file)
+                    self._wal = open(self.wal_file, 'a', encoding='utf-8')
+                    self._wal_records = tail.count(b"\n")
+                    self._wal_dirty = False
+                    self._last_compact = time.time()
+            except Exception as e:
+                logger.error(f"Failed to save memory: {e}")
+
+    def close(self):
+        """Stop the background thread, compact and close the log and db."""
+        self._stop_event.set()
+        self._worker.join(timeout=5)
+        self.save()
+        with self._lock:
+            if self._wal:
+                self._wal.close()
+                self._wal = None
+            if self.db:
+                self.db.close()
+                self.db = None
@@ -45,12 +45,13 @@ logger = logging.getLogger("FireflyMain")
 def main():
     logger.info("Initializing Firefly Agent Manager...")
 
-    # 1. Initialize Event Bus
-    bus = EventBusService()
-
-    # 2. Initialize Configuration
+    # 1. Initialize Configuration
     config = ConfigurationService()
 
+    # 2. Initialize Event Bus (slow topics are dispatched on worker pools)
+    bus = EventBusService()
+    bus.apply_config(config.get("event_dispatch", ConfigurationService.DEFAULT_CONFIG["event_dispatch"]))
+
     # 3. Initialize Model Client Manager
     model_client = ModelClientManager(event_bus=bus, config_service=config)
 
@@ -61,7 +62,7 @@ def main():
     prompt_service = PromptService()
 
     # 3.9 Initialize Memory Service
-    memory_service = MemoryService(model_client=model_client)
+    memory_service = MemoryService(model_client=model_client, config_service=config)
 
     # 3.10 Initialize Notification Service
     notifier = NotificationService(event_bus=bus, config_service=config)
@@ -141,6 +142,8 @@ def main():
         ide_control.stop()
         git_monitor.stop()
         orchestrator.stop()
+        memory_service.close()
+        bus.shutdown()
 
 if __name__ == "__main__":
     main()
@@ -1,12 +1,12 @@
-from typing import Optional, TYPE_CHECKING, Dict, Any
+from __future__ import annotations
+
+from typing import Optional, TYPE_CHECKING, Dict, Any, Iterator
 import json
 import logging
 import os
-import urllib.error
-import urllib.request
 
-from .base import BaseService, ServiceResponse
-from __future__ import annotations
+from .base import BaseService, ServiceResponse, StreamChunk
+from .transport import HTTPStatusError, iter_sse_events
 
 if TYPE_CHECKING:
     pass
@@ -26,6 +26,19 @@ class AnthropicService(BaseService):
     def validate_config(self) -> bool:
         return bool(self.api_key)
 
+    @staticmethod
+    def _estimate_cost(pt: int, ct: int) -> float:
+        # Estimate cost (Claude 3.5 Sonnet approx)
+        # $3 / 1M input, $15 / 1M output
+        return (pt * 0.000003) + (ct * 0.000015)
+
+    def _headers(self) -> Dict[str, str]:
+        return {
+            'Content-Type': 'application/json',
+            'x-api-key': self.api_key,
+            'anthropic-version': '2023-06-01'
+        }
+
     def generate(self, prompt: str, system_prompt: Optional[str] = None) -> ServiceResponse:
         if not self.validate_config():
             raise ValueError("Anthropic API Key not found. Set ANTHROPIC_API_KEY environment variable.")
@@ -39,53 +52,98 @@ class AnthropicService(BaseService):
         if system_prompt:
             data["system"] = system_prompt
 
-        headers = {
-            'Content-Type': 'application/json',
-            'x-api-key': self.api_key,
-            'anthropic-version': '2023-06-01'
-        }
-
-        req = urllib.request.Request(self.BASE_URL, data=json.dumps(data).encode('utf-8'), headers=headers)
+        headers = self._headers()
 
         try:
-            with urllib.request.urlopen(req) as response:
-                result = json.loads(response.read().decode('utf-8'))
-
-                try:
-                    # Anthropic returns a list of content blocks
-                    text = ""
-                    for block in result.get("content", []):
-                        if block.get("type") == "text":
-                            text += block.get("text", "")
-
-                    usage = result.get('usage', {})
-                    pt = usage.get('input_tokens', 0)
-                    ct = usage.get('output_tokens', 0)
-
-                    # Estimate cost (Claude 3.5 Sonnet approx)
-                    # $3 / 1M input, $15 / 1M output
-                    cost = (pt * 0.000003) + (ct * 0.000015)
-
-                    return ServiceResponse(
-                        text=text.strip(),
-                        prompt_tokens=pt,
-                        completion_tokens=ct,
-                        model_name=self.model_name,
-                        cost_usd=cost,
-                        metadata={"raw_usage": usage}
-                    )
-                except (KeyError, IndexError):
-                     logger.error(f"Unexpected Anthropic response format: {result}")
-                     raise ValueError("Failed to parse Anthropic response")
-
-        except urllib.error.HTTPError as e:
-            logger.error(f"Anthropic API Error: {e.code} - {e.reason}")
-            # Try to read error body
+            result = self.transport.post_json(self.BASE_URL, data, headers=headers)
+
             try:
-                err_body = e.read().decode('utf-8')
-                logger.error(f"Error body: {err_body}")
-            except: pass
+                # Anthropic returns a list of content blocks
+                text = ""
+                for block in result.get("content", []):
+                    if block.get("type") == "text":
+                        text += block.get("text", "")
+
+                usage = result.get('usage', {})
+                pt = usage.get('input_tokens', 0)
+                ct = usage.get('output_tokens', 0)
+
+                cost = self._estimate_cost(pt, ct)
+
+                return ServiceResponse(
+                    text=text.strip(),
+                    prompt_tokens=pt,
+                    completion_tokens=ct,
+                    model_name=self.model_name,
+                    cost_usd=cost,
+                    metadata={"raw_usage": usage}
+                )
+            except (KeyError, IndexError):
+                 logger.error(f"Unexpected Anthropic response format: {result}")
+                 raise ValueError("Failed to parse Anthropic response")
+
+        except HTTPStatusError as e:
+            logger.error(f"Anthropic API Error: {e.code} - {e.reason}")
+            if e.body:
+                logger.error(f"Error body: {e.body}")
             raise Exception(f"Anthropic API failed with status {e.code}")
         except Exception as e:
             logger.error(f"Anthropic Connection Error: {e}")
             raise
+
+    def generate_stream(self, prompt: str, system_prompt: Optional[str] = None) -> Iterator[StreamChunk]:
+        if not self.validate_config():
+            raise ValueError("Anthropic API Key not found. Set ANTHROPIC_API_KEY environment variable.")
+
+        data = {
+            "model": self.model_name,
+            "max_tokens": 4096,
+            "messages": [{"role": "user", "content": prompt}],
+            "stream": True
+        }
+        if system_prompt:
+            data["system"] = system_prompt
+
+        headers = self._headers()
+        headers['Accept'] = 'text/event-stream'
+
+        pt, ct = 0, 0
+        usage: Dict[str, Any] = {}
+        try:
+            with self.transport.stream_json(self.BASE_URL, data, headers=headers) as response:
+                for event_name, payload in iter_sse_events(response.iter_lines()):
+                    event = json.loads(payload)
+                    etype = event.get("type", event_name)
+
+                    if etype == "message_start":
+                        usage = event.get("message", {}).get("usage", {})
+                        pt = usage.get("input_tokens", 0)
+                        ct = usage.get("output_tokens", 0)
+                    elif etype == "content_block_delta":
+                        delta = event.get("delta", {})
+                        if delta.get("type") == "text_delta" and delta.get("text"):
+                            ct += 1
+                            yield StreamChunk(text=delta["text"], prompt_tokens=pt, completion_tokens=ct, model_name=self.model_name)
+                    elif etype == "message_delta":
+                        # Authoritative output token count arrives at the end of the message
+                        usage = {**usage, **event.get("usage", {})}
+                        ct = usage.get("output_tokens", ct)
+                    elif etype == "message_stop":
+                        break
+                    elif etype == "error":
+                        raise Exception(f"Anthropic stream error: {event.get('error')}")
+        except HTTPStatusError as e:
+            logger.error(f"Anthropic API Error: {e.code} - {e.reason}")
+            if e.body:
+                logger.error(f"Error body: {e.body}")
+            raise Exception(f"Anthropic API failed with status {e.code}")
+
+        yield StreamChunk(
+            text="",
+            prompt_tokens=pt,
+            completion_tokens=ct,
+            model_name=self.model_name,
+            done=True,
+            cost_usd=self._estimate_cost(pt, ct),
+            metadata={"raw_usage": usage}
+        )
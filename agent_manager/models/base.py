@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import Iterator, Optional, Dict, Any
+from typing import Iterator, List, Optional, Dict, Any
+
+from .transport import HTTPTransport, get_default_transport
 
 @dataclass
 class ServiceResponse:
@@ -14,16 +16,45 @@ class ServiceResponse:
     cost_usd: float = 0.0
     metadata: Dict[str, Any] = field(default_factory=dict)
 
+@dataclass
+class StreamChunk:
+    """
+    Incremental piece of a streamed generation.
+    Token counts are running totals; provider-reported counts replace estimates once known.
+    The final chunk has done=True and carries the cost and usage metadata.
+    """
+    text: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    model_name: str = "unknown"
+    done: bool = False
+    cost_usd: float = 0.0
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
 class BaseService(ABC):
     """
     Abstract base class for all LLM providers.
     Enforces a consistent interface for the ModelConnectionManager.
     """
+    # Embedding model name; providers without an embeddings API leave this unset
+    EMBED_MODEL: Optional[str] = None
 
     def __init__(self, api_key: Optional[str] = None, model_name: str = "default"):
         self.api_key = api_key
         self.model_name = model_name
 
+    @property
+    def transport(self) -> HTTPTransport:
+        """
+        Pooled HTTP transport used for API calls.
+        Defaults to the process-wide shared transport so keep-alive connections are reused.
+        """
+        return getattr(self, "_transport", None) or get_default_transport()
+
+    @transport.setter
+    def transport(self, value: HTTPTransport):
+        self._transport = value
+
     @abstractmethod
     def generate(self, prompt: str, system_prompt: Optional[str] = None) -> ServiceResponse:
         """
@@ -41,9 +72,50 @@ class BaseService(ABC):
         """
         pass
 
+    @abstractmethod
+    def generate_stream(self, prompt: str, system_prompt: Optional[str] = None) -> Iterator[StreamChunk]:
+        """
+        Generate a response incrementally.
+
+        Args:
+            prompt: The user prompt.
+            system_prompt: Optional system instruction.
+
+        Yields:
+            StreamChunk: Text deltas with running token counts, ending with a done chunk.
+
+        Raises:
+            Exception: If the API call fails.
+        """
+        pass
+
     @abstractmethod
     def validate_config(self) -> bool:
         """
         Check if the provider is correctly configured (e.g., has API key).
         """
         pass
+
+    @property
+    def embedding_key(self) -> str:
+        """Identifies the embedding space, used to key cached vectors."""
+        return f"{self.__class__.__name__}:{self.EMBED_MODEL or self.model_name}"
+
+    def embed(self, text: str) -> List[float]:
+        """
+        Generate an embedding for a single text.
+
+        Raises:
+            NotImplementedError: If the provider has no embeddings API.
+        """
+        return self.embed_batch([text])[0]
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for several texts, preserving order.
+        Providers with a native batch endpoint override this to use one request.
+
+        Raises:
+            NotImplementedError: If the provider has no embeddings API.
+        """
+        raise NotImplementedError(f"{self.__class__.__name__} does not support embeddings.")
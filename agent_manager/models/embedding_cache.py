@@ -0,0 +1,236 @@
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+import hashlib
+import json
+import logging
+import mmap
+import os
+import threading
+
+logger = logging.getLogger("FireflyEmbeddingCache")
+
+DIGEST_SIZE = 32 # sha256
+FLOAT_SIZE = 4
+
+def cache_key(model: str, text: str) -> bytes:
+    """Content address of an embedding: sha256 over (model, text)."""
+    return hashlib.sha256(model.encode('utf-8') + b"\0" + text.encode('utf-8')).digest()
+
+class _ModelStore:
+    """
+    Embeddings for a single model, stored as fixed-size slots in an mmap'd file.
+    Each slot is the sha256 key followed by `dim` float32 values. The key is
+    re-checked on read, so a slot reused after a crash can never answer for the
+    wrong text even if the index file is stale.
+    """
+    def __init__(self, root: Path, model: str, max_entries: int):
+        self.root = root
+        self.model = model
+        self.max_entries = max_entries
+        self.vectors_file = root / "vectors.f32"
+        self.index_file = root / "index.json"
+        self.dim = 0
+        self.capacity = 0
+        self.slots: "OrderedDict[bytes, int]" = OrderedDict() # key -> slot, least recently used first
+        self.free: List[int] = []
+        self.dirty = False
+        self._fh = None
+        self._mm: Optional[mmap.mmap] = None
+        self._load()
+
+    @property
+    def slot_size(self) -> int:
+        return DIGEST_SIZE + self.dim * FLOAT_SIZE
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    def _load(self):
+        if not (self.index_file.exists() and self.vectors_file.exists()):
+            return
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("model") != self.model:
+                raise ValueError(f"index belongs to {data.get('model')}")
+            self.dim = data["dim"]
+            self.capacity = os.path.getsize(self.vectors_file) // self.slot_size
+            for hex_key, slot in data["entries"]:
+                if slot < self.capacity:
+                    self.slots[bytes.fromhex(hex_key)] = slot
+            used = set(self.slots.values())
+            self.free = [s for s in range(self.capacity) if s not in used]
+            self._map()
+        except Exception as e:
+            logger.error(f"Discarding unreadable embedding cache for {self.model}: {e}")
+            self._reset()
+
+    def _reset(self):
+        self._unmap()
+        self.dim, self.capacity = 0, 0
+        self.slots.clear()
+        self.free = []
+        for path in (self.vectors_file, self.index_file):
+            if path.exists():
+                path.unlink()
+
+    def _map(self):
+        self._unmap()
+        self._fh = open(self.vectors_file, 'r+b')
+        self._mm = mmap.mmap(self._fh.fileno(), 0)
+
+    def _unmap(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def _grow(self, needed: int):
+        """Extend the vectors file geometrically, up to max_entries slots."""
+        new_capacity = min(self.max_entries, max(needed, self.capacity * 2, 64))
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._unmap()
+        with open(self.vectors_file, 'ab') as f:
+            f.truncate(new_capacity * self.slot_size)
+        self.free.extend(range(self.capacity, new_capacity))
+        self.capacity = new_capacity
+        self._map()
+
+    def _allocate(self) -> int:
+        if not self.free and self.capacity < self.max_entries:
+            self._grow(self.capacity + 1)
+        if self.free:
+            return self.free.pop()
+        # Full: evict the least recently used entry and take its slot
+        _, slot = self.slots.popitem(last=False)
+        return slot
+
+    # ------------------------------------------------------------------
+    # Access
+    # ------------------------------------------------------------------
+
+    def get(self, key: bytes) -> Optional[List[float]]:
+        slot = self.slots.get(key)
+        if slot is None or self._mm is None:
+            return None
+        offset = slot * self.slot_size
+        if self._mm[offset:offset + DIGEST_SIZE] != key:
+            del self.slots[key]
+            self.free.append(slot)
+            self.dirty = True
+            return None
+        self.slots.move_to_end(key)
+        self.dirty = True
+        values = array('f')
+        values.frombytes(self._mm[offset + DIGEST_SIZE:offset + self.slot_size])
+        return values.tolist()
+
+    def put(self, key: bytes, vector: Sequence[float]):
+        if not self.dim:
+            self.dim = len(vector)
+        elif len(vector) != self.dim:
+            logger.warning(f"Embedding dimension for {self.model} changed ({self.dim} -> {len(vector)}). Resetting cache.")
+            self._reset()
+            self.dim = len(vector)
+
+        slot = self.slots.pop(key, None)
+        if slot is None:
+            slot = self._allocate()
+        offset = slot * self.slot_size
+        self._mm[offset:offset + self.slot_size] = key + array('f', vector).tobytes()
+        self.slots[key] = slot
+        self.dirty = True
+
+    def save(self):
+        """Flush vectors and atomically rewrite the index (LRU order preserved)."""
+        if not self.dirty or self._mm is None:
+            return
+        self._mm.flush()
+        data = {
+            "model": self.model,
+            "dim": self.dim,
+            "entries": [[key.hex(), slot] for key, slot in self.slots.items()]
+        }
+        tmp = self.index_file.with_suffix(".json.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp, self.index_file)
+        self.dirty = False
+
+    def close(self):
+        self.save()
+        self._unmap()
+
+class EmbeddingCache:
+    """
+    Persistent, content-addressed embedding cache.
+    Vectors live in an mmap'd float32 file per model with a small JSON index,
+    keyed by sha256(model, text). Each model store is bounded to max_entries
+    and evicts the least recently used vector when full.
+    """
+    def __init__(self, path: str = ".firefly/embeddings", max_entries: int = 20000):
+        self.root = Path(path)
+        self.max_entries = max(1, int(max_entries))
+        self._stores: Dict[str, _ModelStore] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls, settings: Optional[Dict]) -> Optional["EmbeddingCache"]:
+        settings = settings or {}
+        if not settings.get("enabled", True):
+            return None
+        return cls(
+            path=settings.get("path", ".firefly/embeddings"),
+            max_entries=settings.get("max_entries", 20000)
+        )
+
+    def _store(self, model: str) -> _ModelStore:
+        store = self._stores.get(model)
+        if store is None:
+            directory = self.root / hashlib.sha256(model.encode('utf-8')).hexdigest()[:16]
+            store = self._stores[model] = _ModelStore(directory, model, self.max_entries)
+        return store
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Cached vectors for texts, with None for misses."""
+        with self._lock:
+            store = self._store(model)
+            results = [store.get(cache_key(model, text)) for text in texts]
+            hits = sum(1 for r in results if r is not None)
+            self.hits += hits
+            self.misses += len(results) - hits
+            return results
+
+    def put_many(self, model: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]):
+        """Store vectors and persist the index."""
+        with self._lock:
+            store = self._store(model)
+            try:
+                for text, vector in zip(texts, vectors):
+                    store.put(cache_key(model, text), vector)
+                store.save()
+            except Exception as e:
+                logger.error(f"Failed to write embedding cache: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": sum(len(s.slots) for s in self._stores.values())
+            }
+
+    def close(self):
+        with self._lock:
+            for store in self._stores.values():
+                try:
+                    store.close()
+                except Exception as e:
+                    logger.error(f"Failed to close embedding cache for {store.model}: {e}")
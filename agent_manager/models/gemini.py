@@ -1,12 +1,12 @@
-from typing import Optional, TYPE_CHECKING, Dict, Any, List
+from __future__ import annotations
+
+from typing import Optional, TYPE_CHECKING, Dict, Any, Iterator, List
 import json
 import logging
 import os
-import urllib.error
-import urllib.request
 
-from .base import BaseService, ServiceResponse
-from __future__ import annotations
+from .base import BaseService, ServiceResponse, StreamChunk
+from .transport import HTTPStatusError, iter_sse_events
 
 logger = logging.getLogger("FireflyGeminiService")
 
@@ -15,6 +15,8 @@ class GeminiService(BaseService):
     Google Gemini Service using standard library (zero-dependency).
     """
     BASE_URL = "https://generativelanguage.googleapis.com/v1beta/models"
+    EMBED_MODEL = "text-embedding-004"
+    EMBED_BATCH_SIZE = 100 # API limit on requests per batchEmbedContents call
 
     def __init__(self, api_key: Optional[str] = None, model_name: str = "gemini-1.5-flash"):
         self.api_key = api_key or os.environ.get("GEMINI_API_KEY")
@@ -23,12 +25,13 @@ class GeminiService(BaseService):
     def validate_config(self) -> bool:
         return bool(self.api_key)
 
-    def generate(self, prompt: str, system_prompt: Optional[str] = None) -> ServiceResponse:
-        if not self.validate_config():
-            raise ValueError("Gemini API Key not found. Set GEMINI_API_KEY environment variable.")
-
-        url = f"{self.BASE_URL}/{self.model_name}:generateContent?key={self.api_key}"
+    @staticmethod
+    def _estimate_cost(pt: int, ct: int) -> float:
+        # Estimate cost (Gemini 1.5 Flash prices approx)
+        # $0.075 / 1M tokens prompt, $0.30 / 1M tokens completion
+        return (pt * 0.000000075) + (ct * 0.0000003)
 
+    def _build_payload(self, prompt: str, system_prompt: Optional[str]) -> Dict[str, Any]:
         # Construct payload
         contents = []
         if system_prompt:
@@ -36,7 +39,7 @@ class GeminiService(BaseService):
 
         contents.append({"role": "user", "parts": [{"text": prompt}]})
 
-        data = {
+        return {
             "contents": contents,
             "generationConfig": {
                 "temperature": 0.7,
@@ -44,63 +47,99 @@ class GeminiService(BaseService):
             }
         }
 
-        headers = {'Content-Type': 'application/json'}
-        req = urllib.request.Request(url, data=json.dumps(data).encode('utf-8'), headers=headers)
+    def generate(self, prompt: str, system_prompt: Optional[str] = None) -> ServiceResponse:
+        if not self.validate_config():
+            raise ValueError("Gemini API Key not found. Set GEMINI_API_KEY environment variable.")
+
+        url = f"{self.BASE_URL}/{self.model_name}:generateContent?key={self.api_key}"
+
+        data = self._build_payload(prompt, system_prompt)
 
         try:
-            with urllib.request.urlopen(req) as response:
-                result = json.loads(response.read().decode('utf-8'))
-
-                try:
-                    text = result['candidates'][0]['content']['parts'][0]['text']
-                    usage = result.get('usageMetadata', {})
-                    pt = usage.get('promptTokenCount', 0)
-                    ct = usage.get('candidatesTokenCount', 0)
-
-                    # Estimate cost (Gemini 1.5 Flash prices approx)
-                    # $0.075 / 1M tokens prompt, $0.30 / 1M tokens completion
-                    cost = (pt * 0.000000075) + (ct * 0.0000003)
-
-                    return ServiceResponse(
-                        text=text,
-                        prompt_tokens=pt,
-                        completion_tokens=ct,
-                        model_name=self.model_name,
-                        cost_usd=cost,
-                        metadata={"raw_usage": usage}
-                    )
-                except (KeyError, IndexError):
-                     logger.error(f"Unexpected Gemini response format: {result}")
-                     raise ValueError("Failed to parse Gemini response")
-
-        except urllib.error.HTTPError as e:
+            result = self.transport.post_json(url, data)
+
+            try:
+                text = result['candidates'][0]['content']['parts'][0]['text']
+                usage = result.get('usageMetadata', {})
+                pt = usage.get('promptTokenCount', 0)
+                ct = usage.get('candidatesTokenCount', 0)
+
+                cost = self._estimate_cost(pt, ct)
+
+                return ServiceResponse(
+                    text=text,
+                    prompt_tokens=pt,
+                    completion_tokens=ct,
+                    model_name=self.model_name,
+                    cost_usd=cost,
+                    metadata={"raw_usage": usage}
+                )
+            except (KeyError, IndexError):
+                 logger.error(f"Unexpected Gemini response format: {result}")
+                 raise ValueError("Failed to parse Gemini response")
+
+        except HTTPStatusError as e:
             logger.error(f"Gemini API Error: {e.code} - {e.reason}")
             raise Exception(f"Gemini API failed with status {e.code}")
         except Exception as e:
             logger.error(f"Gemini Connection Error: {e}")
             raise
 
-    def embed(self, text: str) -> List[float]:
-        """Generate embedding using Google's Generative AI API."""
-        if not self.api_key:
-            raise ValueError("Gemini API Key not found.")
+    def generate_stream(self, prompt: str, system_prompt: Optional[str] = None) -> Iterator[StreamChunk]:
+        if not self.validate_config():
+            raise ValueError("Gemini API Key not found. Set GEMINI_API_KEY environment variable.")
 
-        # Using text-embedding-004 model for Gemini
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/text-embedding-004:embedContent?key={self.api_key}"
+        url = f"{self.BASE_URL}/{self.model_name}:streamGenerateContent?alt=sse&key={self.api_key}"
 
-        data = {
-            "model": "models/text-embedding-004",
-            "content": {
-                "parts": [{"text": text}]
-            }
-        }
+        pt, ct = 0, 0
+        usage: Dict[str, Any] = {}
+        try:
+            with self.transport.stream_json(url, self._build_payload(prompt, system_prompt), headers={'Accept': 'text/event-stream'}) as response:
+                for _, payload in iter_sse_events(response.iter_lines()):
+                    event = json.loads(payload)
+                    if event.get('usageMetadata'):
+                        # Gemini reports cumulative counts on every chunk
+                        usage = event['usageMetadata']
+                        pt = usage.get('promptTokenCount', pt)
+                        ct = usage.get('candidatesTokenCount', ct)
+
+                    for candidate in event.get('candidates', []):
+                        for part in candidate.get('content', {}).get('parts', []):
+                            if part.get('text'):
+                                yield StreamChunk(text=part['text'], prompt_tokens=pt, completion_tokens=ct, model_name=self.model_name)
+        except HTTPStatusError as e:
+            logger.error(f"Gemini API Error: {e.code} - {e.reason}")
+            raise Exception(f"Gemini API failed with status {e.code}")
+
+        yield StreamChunk(
+            text="",
+            prompt_tokens=pt,
+            completion_tokens=ct,
+            model_name=self.model_name,
+            done=True,
+            cost_usd=self._estimate_cost(pt, ct),
+            metadata={"raw_usage": usage}
+        )
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings with Gemini's batchEmbedContents endpoint."""
+        if not self.api_key:
+            raise ValueError("Gemini API Key not found.")
 
-        req = urllib.request.Request(url, data=json.dumps(data).encode('utf-8'), headers={'Content-Type': 'application/json'})
+        url = f"{self.BASE_URL}/{self.EMBED_MODEL}:batchEmbedContents?key={self.api_key}"
 
+        embeddings: List[List[float]] = []
         try:
-            with urllib.request.urlopen(req) as response:
-                result = json.loads(response.read().decode('utf-8'))
-                return result['embedding']['values']
+            for start in range(0, len(texts), self.EMBED_BATCH_SIZE):
+                data = {
+                    "requests": [
+                        {"model": f"models/{self.EMBED_MODEL}", "content": {"parts": [{"text": text}]}}
+                        for text in texts[start:start + self.EMBED_BATCH_SIZE]
+                    ]
+                }
+                result = self.transport.post_json(url, data)
+                embeddings.extend(item['values'] for item in result['embeddings'])
+            return embeddings
         except Exception as e:
             logger.error(f"Gemini Embed Error: {e}")
             raise
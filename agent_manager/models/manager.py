@@ -1,12 +1,17 @@
-from typing import List, Optional, Dict, Any
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Iterator, List, Optional, Dict, Any
 import logging
+import threading
+import time
 
 from .anthropic import AnthropicService
-from .base import BaseService, ServiceResponse
+from .base import BaseService, ServiceResponse, StreamChunk
+from .embedding_cache import EmbeddingCache
 from .gemini import GeminiService
 from .ollama import OllamaService
 from .open_connector import OpenRouterService
 from .openai import OpenAIService
+from .routing import HealthRouter
 
 logger = logging.getLogger("FireflyHandlerClient")
 
@@ -15,7 +20,14 @@ class ModelClientManager:
     Universal Handler Client.
     Manages multiple model services and handles failover logic.
     Tracks token usage and cost.
+
+    Provider order from model_priority is a preference: a HealthRouter demotes
+    slow or failing providers and skips ones whose circuit breaker is open.
+    With routing.hedge enabled, the next provider is fired after a p95-based
+    delay and the first success wins.
     """
+    DEFAULT_HEALTH_PATH = ".firefly/provider_health.json"
+
     def __init__(self, providers: Optional[List[BaseService]] = None, event_bus = None, config_service = None):
         self.providers = providers or []
         self.event_bus = event_bus
@@ -24,9 +36,22 @@ class ModelClientManager:
             "total_prompt_tokens": 0,
             "total_completion_tokens": 0,
             "total_cost_usd": 0.0,
-            "by_model": {}
+            "by_model": {},
+            "connections": {"requests": 0, "created": 0, "reused": 0, "retries": 0, "by_host": {}}
         }
 
+        routing = dict(self.config_service.get("routing", {}) or {}) if self.config_service else {}
+        if self.config_service:
+            routing.setdefault("state_path", self.DEFAULT_HEALTH_PATH)
+        self.router = HealthRouter.from_config(routing)
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
+        self._hedge_lock = threading.Lock()
+
+        # Persistent embedding cache only when running with a real configuration
+        self.embedding_cache: Optional[EmbeddingCache] = (
+            EmbeddingCache.from_config(self.config_service.get("embedding_cache", {})) if self.config_service else None
+        )
+
         if not self.providers:
             # Default fallback chain if none provided
             self._initialize_default_providers()
@@ -82,6 +107,8 @@ class ModelClientManager:
         self.usage_ledger["by_model"][m_name]["completion"] += response.completion_tokens
         self.usage_ledger["by_model"][m_name]["cost"] += response.cost_usd
 
+        self.usage_ledger["connections"] = self.get_connection_stats()
+
         if self.event_bus:
             self.event_bus.publish("usage_report", {
                 "current_response": {
@@ -93,23 +120,77 @@ class ModelClientManager:
                 "total_usage": self.usage_ledger
             })
 
+    def get_connection_stats(self) -> Dict[str, Any]:
+        """Aggregate HTTP connection reuse counters across the providers' transports."""
+        totals = {"requests": 0, "created": 0, "reused": 0, "retries": 0, "by_host": {}}
+        seen = set()
+        for provider in self.providers:
+            transport = getattr(provider, "transport", None)
+            if transport is None or not hasattr(transport, "stats") or id(transport) in seen:
+                continue
+            seen.add(id(transport))
+            for host, stats in transport.stats().items():
+                totals["by_host"][host] = stats
+                totals["requests"] += stats["requests"]
+                totals["created"] += stats["connections_created"]
+                totals["reused"] += stats["connections_reused"]
+                totals["retries"] += stats["retries"]
+        return totals
+
+    def _ranked(self) -> List[BaseService]:
+        """Configured providers ranked by preference and health."""
+        ranked = []
+        for provider in self.router.order(self.providers):
+            if not provider.validate_config():
+                logger.warning(f"Skipping {self._name(provider)}: Invalid configuration (missing API key?)")
+                continue
+            ranked.append(provider)
+        return ranked
+
+    def _admit(self, provider: BaseService, force: bool) -> bool:
+        """Ask the circuit breaker right before calling a provider (half-open admits one probe)."""
+        if force or self.router.allow(provider):
+            return True
+        logger.warning(f"Skipping {self._name(provider)}: circuit open")
+        return False
+
+    def _all_blocked(self, ranked: List[BaseService]) -> bool:
+        # When every breaker is open, trying something beats failing outright.
+        if ranked and all(self.router.is_blocked(p) for p in ranked):
+            logger.warning("All provider circuits are open. Trying providers anyway.")
+            return True
+        return False
+
+    @staticmethod
+    def _name(provider: BaseService) -> str:
+        return f"{provider.__class__.__name__}({provider.model_name})"
+
+    def get_health(self) -> Dict[str, Dict[str, Any]]:
+        """Current routing health per provider."""
+        return self.router.snapshot()
+
     def generate(self, prompt: str, system_prompt: Optional[str] = None) -> ServiceResponse:
         """
         Attempt to generate text using the configured providers in priority order.
         If one fails, try the next.
         """
+        ranked = self._ranked()
+        force = self._all_blocked(ranked)
+        if self.router.hedge and len(ranked) > 1:
+            return self._generate_hedged(ranked, force, prompt, system_prompt)
+
         full_error_log = []
 
-        for provider in self.providers:
-            provider_name = f"{provider.__class__.__name__}({provider.model_name})"
+        for provider in ranked:
+            if not self._admit(provider, force):
+                continue
+            provider_name = self._name(provider)
+            start = time.monotonic()
             try:
-                if not provider.validate_config():
-                    logger.warning(f"Skipping {provider_name}: Invalid configuration (missing API key?)")
-                    continue
-
                 logger.info(f"Generating with {provider_name}...")
                 response = provider.generate(prompt, system_prompt)
                 logger.info(f"Success with {provider_name}")
+                self.router.record_success(provider, time.monotonic() - start)
 
                 # Record usage
                 self._record_usage(response)
@@ -117,6 +198,7 @@ class ModelClientManager:
                 return response
 
             except Exception as e:
+                self.router.record_failure(provider, time.monotonic() - start)
                 error_msg = f"{provider_name} failed: {str(e)}"
                 logger.error(error_msg)
                 full_error_log.append(error_msg)
@@ -125,12 +207,184 @@ class ModelClientManager:
         # If we reach here, all providers failed
         raise RuntimeError(f"All model providers failed: {'; '.join(full_error_log)}")
 
+    def _get_hedge_executor(self) -> ThreadPoolExecutor:
+        with self._hedge_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(max_workers=max(2, len(self.providers) * 2), thread_name_prefix="ModelHedge")
+            return self._hedge_executor
+
+    def _generate_hedged(self, ranked: List[BaseService], force: bool, prompt: str, system_prompt: Optional[str]) -> ServiceResponse:
+        """
+        Race providers: start the best candidate, and if it has not answered within its
+        p95-based hedge delay (or fails), start the next one. The first success wins.
+        """
+        executor = self._get_hedge_executor()
+        queue = list(ranked)
+        pending: Dict[Future, tuple] = {}
+        full_error_log = []
+
+        def launch() -> Optional[BaseService]:
+            while queue:
+                provider = queue.pop(0)
+                if not self._admit(provider, force):
+                    continue
+                logger.info(f"Generating with {self._name(provider)} (hedged)...")
+                future = executor.submit(provider.generate, prompt, system_prompt)
+                pending[future] = (provider, time.monotonic())
+                return provider
+            return None
+
+        leader = launch()
+        while pending:
+            timeout = self.router.hedge_delay(leader) if queue and leader else None
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                logger.info(f"{self._name(leader)} exceeded hedge delay ({timeout:.2f}s). Hedging.")
+                leader = launch() or leader
+                continue
+
+            for future in done:
+                provider, start = pending.pop(future)
+                elapsed = time.monotonic() - start
+                try:
+                    response = future.result()
+                except Exception as e:
+                    self.router.record_failure(provider, elapsed)
+                    error_msg = f"{self._name(provider)} failed: {str(e)}"
+                    logger.error(error_msg)
+                    full_error_log.append(error_msg)
+                    if queue:
+                        leader = launch() or leader
+                    continue
+
+                self.router.record_success(provider, elapsed)
+                logger.info(f"Success with {self._name(provider)} after {elapsed:.2f}s")
+                self._record_usage(response)
+
+                # Cancel the losers. Requests already on the wire cannot be aborted, so
+                # their outcome is still recorded when they finish.
+                for loser, (loser_provider, loser_start) in pending.items():
+                    if not loser.cancel():
+                        loser.add_done_callback(lambda f, p=loser_provider, t=loser_start: self._settle_hedge_loser(f, p, t))
+                return response
+
+        raise RuntimeError(f"All model providers failed: {'; '.join(full_error_log)}")
+
+    def _settle_hedge_loser(self, future: Future, provider: BaseService, start: float):
+        """Account for a hedge request that finished after another provider won."""
+        elapsed = time.monotonic() - start
+        try:
+            response = future.result()
+        except Exception:
+            self.router.record_failure(provider, elapsed)
+            return
+        self.router.record_success(provider, elapsed)
+        # The tokens were billed even though the answer was discarded
+        self._record_usage(response)
+
+    def generate_stream(self, prompt: str, system_prompt: Optional[str] = None) -> Iterator[StreamChunk]:
+        """
+        Stream a generation from the first provider that starts producing output.
+        Failover only happens before the first chunk arrives; once text has been
+        yielded to the caller, a provider error is raised instead of restarting.
+        """
+        full_error_log = []
+
+        ranked = self._ranked()
+        force = self._all_blocked(ranked)
+        for provider in ranked:
+            if not self._admit(provider, force):
+                continue
+            provider_name = self._name(provider)
+
+            logger.info(f"Streaming with {provider_name}...")
+            start = time.monotonic()
+            stream = provider.generate_stream(prompt, system_prompt)
+            try:
+                first = next(stream)
+            except StopIteration:
+                self.router.record_failure(provider, time.monotonic() - start)
+                full_error_log.append(f"{provider_name} returned an empty stream")
+                continue
+            except Exception as e:
+                self.router.record_failure(provider, time.monotonic() - start)
+                error_msg = f"{provider_name} failed: {str(e)}"
+                logger.error(error_msg)
+                full_error_log.append(error_msg)
+                continue
+
+            # Committed to this provider from here on
+            text_parts = []
+            last = first
+            finished = False
+            try:
+                for chunk in self._chain(first, stream):
+                    text_parts.append(chunk.text)
+                    last = chunk
+                    yield chunk
+                finished = True
+            except Exception:
+                finished = True
+                self.router.record_failure(provider, time.monotonic() - start)
+                raise
+            finally:
+                stream.close()
+                if not finished:
+                    # The caller closed the stream early (GeneratorExit): no outcome to
+                    # record, but a half-open breaker must not keep its trial forever
+                    self.router.release(provider)
+
+            self.router.record_success(provider, time.monotonic() - start)
+            logger.info(f"Success with {provider_name}")
+            self._record_usage(ServiceResponse(
+                text="".join(text_parts),
+                prompt_tokens=last.prompt_tokens,
+                completion_tokens=last.completion_tokens,
+                model_name=last.model_name,
+                cost_usd=last.cost_usd,
+                metadata=last.metadata
+            ))
+            return
+
+        raise RuntimeError(f"All model providers failed: {'; '.join(full_error_log)}")
+
+    @staticmethod
+    def _chain(first: StreamChunk, rest: Iterator[StreamChunk]) -> Iterator[StreamChunk]:
+        yield first
+        yield from rest
+
     def embed(self, text: str) -> List[float]:
         """Generate an embedding for the text using the primary provider."""
+        return self.embed_batch([text])[0]
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed several texts, preserving order.
+        Cached vectors are served from the embedding cache; the remaining unique
+        texts go to the provider in a single batch request.
+        """
+        if not texts:
+            return []
+
         for provider in self.providers:
             try:
-                return provider.embed(text)
+                return self._embed_with(provider, texts)
             except Exception as e:
                 logger.warning(f"Embedding failed with {provider.__class__.__name__}: {e}")
                 continue
         raise RuntimeError("All embedding providers failed.")
+
+    def _embed_with(self, provider: BaseService, texts: List[str]) -> List[List[float]]:
+        model = provider.embedding_key
+        cache = self.embedding_cache
+        vectors = cache.get_many(model, texts) if cache else [None] * len(texts)
+
+        missing = list(dict.fromkeys(t for t, v in zip(texts, vectors) if v is None))
+        if missing:
+            fresh = dict(zip(missing, provider.embed_batch(missing)))
+            if cache:
+                cache.put_many(model, missing, [fresh[t] for t in missing])
+            vectors = [v if v is not None else fresh[t] for t, v in zip(texts, vectors)]
+            self.usage_ledger["connections"] = self.get_connection_stats()
+        return vectors
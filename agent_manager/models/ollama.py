@@ -1,12 +1,12 @@
-from typing import Optional, TYPE_CHECKING, Dict, Any
+from __future__ import annotations
+
+from typing import Optional, TYPE_CHECKING, Dict, Any, Iterator
 import json
 import logging
 import os
-import urllib.error
-import urllib.request
 
-from .base import BaseService, ServiceResponse
-from __future__ import annotations
+from .base import BaseService, ServiceResponse, StreamChunk
+from .transport import HTTPConnectionError
 
 logger = logging.getLogger("FireflyOllamaService")
 
@@ -35,34 +35,76 @@ class OllamaService(BaseService):
         }
 
         headers = {'Content-Type': 'application/json'}
-        req = urllib.request.Request(self.base_url, data=json.dumps(data).encode('utf-8'), headers=headers)
 
         try:
-            with urllib.request.urlopen(req) as response:
-                result = json.loads(response.read().decode('utf-8'))
-
-                try:
-                    text = result.get('response', "")
-
-                    # Ollama counts
-                    pt = result.get('prompt_eval_count', 0)
-                    ct = result.get('eval_count', 0)
-
-                    return ServiceResponse(
-                        text=text.strip(),
-                        prompt_tokens=pt,
-                        completion_tokens=ct,
-                        model_name=self.model_name,
-                        cost_usd=0.0, # Local is free!
-                        metadata={"raw": result}
-                    )
-                except Exception as e:
-                     logger.error(f"Unexpected Ollama response format: {result}")
-                     raise ValueError("Failed to parse Ollama response")
-
-        except urllib.error.URLError as e:
+            result = self.transport.post_json(self.base_url, data, headers=headers)
+
+            try:
+                text = result.get('response', "")
+
+                # Ollama counts
+                pt = result.get('prompt_eval_count', 0)
+                ct = result.get('eval_count', 0)
+
+                return ServiceResponse(
+                    text=text.strip(),
+                    prompt_tokens=pt,
+                    completion_tokens=ct,
+                    model_name=self.model_name,
+                    cost_usd=0.0, # Local is free!
+                    metadata={"raw": result}
+                )
+            except Exception as e:
+                 logger.error(f"Unexpected Ollama response format: {result}")
+                 raise ValueError("Failed to parse Ollama response")
+
+        except HTTPConnectionError as e:
             logger.error(f"Ollama Connection Error (Is ollama serve running?): {e}")
             raise Exception("Ollama service unreachable")
         except Exception as e:
             logger.error(f"Ollama error: {e}")
             raise
+
+    def generate_stream(self, prompt: str, system_prompt: Optional[str] = None) -> Iterator[StreamChunk]:
+        full_prompt = prompt
+        if system_prompt:
+            full_prompt = f"System: {system_prompt}\n\nUser: {prompt}"
+
+        data = {
+            "model": self.model_name,
+            "prompt": full_prompt,
+            "stream": True
+        }
+
+        ct = 0
+        try:
+            # Ollama streams newline-delimited JSON objects
+            with self.transport.stream_json(self.base_url, data) as response:
+                for line in response.iter_lines():
+                    if not line.strip():
+                        continue
+                    event = json.loads(line)
+                    if event.get('error'):
+                        raise Exception(f"Ollama error: {event['error']}")
+
+                    if event.get('done'):
+                        yield StreamChunk(
+                            text="",
+                            prompt_tokens=event.get('prompt_eval_count', 0),
+                            completion_tokens=event.get('eval_count', ct),
+                            model_name=self.model_name,
+                            done=True,
+                            cost_usd=0.0, # Local is free!
+                            metadata={"raw": event}
+                        )
+                        return
+
+                    text = event.get('response', "")
+                    if text:
+                        ct += 1
+                        yield StreamChunk(text=text, completion_tokens=ct, model_name=self.model_name)
+        except HTTPConnectionError as e:
+            logger.error(f"Ollama Connection Error (Is ollama serve running?): {e}")
+            raise Exception("Ollama service unreachable")
+
+        yield StreamChunk(text="", completion_tokens=ct, model_name=self.model_name, done=True)
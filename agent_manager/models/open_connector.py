@@ -1,12 +1,12 @@
-from typing import Optional, TYPE_CHECKING, Dict, Any
-import json
+from __future__ import annotations
+
+from typing import Optional, TYPE_CHECKING, Dict, Any, Iterator, List
 import logging
 import os
-import urllib.error
-import urllib.request
 
-from .base import BaseService, ServiceResponse
-from __future__ import annotations
+from .base import BaseService, ServiceResponse, StreamChunk
+from .openai import stream_chat_completion
+from .transport import HTTPStatusError
 
 logger = logging.getLogger("FireflyOpenRouterService")
 
@@ -23,61 +23,87 @@ class OpenRouterService(BaseService):
     def validate_config(self) -> bool:
         return bool(self.api_key)
 
-    def generate(self, prompt: str, system_prompt: Optional[str] = None) -> ServiceResponse:
-        if not self.validate_config():
-            raise ValueError("OpenRouter API Key not found. Set OPENROUTER_API_KEY environment variable.")
-
-        # Construct payload
+    def _build_messages(self, prompt: str, system_prompt: Optional[str]) -> List[Dict[str, str]]:
         messages = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": prompt})
+        return messages
 
-        data = {
-            "model": self.model_name,
-            "messages": messages,
-            "top_p": 1,
-            "temperature": 0.7
-        }
-
-        headers = {
+    def _headers(self) -> Dict[str, str]:
+        return {
             'Content-Type': 'application/json',
             'Authorization': f'Bearer {self.api_key}',
             'HTTP-Referer': 'https://github.com/FatStinkyPanda/Project-Firefly',
             'X-Title': 'Firefly Agent Manager'
         }
 
-        req = urllib.request.Request(self.BASE_URL, data=json.dumps(data).encode('utf-8'), headers=headers)
+    def generate(self, prompt: str, system_prompt: Optional[str] = None) -> ServiceResponse:
+        if not self.validate_config():
+            raise ValueError("OpenRouter API Key not found. Set OPENROUTER_API_KEY environment variable.")
+
+        # Construct payload
+        data = {
+            "model": self.model_name,
+            "messages": self._build_messages(prompt, system_prompt),
+            "top_p": 1,
+            "temperature": 0.7
+        }
+
+        headers = self._headers()
 
         try:
-            with urllib.request.urlopen(req) as response:
-                result = json.loads(response.read().decode('utf-8'))
-
-                try:
-                    text = result['choices'][0]['message']['content']
-                    usage = result.get('usage', {})
-                    pt = usage.get('prompt_tokens', 0)
-                    ct = usage.get('completion_tokens', 0)
-
-                    # Cost is provided by OpenRouter sometimes, but we'll fallback to 0.0
-                    # if not explicitly calculated per model here.
-                    cost = result.get('cost', 0.0)
-
-                    return ServiceResponse(
-                        text=text.strip(),
-                        prompt_tokens=pt,
-                        completion_tokens=ct,
-                        model_name=self.model_name,
-                        cost_usd=cost,
-                        metadata={"raw_usage": usage}
-                    )
-                except (KeyError, IndexError):
-                     logger.error(f"Unexpected OpenRouter response format: {result}")
-                     raise ValueError("Failed to parse OpenRouter response")
-
-        except urllib.error.HTTPError as e:
+            result = self.transport.post_json(self.BASE_URL, data, headers=headers)
+
+            try:
+                text = result['choices'][0]['message']['content']
+                usage = result.get('usage', {})
+                pt = usage.get('prompt_tokens', 0)
+                ct = usage.get('completion_tokens', 0)
+
+                # Cost is provided by OpenRouter sometimes, but we'll fallback to 0.0
+                # if not explicitly calculated per model here.
+                cost = result.get('cost', 0.0)
+
+                return ServiceResponse(
+                    text=text.strip(),
+                    prompt_tokens=pt,
+                    completion_tokens=ct,
+                    model_name=self.model_name,
+                    cost_usd=cost,
+                    metadata={"raw_usage": usage}
+                )
+            except (KeyError, IndexError):
+                 logger.error(f"Unexpected OpenRouter response format: {result}")
+                 raise ValueError("Failed to parse OpenRouter response")
+
+        except HTTPStatusError as e:
             logger.error(f"OpenRouter API Error: {e.code} - {e.reason}")
             raise Exception(f"OpenRouter API failed with status {e.code}")
         except Exception as e:
             logger.error(f"OpenRouter Connection Error: {e}")
             raise
+
+    def generate_stream(self, prompt: str, system_prompt: Optional[str] = None) -> Iterator[StreamChunk]:
+        if not self.validate_config():
+            raise ValueError("OpenRouter API Key not found. Set OPENROUTER_API_KEY environment variable.")
+
+        data = {
+            "model": self.model_name,
+            "messages": self._build_messages(prompt, system_prompt),
+            "top_p": 1,
+            "temperature": 0.7,
+            "stream": True,
+            "usage": {"include": True}
+        }
+
+        headers = self._headers()
+        headers['Accept'] = 'text/event-stream'
+
+        try:
+            with self.transport.stream_json(self.BASE_URL, data, headers=headers) as response:
+                # OpenRouter only reports cost when usage accounting is enabled
+                yield from stream_chat_completion(response, self.model_name, lambda pt, ct: 0.0)
+        except HTTPStatusError as e:
+            logger.error(f"OpenRouter API Error: {e.code} - {e.reason}")
+            raise Exception(f"OpenRouter API failed with status {e.code}")
@@ -1,12 +1,12 @@
-from typing import Optional, TYPE_CHECKING, Dict, Any, List
+from __future__ import annotations
+
+from typing import Optional, TYPE_CHECKING, Dict, Any, Iterator, List
 import json
 import logging
 import os
-import urllib.error
-import urllib.request
 
-from .base import BaseService, ServiceResponse
-from __future__ import annotations
+from .base import BaseService, ServiceResponse, StreamChunk
+from .transport import HTTPStatusError, iter_sse_events
 
 logger = logging.getLogger("FireflyOpenAIService")
 
@@ -16,6 +16,8 @@ class OpenAIService(BaseService):
     """
     BASE_URL = "https://api.openai.com/v1/chat/completions"
     EMBED_URL = "https://api.openai.com/v1/embeddings"
+    EMBED_MODEL = "text-embedding-3-small"
+    EMBED_BATCH_SIZE = 2048 # API limit on inputs per request
 
     def __init__(self, api_key: Optional[str] = None, model_name: str = "gpt-4o-mini"):
         self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
@@ -24,20 +26,27 @@ class OpenAIService(BaseService):
     def validate_config(self) -> bool:
         return bool(self.api_key)
 
-    def generate(self, prompt: str, system_prompt: Optional[str] = None) -> ServiceResponse:
-        if not self.validate_config():
-            raise ValueError("OpenAI API Key not found. Set OPENAI_API_KEY environment variable.")
+    @staticmethod
+    def _estimate_cost(pt: int, ct: int) -> float:
+        # Estimate cost (GPT-4o-mini prices approx)
+        # $0.15 / 1M tokens prompt, $0.60 / 1M tokens completion
+        return (pt * 0.00000015) + (ct * 0.0000006)
 
-        # Construct payload
+    def _build_messages(self, prompt: str, system_prompt: Optional[str]) -> List[Dict[str, str]]:
         messages = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
-
         messages.append({"role": "user", "content": prompt})
+        return messages
 
+    def generate(self, prompt: str, system_prompt: Optional[str] = None) -> ServiceResponse:
+        if not self.validate_config():
+            raise ValueError("OpenAI API Key not found. Set OPENAI_API_KEY environment variable.")
+
+        # Construct payload
         data = {
             "model": self.model_name,
-            "messages": messages,
+            "messages": self._build_messages(prompt, system_prompt),
             "temperature": 0.7
         }
 
@@ -46,62 +55,124 @@ class OpenAIService(BaseService):
             'Authorization': f'Bearer {self.api_key}'
         }
 
-        req = urllib.request.Request(self.BASE_URL, data=json.dumps(data).encode('utf-8'), headers=headers)
-
         try:
-            with urllib.request.urlopen(req) as response:
-                result = json.loads(response.read().decode('utf-8'))
-
-                try:
-                    text = result['choices'][0]['message']['content']
-                    usage = result.get('usage', {})
-                    pt = usage.get('prompt_tokens', 0)
-                    ct = usage.get('completion_tokens', 0)
-
-                    # Estimate cost (GPT-4o-mini prices approx)
-                    # $0.15 / 1M tokens prompt, $0.60 / 1M tokens completion
-                    cost = (pt * 0.00000015) + (ct * 0.0000006)
-
-                    return ServiceResponse(
-                        text=text,
-                        prompt_tokens=pt,
-                        completion_tokens=ct,
-                        model_name=self.model_name,
-                        cost_usd=cost,
-                        metadata={"raw_usage": usage}
-                    )
-                except (KeyError, IndexError):
-                     logger.error(f"Unexpected OpenAI response format: {result}")
-                     raise ValueError("Failed to parse OpenAI response")
-
-        except urllib.error.HTTPError as e:
+            result = self.transport.post_json(self.BASE_URL, data, headers=headers)
+
+            try:
+                text = result['choices'][0]['message']['content']
+                usage = result.get('usage', {})
+                pt = usage.get('prompt_tokens', 0)
+                ct = usage.get('completion_tokens', 0)
+
+                cost = self._estimate_cost(pt, ct)
+
+                return ServiceResponse(
+                    text=text,
+                    prompt_tokens=pt,
+                    completion_tokens=ct,
+                    model_name=self.model_name,
+                    cost_usd=cost,
+                    metadata={"raw_usage": usage}
+                )
+            except (KeyError, IndexError):
+                 logger.error(f"Unexpected OpenAI response format: {result}")
+                 raise ValueError("Failed to parse OpenAI response")
+
+        except HTTPStatusError as e:
             logger.error(f"OpenAI API Error: {e.code} - {e.reason}")
             raise Exception(f"OpenAI API failed with status {e.code}")
         except Exception as e:
             logger.error(f"OpenAI Connection Error: {e}")
             raise
 
-    def embed(self, text: str) -> List[float]:
-        """Generate embedding using OpenAI's embeddings API."""
+    def generate_stream(self, prompt: str, system_prompt: Optional[str] = None) -> Iterator[StreamChunk]:
         if not self.validate_config():
-            raise ValueError("OpenAI API Key not found.")
+            raise ValueError("OpenAI API Key not found. Set OPENAI_API_KEY environment variable.")
 
         data = {
-            "model": "text-embedding-3-small",
-            "input": text
+            "model": self.model_name,
+            "messages": self._build_messages(prompt, system_prompt),
+            "temperature": 0.7,
+            "stream": True,
+            "stream_options": {"include_usage": True}
+        }
+
+        headers = {
+            'Authorization': f'Bearer {self.api_key}',
+            'Accept': 'text/event-stream'
         }
 
+        try:
+            with self.transport.stream_json(self.BASE_URL, data, headers=headers) as response:
+                yield from stream_chat_completion(response, self.model_name, self._estimate_cost)
+        except HTTPStatusError as e:
+            logger.error(f"OpenAI API Error: {e.code} - {e.reason}")
+            raise Exception(f"OpenAI API failed with status {e.code}")
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings with OpenAI's embeddings API, many inputs per request."""
+        if not self.validate_config():
+            raise ValueError("OpenAI API Key not found.")
+
         headers = {
             'Content-Type': 'application/json',
             'Authorization': f'Bearer {self.api_key}'
         }
 
-        req = urllib.request.Request(self.EMBED_URL, data=json.dumps(data).encode('utf-8'), headers=headers)
-
+        embeddings: List[List[float]] = []
         try:
-            with urllib.request.urlopen(req) as response:
-                result = json.loads(response.read().decode('utf-8'))
-                return result['data'][0]['embedding']
+            for start in range(0, len(texts), self.EMBED_BATCH_SIZE):
+                data = {
+                    "model": self.EMBED_MODEL,
+                    "input": texts[start:start + self.EMBED_BATCH_SIZE]
+                }
+                result = self.transport.post_json(self.EMBED_URL, data, headers=headers)
+                # Items carry their input index; don't rely on response order
+                embeddings.extend(item['embedding'] for item in sorted(result['data'], key=lambda d: d['index']))
+            return embeddings
         except Exception as e:
             logger.error(f"OpenAI Embed Error: {e}")
             raise
+
+
+def stream_chat_completion(response, model_name: str, estimate_cost) -> Iterator[StreamChunk]:
+    """
+    Translate an OpenAI-compatible chat completion SSE stream into StreamChunks.
+    Shared by OpenAI and OpenRouter. Completion tokens are counted per delta until
+    the provider reports real usage in the final event.
+    """
+    pt, ct = 0, 0
+    usage: Dict[str, Any] = {}
+    reported_cost = None
+
+    for _, payload in iter_sse_events(response.iter_lines()):
+        if payload.strip() == "[DONE]":
+            break
+        event = json.loads(payload)
+
+        if event.get('usage'):
+            usage = event['usage']
+            pt = usage.get('prompt_tokens', pt)
+            ct = usage.get('completion_tokens', ct)
+            if 'cost' in usage:
+                reported_cost = usage['cost']
+        if 'cost' in event:
+            reported_cost = event['cost']
+
+        for choice in event.get('choices', []):
+            delta = (choice.get('delta') or {}).get('content')
+            if delta:
+                if not usage:
+                    ct += 1
+                yield StreamChunk(text=delta, prompt_tokens=pt, completion_tokens=ct, model_name=model_name)
+
+    cost = reported_cost if reported_cost is not None else estimate_cost(pt, ct)
+    yield StreamChunk(
+        text="",
+        prompt_tokens=pt,
+        completion_tokens=ct,
+        model_name=model_name,
+        done=True,
+        cost_usd=cost,
+        metadata={"raw_usage": usage}
+    )
@@ -0,0 +1,269 @@
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger("FireflyHealthRouter")
+
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+@dataclass
+class ProviderHealth:
+    """
+    Rolling health statistics for one provider.
+    """
+    latency_ewma: float = 0.0
+    error_ewma: float = 0.0
+    successes: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    state: str = BREAKER_CLOSED
+    opened_at: float = 0.0
+    trial_in_flight: bool = False
+    recent_latencies: deque = field(default_factory=lambda: deque(maxlen=50))
+
+    def p95(self) -> Optional[float]:
+        if not self.recent_latencies:
+            return None
+        ordered = sorted(self.recent_latencies)
+        return ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "latency_ewma": self.latency_ewma,
+            "error_ewma": self.error_ewma,
+            "successes": self.successes,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "state": self.state,
+            "opened_at": self.opened_at,
+            "recent_latencies": list(self.recent_latencies)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ProviderHealth":
+        health = cls(
+            latency_ewma=data.get("latency_ewma", 0.0),
+            error_ewma=data.get("error_ewma", 0.0),
+            successes=data.get("successes", 0),
+            failures=data.get("failures", 0),
+            consecutive_failures=data.get("consecutive_failures", 0),
+            state=data.get("state", BREAKER_CLOSED),
+            opened_at=data.get("opened_at", 0.0)
+        )
+        if health.state == BREAKER_HALF_OPEN:
+            health.state = BREAKER_OPEN # A trial that was running when we stopped never finished
+        health.recent_latencies.extend(data.get("recent_latencies", []))
+        return health
+
+class HealthRouter:
+    """
+    Health-aware provider selection.
+    Tracks per-provider latency and error EWMAs, trips a circuit breaker after
+    repeated failures and ranks providers by configured preference adjusted for
+    observed health. State is persisted so a restart does not forget a degraded provider.
+    """
+    def __init__(self, state_path: Optional[str] = None, alpha: float = 0.2, failure_threshold: int = 3,
+                 cooldown_seconds: float = 60.0, error_penalty: float = 3.0, latency_scale: float = 10.0,
+                 hedge: bool = False, hedge_min_delay: float = 1.0, hedge_max_delay: float = 15.0,
+                 save_interval: float = 5.0):
+        self.state_path = Path(state_path) if state_path else None
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.error_penalty = error_penalty
+        self.latency_scale = latency_scale
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_max_delay = hedge_max_delay
+        self.save_interval = save_interval
+        self._health: Dict[str, ProviderHealth] = {}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._last_save = 0.0
+        self.load()
+
+    @classmethod
+    def from_config(cls, settings: Optional[Dict[str, Any]]) -> "HealthRouter":
+        settings = settings or {}
+        return cls(
+            state_path=settings.get("state_path"),
+            alpha=settings.get("ewma_alpha", 0.2),
+            failure_threshold=settings.get("failure_threshold", 3),
+            cooldown_seconds=settings.get("cooldown_seconds", 60.0),
+            hedge=settings.get("hedge", False),
+            hedge_min_delay=settings.get("hedge_min_delay", 1.0),
+            hedge_max_delay=settings.get("hedge_max_delay", 15.0)
+        )
+
+    @staticmethod
+    def key(provider) -> str:
+        return f"{provider.__class__.__name__}:{provider.model_name}"
+
+    def _get(self, key: str) -> ProviderHealth:
+        health = self._health.get(key)
+        if health is None:
+            health = self._health[key] = ProviderHealth()
+        return health
+
+    # ------------------------------------------------------------------
+    # Selection
+    # ------------------------------------------------------------------
+
+    def order(self, providers: List[Any]) -> List[Any]:
+        """
+        Rank providers. The incoming order is the preference (model_priority); providers
+        with open breakers still cooling down go last, and error rate / latency demote the rest.
+        """
+        now = time.time()
+        with self._lock:
+            def score(item):
+                rank, provider = item
+                health = self._get(self.key(provider))
+                cooling = health.state == BREAKER_OPEN and now - health.opened_at < self.cooldown_seconds
+                penalty = health.error_ewma * self.error_penalty + health.latency_ewma / self.latency_scale
+                return (cooling, rank + penalty)
+
+            return [p for _, p in sorted(enumerate(providers), key=score)]
+
+    def is_blocked(self, provider) -> bool:
+        """Read-only check: would allow() currently refuse this provider?"""
+        with self._lock:
+            health = self._get(self.key(provider))
+            if health.state == BREAKER_OPEN:
+                return time.time() - health.opened_at < self.cooldown_seconds
+            return health.state == BREAKER_HALF_OPEN and health.trial_in_flight
+
+    def allow(self, provider) -> bool:
+        """Whether a request may be sent to this provider right now."""
+        with self._lock:
+            health = self._get(self.key(provider))
+            if health.state == BREAKER_CLOSED:
+                return True
+            if health.state == BREAKER_OPEN and time.time() - health.opened_at >= self.cooldown_seconds:
+                health.state = BREAKER_HALF_OPEN
+                health.trial_in_flight = False
+            if health.state == BREAKER_HALF_OPEN and not health.trial_in_flight:
+                # Let exactly one probe through
+                health.trial_in_flight = True
+                return True
+            return False
+
+    def hedge_delay(self, provider) -> float:
+        """How long to wait on this provider before firing a hedge request."""
+        with self._lock:
+            p95 = self._get(self.key(provider)).p95()
+        if p95 is None:
+            return self.hedge_max_delay
+        return min(self.hedge_max_delay, max(self.hedge_min_delay, p95))
+
+    # ------------------------------------------------------------------
+    # Outcomes
+    # ------------------------------------------------------------------
+
+    def record_success(self, provider, latency: float):
+        with self._lock:
+            health = self._get(self.key(provider))
+            health.latency_ewma = latency if health.successes == 0 else (
+                self.alpha * latency + (1 - self.alpha) * health.latency_ewma
+            )
+            health.error_ewma = (1 - self.alpha) * health.error_ewma
+            health.recent_latencies.append(latency)
+            health.successes += 1
+            health.consecutive_failures = 0
+            transitioned = health.state != BREAKER_CLOSED
+            health.state = BREAKER_CLOSED
+            health.trial_in_flight = False
+        if transitioned:
+            logger.info(f"Circuit closed for {self.key(provider)}")
+        self._maybe_save(force=transitioned)
+
+    def release(self, provider):
+        """Give up a request without an outcome (e.g. the caller stopped reading), freeing a half-open trial."""
+        with self._lock:
+            self._get(self.key(provider)).trial_in_flight = False
+
+    def record_failure(self, provider, latency: float = 0.0):
+        with self._lock:
+            health = self._get(self.key(provider))
+            health.error_ewma = self.alpha + (1 - self.alpha) * health.error_ewma
+            health.failures += 1
+            health.consecutive_failures += 1
+            health.trial_in_flight = False
+            tripped = health.state == BREAKER_HALF_OPEN or (
+                health.state == BREAKER_CLOSED and health.consecutive_failures >= self.failure_threshold
+            )
+            if tripped:
+                health.state = BREAKER_OPEN
+                health.opened_at = time.time()
+        if tripped:
+            logger.warning(f"Circuit opened for {self.key(provider)} after {health.consecutive_failures} consecutive failure(s)")
+        self._maybe_save(force=tripped)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            result = {}
+            for key, health in self._health.items():
+                data = health.to_dict()
+                data.pop("recent_latencies")
+                data["p95"] = health.p95()
+                result[key] = data
+            return result
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def load(self):
+        if not self.state_path or not self.state_path.exists():
+            return
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            with self._lock:
+                self._health = {k: ProviderHealth.from_dict(v) for k, v in data.items()}
+            logger.info(f"Loaded provider health for {len(self._health)} provider(s).")
+        except Exception as e:
+            logger.error(f"Failed to load provider health: {e}")
+
+    def _maybe_save(self, force: bool = False):
+        if not self.state_path:
+            return
+        now = time.time()
+        if force or now - self._last_save >= self.save_interval:
+            self._last_save = now
+            self.save()
+
+    def save(self):
+        """Write health state atomically, through a temp file unique to this writer."""
+        if not self.state_path:
+            return
+        with self._save_lock:
+            with self._lock:
+                data = {k: h.to_dict() for k, h in self._health.items()}
+            tmp = None
+            try:
+                self.state_path.parent.mkdir(parents=True, exist_ok=True)
+                with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=self.state_path.parent,
+                                                 prefix=self.state_path.name + ".", suffix=".tmp",
+                                                 delete=False) as f:
+                    tmp = f.name
+                    json.dump(data, f, indent=2)
+                os.replace(tmp, self.state_path)
+                tmp = None
+            except Exception as e:
+                logger.error(f"Failed to save provider health: {e}")
+            finally:
+                if tmp:
+                    try:
+                        os.unlink(tmp)
+                    except OSError:
+                        pass
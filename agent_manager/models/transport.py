@@ -0,0 +1,361 @@
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import gzip
+import http.client
+import json
+import logging
+import random
+import socket
+import threading
+import time
+import urllib.parse
+import zlib
+
+logger = logging.getLogger("FireflyHTTPTransport")
+
+# Statuses worth retrying: rate limits and transient upstream failures
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Errors raised when a pooled keep-alive socket was closed by the server
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine, BrokenPipeError, ConnectionResetError)
+
+class HTTPStatusError(Exception):
+    """
+    Non-2xx response from a provider endpoint.
+    """
+    def __init__(self, code: int, reason: str, body: str = ""):
+        super().__init__(f"HTTP {code} {reason}")
+        self.code = code
+        self.reason = reason
+        self.body = body
+
+class HTTPConnectionError(Exception):
+    """
+    The endpoint could not be reached (DNS, refused, timeout, ...).
+    """
+
+@dataclass
+class TransportResponse:
+    """
+    Fully-read HTTP response.
+    """
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+    reused_connection: bool = False
+
+    def json(self) -> Any:
+        return json.loads(self.body.decode('utf-8'))
+
+@dataclass
+class _HostPool:
+    idle: List[http.client.HTTPConnection] = field(default_factory=list)
+    created: int = 0
+    reused: int = 0
+    requests: int = 0
+    retries: int = 0
+
+class StreamResponse:
+    """
+    Streaming HTTP response. Reads the body incrementally, transparently gunzipping.
+    """
+    def __init__(self, response: http.client.HTTPResponse):
+        self._response = response
+        encoding = (response.getheader('Content-Encoding') or '').lower()
+        self._decoder = zlib.decompressobj(16 + zlib.MAX_WBITS) if encoding == 'gzip' else None
+        self.status = response.status
+        self.headers = {k.lower(): v for k, v in response.getheaders()}
+
+    def iter_chunks(self, size: int = 1024) -> Iterator[bytes]:
+        while True:
+            # read1 returns as soon as any data is available, which keeps latency low
+            chunk = self._response.read1(size) if hasattr(self._response, 'read1') else self._response.read(size)
+            if not chunk:
+                break
+            if self._decoder:
+                chunk = self._decoder.decompress(chunk)
+                if not chunk:
+                    continue
+            yield chunk
+        if self._decoder:
+            tail = self._decoder.flush()
+            if tail:
+                yield tail
+
+    def iter_lines(self) -> Iterator[str]:
+        """Yield decoded lines without their terminators (SSE and NDJSON framing)."""
+        buffer = b""
+        for chunk in self.iter_chunks():
+            buffer += chunk
+            while b"\n" in buffer:
+                line, buffer = buffer.split(b"\n", 1)
+                yield line.rstrip(b"\r").decode('utf-8', errors='replace')
+        if buffer:
+            yield buffer.rstrip(b"\r").decode('utf-8', errors='replace')
+
+def iter_sse_events(lines: Iterator[str]) -> Iterator[Tuple[str, str]]:
+    """
+    Parse Server-Sent Events framing into (event, data) pairs.
+    Multi-line data fields are joined with newlines; the default event name is 'message'.
+    """
+    event, data = "message", []
+    for line in lines:
+        if not line:
+            if data:
+                yield event, "\n".join(data)
+            event, data = "message", []
+        elif line.startswith(":"):
+            continue
+        elif line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].lstrip(" "))
+    if data:
+        yield event, "\n".join(data)
+
+class HTTPTransport:
+    """
+    Connection-pooled HTTP/1.1 transport built on http.client (zero-dependency).
+    Keeps a small pool of keep-alive connections per host so repeated provider
+    calls skip DNS, TCP and TLS setup. Retries transient failures with jittered
+    exponential backoff and transparently handles gzip bodies.
+    """
+    def __init__(self, timeout: float = 120.0, max_idle_per_host: int = 4, max_retries: int = 2,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0):
+        self.timeout = timeout
+        self.max_idle_per_host = max_idle_per_host
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._pools: Dict[Tuple[str, str, int], _HostPool] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Connection pool
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _split_url(url: str) -> Tuple[Tuple[str, str, int], str]:
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported URL scheme: {url}")
+        port = parts.port or (443 if scheme == "https" else 80)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        return (scheme, parts.hostname, port), path
+
+    def _acquire(self, key: Tuple[str, str, int], timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            pool = self._pools.setdefault(key, _HostPool())
+            pool.requests += 1
+            if pool.idle:
+                conn = pool.idle.pop()
+                pool.reused += 1
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+            pool.created += 1
+
+        scheme, host, port = key
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return cls(host, port, timeout=timeout), False
+
+    def _release(self, key: Tuple[str, str, int], conn: http.client.HTTPConnection, reusable: bool):
+        if reusable:
+            with self._lock:
+                pool = self._pools.setdefault(key, _HostPool())
+                if len(pool.idle) < self.max_idle_per_host:
+                    pool.idle.append(conn)
+                    return
+        conn.close()
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after:
+            try:
+                return min(self.backoff_max, float(retry_after))
+            except ValueError:
+                pass
+        # Full jitter keeps concurrent retries from synchronizing
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _prepare_headers(self, headers: Optional[Dict[str, str]], body: Optional[bytes]) -> Dict[str, str]:
+        prepared = {"Accept-Encoding": "gzip", "Connection": "keep-alive"}
+        prepared.update(headers or {})
+        if body is not None:
+            prepared.setdefault("Content-Length", str(len(body)))
+        return prepared
+
+    def _open(self, method: str, url: str, body: Optional[bytes], headers: Optional[Dict[str, str]],
+              timeout: Optional[float]) -> Tuple[Tuple[str, str, int], http.client.HTTPConnection, http.client.HTTPResponse, bool]:
+        """
+        Send a request and return once the status line and headers have arrived.
+        Only failures before the request went out (connect errors, a stale pooled
+        socket) and retryable statuses are retried. A timeout or an error after the
+        request was sent fails at once: the provider may already be processing it,
+        and the caller should fail over rather than wait out more timeouts.
+        """
+        key, path = self._split_url(url)
+        prepared = self._prepare_headers(headers, body)
+        timeout = timeout or self.timeout
+        attempt = 0
+
+        while True:
+            conn, reused = self._acquire(key, timeout)
+            sent = False
+            try:
+                conn.request(method, path, body=body, headers=prepared)
+                sent = True
+                response = conn.getresponse()
+            except socket.timeout as e:
+                conn.close()
+                raise HTTPConnectionError(f"{key[1]}: timed out after {timeout}s") from e
+            except STALE_CONNECTION_ERRORS as e:
+                conn.close()
+                if reused:
+                    # Server closed an idle keep-alive socket; retry on a fresh one for free
+                    continue
+                if sent:
+                    raise HTTPConnectionError(f"{key[1]}: {e}") from e
+                error = e
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                if sent:
+                    raise HTTPConnectionError(f"{key[1]}: {e}") from e
+                error = e
+            else:
+                if response.status in RETRY_STATUSES and attempt < self.max_retries:
+                    retry_after = response.getheader('Retry-After')
+                    response.read()
+                    self._release(key, conn, not response.will_close)
+                    delay = self._backoff(attempt, retry_after)
+                    logger.warning(f"HTTP {response.status} from {key[1]}. Retrying in {delay:.2f}s...")
+                    self._count_retry(key)
+                    attempt += 1
+                    time.sleep(delay)
+                    continue
+                return key, conn, response, reused
+
+            if attempt >= self.max_retries:
+                raise HTTPConnectionError(f"{key[1]}: {error}") from error
+            delay = self._backoff(attempt)
+            logger.warning(f"Connection to {key[1]} failed ({error}). Retrying in {delay:.2f}s...")
+            self._count_retry(key)
+            attempt += 1
+            time.sleep(delay)
+
+    def _count_retry(self, key: Tuple[str, str, int]):
+        with self._lock:
+            self._pools.setdefault(key, _HostPool()).retries += 1
+
+    @staticmethod
+    def _decode_body(response: http.client.HTTPResponse, raw: bytes) -> bytes:
+        if (response.getheader('Content-Encoding') or '').lower() == 'gzip':
+            return gzip.decompress(raw)
+        return raw
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def request(self, method: str, url: str, body: Optional[bytes] = None, headers: Optional[Dict[str, str]] = None,
+                timeout: Optional[float] = None) -> TransportResponse:
+        """
+        Perform a request and read the whole body.
+
+        Raises:
+            HTTPStatusError: For non-2xx responses (after retries).
+            HTTPConnectionError: If the host cannot be reached.
+        """
+        key, conn, response, reused = self._open(method, url, body, headers, timeout)
+        try:
+            raw = response.read()
+        except (OSError, http.client.HTTPException) as e:
+            conn.close()
+            raise HTTPConnectionError(f"{key[1]}: {e}") from e
+        self._release(key, conn, not response.will_close)
+
+        data = self._decode_body(response, raw)
+        if response.status >= 400:
+            raise HTTPStatusError(response.status, response.reason, data.decode('utf-8', errors='replace'))
+
+        return TransportResponse(
+            status=response.status,
+            headers={k.lower(): v for k, v in response.getheaders()},
+            body=data,
+            reused_connection=reused
+        )
+
+    def post_json(self, url: str, payload: Any, headers: Optional[Dict[str, str]] = None,
+                  timeout: Optional[float] = None) -> Any:
+        """POST a JSON payload and decode the JSON response."""
+        merged = {'Content-Type': 'application/json'}
+        merged.update(headers or {})
+        return self.request("POST", url, json.dumps(payload).encode('utf-8'), merged, timeout).json()
+
+    @contextmanager
+    def stream(self, method: str, url: str, body: Optional[bytes] = None, headers: Optional[Dict[str, str]] = None,
+               timeout: Optional[float] = None) -> Iterator[StreamResponse]:
+        """
+        Perform a request and yield a StreamResponse for incremental reading.
+        The connection returns to the pool only if the body was fully consumed.
+        """
+        key, conn, response, _ = self._open(method, url, body, headers, timeout)
+        if response.status >= 400:
+            data = self._decode_body(response, response.read())
+            self._release(key, conn, not response.will_close)
+            raise HTTPStatusError(response.status, response.reason, data.decode('utf-8', errors='replace'))
+
+        completed = False
+        try:
+            yield StreamResponse(response)
+            # Consume any trailer (e.g. after an SSE [DONE] marker) so the socket can be reused
+            response.read()
+            completed = True
+        finally:
+            self._release(key, conn, completed and not response.will_close)
+
+    @contextmanager
+    def stream_json(self, url: str, payload: Any, headers: Optional[Dict[str, str]] = None,
+                    timeout: Optional[float] = None) -> Iterator[StreamResponse]:
+        """POST a JSON payload and yield a StreamResponse for the body."""
+        merged = {'Content-Type': 'application/json'}
+        merged.update(headers or {})
+        with self.stream("POST", url, json.dumps(payload).encode('utf-8'), merged, timeout) as response:
+            yield response
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Per-host connection counters."""
+        with self._lock:
+            return {
+                f"{scheme}://{host}:{port}": {
+                    "requests": p.requests,
+                    "connections_created": p.created,
+                    "connections_reused": p.reused,
+                    "retries": p.retries,
+                    "idle": len(p.idle)
+                }
+                for (scheme, host, port), p in self._pools.items()
+            }
+
+    def close(self):
+        """Close every idle pooled connection."""
+        with self._lock:
+            pools = list(self._pools.values())
+        for pool in pools:
+            while pool.idle:
+                pool.idle.pop().close()
+
+_default_transport: Optional[HTTPTransport] = None
+_default_lock = threading.Lock()
+
+def get_default_transport() -> HTTPTransport:
+    """Process-wide transport shared by all model services."""
+    global _default_transport
+    with _default_lock:
+        if _default_transport is None:
+            _default_transport = HTTPTransport()
+        return _default_transport
@@ -1,11 +1,16 @@
+from concurrent.futures import Future
+from typing import Any, Dict, Optional, Set
+import asyncio
 import logging
 import os
 import re
 import subprocess
+import threading
+import time
 
 from agent_manager.core.git_manager import GitManager
 from agent_manager.core.tag_parser import TagParserService
-import asyncio
+from agent_manager.models.base import ServiceResponse
 
 logger = logging.getLogger("FireflyOrchestrator")
 
@@ -14,6 +19,10 @@ class OrchestratorManager:
     Manages the lifecycle and execution of agents based on triggers.
     Robustly handles AI responses using the Firefly Tagging System (FTS).
     """
+    # Sources where time-to-first-token matters; partial output is pushed to the IDE status line
+    STREAMING_SOURCES = ("chat",)
+    STREAM_STATUS_INTERVAL = 0.1 # Seconds between partial status updates
+
     def __init__(self, event_bus, model_client, config_service=None, peer_discovery=None, session_manager=None, browser_service=None, artifact_service=None, prompt_service=None, memory_service=None, notification_service=None, context_service=None):
         self.event_bus = event_bus
         self.model_client = model_client
@@ -34,8 +43,53 @@ class OrchestratorManager:
         self._is_autonomous = False
         self.is_running = False
 
+        # Long-lived event loop on a dedicated thread. All requests run here.
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._loop_lock = threading.Lock()
+        self._session_locks: Dict[str, list] = {} # session -> [lock, requests using it]; loop thread only
+        self._inflight: Dict[str, Set[Future]] = {}
+        self._inflight_lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the orchestrator event loop thread if it is not running yet."""
+        with self._loop_lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def run():
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                self._loop_thread = threading.Thread(target=run, name="OrchestratorLoop", daemon=True)
+                self._loop_thread.start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    def _shutdown_loop(self):
+        """Cancel in-flight work and stop the loop thread."""
+        with self._loop_lock:
+            loop, thread = self._loop, self._loop_thread
+            self._loop, self._loop_thread = None, None
+        if loop is None:
+            return
+
+        self.cancel_all()
+        loop.call_soon_threadsafe(loop.stop)
+        if thread and thread is not threading.current_thread():
+            thread.join(timeout=5)
+        if not loop.is_running():
+            loop.close()
+
+    def _on_loop_thread(self) -> bool:
+        return self._loop_thread is not None and threading.current_thread() is self._loop_thread
+
     def start(self):
         self.is_running = True
+        self._ensure_loop()
         logger.info("Orchestrator started. Defined role: Lead Developer.")
         self.event_bus.subscribe("webhook_event", self.handle_event)
         self.event_bus.subscribe("telegram_input", self.handle_event)
@@ -57,7 +111,15 @@ class OrchestratorManager:
     def stop(self):
         self.is_running = False
         if self.browser_service:
-            asyncio.run(self.browser_service.stop())
+            # The browser was driven from the orchestrator loop, so close it there.
+            if self._loop and self._loop.is_running():
+                try:
+                    asyncio.run_coroutine_threadsafe(self.browser_service.stop(), self._loop).result(timeout=10)
+                except Exception as e:
+                    logger.error(f"Failed to stop browser service: {e}")
+            else:
+                asyncio.run(self.browser_service.stop())
+        self._shutdown_loop()
         logger.info("Orchestrator stopped.")
 
     def handle_event(self, event_type: str, payload: dict):
@@ -163,14 +225,90 @@ class OrchestratorManager:
     def process_request(self, text: str, source: str = "manual", context: Optional[Dict] = None, session_id: str = "default", agent_role: str = "Lead Orchestrator"):
         """
         Sync bridge to async processing.
+        From any other thread this blocks until the request completes. When re-entered
+        from the orchestrator loop itself (follow-ups, local delegation) the request is
+        queued behind the current one for its session and the Future is returned.
         """
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+        future = self.submit_request(text, source, context, session_id, agent_role)
+        if self._on_loop_thread():
+            return future
+        return future.result()
 
-        return loop.run_until_complete(self.process_request_async(text, source, context, session_id, agent_role))
+    def submit_request(self, text: str, source: str = "manual", context: Optional[Dict] = None, session_id: str = "default", agent_role: str = "Lead Orchestrator") -> Future:
+        """
+        Schedule a request on the orchestrator loop without waiting for it.
+        Requests for different sessions run concurrently; requests within a session
+        run in submission order. The returned Future can be awaited or cancelled.
+        """
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(
+            self._run_in_session(text, source, context, session_id, agent_role), loop
+        )
+
+        with self._inflight_lock:
+            self._inflight.setdefault(session_id, set()).add(future)
+        future.add_done_callback(lambda f: self._discard_inflight(session_id, f))
+        return future
+
+    def _discard_inflight(self, session_id: str, future: Future):
+        with self._inflight_lock:
+            pending = self._inflight.get(session_id)
+            if pending is not None:
+                pending.discard(future)
+                if not pending:
+                    del self._inflight[session_id]
+
+    async def _run_in_session(self, text: str, source: str, context: Optional[Dict], session_id: str, agent_role: str):
+        """Serialize requests per session while letting other sessions proceed."""
+        entry = self._session_locks.get(session_id)
+        if entry is None:
+            entry = self._session_locks[session_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                return await self.process_request_async(text, source, context, session_id, agent_role)
+        finally:
+            # Session ids come from every chat and sender; forget idle ones
+            entry[1] -= 1
+            if entry[1] == 0 and self._session_locks.get(session_id) is entry:
+                del self._session_locks[session_id]
+
+    def get_inflight(self) -> Dict[str, int]:
+        """Number of queued or running requests per session."""
+        with self._inflight_lock:
+            return {sid: len(futures) for sid, futures in self._inflight.items()}
+
+    def cancel_session(self, session_id: str) -> int:
+        """Cancel all queued and running requests for a session. Returns the number cancelled."""
+        with self._inflight_lock:
+            futures = list(self._inflight.get(session_id, ()))
+        cancelled = sum(1 for f in futures if f.cancel())
+        if cancelled:
+            logger.info(f"Cancelled {cancelled} request(s) for session {session_id}")
+        return cancelled
+
+    def cancel_all(self) -> int:
+        """Cancel every in-flight request."""
+        with self._inflight_lock:
+            sessions = list(self._inflight.keys())
+        return sum(self.cancel_session(sid) for sid in sessions)
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until no requests are in flight (including follow-ups they queue)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._inflight_lock:
+                futures = [f for fs in self._inflight.values() for f in fs]
+            if not futures:
+                return True
+            for f in futures:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                try:
+                    f.result(timeout=remaining)
+                except Exception:
+                    pass
 
     async def process_request_async(self, prompt: str, source: str, context: dict = None, session_id: str = "default", agent_role: str = "Lead Orchestrator"):
         """
@@ -194,7 +332,7 @@ class OrchestratorManager:
 
             # Retrieve relevant semantic memories
             if self.memory_service:
-                memories = self.memory_service.query(prompt, top_k=3)
+                memories = await asyncio.to_thread(self.memory_service.query, prompt, top_k=3, session=session_id)
                 if memories:
                     mem_context = "\n[RELEVANT HISTORICAL CONTEXT]\n" + "\n".join([f"- {m['text']}" for m in memories])
                     history_context += mem_context
@@ -220,7 +358,11 @@ Known Bugs: {', '.join(state.get('known_bugs', []))}
             system_prompt = f"You are the Firefly {agent_role}. {history_context}"
 
         try:
-            response = self.model_client.generate(prompt, system_prompt=system_prompt)
+            # Provider calls block on network I/O; keep the loop free for other sessions.
+            if source in self.STREAMING_SOURCES and hasattr(self.model_client, "generate_stream"):
+                response = await asyncio.to_thread(self._generate_streaming, prompt, system_prompt)
+            else:
+                response = await asyncio.to_thread(self.model_client.generate, prompt, system_prompt=system_prompt)
             parsed = self.tag_parser.parse(response.text)
 
             # Record assistant response in history
@@ -236,15 +378,16 @@ Known Bugs: {', '.join(state.get('known_bugs', []))}
 
             # 2. execute commands (with safety)
             for cmd in parsed.commands:
-                result = self.execute_command(cmd)
+                result = await asyncio.to_thread(self.execute_command, cmd)
                 if self.artifact_service:
                     self.artifact_service.create_artifact(session_id, "command", {"command": cmd, "success": result})
 
             # 2. Extract Thoughts and Index in Memory
             thoughts = re.findall(r'<thought>(.*?)</thought>', response.text, re.DOTALL | re.IGNORECASE)
-            for t in thoughts:
-                if self.memory_service:
-                    self.memory_service.upsert(t.strip(), {"type": "thought", "session": session_id})
+            if thoughts and self.memory_service:
+                # One embedding request for the whole turn
+                items = [(t.strip(), {"type": "thought", "session": session_id}) for t in thoughts]
+                await asyncio.to_thread(self.memory_service.upsert_batch, items)
 
             # 2.5 Handle Browser Actions
             await self._handle_browser_actions(response.text, session_id)
@@ -290,6 +433,38 @@ Known Bugs: {', '.join(state.get('known_bugs', []))}
         except Exception as e:
             logger.error(f"Failed to process request: {e}")
 
+    def _generate_streaming(self, prompt: str, system_prompt: str) -> ServiceResponse:
+        """Consume a streamed generation, publishing partial text as it arrives."""
+        parts = []
+        last_chunk = None
+        last_update = 0.0
+        for chunk in self.model_client.generate_stream(prompt, system_prompt=system_prompt):
+            last_chunk = chunk
+            if not chunk.text:
+                continue
+            parts.append(chunk.text)
+            now = time.monotonic()
+            if now - last_update >= self.STREAM_STATUS_INTERVAL:
+                last_update = now
+                self.set_status(thought=self._status_preview("".join(parts)))
+
+        text = "".join(parts)
+        if text:
+            self.set_status(thought=self._status_preview(text))
+        return ServiceResponse(
+            text=text,
+            prompt_tokens=getattr(last_chunk, "prompt_tokens", 0),
+            completion_tokens=getattr(last_chunk, "completion_tokens", 0),
+            model_name=getattr(last_chunk, "model_name", "unknown"),
+            cost_usd=getattr(last_chunk, "cost_usd", 0.0)
+        )
+
+    @staticmethod
+    def _status_preview(text: str, limit: int = 160) -> str:
+        """Tail of the streamed text, flattened so it fits in a quoted status field."""
+        flat = " ".join(text.split()).replace('"', "'")
+        return flat if len(flat) <= limit else "..." + flat[-limit:]
+
     async def _handle_browser_actions(self, text: str, session_id: str):
         """Extracts and executes <browser> tags."""
         if not self.browser_service:
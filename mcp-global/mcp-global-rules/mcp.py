@@ -82,6 +82,7 @@ Usage: python3 mcp-global-rules/mcp.py <command> [args...]
 
 Code Quality:
     review [path] [--strict]    Code review automation
+    check [--staged|paths]      All pre-commit analyzers in one pass
     docs [path] [--write]       Generate missing docstrings
     test [path]                 Generate pytest test stubs
     deadcode [path]             Find unused code
@@ -96,7 +97,9 @@ Analysis:
 
 Intelligence:
     context "query" [path]      Smart context extraction
+    context-index [path]        Refresh the context search index
     find "query" [path]         Natural language search
+    symbols <query> [path]      Search functions, classes and imports by name
     refactor [path]             Suggest refactorings
 
 Indexes:
@@ -129,6 +132,7 @@ Automation:
     watch [path]                Live index updates
     autocontext                 Auto-load context
     warm                        Pre-warm indexes
+    parse-cache [--clear]       Shared parse cache stats
 
 Setup:
     setup --all                 Full setup
@@ -147,8 +151,10 @@ COMMANDS = {
     'summarize': 'summarize',
     'changelog': 'changelog',
     'review': 'review',
+    'check': 'check',
     # Phase 2 tools
     'context': 'context',
+    'context-index': 'context_index',
     'refactor': 'refactor',
     'apidocs': 'api_docs',
     'coverage': 'doc_coverage',
@@ -161,6 +167,7 @@ COMMANDS = {
     "comms": "agent_comms",
     "model": "model_manager",
     'find': 'finder',
+    'symbols': 'symbol_index',
     'errors': 'errors',
     'migrate': 'migrate',
     'architecture': 'architecture',
@@ -202,6 +209,7 @@ COMMANDS = {
     # Setup & Automation
     'setup': 'setup',
     'warm': 'warm',
+    'parse-cache': 'parse_cache',
     'auto-learn': 'auto_learn',
 }
 
@@ -316,6 +316,18 @@ def analyze_architecture(
                             report.dependencies[layer].add(rule.layer)
                             break
 
+    # Imports the names miss (e.g. "from . import helpers"), resolved to files by the shared graph
+    from .impact import build_dependency_graph
+    graph = build_dependency_graph(root)
+    for file_key, targets in graph.depends_on.items():
+        layer = report.layer_mapping.get(str(root / file_key))
+        if not layer or layer == 'unknown':
+            continue
+        for target in targets:
+            target_layer = report.layer_mapping.get(str(root / target))
+            if target_layer and target_layer != 'unknown':
+                report.dependencies[layer].add(target_layer)
+
     return report
 
 
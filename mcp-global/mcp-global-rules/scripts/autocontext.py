@@ -194,31 +194,25 @@ def get_dependency_context(
     file_path: Path,
     root: Path = None
 ) -> ContextResult:
-    """Get context from file dependencies (imports)."""
+    """Get context from file dependencies (imports resolved by the shared import graph)."""
     root = root or find_project_root() or Path.cwd()
 
     files = []
     token_count = 0
 
     try:
-        from .treesitter_utils import parse_file
-        parsed = parse_file(file_path)
-
-        for imp in parsed.imports:
-            # Try to resolve import to file
-            parts = imp.replace('from ', '').replace('import ', '').split()[0].split('.')
-
-            for i in range(len(parts), 0, -1):
-                possible_path = root / '/'.join(parts[:i]) + '.py'
-                if possible_path.exists():
-                    try:
-                        with open(possible_path, 'r', encoding='utf-8') as f:
-                            content = f.read()[:2000]
-                            files.append((str(possible_path), content))
-                            token_count += len(content.split())
-                    except Exception:
-                        pass
-                    break
+        from .impact import build_dependency_graph
+        graph = build_dependency_graph(root)
+        file_key = str(Path(file_path).resolve().relative_to(Path(root).resolve()))
+
+        for dep in sorted(graph.depends_on.get(file_key, ())):
+            try:
+                with open(root / dep, 'r', encoding='utf-8') as f:
+                    content = f.read()[:2000]
+                    files.append((str(root / dep), content))
+                    token_count += len(content.split())
+            except Exception:
+                pass
     except Exception:
         pass
 
@@ -296,18 +290,16 @@ def get_auto_context(
 
             # 3b. Dependencies of Active
             try:
-                from .deps import analyze_imports
-                deps = analyze_imports(Path(path))
-                if deps:
-                    # Very simple heuristic: try to find local module file
-                    for imp in list(deps.imports)[:2]:
-                        # Try finding file
-                        local_path = root / f"{imp.replace('.', '/')}.py"
-                        if local_path.exists() and str(local_path) not in active_files:
-                             dep_content = local_path.read_text(encoding='utf-8')[:1000]
-                             if active_tokens + len(dep_content.split()) < budget_active:
-                                 active_files[str(local_path)] = dep_content
-                                 active_tokens += len(dep_content.split())
+                from .impact import build_dependency_graph
+                graph = build_dependency_graph(root)
+                file_key = str(Path(path).resolve().relative_to(Path(root).resolve()))
+                for dep in sorted(graph.depends_on.get(file_key, ()))[:2]:
+                    local_path = root / dep
+                    if str(local_path) not in active_files:
+                        dep_content = local_path.read_text(encoding='utf-8')[:1000]
+                        if active_tokens + len(dep_content.split()) < budget_active:
+                            active_files[str(local_path)] = dep_content
+                            active_tokens += len(dep_content.split())
             except Exception:
                 pass
 
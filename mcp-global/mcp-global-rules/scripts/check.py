@@ -0,0 +1,295 @@
+"""
+Check Pipeline
+==============
+Runs the pre-commit hook's steps in one process: auto-context, the memory
+snapshot, and the per-file analyzers (auto-fix, bug prediction, security
+audit, strict review) over a set of files, with one combined report.
+
+Each file is fixed first and then parsed once: the other analyzers share the
+memoized syntax tree (see parse_cache). Large file sets are spread over
+worker processes, each handling whole files.
+
+Usage:
+    python mcp.py check --staged            # Files staged for commit (git hooks)
+    python mcp.py check --changed           # Uncommitted changes
+    python mcp.py check [paths...]          # Files or directories
+    python mcp.py check --staged --no-fix --no-context --no-snapshot
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+import sys
+import time
+
+from .fix import FixResult, fix_file
+from .predict import BugPrediction, predict_bugs
+from .review import ReviewIssue, Severity as ReviewSeverity, review_file
+from .security import SecurityIssue, Severity as SecuritySeverity, audit_file
+from .utils import Console, find_project_root, find_python_files, get_staged_files, parallel_map, run_git_command
+
+
+# Per-file analyzers, in the order they run on each file
+ANALYZERS = ('fix', 'predict', 'security', 'review')
+
+
+@dataclass
+class CheckOptions:
+    """What to run on each file."""
+    fix: bool = True  # Safe fixes only: imports, whitespace, blank lines
+    strict: bool = True  # Strict review (type hints)
+    security_strict: bool = False  # Keep INFO-level security findings
+
+
+@dataclass
+class FileResult:
+    """Findings for one file, with the seconds each analyzer took."""
+    path: Path
+    fixes: List[FixResult] = field(default_factory=list)
+    predictions: List[BugPrediction] = field(default_factory=list)
+    security: List[SecurityIssue] = field(default_factory=list)
+    review: List[ReviewIssue] = field(default_factory=list)
+    timings: Dict[str, float] = field(default_factory=dict)
+
+
+@dataclass
+class CheckReport:
+    """Combined findings of all analyzers."""
+    files: List[FileResult] = field(default_factory=list)
+    timings: Dict[str, float] = field(default_factory=dict)  # Analyzer/step -> seconds
+    wall_time: float = 0.0
+
+    def _all(self, name: str) -> list:
+        return [item for result in self.files for item in getattr(result, name)]
+
+    @property
+    def fixes(self) -> List[FixResult]:
+        return self._all('fixes')
+
+    @property
+    def predictions(self) -> List[BugPrediction]:
+        return self._all('predictions')
+
+    @property
+    def security(self) -> List[SecurityIssue]:
+        return self._all('security')
+
+    @property
+    def review(self) -> List[ReviewIssue]:
+        return self._all('review')
+
+    @property
+    def blocking_security(self) -> List[SecurityIssue]:
+        return [i for i in self.security if i.severity in (SecuritySeverity.CRITICAL, SecuritySeverity.HIGH)]
+
+    @property
+    def review_errors(self) -> List[ReviewIssue]:
+        return [i for i in self.review if i.severity == ReviewSeverity.ERROR]
+
+    @property
+    def passed(self) -> bool:
+        return not self.blocking_security and not self.review_errors
+
+    def to_markdown(self) -> str:
+        lines = [
+            "# Check Report",
+            "",
+            f"- **Files:** {len(self.files)}",
+            f"- **Fixes applied:** {len(self.fixes)}",
+            f"- **Bug predictions:** {len(self.predictions)}",
+            f"- **Security issues:** {len(self.security)} ({len(self.blocking_security)} critical/high)",
+            f"- **Review issues:** {len(self.review)} ({len(self.review_errors)} errors)",
+            f"- **Status:** {'PASSED' if self.passed else 'FAILED'}",
+            "",
+        ]
+
+        if self.blocking_security:
+            lines.extend(["## Security (Must Fix)", ""])
+            for issue in self.blocking_security:
+                lines.append(f"- `{issue.path}:{issue.line}` {issue.severity.value}: {issue.title}")
+            lines.append("")
+
+        if self.review_errors:
+            lines.extend(["## Review Errors (Must Fix)", ""])
+            for issue in self.review_errors:
+                lines.append(f"- `{issue.file}:{issue.line}` [{issue.category}] {issue.message}")
+            lines.append("")
+
+        high_risk = [p for p in self.predictions if p.risk_level == 'high']
+        if high_risk:
+            lines.extend(["## High-Risk Predictions", ""])
+            for pred in high_risk:
+                lines.append(f"- `{pred.file}:{pred.line}` {pred.category}: {pred.description}")
+            lines.append("")
+
+        if self.fixes:
+            lines.extend(["## Fixed Files (re-stage before committing)", ""])
+            for path in sorted({str(fix.path) for fix in self.fixes}):
+                lines.append(f"- `{path}`")
+            lines.append("")
+
+        lines.extend(["## Timing", "", "| Step | Seconds |", "|------|---------|"])
+        for name, seconds in self.timings.items():
+            lines.append(f"| {name} | {seconds:.2f} |")
+        lines.append(f"| total (wall) | {self.wall_time:.2f} |")
+        lines.append("")
+        return "\n".join(lines)
+
+
+# ------------------------------------------------------------------
+# File selection
+# ------------------------------------------------------------------
+
+def staged_python_files(root: Path) -> List[Path]:
+    """Python files staged for commit (deleted files excluded)."""
+    toplevel = run_git_command(['rev-parse', '--show-toplevel'], cwd=root)
+    if not toplevel:
+        return []
+    top = Path(toplevel)
+    paths = (top / name for name in get_staged_files(cwd=top) if name.endswith('.py'))
+    return [path for path in paths if path.is_file()]
+
+
+def collect_files(targets: List[Path]) -> List[Path]:
+    """Python files named by targets, expanding directories."""
+    files, seen = [], set()
+    for target in targets:
+        found = find_python_files(target) if target.is_dir() else [target]
+        for path in found:
+            if path.suffix == '.py' and path.is_file() and path not in seen:
+                seen.add(path)
+                files.append(path)
+    return files
+
+
+# ------------------------------------------------------------------
+# Analysis
+# ------------------------------------------------------------------
+
+def check_file(path: Path, options: CheckOptions) -> FileResult:
+    """Run every analyzer on one file; the file is parsed once after fixing."""
+    result = FileResult(path=path)
+
+    def timed(name, func, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            result.timings[name] = time.perf_counter() - start
+
+    if options.fix:
+        result.fixes = timed('fix', fix_file, path, fix_unused=False)
+    result.predictions = timed('predict', predict_bugs, path)
+    issues = timed('security', audit_file, path)
+    if not options.security_strict:
+        issues = [i for i in issues if i.severity != SecuritySeverity.INFO]
+    result.security = issues
+    result.review = timed('review', review_file, path, strict=options.strict)
+    return result
+
+
+def check_files(
+    paths: List[Path],
+    options: Optional[CheckOptions] = None,
+    workers: Optional[int] = None
+) -> CheckReport:
+    """Check files, in worker processes when there are enough of them."""
+    options = options or CheckOptions()
+    report = CheckReport()
+    start = time.perf_counter()
+
+    results = parallel_map(check_file, paths, [options] * len(paths), workers=workers)
+
+    report.files = results
+    for name in ANALYZERS:
+        times = [r.timings[name] for r in results if name in r.timings]
+        if times:
+            report.timings[name] = sum(times)
+    report.wall_time = time.perf_counter() - start
+    return report
+
+
+def _context_step(root: Path):
+    from .autocontext import get_auto_context
+    print(get_auto_context(root=root))
+
+
+def _snapshot_step(root: Path):
+    from .record import record_snapshot
+    record_snapshot(root)
+
+
+def run_check(
+    paths: List[Path],
+    root: Path,
+    options: Optional[CheckOptions] = None,
+    context: bool = True,
+    snapshot: bool = True,
+    workers: Optional[int] = None
+) -> CheckReport:
+    """
+    The full hook pipeline: auto-context and the memory snapshot (once per
+    run), then the per-file analyzers.
+    """
+    start = time.perf_counter()
+    timings: Dict[str, float] = {}
+    steps = [('context', _context_step, context), ('snapshot', _snapshot_step, snapshot)]
+    for name, func, enabled in steps:
+        if not enabled:
+            continue
+        step = time.perf_counter()
+        try:
+            func(root)
+        except Exception as e:
+            Console.warn(f"{name} step failed: {e}")
+        timings[name] = time.perf_counter() - step
+
+    report = check_files(paths, options, workers)
+    timings.update(report.timings)
+    report.timings = timings
+    report.wall_time = time.perf_counter() - start
+    return report
+
+
+def main():
+    """CLI entry point."""
+    Console.header("Check Pipeline")
+
+    args = [a for a in sys.argv[1:] if not a.startswith('-')]
+    root = find_project_root() or Path.cwd()
+
+    if '--staged' in sys.argv:
+        files = staged_python_files(root)
+    elif '--changed' in sys.argv:
+        from .impact import changed_python_files
+        files = [path for path in changed_python_files(root) if path.is_file()]
+    else:
+        files = collect_files([Path(a) for a in args] or [root])
+
+    if not files:
+        Console.ok("No Python files to check")
+        return 0
+
+    options = CheckOptions(
+        fix='--no-fix' not in sys.argv,
+        strict='--standard' not in sys.argv,
+        security_strict='--security-strict' in sys.argv
+    )
+    Console.info(f"Checking {len(files)} files...")
+    report = run_check(
+        files, root, options,
+        context='--no-context' not in sys.argv,
+        snapshot='--no-snapshot' not in sys.argv
+    )
+
+    print(report.to_markdown())
+
+    if report.passed:
+        Console.ok(f"Check PASSED in {report.wall_time:.2f}s")
+        return 0
+    Console.fail(f"Check FAILED in {report.wall_time:.2f}s")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
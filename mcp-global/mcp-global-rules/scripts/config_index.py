@@ -11,6 +11,7 @@ Usage:
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, List, Optional, Set
+import fnmatch
 import json
 import os
 import re
@@ -41,19 +42,28 @@ ENV_PATTERNS = [
 ]
 
 
+CONFIG_FILE_PATTERNS = [
+    '.env', '.env.*', 'config.json', 'config.yaml', 'config.yml',
+    'settings.json', 'settings.yaml', 'settings.yml', 'settings.py',
+    'pyproject.toml', 'setup.cfg', 'requirements.txt',
+    'package.json', 'tsconfig.json',
+    '*.ini', '*.toml', '*.conf'
+]
+
+# Code file types searched for env var usage
+ENV_USAGE_EXTENSIONS = ['.py', '.js', '.ts']
+
+
+def is_config_file(name: str) -> bool:
+    """True if a file name matches one of the config file patterns."""
+    return any(fnmatch.fnmatch(name, pattern) for pattern in CONFIG_FILE_PATTERNS)
+
+
 def find_config_files(root: Path) -> List[Path]:
     """Find configuration files."""
-    patterns = [
-        '.env', '.env.*', 'config.json', 'config.yaml', 'config.yml',
-        'settings.json', 'settings.yaml', 'settings.yml', 'settings.py',
-        'pyproject.toml', 'setup.cfg', 'requirements.txt',
-        'package.json', 'tsconfig.json',
-        '*.ini', '*.toml', '*.conf'
-    ]
-
     files = []
 
-    for pattern in patterns:
+    for pattern in CONFIG_FILE_PATTERNS:
         for path in root.glob(pattern):
             if path.is_file() and '.git' not in str(path):
                 files.append(path)
@@ -124,21 +134,49 @@ def find_env_usage_in_file(file_path: Path) -> Set[str]:
         with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
             content = f.read()
 
-        for pattern in ENV_PATTERNS:
-            matches = re.findall(pattern, content)
-            env_vars.update(matches)
+        env_vars = find_env_usage(content)
     except Exception:
         pass
 
     return env_vars
 
 
+def find_env_usage(content: str) -> Set[str]:
+    """Find env var usage in already-read code."""
+    env_vars = set()
+
+    for pattern in ENV_PATTERNS:
+        matches = re.findall(pattern, content)
+        env_vars.update(matches)
+
+    return env_vars
+
+
 def index_configs(root: Path = None) -> Dict:
     """Build configuration index."""
     root = root or find_project_root() or Path.cwd()
 
     Console.info("Indexing configuration...")
 
+    # Find config files
+    config_files = find_config_files(root)
+
+    # Find env var usage in code
+    env_usage = {}
+    for ext in ENV_USAGE_EXTENSIONS:
+        for code_file in root.rglob(f'*{ext}'):
+            if '.git' in str(code_file) or 'node_modules' in str(code_file):
+                continue
+
+            used = find_env_usage_in_file(code_file)
+            if used:
+                env_usage[str(code_file.relative_to(root))] = list(used)
+
+    return build_index(root, config_files, env_usage)
+
+
+def build_index(root: Path, config_files: List[Path], env_usage: Dict[str, List[str]]) -> Dict:
+    """Build the configuration index from config files and per-file env usage, and save it."""
     index = {
         "config_files": [],
         "env_vars": {},
@@ -146,9 +184,7 @@ def index_configs(root: Path = None) -> Dict:
         "missing_vars": []
     }
 
-    # Find and parse config files
-    config_files = find_config_files(root)
-
+    # Parse config files
     for config_path in config_files:
         index["config_files"].append(str(config_path.relative_to(root)))
 
@@ -162,20 +198,11 @@ def index_configs(root: Path = None) -> Dict:
         elif config_path.suffix == '.json':
             items = parse_json_file(config_path)
 
-    # Find env var usage in code
+    # Env var usage in code
     all_used = set()
-    extensions = ['.py', '.js', '.ts']
-
-    for ext in extensions:
-        for code_file in root.rglob(f'*{ext}'):
-            if '.git' in str(code_file) or 'node_modules' in str(code_file):
-                continue
-
-            used = find_env_usage_in_file(code_file)
-            if used:
-                rel_path = str(code_file.relative_to(root))
-                index["env_usage"][rel_path] = list(used)
-                all_used.update(used)
+    for rel_path, used in env_usage.items():
+        index["env_usage"][rel_path] = list(used)
+        all_used.update(used)
 
     # Find missing env vars (used but not defined)
     defined = set(index["env_vars"].keys())
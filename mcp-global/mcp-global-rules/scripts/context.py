@@ -13,10 +13,10 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 import ast
-import math
 import re
 import sys
 
+from .context_index import ContextIndex
 from .utils import (
     find_python_files,
     find_project_root,
@@ -73,6 +73,10 @@ class ContextResult:
         return "\n".join(lines)
 
 
+# Files taken from the index ranking for snippet extraction
+MAX_RANKED_FILES = 30
+
+
 def estimate_tokens(text: str) -> int:
     """Estimate token count (rough: 4 chars per token)."""
     return len(text) // 4
@@ -103,41 +107,6 @@ def tokenize_query(query: str) -> List[str]:
     return expanded
 
 
-def calculate_tf_idf(
-    terms: List[str],
-    document: str,
-    all_documents: List[str]
-) -> float:
-    """Calculate TF-IDF relevance score."""
-    doc_lower = document.lower()
-
-    # Term frequency in this document
-    tf_scores = []
-    for term in terms:
-        tf = doc_lower.count(term)
-        if tf > 0:
-            tf_scores.append(1 + math.log(tf))
-        else:
-            tf_scores.append(0)
-
-    if not tf_scores or sum(tf_scores) == 0:
-        return 0.0
-
-    # Inverse document frequency
-    idf_scores = []
-    for term in terms:
-        docs_with_term = sum(1 for doc in all_documents if term in doc.lower())
-        if docs_with_term > 0:
-            idf = math.log(len(all_documents) / docs_with_term)
-            idf_scores.append(idf)
-        else:
-            idf_scores.append(0)
-
-    # Combined TF-IDF
-    score = sum(tf * idf for tf, idf in zip(tf_scores, idf_scores))
-    return score
-
-
 def get_recent_files(root: Path, limit: int = 10) -> List[Path]:
     """Get recently modified files from git."""
     output = run_git_command(
@@ -234,40 +203,34 @@ def load_context(
     terms = tokenize_query(query)
     Console.info(f"Search terms: {', '.join(terms)}")
 
-    # Get all Python files
+    # Rank files from the inverted index, refreshing files changed since the last query
     files = list(find_python_files(root, exclude_patterns))
     result.files_scanned = len(files)
 
-    Console.info(f"Scanning {len(files)} files...")
+    index = ContextIndex.for_root(root)
+    try:
+        refreshed = index.sync(files, scope=root)
+        if refreshed:
+            Console.info(f"Indexed {refreshed} changed files")
+        ranked = index.search(terms, limit=MAX_RANKED_FILES, scope=root)
+    finally:
+        index.close()
 
-    # Get recent files for priority boost
-    recent_files = set(get_recent_files(root))
+    # Get recent files for priority boost (index paths are resolved; root may be relative)
+    recent_files = {p.resolve() for p in get_recent_files(root)}
 
-    # Load all file contents for IDF calculation
-    all_contents = []
-    file_data = []
+    # Only the top-ranked files are read and parsed for snippets
+    context_items = []
 
-    for path in files:
+    for path, relevance in ranked:
         try:
             with open(path, 'r', encoding='utf-8', errors='ignore') as f:
                 content = f.read()
-                all_contents.append(content)
-                file_data.append((path, content))
         except Exception:
             continue
 
-    # Score and extract context items
-    context_items = []
-
-    for path, content in file_data:
-        # Calculate base relevance
-        relevance = calculate_tf_idf(terms, content, all_contents)
-
-        if relevance == 0:
-            continue
-
         # Boost for recent files
-        if path in recent_files:
+        if path.resolve() in recent_files:
             relevance *= 1.5
 
         # Boost for filename match
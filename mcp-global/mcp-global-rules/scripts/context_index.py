@@ -0,0 +1,279 @@
+"""
+Context Index
+=============
+Persistent inverted index with BM25 ranking for the context loader.
+
+Each Python file is tokenized once into weighted fields (body, identifiers,
+docstrings, path). Postings (token -> file, weighted term frequency) live in
+SQLite under .mcp/context_index/, so a query reads only the postings of its
+own terms. Files are re-indexed when their mtime or size changes, either by
+sync() before a query or by the watcher as files are saved.
+
+Usage:
+    python mcp.py context-index            # Build or refresh the index
+    python mcp.py context-index --stats
+"""
+
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import math
+import os
+import re
+import sys
+
+from .utils import Console, analyze_module, find_project_root, find_python_files, open_cache_db
+
+
+# Bump when tokenization or field weights change; the index is rebuilt
+INDEX_VERSION = 1
+
+# Weight of a token occurrence by where it appears
+FIELD_BOOSTS = {
+    'body': 1.0,
+    'docstring': 2.0,
+    'path': 2.0,
+    'identifier': 3.0,
+}
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Query terms this long or longer also match tokens they prefix (e.g. auth -> authenticate)
+PREFIX_MIN_LENGTH = 3
+PREFIX_LIMIT = 20
+PREFIX_WEIGHT = 0.5
+
+WORD_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_]*|[0-9]+')
+PART_RE = re.compile(r'[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+')
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase tokens of text. Identifiers are kept whole and also split
+    into their snake_case / camelCase parts.
+    """
+    tokens = []
+    for word in WORD_RE.findall(text):
+        tokens.append(word.lower().strip('_') or word.lower())
+        parts = PART_RE.findall(word)
+        if len(parts) > 1:
+            tokens.extend(part.lower() for part in parts)
+    return tokens
+
+
+def document_terms(path: Path, text: str, rel_path: str) -> Tuple[Counter, int]:
+    """Weighted term frequencies of a file, and its length in body tokens."""
+    body = tokenize(text)
+    terms = Counter()
+    for token in body:
+        terms[token] += FIELD_BOOSTS['body']
+    for token in tokenize(rel_path):
+        terms[token] += FIELD_BOOSTS['path']
+
+    info = analyze_module(path) if path.suffix == '.py' else None
+    if info is not None:
+        identifiers, docstrings = list(info.global_vars), [info.docstring]
+        for func in info.functions:
+            identifiers.append(func.name)
+            docstrings.append(func.docstring)
+        for cls in info.classes:
+            identifiers.append(cls.name)
+            docstrings.append(cls.docstring)
+            for method in cls.methods:
+                identifiers.append(method.name)
+                docstrings.append(method.docstring)
+        for token in tokenize(' '.join(identifiers)):
+            terms[token] += FIELD_BOOSTS['identifier']
+        for token in tokenize(' '.join(d for d in docstrings if d)):
+            terms[token] += FIELD_BOOSTS['docstring']
+
+    return terms, len(body)
+
+
+class ContextIndex:
+    """BM25 inverted index over a project's Python files."""
+
+    def __init__(self, index_dir: Path, root: Path):
+        self.index_dir = Path(index_dir)
+        self.root = Path(root).resolve()
+        self.db = open_cache_db(self.index_dir, 'index.db', INDEX_VERSION)
+        self._init_schema()
+
+    @classmethod
+    def for_root(cls, root: Path) -> "ContextIndex":
+        """Index stored in the project's .mcp directory."""
+        project = find_project_root(root) or Path(root)
+        return cls(project / '.mcp' / 'context_index', project)
+
+    def _init_schema(self):
+        db = self.db
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS docs ("
+            " id INTEGER PRIMARY KEY, path TEXT UNIQUE, mtime_ns INTEGER, size INTEGER, length INTEGER)"
+        )
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS postings ("
+            " term TEXT, doc INTEGER, tf REAL, PRIMARY KEY (term, doc)) WITHOUT ROWID"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc)")
+        db.commit()
+
+    def close(self):
+        self.db.close()
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def _remove(self, key: str):
+        row = self.db.execute("SELECT id FROM docs WHERE path = ?", (key,)).fetchone()
+        if row:
+            self.db.execute("DELETE FROM postings WHERE doc = ?", (row[0],))
+            self.db.execute("DELETE FROM docs WHERE id = ?", (row[0],))
+
+    def _add(self, path: Path, key: str) -> bool:
+        try:
+            st = os.stat(key)
+            with open(key, 'r', encoding='utf-8', errors='ignore') as f:
+                text = f.read()
+        except OSError:
+            return False
+
+        try:
+            rel_path = str(Path(key).relative_to(self.root))
+        except ValueError:
+            rel_path = key
+        terms, length = document_terms(path, text, rel_path)
+
+        self._remove(key)
+        cursor = self.db.execute(
+            "INSERT INTO docs (path, mtime_ns, size, length) VALUES (?, ?, ?, ?)",
+            (key, st.st_mtime_ns, st.st_size, length)
+        )
+        doc = cursor.lastrowid
+        self.db.executemany(
+            "INSERT INTO postings (term, doc, tf) VALUES (?, ?, ?)",
+            ((term, doc, tf) for term, tf in terms.items())
+        )
+        return True
+
+    def update_files(self, paths: Iterable[Path]) -> int:
+        """Re-index the given files; files that no longer exist are dropped."""
+        count = 0
+        for path in paths:
+            path = Path(path)
+            key = str(path.resolve())
+            if path.exists():
+                count += self._add(path, key)
+            else:
+                self._remove(key)
+        self.db.commit()
+        return count
+
+    def sync(self, files: Iterable[Path], scope: Optional[Path] = None) -> int:
+        """
+        Bring the index in line with files (all Python files under scope):
+        new or modified files are re-indexed by mtime/size, and indexed files
+        under scope that are not in files are dropped. Returns files re-indexed.
+        """
+        known = {path: (mtime, size) for path, mtime, size in
+                 self.db.execute("SELECT path, mtime_ns, size FROM docs")}
+        seen, changed = set(), []
+        for path in files:
+            key = str(Path(path).resolve())
+            seen.add(key)
+            try:
+                st = os.stat(key)
+            except OSError:
+                continue
+            if known.get(key) != (st.st_mtime_ns, st.st_size):
+                changed.append(path)
+
+        prefix = str(Path(scope or self.root).resolve()) + os.sep
+        removed = [key for key in known if key.startswith(prefix) and key not in seen]
+
+        for key in removed:
+            self._remove(key)
+        for path in changed:
+            self._add(Path(path), str(Path(path).resolve()))
+        self.db.commit()
+        return len(changed)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _expand(self, terms: Iterable[str]) -> Dict[str, float]:
+        """Query token -> weight, adding vocabulary tokens that the terms prefix."""
+        weights: Dict[str, float] = {}
+        for term in terms:
+            for token in tokenize(term):
+                weights[token] = max(weights.get(token, 0.0), 1.0)
+                if len(token) < PREFIX_MIN_LENGTH:
+                    continue
+                rows = self.db.execute(
+                    "SELECT DISTINCT term FROM postings WHERE term > ? AND term < ? LIMIT ?",
+                    (token, token + '\uffff', PREFIX_LIMIT)
+                )
+                for (match,) in rows:
+                    weights.setdefault(match, PREFIX_WEIGHT)
+        return weights
+
+    def search(self, terms: Iterable[str], limit: int = 30,
+               scope: Optional[Path] = None) -> List[Tuple[Path, float]]:
+        """Files ranked by BM25 over the weighted fields, best first."""
+        total, avg_length = self.db.execute("SELECT COUNT(*), AVG(length) FROM docs").fetchone()
+        if not total:
+            return []
+        avg_length = avg_length or 1.0
+        docs = {doc: (path, length) for doc, path, length in self.db.execute("SELECT id, path, length FROM docs")}
+
+        scores: Dict[int, float] = defaultdict(float)
+        for token, weight in self._expand(terms).items():
+            postings = self.db.execute("SELECT doc, tf FROM postings WHERE term = ?", (token,)).fetchall()
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc, tf in postings:
+                norm = K1 * (1 - B + B * docs[doc][1] / avg_length)
+                scores[doc] += weight * idf * tf * (K1 + 1) / (tf + norm)
+
+        prefix = str(Path(scope).resolve()) + os.sep if scope else None
+        ranked = []
+        for doc, score in sorted(scores.items(), key=lambda x: x[1], reverse=True):
+            path = docs[doc][0]
+            if prefix and not path.startswith(prefix):
+                continue
+            ranked.append((Path(path), score))
+            if len(ranked) >= limit:
+                break
+        return ranked
+
+    def stats(self) -> Dict:
+        docs, avg_length = self.db.execute("SELECT COUNT(*), AVG(length) FROM docs").fetchone()
+        terms = self.db.execute("SELECT COUNT(DISTINCT term) FROM postings").fetchone()[0]
+        return {'files': docs, 'terms': terms, 'avg_length': round(avg_length or 0, 1)}
+
+
+def main():
+    """CLI entry point."""
+    Console.header("Context Index")
+
+    args = [a for a in sys.argv[1:] if not a.startswith('-')]
+    root = Path(args[0]) if args else (find_project_root() or Path.cwd())
+
+    index = ContextIndex.for_root(root)
+    if '--stats' not in sys.argv:
+        changed = index.sync(find_python_files(root), scope=root)
+        Console.ok(f"Re-indexed {changed} files")
+
+    stats = index.stats()
+    Console.info(f"Files: {stats['files']}, terms: {stats['terms']}, avg length: {stats['avg_length']}")
+    index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
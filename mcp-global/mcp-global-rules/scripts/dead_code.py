@@ -3,27 +3,53 @@ Dead Code Detector
 ==================
 Find unused functions, classes, imports, and variables in Python code.
 
+Each file is summarized once into its definitions and the names it uses.
+Summaries are cached in .mcp/dead_code/ by path, mtime, size and content
+hash, so a later run re-reads only files that changed. References are then
+resolved across modules through their imports:
+
+- a name used in the module that defines it refers to that definition;
+- a name imported with "from M import name" refers to name in M;
+- an attribute of an imported module (M.name, alias.name) refers to name in M;
+- anything else (builtins, star imports, obj.name) is kept as a bare name
+  and keeps every definition of that name alive.
+
 Usage:
     python dead_code.py [path]
     python -m scripts.dead_code [path]
 """
 
-from collections import defaultdict
-from dataclasses import dataclass, field
+from collections import Counter
+from dataclasses import dataclass, field, asdict
 from pathlib import Path
-from typing import Dict, List, Set, Tuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 import ast
+import hashlib
+import json
+import os
 import sys
 
 from .utils import (
     find_python_files,
     find_project_root,
+    open_cache_db,
     parse_file,
     Console,
     format_as_markdown_table
 )
 
 
+# Bump when FileSummary or the collectors change
+SUMMARY_VERSION = 1
+
+# Known always-used names (builtins, common patterns)
+ALWAYS_USED = {
+    'self', 'cls', 'args', 'kwargs',
+    'main', 'setup', 'teardown',
+    '__all__', '__version__', '__name__', '__main__'
+}
+
+
 @dataclass
 class DeadCodeReport:
     """Report of detected dead code."""
@@ -83,19 +109,23 @@ class DefinitionCollector(ast.NodeVisitor):
         self.functions: Dict[str, int] = {}
         self.classes: Dict[str, int] = {}
         self.variables: Dict[str, int] = {}
+        self.bindings: Dict[str, Tuple[str, str]] = {}  # name -> (module spec, imported name; '' for modules)
         self._in_class = False
 
     def visit_Import(self, node: ast.Import):
         for alias in node.names:
             name = alias.asname or alias.name.split('.')[0]
             self.imports[name] = node.lineno
+            self.bindings[name] = (alias.name if alias.asname else name, '')
         self.generic_visit(node)
 
     def visit_ImportFrom(self, node: ast.ImportFrom):
+        spec = '.' * (node.level or 0) + (node.module or '')
         for alias in node.names:
             if alias.name != '*':
                 name = alias.asname or alias.name
                 self.imports[name] = node.lineno
+                self.bindings[name] = (spec, alias.name)
         self.generic_visit(node)
 
     def visit_FunctionDef(self, node: ast.FunctionDef):
@@ -129,62 +159,249 @@ class DefinitionCollector(ast.NodeVisitor):
 
 
 class UsageCollector(ast.NodeVisitor):
-    """Collect all name usages in a module."""
+    """Count the names and attributes a module reads."""
 
     def __init__(self):
-        self.used_names: Set[str] = set()
+        self.names: Counter = Counter()  # Names read (assignments are not uses)
+        self.attributes: Counter = Counter()  # "base.attr" for attributes of a plain name
+        self.other_attributes: Counter = Counter()  # attr of any other expression
 
     def visit_Name(self, node: ast.Name):
-        self.used_names.add(node.id)
+        if not isinstance(node.ctx, ast.Store):
+            self.names[node.id] += 1
+
+    def visit_AugAssign(self, node: ast.AugAssign):
+        # x += 1 reads x
+        if isinstance(node.target, ast.Name):
+            self.names[node.target.id] += 1
         self.generic_visit(node)
 
     def visit_Attribute(self, node: ast.Attribute):
-        # Track the base name
         if isinstance(node.value, ast.Name):
-            self.used_names.add(node.value.id)
+            self.attributes[f"{node.value.id}.{node.attr}"] += 1
+        else:
+            self.other_attributes[node.attr] += 1
         self.generic_visit(node)
 
-    def visit_Call(self, node: ast.Call):
-        if isinstance(node.func, ast.Name):
-            self.used_names.add(node.func.id)
-        elif isinstance(node.func, ast.Attribute):
-            if isinstance(node.func.value, ast.Name):
-                self.used_names.add(node.func.value.id)
+    def visit_Assign(self, node: ast.Assign):
+        # Names listed in __all__ are exported
+        for target in node.targets:
+            if isinstance(target, ast.Name) and target.id == '__all__' and isinstance(node.value, (ast.List, ast.Tuple)):
+                for elt in node.value.elts:
+                    if isinstance(elt, ast.Constant) and isinstance(elt.value, str):
+                        self.names[elt.value] += 1
         self.generic_visit(node)
 
 
-def analyze_file(path: Path) -> Tuple[Dict[str, Dict[str, int]], Set[str]]:
-    """
-    Analyze a single file for definitions and usages.
+@dataclass
+class FileSummary:
+    """Definitions and uses of one file."""
+    definitions: Dict[str, Dict[str, int]] = field(default_factory=dict)  # kind -> name -> line
+    bindings: Dict[str, Tuple[str, str]] = field(default_factory=dict)  # imported name -> (spec, name)
+    names: Dict[str, int] = field(default_factory=dict)
+    attributes: Dict[str, int] = field(default_factory=dict)
+    other_attributes: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def defined(self) -> Set[str]:
+        return {name for kind in ('functions', 'classes', 'variables')
+                for name in self.definitions.get(kind, {})}
+
+    @property
+    def used_names(self) -> Set[str]:
+        """Names this file reads, including bases of attributes."""
+        return set(self.names) | {ref.split('.', 1)[0] for ref in self.attributes}
 
-    Returns:
-        Tuple of (definitions dict, used names set)
-    """
-    tree = parse_file(path)
-    if tree is None:
-        return {}, set()
 
-    # Collect definitions
+def summarize_tree(tree: ast.Module, path: Path) -> FileSummary:
+    """Definitions and uses of a parsed module."""
     def_collector = DefinitionCollector(path)
     def_collector.visit(tree)
-
-    # Collect usages
     usage_collector = UsageCollector()
     usage_collector.visit(tree)
 
-    definitions = {
-        'imports': def_collector.imports,
-        'functions': def_collector.functions,
-        'classes': def_collector.classes,
-        'variables': def_collector.variables
-    }
+    return FileSummary(
+        definitions={
+            'imports': def_collector.imports,
+            'functions': def_collector.functions,
+            'classes': def_collector.classes,
+            'variables': def_collector.variables
+        },
+        bindings=def_collector.bindings,
+        names=dict(usage_collector.names),
+        attributes=dict(usage_collector.attributes),
+        other_attributes=dict(usage_collector.other_attributes)
+    )
+
+
+def summarize_file(path: Path) -> Optional[FileSummary]:
+    """Summary of a single file, or None if it does not parse."""
+    tree = parse_file(path)
+    if tree is None:
+        return None
+    return summarize_tree(tree, path)
+
+
+class SummaryCache:
+    """FileSummary per file, keyed by path and checked by mtime, size and hash."""
+
+    def __init__(self, cache_dir: Path):
+        self.db = open_cache_db(cache_dir, 'summaries.db', SUMMARY_VERSION)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, digest TEXT, summary TEXT)"
+        )
+        self.db.commit()
+
+    @classmethod
+    def for_root(cls, root: Path) -> "SummaryCache":
+        """Cache stored in the project's .mcp directory."""
+        project = find_project_root(root) or Path(root)
+        return cls(project / '.mcp' / 'dead_code')
+
+    def summaries(self, paths: Iterable[Path]) -> Tuple[Dict[Path, FileSummary], int]:
+        """
+        Summaries of paths (files that do not parse are left out), re-reading
+        only files whose mtime/size changed and whose contents hash differently.
+        Returns the summaries and the number of files summarized anew.
+        """
+        known = {path: (mtime, size, digest, summary) for path, mtime, size, digest, summary in
+                 self.db.execute("SELECT path, mtime_ns, size, digest, summary FROM files")}
+        result: Dict[Path, FileSummary] = {}
+        rows, touched, computed = [], [], 0
+
+        for path in paths:
+            key = str(Path(path).resolve())
+            entry = known.get(key)
+            try:
+                st = os.stat(key)
+            except OSError:
+                continue
+            if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+                summary = _load_summary(entry[3])
+            else:
+                try:
+                    with open(key, 'rb') as f:
+                        digest = hashlib.sha1(f.read()).hexdigest()
+                except OSError:
+                    continue
+                if entry and entry[2] == digest:
+                    touched.append((st.st_mtime_ns, key))
+                    summary = _load_summary(entry[3])
+                else:
+                    summary = summarize_file(Path(path))
+                    computed += 1
+                    rows.append((key, st.st_mtime_ns, st.st_size, digest,
+                                 json.dumps(asdict(summary)) if summary else ''))
+            if summary is not None:
+                result[path] = summary
+
+        if rows or touched:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO files (path, mtime_ns, size, digest, summary) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            self.db.executemany("UPDATE files SET mtime_ns = ? WHERE path = ?", touched)
+            self.db.commit()
+        return result, computed
+
+    def prune(self) -> int:
+        """Drop entries for files that no longer exist."""
+        gone = [(p,) for (p,) in self.db.execute("SELECT path FROM files") if not os.path.exists(p)]
+        self.db.executemany("DELETE FROM files WHERE path = ?", gone)
+        self.db.commit()
+        return len(gone)
+
+    def close(self):
+        self.db.close()
+
+
+def _load_summary(data: str) -> Optional[FileSummary]:
+    if not data:
+        return None
+    summary = FileSummary(**json.loads(data))
+    summary.bindings = {name: tuple(binding) for name, binding in summary.bindings.items()}
+    return summary
+
+
+class ReferenceIndex:
+    """
+    Project-wide reference counts: per (file, name) for references resolved
+    to a module, and per bare name for those that could not be.
+    """
 
-    return definitions, usage_collector.used_names
+    def __init__(self, summaries: Dict[str, FileSummary]):
+        from .impact import DependencyGraph
+
+        # Module resolution is shared with the impact graph
+        self.graph = DependencyGraph()
+        for file_key in summaries:
+            self.graph.files[file_key] = (0, 0)
+        self.graph.link()
+
+        self.resolved: Counter = Counter()  # (file key, name) -> references
+        self.unresolved: Counter = Counter()  # name -> references
+        for file_key, summary in summaries.items():
+            self._add(file_key, summary)
+
+    def _module(self, spec: str, file_key: str) -> Optional[str]:
+        return self.graph.resolve(spec, file_key) if spec else None
+
+    def _add(self, file_key: str, summary: FileSummary):
+        defined = summary.defined
+        is_package = Path(file_key).name == '__init__.py'
+
+        for name, count in summary.names.items():
+            if name in defined:
+                self.resolved[(file_key, name)] += count
+            elif name in summary.bindings:
+                self._add_import_use(file_key, summary.bindings[name], count)
+            else:
+                self.unresolved[name] += count
+
+        for ref, count in summary.attributes.items():
+            base, attr = ref.split('.', 1)
+            binding = summary.bindings.get(base)
+            target = None
+            if binding:
+                spec, imported = binding
+                # import pkg.mod as alias / from pkg import mod
+                if imported:
+                    spec = spec + imported if spec.endswith('.') else f"{spec}.{imported}"
+                target = self._module(spec, file_key)
+            if target:
+                self.resolved[(target, attr)] += count
+            else:
+                self.unresolved[attr] += count
+
+        for attr, count in summary.other_attributes.items():
+            self.unresolved[attr] += count
+
+        if is_package:
+            # Re-exports from a package make the names part of its interface
+            for spec, imported in summary.bindings.values():
+                if imported:
+                    self._add_import_use(file_key, (spec, imported), 1)
+
+    def _add_import_use(self, file_key: str, binding: Tuple[str, str], count: int):
+        spec, imported = binding
+        if not imported:
+            return  # A module, not a definition
+        target = self._module(spec, file_key)
+        if target:
+            self.resolved[(target, imported)] += count
+        else:
+            # Outside the project, or not resolvable: keep every definition alive
+            self.unresolved[imported] += count
+
+    def references(self, file_key: str, name: str) -> int:
+        """References to the definition of name in file_key."""
+        return self.resolved[(file_key, name)] + self.unresolved[name]
 
 
 def detect_dead_code(
     root: Path,
-    exclude_patterns: List[str] = None
+    exclude_patterns: List[str] = None,
+    cache: Optional[SummaryCache] = None
 ) -> DeadCodeReport:
     """
     Detect dead code in a Python project.
@@ -192,64 +409,54 @@ def detect_dead_code(
     Args:
         root: Root directory to analyze
         exclude_patterns: Patterns to exclude
+        cache: Summary cache (default: the project's); only changed files are re-read
 
     Returns:
         DeadCodeReport with findings
     """
     report = DeadCodeReport()
-
-    # Collect all definitions and usages across the project
-    all_definitions: Dict[Path, Dict[str, Dict[str, int]]] = {}
-    all_usages: Set[str] = set()
-
-    # Known always-used names (builtins, common patterns)
-    always_used = {
-        'self', 'cls', 'args', 'kwargs',
-        'main', 'setup', 'teardown',
-        '__all__', '__version__', '__name__', '__main__'
-    }
-    all_usages.update(always_used)
+    root = Path(root)
 
     Console.info(f"Scanning for Python files in {root}...")
 
     files = list(find_python_files(root, exclude_patterns))
     Console.info(f"Found {len(files)} Python files")
 
-    for path in files:
-        definitions, usages = analyze_file(path)
-        if definitions:
-            all_definitions[path] = definitions
-            all_usages.update(usages)
+    own_cache = cache is None
+    if own_cache:
+        cache = SummaryCache.for_root(root)
+    try:
+        summaries, computed = cache.summaries(files)
+    finally:
+        if own_cache:
+            cache.close()
+    Console.info(f"Summarized {computed} changed files")
+
+    by_key: Dict[str, FileSummary] = {}
+    for path, summary in summaries.items():
+        file_key = str(path.relative_to(root)) if path.is_relative_to(root) else str(path)
+        by_key[file_key] = summary
 
     Console.info("Analyzing for dead code...")
+    index = ReferenceIndex(by_key)
 
-    # Check each definition against all usages
-    for path, definitions in all_definitions.items():
-        relative_path = path.relative_to(root) if path.is_relative_to(root) else path
+    for file_key, summary in by_key.items():
+        relative_path = Path(file_key)
+        definitions = summary.definitions
 
-        # Check imports (only within the same file typically)
+        # Imports are checked within the file
+        used_here = summary.used_names
         for name, lineno in definitions.get('imports', {}).items():
-            file_defs, file_usages = analyze_file(path)
-            if name not in file_usages and name not in always_used:
+            if name not in used_here and name not in ALWAYS_USED:
                 report.unused_imports.append((relative_path, lineno, name))
 
-        # Check functions (project-wide)
-        for name, lineno in definitions.get('functions', {}).items():
-            if name not in all_usages:
-                report.unused_functions.append((relative_path, lineno, name))
-
-        # Check classes (project-wide)
-        for name, lineno in definitions.get('classes', {}).items():
-            if name not in all_usages:
-                report.unused_classes.append((relative_path, lineno, name))
-
-        # Check variables (file-local typically)
-        for name, lineno in definitions.get('variables', {}).items():
-            file_defs, file_usages = analyze_file(path)
-            # Variables should be used at least twice (definition + usage)
-            # Count occurrences in source
-            if name not in file_usages:
-                report.unused_variables.append((relative_path, lineno, name))
+        # Functions, classes and variables are checked project-wide
+        for kind, found in (('functions', report.unused_functions),
+                            ('classes', report.unused_classes),
+                            ('variables', report.unused_variables)):
+            for name, lineno in definitions.get(kind, {}).items():
+                if name not in ALWAYS_USED and not index.references(file_key, name):
+                    found.append((relative_path, lineno, name))
 
     return report
 
@@ -3,6 +3,11 @@ Dependency Analyzer
 ===================
 Analyze and visualize project dependencies, detect circular imports.
 
+Imports are resolved to files with the shared import graph (see impact.py),
+and circular imports are its strongly connected components, each reported
+as a full cycle path. Large graphs are drawn condensed: every cycle becomes
+one node.
+
 Usage:
     python deps.py [path] [--output deps.md]
     python -m scripts.deps [path]
@@ -15,6 +20,7 @@ from typing import Dict, List, Set, Optional, Tuple
 import ast
 import sys
 
+from .impact import build_dependency_graph, cycle_path, strongly_connected_components
 from .utils import (
     find_python_files,
     find_project_root,
@@ -46,7 +52,9 @@ class DependencyReport:
     modules: Dict[str, DependencyInfo] = field(default_factory=dict)
     external_deps: Set[str] = field(default_factory=set)
     internal_deps: Dict[str, Set[str]] = field(default_factory=lambda: defaultdict(set))
-    circular_deps: List[Tuple[str, str]] = field(default_factory=list)
+    module_graph: Dict[str, Set[str]] = field(default_factory=lambda: defaultdict(set))  # Resolved module -> modules
+    components: List[List[str]] = field(default_factory=list)  # Strongly connected components of module_graph
+    circular_deps: List[List[str]] = field(default_factory=list)  # Cycle paths, first module not repeated
     missing_deps: List[Tuple[str, str]] = field(default_factory=list)
 
 
@@ -184,30 +192,41 @@ def analyze_dependencies(
                 else:
                     report.external_deps.add(base_dep)
 
+    # Resolved module graph, from the shared import graph
+    graph = build_dependency_graph(root)
+    for file_key, targets in graph.depends_on.items():
+        module = path_to_module_name(root / file_key, root)
+        if module not in report.modules:
+            continue
+        for target in targets:
+            dep = path_to_module_name(root / target, root)
+            if dep in report.modules:
+                report.module_graph[module].add(dep)
+
     Console.info("Detecting circular dependencies...")
 
-    # Detect circular dependencies
-    for module, deps in report.internal_deps.items():
-        base_module = module.split('.')[0]
-        for dep in deps:
-            base_dep = dep.split('.')[0]
-            # Check if the dependency also imports this module
-            for other_module, other_deps in report.internal_deps.items():
-                other_base = other_module.split('.')[0]
-                if other_base == base_dep:
-                    for other_dep in other_deps:
-                        if other_dep.split('.')[0] == base_module:
-                            pair = tuple(sorted([base_module, base_dep]))
-                            if pair not in report.circular_deps:
-                                report.circular_deps.append(pair)
+    report.components = strongly_connected_components(sorted(report.modules), report.module_graph)
+    report.circular_deps = [
+        cycle_path(component, report.module_graph)
+        for component in report.components if len(component) > 1
+    ]
 
     return report
 
 
+def _mermaid_id(index: int) -> str:
+    return f"n{index}"
+
+
 def generate_mermaid_diagram(report: DependencyReport, max_nodes: int = 20) -> str:
     """
     Generate a Mermaid diagram of dependencies.
 
+    Graphs of up to max_nodes modules are drawn module by module, with
+    modules in cycles highlighted. Larger graphs are condensed: each
+    strongly connected component is one node, and the max_nodes components
+    with the most connections (cycles first) are drawn.
+
     Args:
         report: DependencyReport
         max_nodes: Maximum number of nodes to show
@@ -217,34 +236,52 @@ def generate_mermaid_diagram(report: DependencyReport, max_nodes: int = 20) -> s
     """
     lines = ["```mermaid", "graph LR"]
 
-    # Track nodes we've added
-    nodes_added = set()
-    edges_added = set()
-
-    # Add internal dependencies
-    for module, deps in list(report.internal_deps.items())[:max_nodes]:
-        base_module = module.split('.')[0]
-
-        if base_module not in nodes_added:
-            lines.append(f'    {base_module}["{base_module}"]')
-            nodes_added.add(base_module)
-
-        for dep in list(deps)[:5]:  # Limit edges per node
-            base_dep = dep.split('.')[0]
-
-            if base_dep not in nodes_added and len(nodes_added) < max_nodes:
-                lines.append(f'    {base_dep}["{base_dep}"]')
-                nodes_added.add(base_dep)
-
-            edge = (base_module, base_dep)
-            if edge not in edges_added and base_dep in nodes_added:
-                lines.append(f'    {base_module} --> {base_dep}')
-                edges_added.add(edge)
-
-    # Highlight circular dependencies
-    for mod1, mod2 in report.circular_deps:
-        if mod1 in nodes_added and mod2 in nodes_added:
-            lines.append(f'    {mod1} <-.->|circular| {mod2}')
+    components = report.components or [[m] for m in sorted(report.modules)]
+    component_of = {module: i for i, component in enumerate(components) for module in component}
+    edges: Dict[int, Set[int]] = defaultdict(set)
+    for module, deps in report.module_graph.items():
+        for dep in deps:
+            a, b = component_of.get(module), component_of.get(dep)
+            if a is not None and b is not None and a != b:
+                edges[a].add(b)
+
+    condensed = len(report.modules) > max_nodes
+    if condensed:
+        # One node per component; keep the most connected ones
+        degree: Dict[int, int] = defaultdict(int)
+        for a, targets in edges.items():
+            degree[a] += len(targets)
+            for b in targets:
+                degree[b] += 1
+        ranked = sorted(range(len(components)),
+                        key=lambda i: (len(components[i]) == 1, -degree[i], components[i][0]))
+        shown = [i for i in ranked if degree[i] or len(components[i]) > 1][:max_nodes]
+        for i in shown:
+            members = components[i]
+            label = members[0] if len(members) == 1 else f"cycle: {len(members)} modules<br/>{', '.join(members[:3])}"
+            if len(members) > 3:
+                label += ", ..."
+            lines.append(f'    {_mermaid_id(i)}["{label}"]')
+        kept = set(shown)
+        for a in shown:
+            for b in sorted(edges.get(a, ())):
+                if b in kept:
+                    lines.append(f'    {_mermaid_id(a)} --> {_mermaid_id(b)}')
+        for i in shown:
+            if len(components[i]) > 1:
+                lines.append(f'    style {_mermaid_id(i)} stroke:#d33,stroke-width:2px')
+    else:
+        modules = sorted(report.modules)
+        ids = {module: _mermaid_id(i) for i, module in enumerate(modules)}
+        for module in modules:
+            lines.append(f'    {ids[module]}["{module}"]')
+        for module in modules:
+            for dep in sorted(report.module_graph.get(module, ())):
+                in_cycle = component_of[module] == component_of[dep]
+                lines.append(f'    {ids[module]} {"-.->|circular|" if in_cycle else "-->"} {ids[dep]}')
+        for cycle in report.circular_deps:
+            for module in cycle:
+                lines.append(f'    style {ids[module]} stroke:#d33,stroke-width:2px')
 
     lines.append("```")
     return "\n".join(lines)
@@ -280,15 +317,20 @@ def format_report_markdown(report: DependencyReport) -> str:
         lines.extend([
             "## Circular Dependencies [WARNING]",
             "",
-            "The following modules have circular imports:",
+            "The following modules import each other in a cycle:",
             "",
         ])
-        for mod1, mod2 in report.circular_deps:
-            lines.append(f"- `{mod1}` <-> `{mod2}`")
+        components = [c for c in report.components if len(c) > 1]
+        for cycle, component in zip(report.circular_deps, components):
+            line = "- " + " -> ".join(f"`{m}`" for m in cycle + cycle[:1])
+            others = [m for m in component if m not in cycle]
+            if others:
+                line += f" (same cycle group: {', '.join(f'`{m}`' for m in others)})"
+            lines.append(line)
         lines.append("")
 
     # Dependency graph
-    if report.internal_deps:
+    if report.module_graph:
         lines.extend([
             "## Dependency Graph",
             "",
@@ -16,7 +16,7 @@ import json
 import re
 import sys
 
-from .utils import Console, find_python_files, find_project_root
+from .utils import Console, find_python_files, find_project_root, parse_file
 
 
 @dataclass
@@ -29,28 +29,21 @@ class DocItem:
     full_text: str = ""
 
 
-def extract_module_docstring(file_path: Path) -> Optional[str]:
-    """Extract module docstring from a Python file."""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            source = f.read()
-        tree = ast.parse(source)
-        return ast.get_docstring(tree)
-    except Exception:
-        return None
-
-
 def extract_docstrings(file_path: Path) -> List[DocItem]:
     """Extract all docstrings from a file."""
     docs = []
 
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            source = f.read()
-        tree = ast.parse(source)
-    except Exception:
+    tree = parse_file(file_path)
+    if tree is None:
         return docs
 
+    return docstrings_from_tree(tree, file_path)
+
+
+def docstrings_from_tree(tree: ast.Module, file_path: Path) -> List[DocItem]:
+    """Extract all docstrings from an already parsed file."""
+    docs = []
+
     # Module docstring
     module_doc = ast.get_docstring(tree)
     if module_doc:
@@ -88,12 +81,14 @@ def extract_docstrings(file_path: Path) -> List[DocItem]:
     return docs
 
 
+README_NAMES = ['README', 'README.md', 'README.rst', 'README.txt', 'DOCUMENTATION.md']
+
+
 def find_readme_files(root: Path) -> List[Path]:
     """Find README files in project."""
     readmes = []
-    patterns = ['README', 'README.md', 'README.rst', 'README.txt', 'DOCUMENTATION.md']
 
-    for pattern in patterns:
+    for pattern in README_NAMES:
         for readme in root.rglob(pattern):
             if '.git' not in str(readme) and 'node_modules' not in str(readme):
                 readmes.append(readme)
@@ -134,6 +129,19 @@ def index_documentation(root: Path = None) -> Dict:
 
     Console.info("Indexing documentation...")
 
+    readmes = [index_readme(readme) for readme in find_readme_files(root)]
+
+    # Index Python docstrings
+    exclude = ['node_modules', 'venv', '.venv', '__pycache__', '.git', 'vendor']
+    docs = []
+    for file_path in find_python_files(root, exclude):
+        docs.extend(extract_docstrings(file_path))
+
+    return build_index(root, readmes, docs)
+
+
+def build_index(root: Path, readmes: List[Optional[DocItem]], docs: List[DocItem]) -> Dict:
+    """Build the documentation index from README and docstring items and save it."""
     index = {
         "total_items": 0,
         "by_type": {"readme": 0, "module": 0, "class": 0, "function": 0},
@@ -141,8 +149,7 @@ def index_documentation(root: Path = None) -> Dict:
     }
 
     # Index READMEs
-    for readme in find_readme_files(root):
-        item = index_readme(readme)
+    for item in readmes:
         if item:
             index["items"].append({
                 "type": item.type,
@@ -154,18 +161,15 @@ def index_documentation(root: Path = None) -> Dict:
             index["total_items"] += 1
 
     # Index Python docstrings
-    exclude = ['node_modules', 'venv', '.venv', '__pycache__', '.git', 'vendor']
-    for file_path in find_python_files(root, exclude):
-        docs = extract_docstrings(file_path)
-        for item in docs:
-            index["items"].append({
-                "type": item.type,
-                "name": item.name,
-                "path": str(item.path),
-                "summary": item.summary
-            })
-            index["by_type"][item.type] += 1
-            index["total_items"] += 1
+    for item in docs:
+        index["items"].append({
+            "type": item.type,
+            "name": item.name,
+            "path": str(item.path),
+            "summary": item.summary
+        })
+        index["by_type"][item.type] += 1
+        index["total_items"] += 1
 
     # Save index
     index_path = root / '.mcp' / 'doc_index.json'
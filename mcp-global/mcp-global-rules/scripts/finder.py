@@ -3,6 +3,9 @@ Smart File Finder
 =================
 Find files by natural language queries and patterns.
 
+Function, class and import matches come from the symbol index
+(symbol_index.py), so source files are only read for the content fallback.
+
 Usage:
     python finder.py "authentication" [path]
     python -m scripts.finder "database handler"
@@ -14,12 +17,10 @@ from typing import Dict, List, Optional, Tuple
 import re
 import sys
 
+from .symbol_index import SymbolIndex
 from .utils import (
     find_python_files,
     find_project_root,
-    parse_file,
-    analyze_module,
-    run_git_command,
     Console
 )
 
@@ -79,6 +80,15 @@ class SearchResults:
         return "\n".join(lines)
 
 
+# Result group for each symbol kind in the index
+SYMBOL_MATCH_TYPES = {
+    'function': 'function',
+    'method': 'function',
+    'class': 'class',
+    'import': 'import',
+}
+
+
 # Query expansion patterns
 QUERY_EXPANSIONS = {
     'auth': ['authentication', 'authorize', 'authorization', 'login', 'logout'],
@@ -144,68 +154,6 @@ def search_file_content(
     return matches
 
 
-def search_module_structure(
-    path: Path,
-    terms: List[str]
-) -> List[SearchResult]:
-    """Search module functions and classes."""
-    results = []
-
-    module = analyze_module(path)
-    if module is None:
-        return results
-
-    # Search functions
-    for func in module.functions:
-        name_lower = func.name.lower()
-        score = sum(2.0 for term in terms if term in name_lower)
-
-        # Check docstring
-        if func.docstring:
-            doc_lower = func.docstring.lower()
-            score += sum(0.5 for term in terms if term in doc_lower)
-
-        if score > 0:
-            results.append(SearchResult(
-                path=path,
-                score=score,
-                match_type='function',
-                context=f"def {func.name}(): {func.docstring or ''}",
-                line=func.lineno
-            ))
-
-    # Search classes
-    for cls in module.classes:
-        name_lower = cls.name.lower()
-        score = sum(2.0 for term in terms if term in name_lower)
-
-        if cls.docstring:
-            doc_lower = cls.docstring.lower()
-            score += sum(0.5 for term in terms if term in doc_lower)
-
-        if score > 0:
-            results.append(SearchResult(
-                path=path,
-                score=score,
-                match_type='class',
-                context=f"class {cls.name}: {cls.docstring or ''}",
-                line=cls.lineno
-            ))
-
-    # Search imports
-    for imp in module.imports:
-        if any(term in imp.lower() for term in terms):
-            results.append(SearchResult(
-                path=path,
-                score=1.0,
-                match_type='import',
-                context=f"import {imp}",
-                line=1
-            ))
-
-    return results
-
-
 def find_files(
     query: str,
     root: Path,
@@ -220,7 +168,9 @@ def find_files(
     Console.info(f"Terms: {', '.join(terms)}")
 
     files = list(find_python_files(root, exclude_patterns))
-    Console.info(f"Scanning {len(files)} files...")
+    index = SymbolIndex.for_root(root)
+    changed = index.sync(files, scope=root)
+    Console.info(f"Searching {len(files)} files ({changed} re-indexed)...")
 
     all_results = []
 
@@ -235,12 +185,20 @@ def find_files(
                 context=path.name
             ))
 
-        # Module structure search
-        structure_results = search_module_structure(path, terms)
-        all_results.extend(structure_results)
-
-        # Content search (only if not found in structure)
-        if not structure_results:
+    # Symbol search from the index; source files are not opened
+    for hit in index.search(terms, limit=limit * 2, scope=root):
+        all_results.append(SearchResult(
+            path=hit.path,
+            score=hit.score,
+            match_type=SYMBOL_MATCH_TYPES[hit.kind],
+            context=f"{hit.signature}: {hit.summary}" if hit.summary else hit.signature,
+            line=hit.line
+        ))
+    index.close()
+
+    # Content search only when nothing matched by name
+    if not all_results:
+        for path in files:
             content_matches = search_file_content(path, terms)
             for line_num, context, score in content_matches[:3]:  # Limit per file
                 all_results.append(SearchResult(
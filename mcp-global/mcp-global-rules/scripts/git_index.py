@@ -3,21 +3,36 @@ Git History Index
 =================
 Index git commits, blame, and file evolution for AI agents.
 
+Blame is cached per file by blob id and HEAD; edited files re-blame only
+their changed hunks, and several files are blamed concurrently.
+
+Commits are kept in SQLite under .mcp/git_index/ with posting lists per
+file, per author and per message token. The index records the last commit
+it ingested and later updates read only last..HEAD, so history, change
+intent and commit searches are answered without running git unless HEAD
+has moved.
+
 Usage:
     python mcp.py git-history [file]
+    python mcp.py git-history --search <query>
+    python mcp.py git-history --author <name>
     python mcp.py blame [file]
+    python mcp.py git-history --blame <file> [file...]
 """
 
-from dataclasses import dataclass, field, asdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import astuple, dataclass, field, replace
 from datetime import datetime
+from difflib import SequenceMatcher
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+import hashlib
 import json
-import re
 import subprocess
 import sys
 
-from .utils import Console, find_project_root
+from .context_index import tokenize
+from .utils import Console, find_project_root, open_cache_db
 
 
 @dataclass
@@ -68,6 +83,64 @@ def run_git(args: List[str], cwd: Path = None) -> Optional[str]:
         return None
 
 
+# Concurrent git blame processes in bulk mode
+BLAME_WORKERS = 8
+
+# One record per commit: \x1e, header fields split by \x1f, then (with -z)
+# a NUL and the NUL-separated names of the files it changed
+LOG_FORMAT = '%x1e%H%x1f%h%x1f%an%x1f%ae%x1f%aI%x1f%s'
+
+
+def parse_log_record(record: str) -> Optional[Commit]:
+    """Commit from one record of `git log -z --name-only --format=LOG_FORMAT`."""
+    header, _, names = record.partition('\0')
+    parts = header.split('\x1f', 5)
+    if len(parts) < 6:
+        return None
+    commit = Commit(
+        hash=parts[0],
+        short_hash=parts[1],
+        author=parts[2],
+        email=parts[3],
+        date=parts[4],
+        message=parts[5]
+    )
+    commit.files_changed = [name.lstrip('\n') for name in names.split('\0') if name.strip('\n')]
+    return commit
+
+
+def iter_log(args: List[str], cwd: Path = None) -> Iterator[Commit]:
+    """Stream commits from git log, parsing records as output arrives."""
+    try:
+        proc = subprocess.Popen(
+            ['git', 'log', '-z', '--name-only', f'--format={LOG_FORMAT}'] + args,
+            cwd=cwd or Path.cwd(),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+    except OSError:
+        return
+
+    buffer = b''
+    try:
+        while True:
+            chunk = proc.stdout.read(65536)
+            if not chunk:
+                break
+            records = (buffer + chunk).split(b'\x1e')
+            buffer = records.pop()
+            for record in records:
+                commit = parse_log_record(record.decode('utf-8', errors='replace')) if record else None
+                if commit:
+                    yield commit
+        commit = parse_log_record(buffer.decode('utf-8', errors='replace')) if buffer else None
+        if commit:
+            yield commit
+    finally:
+        proc.stdout.close()
+        proc.wait()
+
+
 def get_commits(
     path: Path = None,
     since: str = None,
@@ -75,12 +148,7 @@ def get_commits(
     file_path: Path = None
 ) -> List[Commit]:
     """Get list of commits."""
-    args = [
-        'log',
-        f'-{limit}',
-        '--format=%H|%h|%an|%ae|%aI|%s',
-        '--name-only'
-    ]
+    args = [f'-{limit}']
 
     if since:
         args.append(f'--since={since}')
@@ -88,80 +156,98 @@ def get_commits(
     if file_path:
         args.extend(['--', str(file_path)])
 
-    output = run_git(args, path)
-    if not output:
-        return []
-
-    commits = []
-    current_commit = None
-
-    for line in output.split('\n'):
-        if '|' in line and line.count('|') >= 5:
-            # Commit line
-            parts = line.split('|', 5)
-            if current_commit:
-                commits.append(current_commit)
-
-            current_commit = Commit(
-                hash=parts[0],
-                short_hash=parts[1],
-                author=parts[2],
-                email=parts[3],
-                date=parts[4],
-                message=parts[5] if len(parts) > 5 else ""
-            )
-        elif line.strip() and current_commit:
-            # File changed
-            current_commit.files_changed.append(line.strip())
-
-    if current_commit:
-        commits.append(current_commit)
-
-    return commits
+    return list(iter_log(args, path))
 
 
-def get_blame(file_path: Path, root: Path = None) -> List[BlameInfo]:
-    """Get blame info for file."""
-    root = root or find_project_root() or Path.cwd()
-
-    args = ['blame', '--line-porcelain', str(file_path)]
-    output = run_git(args, root)
-
-    if not output:
-        return []
-
+def parse_blame(output: str) -> List[BlameInfo]:
+    """Lines from `git blame --line-porcelain` output, numbered as in the file."""
     blame_info = []
     current = {}
-    line_num = 0
 
     for line in output.split('\n'):
-        if line.startswith('author '):
-            current['author'] = line[7:]
-        elif line.startswith('author-time '):
-            ts = int(line[12:])
-            current['date'] = datetime.fromtimestamp(ts).isoformat()
-        elif line.startswith('\t'):
-            line_num += 1
+        if line.startswith('\t'):
             if 'commit_hash' in current:
                 blame_info.append(BlameInfo(
-                    line_num=line_num,
-                    commit_hash=current.get('commit_hash', ''),
+                    line_num=current['line_num'],
+                    commit_hash=current['commit_hash'],
                     author=current.get('author', 'Unknown'),
                     date=current.get('date', ''),
                     content=line[1:]  # Remove tab
                 ))
             current = {}
-        elif len(line) == 40 and all(c in '0123456789abcdef' for c in line[:40].split()[0]):
-            current['commit_hash'] = line.split()[0]
+        elif line.startswith('author '):
+            current['author'] = line[7:]
+        elif line.startswith('author-time '):
+            ts = int(line[12:])
+            current['date'] = datetime.fromtimestamp(ts).isoformat()
+        else:
+            # Header: <sha> <original line> <final line> [<lines in group>]
+            parts = line.split(' ')
+            if len(parts) >= 3 and len(parts[0]) == 40 and all(c in '0123456789abcdef' for c in parts[0]):
+                current['commit_hash'] = parts[0]
+                current['line_num'] = int(parts[2])
 
     return blame_info
 
 
+def run_blame(
+    file_path: str,
+    cwd: Path,
+    ranges: List[Tuple[int, int]] = None
+) -> Optional[List[BlameInfo]]:
+    """Blame the working copy of a file, optionally only the given line ranges."""
+    args = ['git', 'blame', '--line-porcelain']
+    for start, end in ranges or []:
+        args.append(f'-L{start},{end}')
+    try:
+        result = subprocess.run(args + ['--', file_path], capture_output=True, cwd=cwd)
+    except OSError:
+        return None
+    if result.returncode != 0:
+        return None
+    return parse_blame(result.stdout.decode('utf-8', errors='replace'))
+
+
+def get_blame(file_path: Path, root: Path = None) -> List[BlameInfo]:
+    """Get blame info for file."""
+    root = root or find_project_root() or Path.cwd()
+    return get_blames([file_path], root).get(str(file_path), [])
+
+
+def get_blames(
+    file_paths: List[Path],
+    root: Path = None,
+    workers: int = BLAME_WORKERS
+) -> Dict[str, List[BlameInfo]]:
+    """
+    Blame several files, keyed by the paths as given. Cached blame is
+    reused while a file and HEAD are unchanged; the rest are blamed
+    concurrently.
+    """
+    root = root or find_project_root() or Path.cwd()
+
+    index = open_index(root)
+    if index is not None:
+        resolved = {str(path): _resolve(path, root) for path in file_paths}
+        blamed = index.blame_files(list(resolved.values()), workers)
+        index.close()
+        return {name: blamed.get(path, []) for name, path in resolved.items()}
+
+    return {str(path): run_blame(str(path), root) or [] for path in file_paths}
+
+
 def get_file_history(file_path: Path, root: Path = None) -> FileHistory:
     """Get complete history of a file."""
     root = root or find_project_root() or Path.cwd()
 
-    commits = get_commits(root, file_path=file_path)
+    commits = []
+    index = open_index(root)
+    if index is not None:
+        commits = index.file_history(_resolve(file_path, root))
+        index.close()
+    # The index only covers its since window; older files need full history
+    if not commits:
+        commits = get_commits(root, file_path=file_path)
 
     authors = list(set(c.author for c in commits))
 
@@ -199,80 +285,405 @@ def search_commits(query: str, root: Path = None, limit: int = 20) -> List[Commi
     """Search commit messages."""
     root = root or find_project_root() or Path.cwd()
 
-    args = [
-        'log',
-        f'-{limit}',
-        '--format=%H|%h|%an|%ae|%aI|%s',
-        f'--grep={query}',
-        '-i'  # Case insensitive
-    ]
+    index = open_index(root)
+    if index is not None:
+        commits = index.search(query, limit)
+        index.close()
+        if commits:
+            return commits
+
+    # Nothing in the indexed window: search the full history
+    return list(iter_log([f'-{limit}', f'--grep={query}', '-i'], root))
+
+
+# ------------------------------------------------------------------
+# Persistent index
+# ------------------------------------------------------------------
+
+# Commit id git blame gives lines that are not committed yet
+UNCOMMITTED = '0' * 40
+
+
+def blob_id(data: bytes) -> str:
+    """Git object id of file contents (what `git hash-object` prints)."""
+    return hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+
+
+def reblame_plan(
+    cached: List[BlameInfo],
+    lines: List[str]
+) -> Tuple[Dict[int, BlameInfo], List[Tuple[int, int]]]:
+    """
+    Carry cached blame over to a file's current lines. Returns blame for the
+    lines that are unchanged and committed (by current line number), and the
+    line ranges that must be blamed again.
+    """
+    kept: Dict[int, BlameInfo] = {}
+    stale: List[int] = []
+    matcher = SequenceMatcher(None, [b.content for b in cached], lines, autojunk=False)
+
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            for offset in range(i2 - i1):
+                info = cached[i1 + offset]
+                line_num = j1 + offset + 1
+                if info.commit_hash == UNCOMMITTED:
+                    stale.append(line_num)  # May have been committed since
+                else:
+                    kept[line_num] = replace(info, line_num=line_num)
+        else:
+            stale.extend(range(j1 + 1, j2 + 1))
+
+    ranges: List[Tuple[int, int]] = []
+    for line_num in stale:
+        if ranges and ranges[-1][1] == line_num - 1:
+            ranges[-1] = (ranges[-1][0], line_num)
+        else:
+            ranges.append((line_num, line_num))
+    return kept, ranges
+
+# Bump when the schema changes; the index is rebuilt
+INDEX_VERSION = 1
+
+DEFAULT_SINCE = "3 months"
+
+
+def find_repo(root: Path) -> Optional[Path]:
+    """Top level of the git work tree containing root, found without running git."""
+    root = Path(root).resolve()
+    for directory in [root, *root.parents]:
+        if (directory / '.git').exists():
+            return directory
+    return None
+
+
+def read_head(repo: Path) -> Optional[str]:
+    """Commit HEAD points at, read from .git directly (None if it cannot be read)."""
+    git_dir = repo / '.git'
+    try:
+        if git_dir.is_file():
+            # Worktree or submodule: .git names the real git directory
+            content = git_dir.read_text(encoding='utf-8').strip()
+            if not content.startswith('gitdir:'):
+                return None
+            git_dir = (repo / content[7:].strip()).resolve()
+
+        head = (git_dir / 'HEAD').read_text(encoding='utf-8').strip()
+        if not head.startswith('ref:'):
+            return head
+        ref = head[4:].strip()
+
+        # Worktrees keep branch refs in the main git directory
+        common = git_dir / 'commondir'
+        if not (git_dir / ref).exists() and common.exists():
+            git_dir = (git_dir / common.read_text(encoding='utf-8').strip()).resolve()
+        if (git_dir / ref).exists():
+            return (git_dir / ref).read_text(encoding='utf-8').strip()
+
+        packed = git_dir / 'packed-refs'
+        if packed.exists():
+            for line in packed.read_text(encoding='utf-8').splitlines():
+                if line.endswith(' ' + ref):
+                    return line.split(' ', 1)[0]
+    except OSError:
+        pass
+    return None
+
+
+def _resolve(file_path: Path, root: Path) -> Path:
+    """File path as git would take it when run from root."""
+    file_path = Path(file_path)
+    if file_path.is_absolute():
+        return file_path
+    if (root / file_path).exists():
+        return root / file_path
+    return Path.cwd() / file_path
+
+
+class GitIndex:
+    """Commits with posting lists by file, author and message token."""
+
+    def __init__(self, index_dir: Path, repo: Path):
+        self.index_dir = Path(index_dir)
+        self.repo = Path(repo).resolve()
+        self.db = open_cache_db(self.index_dir, 'index.db', INDEX_VERSION)
+        self._init_schema()
+
+    @classmethod
+    def for_root(cls, root: Path) -> Optional["GitIndex"]:
+        """Index stored in the project's .mcp directory (None outside a git repo)."""
+        repo = find_repo(root)
+        if repo is None:
+            return None
+        return cls(Path(root) / '.mcp' / 'git_index', repo)
+
+    def _init_schema(self):
+        db = self.db
+        # seq follows history order, so ORDER BY seq DESC is newest first
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS commits ("
+            " seq INTEGER PRIMARY KEY, hash TEXT UNIQUE, short_hash TEXT, author TEXT,"
+            " email TEXT, date TEXT, message TEXT)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS commits_author ON commits (author)")
+        db.execute("CREATE INDEX IF NOT EXISTS commits_email ON commits (email)")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT, seq INTEGER, PRIMARY KEY (path, seq)) WITHOUT ROWID"
+        )
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS terms ("
+            " term TEXT, seq INTEGER, PRIMARY KEY (term, seq)) WITHOUT ROWID"
+        )
+        # Blame of a file's working copy, valid for (blob, head)
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS blame ("
+            " path TEXT PRIMARY KEY, blob TEXT, head TEXT, lines TEXT)"
+        )
+        db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    @property
+    def last_commit(self) -> Optional[str]:
+        """Last commit ingested (the watermark)."""
+        return self._meta('head')
+
+    @property
+    def since(self) -> Optional[str]:
+        """Window the index was first built from."""
+        return self._meta('since')
+
+    def is_current(self) -> bool:
+        """Whether the watermark is still HEAD (checked without running git)."""
+        head = read_head(self.repo)
+        return head is not None and head == self.last_commit
+
+    def update(self, since: str = DEFAULT_SINCE) -> int:
+        """
+        Ingest commits made after the watermark. The first run, a different
+        since, or a watermark no longer in HEAD's history (after a rebase)
+        rebuilds from commits made within since. Returns commits ingested.
+        """
+        if self.since == since and self.is_current():
+            return 0
+
+        head = run_git(['rev-parse', 'HEAD'], self.repo)
+        if not head:
+            return 0
+        last = self.last_commit
+        if self.since == since and last == head:
+            return 0
+
+        incremental = (
+            last is not None and self.since == since
+            and run_git(['merge-base', '--is-ancestor', last, head], self.repo) is not None
+        )
+        if incremental:
+            args = [f'{last}..{head}']
+        else:
+            for table in ('commits', 'files', 'terms'):
+                self.db.execute(f"DELETE FROM {table}")
+            args = [f'--since={since}', head]
+
+        # git log lists newest first; insert oldest first so seq follows history
+        commits = list(iter_log(args, self.repo))
+        for commit in reversed(commits):
+            self._add(commit)
+
+        self._set_meta('head', head)
+        self._set_meta('since', since)
+        self.db.commit()
+        return len(commits)
+
+    def _add(self, commit: Commit):
+        cursor = self.db.execute(
+            "INSERT OR IGNORE INTO commits (hash, short_hash, author, email, date, message)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (commit.hash, commit.short_hash, commit.author, commit.email, commit.date, commit.message)
+        )
+        if not cursor.rowcount:
+            return
+        seq = cursor.lastrowid
+        self.db.executemany("INSERT OR IGNORE INTO files (path, seq) VALUES (?, ?)",
+                            ((path, seq) for path in commit.files_changed))
+        self.db.executemany("INSERT OR IGNORE INTO terms (term, seq) VALUES (?, ?)",
+                            ((term, seq) for term in set(tokenize(commit.message))))
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _commits(self, where: str, params: Iterable, limit: int) -> List[Commit]:
+        rows = self.db.execute(
+            "SELECT hash, short_hash, author, email, date, message FROM commits"
+            f" WHERE {where} ORDER BY seq DESC LIMIT ?",
+            (*params, limit)
+        )
+        return [Commit(*row) for row in rows]
+
+    def file_history(self, file_path: Path, limit: int = 100) -> List[Commit]:
+        """Commits that changed a file, newest first."""
+        try:
+            key = Path(file_path).resolve().relative_to(self.repo).as_posix()
+        except ValueError:
+            return []
+        commits = self._commits("seq IN (SELECT seq FROM files WHERE path = ?)", (key,), limit)
+        for commit in commits:
+            commit.files_changed = [key]
+        return commits
+
+    def by_author(self, author: str, limit: int = 100) -> List[Commit]:
+        """Commits by an author (name or email), newest first."""
+        return self._commits("author = ? OR email = ?", (author, author), limit)
+
+    def search(self, query: str, limit: int = 20) -> List[Commit]:
+        """Commits whose message has, for every query word, a word starting with it."""
+        matched: Optional[Set[int]] = None
+        for term in set(tokenize(query)):
+            seqs = {seq for (seq,) in self.db.execute(
+                "SELECT seq FROM terms WHERE term >= ? AND term < ?", (term, term + '\uffff')
+            )}
+            matched = seqs if matched is None else matched & seqs
+            if not matched:
+                return []
+        if not matched:
+            return []
+        newest = sorted(matched, reverse=True)[:limit]
+        return self._commits(f"seq IN ({','.join('?' * len(newest))})", newest, limit)
+
+    # ------------------------------------------------------------------
+    # Blame
+    # ------------------------------------------------------------------
+
+    def _cached_blame(self, key: str) -> Optional[Tuple[str, str, List[BlameInfo]]]:
+        row = self.db.execute("SELECT blob, head, lines FROM blame WHERE path = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], [BlameInfo(*line) for line in json.loads(row[2])]
+
+    def blame_files(self, file_paths: List[Path], workers: int = BLAME_WORKERS) -> Dict[Path, List[BlameInfo]]:
+        """
+        Blame the working copies of files. A file whose blob and HEAD match
+        the cache is not blamed; one edited, or cached at an earlier commit
+        of the current history, has only its changed hunks re-blamed; the
+        rest are blamed in full, up to workers at a time.
+        """
+        head = read_head(self.repo) or ''
+        results: Dict[Path, List[BlameInfo]] = {}
+        jobs = {}  # path -> (key, blob, kept lines, ranges or None for a full blame)
+
+        for path in file_paths:
+            try:
+                key = Path(path).resolve().relative_to(self.repo).as_posix()
+                with open(path, 'rb') as f:
+                    data = f.read()
+            except (OSError, ValueError):
+                results[path] = []
+                continue
+
+            blob = blob_id(data)
+            cached = self._cached_blame(key)
+            if cached and cached[0] == blob and cached[1] == head:
+                results[path] = cached[2]
+                continue
+
+            if cached and (cached[1] == head or self._has_commit(cached[1])):
+                lines = data.decode('utf-8', errors='replace').splitlines()
+                kept, ranges = reblame_plan(cached[2], lines)
+                if not ranges:
+                    results[path] = [kept[n] for n in sorted(kept)]
+                    self._store_blame(key, blob, head, results[path])
+                    continue
+                jobs[path] = (key, blob, kept, ranges)
+            else:
+                jobs[path] = (key, blob, {}, None)
+
+        if jobs:
+            with ThreadPoolExecutor(max_workers=max(1, min(workers, len(jobs)))) as pool:
+                futures = {
+                    path: pool.submit(run_blame, key, self.repo, ranges)
+                    for path, (key, _, _, ranges) in jobs.items()
+                }
+            for path, future in futures.items():
+                key, blob, kept, _ = jobs[path]
+                blamed = future.result()
+                if blamed is None:
+                    results[path] = []
+                    continue
+                merged = dict(kept)
+                merged.update((info.line_num, info) for info in blamed)
+                results[path] = [merged[n] for n in sorted(merged)]
+                self._store_blame(key, blob, head, results[path])
+
+        self.db.commit()
+        return results
+
+    def _has_commit(self, commit_hash: str) -> bool:
+        """Whether a commit is in the indexed history of HEAD."""
+        row = self.db.execute("SELECT 1 FROM commits WHERE hash = ?", (commit_hash,)).fetchone()
+        return row is not None
+
+    def _store_blame(self, key: str, blob: str, head: str, blame: List[BlameInfo]):
+        self.db.execute(
+            "INSERT OR REPLACE INTO blame (path, blob, head, lines) VALUES (?, ?, ?, ?)",
+            (key, blob, head, json.dumps([astuple(info) for info in blame]))
+        )
 
-    output = run_git(args, root)
-    if not output:
-        return []
+    def stats(self) -> Dict:
+        commits = self.db.execute("SELECT COUNT(*) FROM commits").fetchone()[0]
+        authors = dict(self.db.execute(
+            "SELECT author, COUNT(*) FROM commits GROUP BY author ORDER BY COUNT(*) DESC"
+        ).fetchall())
+        files = self.db.execute("SELECT COUNT(DISTINCT path) FROM files").fetchone()[0]
+        return {
+            'commit_count': commits,
+            'authors': authors,
+            'file_count': files,
+            'last_commit': self.last_commit
+        }
+
+
+def open_index(root: Path) -> Optional[GitIndex]:
+    """
+    The project's git index, caught up with HEAD first if it has moved.
+    None outside a git repository.
+    """
+    index = GitIndex.for_root(root)
+    if index is not None and not index.is_current():
+        index.update(index.since or DEFAULT_SINCE)
+    return index
 
-    commits = []
-    for line in output.split('\n'):
-        if '|' in line:
-            parts = line.split('|', 5)
-            commits.append(Commit(
-                hash=parts[0],
-                short_hash=parts[1],
-                author=parts[2],
-                email=parts[3],
-                date=parts[4],
-                message=parts[5] if len(parts) > 5 else ""
-            ))
-
-    return commits
-
-
-def index_git_history(root: Path = None, since: str = "3 months") -> Dict:
-    """Build git history index."""
+
+def index_git_history(root: Path = None, since: str = DEFAULT_SINCE) -> Dict:
+    """Bring the git history index up to date and return its stats."""
     root = root or find_project_root() or Path.cwd()
 
+    index = GitIndex.for_root(root)
+    if index is None:
+        Console.warn("Not a git repository")
+        return {'commit_count': 0, 'authors': {}, 'file_count': 0, 'last_commit': None}
+
     Console.info(f"Indexing git history (since {since})...")
+    added = index.update(since)
+    stats = index.stats()
+    index.close()
 
-    commits = get_commits(root, since=since, limit=500)
-
-    # Build index
-    index = {
-        "commit_count": len(commits),
-        "authors": {},
-        "files": {},
-        "commits": []
-    }
-
-    for commit in commits:
-        # Track authors
-        if commit.author not in index["authors"]:
-            index["authors"][commit.author] = 0
-        index["authors"][commit.author] += 1
-
-        # Track files
-        for file in commit.files_changed:
-            if file not in index["files"]:
-                index["files"][file] = []
-            index["files"][file].append(commit.short_hash)
-
-        # Store commit (without files to save space)
-        index["commits"].append({
-            "hash": commit.short_hash,
-            "author": commit.author,
-            "date": commit.date,
-            "message": commit.message
-        })
-
-    # Save index
-    index_path = root / '.mcp' / 'git_index.json'
-    index_path.parent.mkdir(parents=True, exist_ok=True)
-
-    with open(index_path, 'w', encoding='utf-8') as f:
-        json.dump(index, f, indent=2)
-
-    Console.ok(f"Indexed {len(commits)} commits from {len(index['authors'])} authors")
+    Console.ok(f"Indexed {added} new commits ({stats['commit_count']} total from {len(stats['authors'])} authors)")
 
-    return index
+    return stats
 
 
 def main():
@@ -283,7 +694,7 @@ def main():
     root = find_project_root() or Path.cwd()
 
     if '--index' in sys.argv:
-        since = "3 months"
+        since = DEFAULT_SINCE
         for i, arg in enumerate(sys.argv):
             if arg == '--since' and i + 1 < len(sys.argv):
                 since = sys.argv[i + 1]
@@ -299,13 +710,23 @@ def main():
             print(f"{commit.short_hash} {commit.message[:60]} ({commit.author})")
         return 0
 
-    if '--blame' in sys.argv and args:
-        file_path = Path(args[0])
-        Console.info(f"Blame: {file_path}")
+    if '--author' in sys.argv and args:
+        index = open_index(root)
+        if index is None:
+            Console.fail("Not a git repository")
+            return 1
+        Console.info(f"Commits by {args[0]}:")
+        for commit in index.by_author(args[0], limit=30):
+            print(f"  {commit.short_hash} {commit.date[:10]} {commit.message[:60]}")
+        index.close()
+        return 0
 
-        blame = get_blame(file_path, root)
-        for info in blame[:30]:
-            print(f"{info.line_num:4d} {info.commit_hash[:7]} {info.author[:15]:15} {info.content[:50]}")
+    if '--blame' in sys.argv and args:
+        blames = get_blames([Path(a) for a in args], root)
+        for name, blame in blames.items():
+            Console.info(f"Blame: {name}")
+            for info in blame[:30]:
+                print(f"{info.line_num:4d} {info.commit_hash[:7]} {info.author[:15]:15} {info.content[:50]}")
         return 0
 
     # Default: show file history
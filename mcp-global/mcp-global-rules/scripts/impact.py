@@ -3,20 +3,28 @@ Impact Analysis
 ================
 Analyze what breaks when code changes.
 
+The graph is saved to .mcp/impact_graph.json with each file's mtime and
+size; later runs re-read only files that changed since. Within a process the
+graph is loaded once per root and shared (deps, architecture and autocontext
+use it too), along with its strongly connected components.
+
 Usage:
     python mcp.py impact [file]
     python mcp.py impact --test [file]  # Show affected tests
+    python mcp.py impact --changed [files...]  # Tests affected by files (default: uncommitted changes)
 """
 
-from collections import defaultdict
+from collections import defaultdict, deque
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 import ast
 import json
+import os
 import sys
 
-from .utils import Console, find_python_files, find_project_root
+from .utils import EXCLUDE_DIRS, EXCLUDE_DIR_SUFFIXES, Console, find_python_files, find_project_root, run_git_command
+from .parse_cache import get_facts, import_specs
 
 
 @dataclass
@@ -56,49 +64,245 @@ class ImpactReport:
         return '\n'.join(lines)
 
 
+def extract_imports(tree: ast.AST) -> List[str]:
+    """Import specs (see parse_cache.import_specs) for a parsed file."""
+    imports = set()
+    for node in ast.walk(tree):
+        imports.update(import_specs(node))
+    return sorted(imports)
+
+
+def module_name(file_key: str) -> str:
+    """Dotted module name of a file path relative to the root (packages drop __init__)."""
+    parts = list(Path(file_key).with_suffix('').parts)
+    if len(parts) > 1 and parts[-1] == '__init__':
+        parts.pop()
+    return '.'.join(parts)
+
+
+def is_test_file(file_key: str) -> bool:
+    """Whether a file looks like a test module."""
+    path = Path(file_key)
+    return (path.name.startswith('test_') or path.stem.endswith('_test')
+            or path.name == 'conftest.py' or any(p in ('test', 'tests') for p in path.parts[:-1]))
+
+
+def strongly_connected_components(nodes: Iterable[str], edges: Dict[str, Set[str]]) -> List[List[str]]:
+    """
+    Strongly connected components of a directed graph (Tarjan, iterative),
+    each sorted. Components come out in reverse topological order: a
+    component is listed after every component it has edges to.
+    """
+    index: Dict[str, int] = {}
+    low: Dict[str, int] = {}
+    stack: List[str] = []
+    on_stack: Set[str] = set()
+    components: List[List[str]] = []
+
+    for start in nodes:
+        if start in index:
+            continue
+        index[start] = low[start] = len(index)
+        stack.append(start)
+        on_stack.add(start)
+        work = [(start, iter(sorted(edges.get(start, ()))))]
+
+        while work:
+            node, children = work[-1]
+            for child in children:
+                if child not in index:
+                    index[child] = low[child] = len(index)
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(sorted(edges.get(child, ())))))
+                    break
+                if child in on_stack:
+                    low[node] = min(low[node], index[child])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(sorted(component))
+
+    return components
+
+
+def cycle_path(component: List[str], edges: Dict[str, Set[str]]) -> List[str]:
+    """
+    A shortest cycle through the first node of a strongly connected
+    component, as the nodes along it (the first node is not repeated).
+    """
+    start, members = component[0], set(component)
+    parents: Dict[str, Optional[str]] = {start: None}
+    queue = deque([start])
+    while queue:
+        node = queue.popleft()
+        for child in sorted(edges.get(node, ())):
+            if child == start:
+                path = [node]
+                while parents[path[-1]] is not None:
+                    path.append(parents[path[-1]])
+                return path[::-1]
+            if child in members and child not in parents:
+                parents[child] = node
+                queue.append(child)
+    return [start]
+
+
+def walk_python_files(root: Path, exclude_patterns: List[str] = None) -> Iterator[Path]:
+    """Python files under root, pruning the directories index-all skips."""
+    if exclude_patterns is not None:
+        yield from find_python_files(root, exclude_patterns)
+        return
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in EXCLUDE_DIRS and not d.endswith(EXCLUDE_DIR_SUFFIXES)]
+        for name in filenames:
+            if name.endswith('.py'):
+                yield Path(dirpath) / name
+
+
 class DependencyGraph:
     """Graph of file dependencies."""
 
     def __init__(self):
         self.imports: Dict[str, Set[str]] = defaultdict(set)  # file -> what it imports
         self.imported_by: Dict[str, Set[str]] = defaultdict(set)  # file -> who imports it
+        self.depends_on: Dict[str, Set[str]] = defaultdict(set)  # file -> files its imports resolve to
         self.module_to_file: Dict[str, str] = {}  # module name -> file path
+        self.files: Dict[str, Tuple[int, int]] = {}  # file -> (mtime_ns, size) when added
+        self._suffixes: Dict[str, List[str]] = defaultdict(list)  # trailing module parts -> modules
+        self._closure: Dict[str, Set[str]] = {}  # memoized transitive dependents
+        self._components: Optional[List[List[str]]] = None  # memoized SCCs
 
     def add_file(self, file_path: Path, root: Path):
         """Add a file's imports to the graph."""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                source = f.read()
-            tree = ast.parse(source)
-        except Exception:
+        facts = get_facts(file_path)
+        if facts is None:
             return
 
+        self.add_module(file_path, root, facts.imports)
+
+    def add_module(self, file_path: Path, root: Path, imports: List[str]):
+        """Register a file and the modules it imports."""
         file_key = str(file_path.relative_to(root))
+        self.remove_file(file_key)
 
-        # Register this module
-        module_name = str(file_path.relative_to(root).with_suffix('')).replace('\\', '.').replace('/', '.')
-        self.module_to_file[module_name] = file_key
+        try:
+            st = os.stat(file_path)
+            self.files[file_key] = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            self.files[file_key] = (0, -1)
+
+        for imp in imports:
+            self.imports[file_key].add(imp)
 
-        # Extract imports
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Import):
-                for alias in node.names:
-                    self.imports[file_key].add(alias.name)
-            elif isinstance(node, ast.ImportFrom):
-                if node.module:
-                    self.imports[file_key].add(node.module)
+    def remove_file(self, file_key: str):
+        """Forget a file; call link() afterwards."""
+        self.files.pop(file_key, None)
+        self.imports.pop(file_key, None)
 
     def build(self, root: Path, exclude_patterns: List[str] = None):
         """Build full dependency graph."""
-        for file_path in find_python_files(root, exclude_patterns):
+        for file_path in walk_python_files(root, exclude_patterns):
             self.add_file(file_path, root)
 
-        # Build reverse mapping
+        self.link()
+
+    def refresh(self, root: Path, exclude_patterns: List[str] = None) -> int:
+        """
+        Re-read files added, changed (by mtime/size) or removed since the
+        graph was built, and relink. Returns the number of files updated.
+        """
+        seen, updated = set(), 0
+        for file_path in walk_python_files(root, exclude_patterns):
+            file_key = str(file_path.relative_to(root))
+            seen.add(file_key)
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                continue
+            if self.files.get(file_key) != (st.st_mtime_ns, st.st_size):
+                self.add_file(file_path, root)
+                updated += 1
+
+        for file_key in [key for key in self.files if key not in seen]:
+            self.remove_file(file_key)
+            updated += 1
+
+        if updated or not self.imported_by:
+            self.link()
+        return updated
+
+    def link(self):
+        """Resolve imports to files and build the reverse mapping."""
+        self.module_to_file.clear()
+        self._suffixes.clear()
+        for file_key in self.files:
+            module = module_name(file_key)
+            self.module_to_file[module] = file_key
+            parts = module.split('.')
+            for i in range(1, len(parts)):
+                self._suffixes['.'.join(parts[i:])].append(module)
+
+        self.imported_by = defaultdict(set)
+        self.depends_on = defaultdict(set)
         for file_key, imports in self.imports.items():
             for imp in imports:
-                # Try to resolve import to file
-                if imp in self.module_to_file:
-                    self.imported_by[self.module_to_file[imp]].add(file_key)
+                target = self.resolve(imp, file_key)
+                if target and target != file_key:
+                    self.imported_by[target].add(file_key)
+                    self.depends_on[file_key].add(target)
+        self._closure.clear()
+        self._components = None
+
+    def resolve(self, spec: str, file_key: str) -> Optional[str]:
+        """
+        File an import spec made in file_key refers to, if it is in the graph.
+
+        Relative specs resolve against the importing file's package. Absolute
+        specs match a module by its full name from the root, or else by its
+        trailing parts (for roots that are not the import root, e.g. src/
+        layouts), preferring the module closest to the importing file.
+        """
+        if spec.startswith('.'):
+            level = len(spec) - len(spec.lstrip('.'))
+            package = module_name(file_key).split('.')
+            if Path(file_key).name != '__init__.py':
+                package = package[:-1]
+            if level - 1 > len(package):
+                return None
+            base = package[:len(package) - (level - 1)]
+            name = '.'.join(base + ([spec[level:]] if spec[level:] else []))
+            return self.module_to_file.get(name)
+
+        if spec in self.module_to_file:
+            return self.module_to_file[spec]
+        candidates = self._suffixes.get(spec)
+        if not candidates:
+            return None
+        if len(candidates) == 1:
+            return self.module_to_file[candidates[0]]
+
+        importer = module_name(file_key).split('.')
+
+        def shared(module: str) -> int:
+            count = 0
+            for a, b in zip(importer, module.split('.')):
+                if a != b:
+                    break
+                count += 1
+            return count
+
+        return self.module_to_file[max(sorted(candidates), key=shared)]
 
     def get_dependents(self, file_path: str) -> Set[str]:
         """Get files that depend on this file."""
@@ -108,39 +312,113 @@ class DependencyGraph:
         """Get files this file depends on."""
         return self.imports.get(file_path, set())
 
-    def get_transitive_dependents(self, file_path: str, visited: Set[str] = None) -> Set[str]:
-        """Get all transitive dependents."""
-        if visited is None:
-            visited = set()
-
-        if file_path in visited:
-            return set()
-
-        visited.add(file_path)
-
-        all_deps = set()
-        direct = self.get_dependents(file_path)
-        all_deps.update(direct)
-
-        for dep in direct:
-            all_deps.update(self.get_transitive_dependents(dep, visited))
-
-        return all_deps
+    def components(self) -> List[List[str]]:
+        """Strongly connected components of the file graph (memoized until the next link())."""
+        if self._components is None:
+            self._components = strongly_connected_components(sorted(self.files), self.depends_on)
+        return self._components
+
+    def cycles(self) -> List[List[str]]:
+        """One import cycle (as a path of files) per component of more than one file."""
+        return [cycle_path(c, self.depends_on) for c in self.components() if len(c) > 1]
+
+    def get_transitive_dependents(self, file_path: str) -> Set[str]:
+        """Get all transitive dependents (breadth-first, memoized until the next link())."""
+        if file_path in self._closure:
+            return self._closure[file_path]
+
+        seen = {file_path}
+        queue = deque([file_path])
+        while queue:
+            for dep in self.imported_by.get(queue.popleft(), ()):
+                if dep not in seen:
+                    seen.add(dep)
+                    queue.append(dep)
+
+        seen.discard(file_path)
+        self._closure[file_path] = seen
+        return seen
+
+    def affected(self, changed: Iterable[str]) -> Dict[str, List[str]]:
+        """
+        Modules and tests affected by changed files (keys relative to the
+        root). Changed test files are included in the tests.
+        """
+        changed = set(changed)
+        modules = set()
+        for file_key in changed:
+            modules |= self.get_transitive_dependents(file_key)
+        modules -= changed
+        return {
+            'changed': sorted(changed),
+            'modules': sorted(f for f in modules if not is_test_file(f)),
+            'tests': sorted(f for f in modules | (changed & self.files.keys()) if is_test_file(f))
+        }
+
+
+# Bump when the saved graph format changes
+GRAPH_VERSION = 2
+
+
+# Graphs already loaded in this process, by resolved root
+_graphs: Dict[str, DependencyGraph] = {}
 
 
 def build_dependency_graph(root: Path = None) -> DependencyGraph:
-    """Build and return dependency graph."""
+    """
+    Return the dependency graph, loading the saved one and re-reading only
+    files that changed since it was saved. The graph is kept for the rest of
+    the process; later calls only refresh it.
+
+    It is saved for the project root, or for any root that has a .mcp
+    directory; graphs of other directories are kept in memory only.
+    """
     root = root or find_project_root() or Path.cwd()
+    key = str(Path(root).resolve())
+    persist = (Path(root) / '.mcp').is_dir() or Path(key) == find_project_root()
+
+    graph = _graphs.get(key)
+    if graph is None and persist:
+        graph = load_impact_graph(root)
+    if graph is None:
+        Console.info("Building dependency graph...")
+        graph = DependencyGraph()
+        graph.build(root)
+        if persist:
+            save_impact_graph(root, graph)
+        Console.ok(f"Indexed {len(graph.files)} files")
+    elif graph.refresh(root) and persist:
+        save_impact_graph(root, graph)
+
+    _graphs[key] = graph
+    return graph
 
-    Console.info("Building dependency graph...")
+
+def load_impact_graph(root: Path) -> Optional[DependencyGraph]:
+    """Saved dependency graph, or None if there is none (or it predates GRAPH_VERSION)."""
+    index_path = root / '.mcp' / 'impact_graph.json'
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get('version') != GRAPH_VERSION:
+        return None
 
     graph = DependencyGraph()
-    exclude = ['node_modules', 'venv', '.venv', '__pycache__', '.git', 'vendor']
-    graph.build(root, exclude)
+    for file_key, (mtime, size) in data.get('files', {}).items():
+        graph.files[file_key] = (mtime, size)
+    for file_key, imports in data.get('imports', {}).items():
+        graph.imports[file_key] = set(imports)
+    graph.link()
+    return graph
 
-    Console.ok(f"Indexed {len(graph.imports)} files")
 
-    return graph
+def _file_key(file_path: Path, root: Path) -> str:
+    try:
+        return str(file_path.resolve().relative_to(root.resolve()))
+    except ValueError:
+        return str(file_path)
 
 
 def analyze_impact(file_path: Path, root: Path = None) -> ImpactReport:
@@ -148,19 +426,15 @@ def analyze_impact(file_path: Path, root: Path = None) -> ImpactReport:
     root = root or find_project_root() or Path.cwd()
 
     graph = build_dependency_graph(root)
+    file_key = _file_key(file_path, root)
 
-    try:
-        file_key = str(file_path.relative_to(root))
-    except ValueError:
-        file_key = str(file_path)
-
-    direct = list(graph.get_dependents(file_key))
+    direct = sorted(graph.get_dependents(file_key))
 
     all_deps = graph.get_transitive_dependents(file_key)
-    indirect = [d for d in all_deps if d not in direct]
+    indirect = sorted(d for d in all_deps if d not in direct)
 
     # Find affected tests
-    tests = [d for d in all_deps if 'test' in d.lower() or d.startswith('tests/')]
+    tests = sorted(d for d in all_deps if is_test_file(d))
 
     return ImpactReport(
         file=file_key,
@@ -171,17 +445,28 @@ def analyze_impact(file_path: Path, root: Path = None) -> ImpactReport:
     )
 
 
-def save_impact_graph(root: Path = None):
-    """Save dependency graph to disk."""
+def affected_by(changed_files: Iterable[Path], root: Path = None) -> Dict[str, List[str]]:
+    """Modules and tests affected by changed files, from the persisted graph."""
     root = root or find_project_root() or Path.cwd()
-
     graph = build_dependency_graph(root)
+    return graph.affected(_file_key(Path(p), root) for p in changed_files)
+
+
+def save_impact_graph(root: Path = None, graph: DependencyGraph = None):
+    """Save dependency graph to disk (building it unless one is given)."""
+    root = root or find_project_root() or Path.cwd()
+
+    if graph is None:
+        graph = DependencyGraph()
+        graph.build(root)
 
     # Convert to serializable format
     data = {
-        "imports": {k: list(v) for k, v in graph.imports.items()},
-        "imported_by": {k: list(v) for k, v in graph.imported_by.items()},
-        "file_count": len(graph.imports)
+        "version": GRAPH_VERSION,
+        "imports": {k: sorted(v) for k, v in graph.imports.items()},
+        "imported_by": {k: sorted(v) for k, v in graph.imported_by.items()},
+        "files": {k: list(v) for k, v in graph.files.items()},
+        "file_count": len(graph.files)
     }
 
     index_path = root / '.mcp' / 'impact_graph.json'
@@ -193,6 +478,18 @@ def save_impact_graph(root: Path = None):
     Console.ok(f"Saved impact graph to {index_path}")
 
 
+def changed_python_files(root: Path) -> List[Path]:
+    """Python files with uncommitted changes (staged, unstaged or untracked)."""
+    toplevel = run_git_command(['rev-parse', '--show-toplevel'], cwd=root)
+    if not toplevel:
+        return []
+    names = set()
+    for args in (['diff', '--name-only', 'HEAD'], ['ls-files', '--others', '--exclude-standard']):
+        output = run_git_command(args, cwd=root) or ''
+        names.update(line for line in output.splitlines() if line.endswith('.py'))
+    return [Path(toplevel) / name for name in sorted(names)]
+
+
 def main():
     """CLI entry point."""
     Console.header("Impact Analysis")
@@ -204,11 +501,25 @@ def main():
         save_impact_graph(root)
         return 0
 
+    if '--changed' in sys.argv:
+        changed = [Path(a) for a in args] or changed_python_files(root)
+        result = affected_by(changed, root)
+        Console.info(f"Changed: {len(result['changed'])} files")
+        print("\n## Affected Modules")
+        for module in result['modules']:
+            print(f"  - {module}")
+        print("\n## Affected Tests")
+        for test in result['tests']:
+            print(f"  - {test}")
+        print(f"\nTotal: {len(result['modules'])} modules, {len(result['tests'])} tests")
+        return 0
+
     if not args:
         Console.info("Usage: python impact.py <file>")
         Console.info("Options:")
         Console.info("  --index    Save dependency graph")
         Console.info("  --test     Show only affected tests")
+        Console.info("  --changed  Modules and tests affected by files (default: uncommitted changes)")
         return 1
 
     file_path = Path(args[0])
@@ -6,99 +6,219 @@ Run all indexes at once for complete codebase intelligence.
 Usage:
     python mcp.py index-all      # Full reindex
     python mcp.py index-all --what  # Show what's indexed
+    python mcp.py index-all --workers 8  # Limit parse processes (default: all cores)
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import ast
 import json
+import os
 import sys
 import time
 
-from .utils import Console, find_project_root
+from .utils import EXCLUDE_DIRS, EXCLUDE_DIR_SUFFIXES, Console, find_project_root, parallel_map
+
+
+# Index names, in the order they are reported
+ALL_INDEXES = ['semantic', 'git', 'todos', 'impact', 'docs', 'config', 'coverage']
+
+
+def walk_project(root: Path) -> Tuple[List[Path], List[Path], List[Path]]:
+    """
+    Walk the tree once.
+    Returns (source files to scan, config files, README files).
+    """
+    from .todo_index import TODO_EXTENSIONS
+    from .config_index import ENV_USAGE_EXTENSIONS, is_config_file
+    from .doc_index import README_NAMES
+
+    source_exts = set(TODO_EXTENSIONS) | set(ENV_USAGE_EXTENSIONS)
+    readme_names = set(README_NAMES)
+    sources, configs, readmes = [], [], []
+
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames
+                             if d not in EXCLUDE_DIRS and not d.endswith(EXCLUDE_DIR_SUFFIXES))
+        directory = Path(dirpath)
+        for name in sorted(filenames):
+            path = directory / name
+            if os.path.splitext(name)[1].lower() in source_exts:
+                sources.append(path)
+            if name in readme_names:
+                readmes.append(path)
+            if is_config_file(name):
+                configs.append(path)
+
+    return sources, configs, readmes
+
+
+def scan_file(path: Path) -> Dict:
+    """
+    Read and parse one file and run every per-file extractor over it.
+    Runs in worker processes, so everything returned must pickle.
+    """
+    from .todo_index import TODO_EXTENSIONS, scan_text
+    from .config_index import ENV_USAGE_EXTENSIONS, find_env_usage
+    from .doc_index import docstrings_from_tree
+    from .impact import extract_imports
+    from .vector_store import extract_chunks
+
+    result = {'path': path, 'todos': [], 'env': [], 'imports': None, 'docs': [], 'chunks': []}
+    try:
+        source = path.read_bytes()
+    except OSError:
+        return result
+    text = source.decode('utf-8', errors='ignore').replace('\r\n', '\n').replace('\r', '\n')
+    ext = path.suffix.lower()
+
+    if ext in TODO_EXTENSIONS:
+        result['todos'] = scan_text(text, path)
+    if ext in ENV_USAGE_EXTENSIONS:
+        result['env'] = sorted(find_env_usage(text))
+    if ext == '.py':
+        result['chunks'] = extract_chunks(path, source)
+        try:
+            tree = ast.parse(text)
+        except (SyntaxError, ValueError):
+            return result
+        result['imports'] = extract_imports(tree)
+        result['docs'] = docstrings_from_tree(tree, path)
 
+    return result
 
-def run_all_indexes(root: Path = None, verbose: bool = True) -> dict:
-    """Run all indexes and return summary."""
-    root = root or find_project_root() or Path.cwd()
 
-    if verbose:
-        Console.header("Full Index Build")
-        Console.info(f"Indexing {root}...")
+def scan_files(paths: List[Path], workers: Optional[int] = None) -> List[Dict]:
+    """Scan files across worker processes (in-process for small trees)."""
+    return parallel_map(scan_file, paths, workers=workers)
 
-    start_time = time.time()
-    results = {}
 
-    # 1. Semantic code index
-    if verbose:
-        Console.info("1/7 Semantic code index...")
-    try:
-        from .vector_store import VectorStore
-        store = VectorStore(root / '.mcp' / 'vector_index')
-        count = store.index_codebase(root)
-        results['semantic'] = {'status': 'ok', 'items': count}
-    except Exception as e:
-        results['semantic'] = {'status': 'error', 'error': str(e)}
+def _git_index(root: Path) -> Dict:
+    from .git_index import index_git_history
+    index = index_git_history(root, since="3 months")
+    return {'status': 'ok', 'commits': index.get('commit_count', 0)}
 
-    # 2. Git history index
-    if verbose:
-        Console.info("2/7 Git history index...")
-    try:
-        from .git_index import index_git_history
-        index = index_git_history(root, since="3 months")
-        results['git'] = {'status': 'ok', 'commits': index.get('commit_count', 0)}
-    except Exception as e:
-        results['git'] = {'status': 'error', 'error': str(e)}
-
-    # 3. TODO/FIXME index
-    if verbose:
-        Console.info("3/7 TODO/FIXME index...")
-    try:
-        from .todo_index import index_todos
-        index = index_todos(root)
-        results['todos'] = {'status': 'ok', 'items': index.get('total', 0)}
-    except Exception as e:
-        results['todos'] = {'status': 'error', 'error': str(e)}
 
-    # 4. Impact graph
-    if verbose:
-        Console.info("4/7 Dependency impact graph...")
+def _coverage_index(root: Path) -> Dict:
     try:
-        from .impact import save_impact_graph
-        save_impact_graph(root)
-        results['impact'] = {'status': 'ok'}
-    except Exception as e:
-        results['impact'] = {'status': 'error', 'error': str(e)}
+        from .coverage_index import index_coverage
+        index = index_coverage(root)
+        return {'status': 'ok', 'files': index.get('total_files', 0)}
+    except Exception:
+        return {'status': 'skipped', 'reason': 'No coverage data'}
 
-    # 5. Documentation index
-    if verbose:
-        Console.info("5/7 Documentation index...")
-    try:
-        from .doc_index import index_documentation
-        index = index_documentation(root)
-        results['docs'] = {'status': 'ok', 'items': index.get('total_items', 0)}
-    except Exception as e:
-        results['docs'] = {'status': 'error', 'error': str(e)}
 
-    # 6. Config index
-    if verbose:
-        Console.info("6/7 Config index...")
+def _timed(fn, *args) -> Tuple[Dict, float]:
+    start = time.perf_counter()
     try:
-        from .config_index import index_configs
-        index = index_configs(root)
-        results['config'] = {'status': 'ok', 'vars': len(index.get('env_vars', {}))}
+        result = fn(*args)
     except Exception as e:
-        results['config'] = {'status': 'error', 'error': str(e)}
+        result = {'status': 'error', 'error': str(e)}
+    return result, round(time.perf_counter() - start, 3)
+
+
+def build_indexes(root: Path, include: Iterable[str] = None, workers: Optional[int] = None,
+                  verbose: bool = True) -> Tuple[Dict, Dict]:
+    """
+    Build the requested indexes (all by default) in one pass over the tree.
+
+    The tree is walked once and every source file is read and parsed once in a
+    process pool; the per-file results are then merged into each index.
+    Git history and coverage do not depend on the walk and run on a side
+    thread meanwhile. Returns (results, timings in seconds per stage).
+    """
+    include = set(include or ALL_INDEXES)
+    results, timings = {}, {}
+
+    side_tasks = {'git': _git_index, 'coverage': _coverage_index}
+    with ThreadPoolExecutor(max_workers=2) as side:
+        futures = {name: side.submit(_timed, fn, root) for name, fn in side_tasks.items() if name in include}
+
+        file_based = include - set(side_tasks)
+        if file_based:
+            start = time.perf_counter()
+            sources, configs, readmes = walk_project(root)
+            timings['walk'] = round(time.perf_counter() - start, 3)
+
+            if not file_based & {'semantic', 'todos', 'impact', 'docs'}:
+                # Config alone only needs env usage from .py/.js/.ts
+                from .config_index import ENV_USAGE_EXTENSIONS
+                sources = [p for p in sources if p.suffix.lower() in ENV_USAGE_EXTENSIONS]
+            if verbose:
+                Console.info(f"Scanning {len(sources)} files with {workers or os.cpu_count() or 1} workers...")
+            start = time.perf_counter()
+            scans = scan_files(sources, workers)
+            timings['scan'] = round(time.perf_counter() - start, 3)
+
+            builders = {
+                'semantic': _build_semantic,
+                'todos': _build_todos,
+                'impact': _build_impact,
+                'docs': _build_docs,
+                'config': _build_config,
+            }
+            for name in ALL_INDEXES:
+                if name in file_based:
+                    if verbose:
+                        Console.info(f"Building {name} index...")
+                    results[name], timings[name] = _timed(builders[name], root, scans, configs, readmes)
+
+        for name, future in futures.items():
+            results[name], timings[name] = future.result()
+
+    return {name: results[name] for name in ALL_INDEXES if name in results}, timings
+
+
+def _build_semantic(root: Path, scans: List[Dict], configs: List[Path], readmes: List[Path]) -> Dict:
+    from .vector_store import VectorStore
+    files = [s['path'] for s in scans if s['path'].suffix == '.py']
+    chunks = [chunk for s in scans for chunk in s['chunks']]
+    store = VectorStore(root / '.mcp' / 'vector_index')
+    return {'status': 'ok', 'items': store.index_chunks(files, chunks)}
+
+
+def _build_todos(root: Path, scans: List[Dict], configs: List[Path], readmes: List[Path]) -> Dict:
+    from .todo_index import build_index
+    index = build_index(root, [todo for s in scans for todo in s['todos']])
+    return {'status': 'ok', 'items': index.get('total', 0)}
+
+
+def _build_impact(root: Path, scans: List[Dict], configs: List[Path], readmes: List[Path]) -> Dict:
+    from .impact import DependencyGraph, save_impact_graph
+    graph = DependencyGraph()
+    for s in scans:
+        if s['imports'] is not None:
+            graph.add_module(s['path'], root, s['imports'])
+    graph.link()
+    save_impact_graph(root, graph)
+    return {'status': 'ok'}
+
+
+def _build_docs(root: Path, scans: List[Dict], configs: List[Path], readmes: List[Path]) -> Dict:
+    from .doc_index import build_index, index_readme
+    items = build_index(root, [index_readme(p) for p in readmes], [doc for s in scans for doc in s['docs']])
+    return {'status': 'ok', 'items': items.get('total_items', 0)}
+
+
+def _build_config(root: Path, scans: List[Dict], configs: List[Path], readmes: List[Path]) -> Dict:
+    from .config_index import build_index
+    env_usage = {str(s['path'].relative_to(root)): s['env'] for s in scans if s['env']}
+    index = build_index(root, configs, env_usage)
+    return {'status': 'ok', 'vars': len(index.get('env_vars', {}))}
+
+
+def run_all_indexes(root: Path = None, verbose: bool = True, workers: Optional[int] = None) -> dict:
+    """Run all indexes and return summary."""
+    root = root or find_project_root() or Path.cwd()
 
-    # 7. Coverage (if available)
     if verbose:
-        Console.info("7/7 Coverage index...")
-    try:
-        from .coverage_index import index_coverage
-        index = index_coverage(root)
-        results['coverage'] = {'status': 'ok', 'files': index.get('total_files', 0)}
-    except Exception as e:
-        results['coverage'] = {'status': 'skipped', 'reason': 'No coverage data'}
+        Console.header("Full Index Build")
+        Console.info(f"Indexing {root}...")
 
+    start_time = time.time()
+    results, timings = build_indexes(root, workers=workers, verbose=verbose)
     elapsed = time.time() - start_time
 
     # Save summary
@@ -106,6 +226,8 @@ def run_all_indexes(root: Path = None, verbose: bool = True) -> dict:
         'timestamp': datetime.utcnow().isoformat() + 'Z',
         'duration_seconds': round(elapsed, 2),
         'root': str(root),
+        'workers': workers or os.cpu_count() or 1,
+        'timings': timings,
         'indexes': results
     }
 
@@ -118,6 +240,8 @@ def run_all_indexes(root: Path = None, verbose: bool = True) -> dict:
     if verbose:
         print("")
         Console.ok(f"Complete in {elapsed:.1f}s")
+        for stage, seconds in timings.items():
+            print(f"  {stage:10} {seconds:.2f}s")
         show_index_status(root)
 
     return summary
@@ -133,7 +257,7 @@ def show_index_status(root: Path = None):
 
     indexes = [
         ('vector_index', 'Semantic Code', 'chunks.json'),
-        ('git_index.json', 'Git History', None),
+        ('git_index', 'Git History', 'index.db'),
         ('todo_index.json', 'TODOs/FIXMEs', None),
         ('impact_graph.json', 'Impact Graph', None),
         ('doc_index.json', 'Documentation', None),
@@ -164,28 +288,23 @@ def main():
         show_index_status(root)
         return 0
 
+    workers = None
+    if '--workers' in sys.argv:
+        try:
+            workers = int(sys.argv[sys.argv.index('--workers') + 1])
+        except (IndexError, ValueError):
+            Console.fail("--workers needs a number")
+            return 1
+
     if '--quick' in sys.argv:
         # Quick mode: only semantic + todos
         Console.header("Quick Index")
-
-        try:
-            from .vector_store import VectorStore
-            store = VectorStore(root / '.mcp' / 'vector_index')
-            store.index_codebase(root)
-        except Exception:
-            pass
-
-        try:
-            from .todo_index import index_todos
-            index_todos(root)
-        except Exception:
-            pass
-
+        build_indexes(root, include=['semantic', 'todos'], workers=workers)
         Console.ok("Quick index complete")
         return 0
 
     # Full index
-    run_all_indexes(root, verbose=True)
+    run_all_indexes(root, verbose=True, workers=workers)
 
     return 0
 
@@ -3,22 +3,53 @@ Persistent Memory System
 ========================
 Cross-session knowledge base for AI agents.
 
+Memories are stored in knowledge.json; their embeddings are L2-normalized
+float32 rows in embeddings.f32, memory-mapped so recall is one
+matrix-vector product. Access counts from recall are appended to
+access.log in batches and folded into knowledge.json on the next save.
+
 Usage:
     python mcp.py remember "key" "value"
     python mcp.py recall "query"
     python mcp.py forget "key"
 """
 
+from array import array
+from bisect import bisect_right
 from dataclasses import dataclass, field, asdict
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
-import hashlib
+from typing import Dict, List, Optional, Sequence, Tuple
+import atexit
 import json
+import math
+import struct
 import sys
 
-from .embeddings import embed_text, cosine_similarity
-from .utils import Console, find_project_root
+from .embeddings import embed_text
+from .utils import Console
+
+# Try numpy
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+# embeddings.f32: header (magic, version, dim, unused) then one row per slot
+VECTORS_MAGIC = b'MEMV'
+VECTORS_VERSION = 1
+HEADER = struct.Struct('<4sIII')
+
+# Access counts are appended to access.log once this many are pending
+ACCESS_FLUSH_EVERY = 64
+
+# Score weights for recall
+KEY_WEIGHT = 1.0
+VALUE_WEIGHT = 0.5
+TAG_WEIGHT = 0.3  # Per matching tag
+SEMANTIC_WEIGHT = 0.5
 
 
 @dataclass
@@ -30,16 +61,76 @@ class Memory:
     created: str = ""
     updated: str = ""
     access_count: int = 0
-    embedding: List[float] = field(default_factory=list)
+    embedding: List[float] = field(default_factory=list)  # Only set until stored in embeddings.f32
+    slot: int = -1  # Row in embeddings.f32, -1 if none
 
     def to_dict(self) -> dict:
-        return asdict(self)
+        data = asdict(self)
+        del data['embedding']
+        return data
 
     @classmethod
     def from_dict(cls, data: dict) -> 'Memory':
         return cls(**data)
 
 
+def _normalized(vector: Sequence[float]) -> List[float]:
+    norm = math.sqrt(sum(x * x for x in vector))
+    return [x / norm for x in vector] if norm > 0 else [0.0] * len(vector)
+
+
+def _segment_hits(haystack: str, starts: List[int], needle: str) -> set:
+    """Indexes of the segments (starting at starts) of haystack that contain needle."""
+    hits = set()
+    i = haystack.find(needle)
+    while i >= 0:
+        segment = bisect_right(starts, i) - 1
+        hits.add(segment)
+        # Skip to the next segment: one hit per segment is enough
+        i = haystack.find(needle, starts[segment + 1] if segment + 1 < len(starts) else len(haystack))
+    return hits
+
+
+class _RecallIndex:
+    """Lowercased key, value and tag text of every memory, for substring matching."""
+
+    def __init__(self, memories: Dict[str, Memory]):
+        self.keys = list(memories)
+        self.slots = [memories[k].slot for k in self.keys]
+        self.key_text, self.key_starts = self._join(k.lower() for k in self.keys)
+        self.value_text, self.value_starts = self._join(memories[k].value.lower() for k in self.keys)
+        tags = [(pos, tag.lower()) for pos, k in enumerate(self.keys) for tag in memories[k].tags]
+        self.tag_owner = [pos for pos, _ in tags]
+        self.tag_text, self.tag_starts = self._join(tag for _, tag in tags)
+
+    @staticmethod
+    def _join(texts) -> Tuple[str, List[int]]:
+        starts, parts, offset = [], [], 0
+        for text in texts:
+            starts.append(offset)
+            parts.append(text)
+            offset += len(text) + 1
+        return '\0'.join(parts), starts
+
+    def lexical_scores(self, query: str) -> Dict[int, float]:
+        """Position -> key/value/tag score for a lowercased query."""
+        scores: Dict[int, float] = {}
+        if not query:
+            for pos in range(len(self.keys)):
+                scores[pos] = KEY_WEIGHT + VALUE_WEIGHT
+            for pos in self.tag_owner:
+                scores[pos] += TAG_WEIGHT
+            return scores
+        for pos in _segment_hits(self.key_text, self.key_starts, query):
+            scores[pos] = scores.get(pos, 0.0) + KEY_WEIGHT
+        for pos in _segment_hits(self.value_text, self.value_starts, query):
+            scores[pos] = scores.get(pos, 0.0) + VALUE_WEIGHT
+        for tag in _segment_hits(self.tag_text, self.tag_starts, query):
+            pos = self.tag_owner[tag]
+            scores[pos] = scores.get(pos, 0.0) + TAG_WEIGHT
+        return scores
+
+
 class MemoryStore:
     """Persistent memory storage."""
 
@@ -53,14 +144,29 @@ class MemoryStore:
 
         self.storage_path.mkdir(parents=True, exist_ok=True)
         self.memories: Dict[str, Memory] = {}
+        self._dim = 0
+        self._rows = 0
+        self._vectors = None  # rows x dim float32 (np.memmap), or list of rows without numpy
+        self._index: Optional[_RecallIndex] = None
+        self._pending_access: List[str] = []
         self.load()
+        atexit.register(self.flush)
 
     def _get_file_path(self) -> Path:
         return self.storage_path / 'knowledge.json'
 
+    @property
+    def vectors_file(self) -> Path:
+        return self.storage_path / 'embeddings.f32'
+
+    @property
+    def access_log(self) -> Path:
+        return self.storage_path / 'access.log'
+
     def load(self):
         """Load memories from disk."""
         file_path = self._get_file_path()
+        self.memories = {}
         if file_path.exists():
             try:
                 with open(file_path, 'r', encoding='utf-8') as f:
@@ -69,6 +175,25 @@ class MemoryStore:
             except Exception:
                 self.memories = {}
 
+        self._read_header()
+        self._vectors = None
+        self._index = None
+
+        # Access counts logged since the last save
+        if self.access_log.exists():
+            with open(self.access_log, 'r', encoding='utf-8') as f:
+                for line in f:
+                    memory = self.memories.get(line.rstrip('\n'))
+                    if memory:
+                        memory.access_count += 1
+
+        # Older stores kept embeddings inline in knowledge.json
+        legacy = [m for m in self.memories.values() if m.embedding and m.slot < 0]
+        if legacy:
+            for memory in legacy:
+                self._store_vector(memory)
+            self.save()
+
     def save(self):
         """Save memories to disk."""
         file_path = self._get_file_path()
@@ -76,6 +201,98 @@ class MemoryStore:
             data = {k: v.to_dict() for k, v in self.memories.items()}
             json.dump(data, f, indent=2)
 
+        # Counts are now in knowledge.json
+        self._pending_access.clear()
+        if self.access_log.exists():
+            self.access_log.unlink()
+
+    def flush(self):
+        """Append pending access counts to access.log."""
+        if not self._pending_access:
+            return
+        try:
+            with open(self.access_log, 'a', encoding='utf-8') as f:
+                f.write(''.join(key + '\n' for key in self._pending_access))
+        except OSError:
+            return
+        self._pending_access.clear()
+
+    # ------------------------------------------------------------------
+    # Embedding matrix
+    # ------------------------------------------------------------------
+
+    def _read_header(self):
+        self._dim = self._rows = 0
+        try:
+            with open(self.vectors_file, 'rb') as f:
+                magic, version, dim, _ = HEADER.unpack(f.read(HEADER.size))
+            size = self.vectors_file.stat().st_size
+        except (OSError, struct.error):
+            return
+        if magic == VECTORS_MAGIC and version == VECTORS_VERSION and dim:
+            self._dim = dim
+            self._rows = (size - HEADER.size) // (dim * 4)
+
+    def _matrix(self):
+        """The embedding matrix, mapped from disk on first use after a change."""
+        if self._vectors is None and self._rows:
+            if NUMPY_AVAILABLE:
+                self._vectors = np.memmap(str(self.vectors_file), dtype='<f4', mode='r',
+                                          offset=HEADER.size, shape=(self._rows, self._dim))
+            else:
+                flat = array('f')
+                with open(self.vectors_file, 'rb') as f:
+                    f.seek(HEADER.size)
+                    flat.fromfile(f, self._rows * self._dim)
+                if sys.byteorder != 'little':
+                    flat.byteswap()
+                self._vectors = [flat[i * self._dim:(i + 1) * self._dim] for i in range(self._rows)]
+        return self._vectors
+
+    def _store_vector(self, memory: Memory):
+        """Write a memory's embedding to its row (allocating one) and clear it from the object."""
+        embedding, memory.embedding = memory.embedding, []
+        if not embedding:
+            memory.slot = -1
+            return
+
+        if len(embedding) != self._dim:
+            # First vector, or the embedding model changed: start a new matrix
+            self._dim, self._rows = len(embedding), 0
+            for other in self.memories.values():
+                other.slot = -1
+            with open(self.vectors_file, 'wb') as f:
+                f.write(HEADER.pack(VECTORS_MAGIC, VECTORS_VERSION, self._dim, 0))
+
+        if memory.slot < 0:
+            used = {m.slot for m in self.memories.values()}
+            memory.slot = next((i for i in range(self._rows) if i not in used), self._rows)
+
+        row = array('f', _normalized(embedding))
+        if sys.byteorder != 'little':
+            row.byteswap()
+        self._vectors = None  # Remap after writing
+        with open(self.vectors_file, 'r+b') as f:
+            f.seek(HEADER.size + memory.slot * self._dim * 4)
+            f.write(row.tobytes())
+        self._rows = max(self._rows, memory.slot + 1)
+
+    def _semantic_scores(self, query_emb: List[float], slots: List[int]):
+        """Cosine similarity of the query to each memory's row (0 where there is none)."""
+        matrix = self._matrix()
+        if not query_emb or len(query_emb) != self._dim or matrix is None:
+            return None
+        query = _normalized(query_emb)
+        if NUMPY_AVAILABLE:
+            sims = np.asarray(matrix @ np.asarray(query, dtype='float32'))
+            slot_array = np.asarray(slots, dtype='int64')
+            return np.where(slot_array >= 0, sims[np.maximum(slot_array, 0)], 0.0)
+        return [sum(x * y for x, y in zip(matrix[slot], query)) if slot >= 0 else 0.0 for slot in slots]
+
+    # ------------------------------------------------------------------
+    # Operations
+    # ------------------------------------------------------------------
+
     def remember(self, key: str, value: str, tags: List[str] = None) -> Memory:
         """Store a memory."""
         now = datetime.utcnow().isoformat() + 'Z'
@@ -103,6 +320,8 @@ class MemoryStore:
             )
 
         self.memories[key] = memory
+        self._store_vector(memory)
+        self._index = None
         self.save()
         return memory
 
@@ -111,48 +330,52 @@ class MemoryStore:
         if not self.memories:
             return []
 
+        if self._index is None:
+            self._index = _RecallIndex(self.memories)
+        index = self._index
+
         # Generate query embedding
         query_emb = embed_text(query)
 
-        results = []
-        for key, memory in self.memories.items():
-            # Update access count
-            memory.access_count += 1
-
-            # Calculate relevance score
-            score = 0.0
-
-            # Exact key match
-            if query.lower() in key.lower():
-                score += 1.0
-
-            # Value match
-            if query.lower() in memory.value.lower():
-                score += 0.5
-
-            # Tag match
-            for tag in memory.tags:
-                if query.lower() in tag.lower():
-                    score += 0.3
-
-            # Semantic similarity
-            if query_emb and memory.embedding:
-                semantic_score = cosine_similarity(query_emb, memory.embedding)
-                score += semantic_score * 0.5
+        lexical = index.lexical_scores(query.lower())
+        semantic = self._semantic_scores(query_emb, index.slots)
+
+        if NUMPY_AVAILABLE:
+            scores = np.zeros(len(index.keys), dtype='float64')
+            if lexical:
+                scores[np.fromiter(lexical.keys(), dtype='int64')] = np.fromiter(lexical.values(), dtype='float64')
+            if semantic is not None:
+                scores += semantic * SEMANTIC_WEIGHT
+            positions = np.flatnonzero(scores > 0)
+            if len(positions) > limit:
+                positions = positions[np.argpartition(-scores[positions], limit - 1)[:limit]]
+            # Best first; ties keep insertion order
+            positions = positions[np.lexsort((positions, -scores[positions]))]
+            top = positions.tolist()
+        else:
+            scores = [lexical.get(pos, 0.0) for pos in range(len(index.keys))]
+            if semantic is not None:
+                scores = [score + sim * SEMANTIC_WEIGHT for score, sim in zip(scores, semantic)]
+            ranked = sorted((pos for pos, score in enumerate(scores) if score > 0),
+                            key=lambda pos: scores[pos], reverse=True)
+            top = ranked[:limit]
 
-            if score > 0:
-                results.append((memory, score))
+        results = [self.memories[index.keys[pos]] for pos in top]
 
-        # Sort by score
-        results.sort(key=lambda x: x[1], reverse=True)
+        # Count the access; written to disk in batches
+        for memory in results:
+            memory.access_count += 1
+            self._pending_access.append(memory.key)
+        if len(self._pending_access) >= ACCESS_FLUSH_EVERY:
+            self.flush()
 
-        self.save()  # Save access counts
-        return [r[0] for r in results[:limit]]
+        return results
 
     def forget(self, key: str) -> bool:
         """Remove a memory."""
         if key in self.memories:
-            del self.memories[key]
+            del self.memories[key]  # Its row becomes free for the next memory
+            self._index = None
             self.save()
             return True
         return False
@@ -178,8 +401,13 @@ class MemoryStore:
             count = 0
             for key, mem_data in data.items():
                 if key not in self.memories:
-                    self.memories[key] = Memory.from_dict(mem_data)
+                    memory = Memory.from_dict({**mem_data, 'slot': -1})
+                    if not memory.embedding:
+                        memory.embedding = embed_text(f"{memory.key} {memory.value}") or []
+                    self.memories[key] = memory
+                    self._store_vector(memory)
                     count += 1
+            self._index = None
             self.save()
             return count
         except Exception:
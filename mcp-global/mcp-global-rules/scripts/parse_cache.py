@@ -0,0 +1,340 @@
+"""
+Parse Cache
+===========
+Shared cache of per-file parse results for all MCP scripts.
+
+utils.parse_file() and utils.analyze_module() consult it transparently:
+
+- ModuleInfo and derived facts (imports, definitions, call sites, referenced
+  names) are stored in .mcp/parse_cache/cache.db, keyed by path, mtime, size,
+  content hash and Python version, so a later process analyzing an unchanged
+  file does not parse it at all.
+- Syntax trees are memoized per process, so scripts running in one process
+  parse each file once. Trees are not persisted: unpickling one costs about
+  as much as ast.parse.
+
+Usage:
+    python mcp.py parse-cache            # Show cache stats
+    python mcp.py parse-cache --prune    # Drop entries for deleted files
+    python mcp.py parse-cache --clear    # Drop all entries
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import ast
+import hashlib
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+
+from .utils import Console, ModuleInfo, build_module_info, get_mcp_data_dir, open_cache_db
+
+
+# Bump when ModuleInfo or ModuleFacts change shape
+CACHE_VERSION = 2
+PY_KEY = f"{sys.version_info[0]}.{sys.version_info[1]}/{CACHE_VERSION}"
+
+# Syntax trees kept in memory per process
+MAX_TREES = 1024
+
+
+@dataclass
+class ModuleFacts:
+    """Facts derived from a module's syntax tree."""
+    imports: List[str] = field(default_factory=list)  # Import specs, see import_specs()
+    defs: List[Tuple[str, str, int]] = field(default_factory=list)  # (kind, name, line)
+    calls: List[Tuple[str, int]] = field(default_factory=list)  # (callee name, line)
+    names: List[str] = field(default_factory=list)  # Names and attributes referenced
+
+
+def import_specs(node: ast.AST) -> List[str]:
+    """
+    Dotted names an import statement may load. Relative imports keep their
+    leading dots, and each name in "from X import name" is also given as
+    X.name, since it may be a submodule:
+
+        import a.b                -> ['a.b']
+        from . import util        -> ['.', '.util']
+        from ..pkg import mod     -> ['..pkg', '..pkg.mod']
+    """
+    if isinstance(node, ast.Import):
+        return [alias.name for alias in node.names]
+    if isinstance(node, ast.ImportFrom):
+        base = '.' * (node.level or 0) + (node.module or '')
+        specs = [base] if base else []
+        for alias in node.names:
+            if alias.name != '*':
+                specs.append(f"{base}.{alias.name}" if node.module else base + alias.name)
+        return specs
+    return []
+
+
+def compute_facts(tree: ast.Module) -> ModuleFacts:
+    """Derive ModuleFacts from a parsed module."""
+    imports, names = set(), set()
+    facts = ModuleFacts()
+
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            imports.update(import_specs(node))
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            facts.defs.append(('function', node.name, node.lineno))
+        elif isinstance(node, ast.ClassDef):
+            facts.defs.append(('class', node.name, node.lineno))
+        elif isinstance(node, ast.Call):
+            if isinstance(node.func, ast.Name):
+                facts.calls.append((node.func.id, node.lineno))
+            elif isinstance(node.func, ast.Attribute):
+                facts.calls.append((node.func.attr, node.lineno))
+        elif isinstance(node, ast.Name):
+            names.add(node.id)
+        elif isinstance(node, ast.Attribute):
+            names.add(node.attr)
+
+    facts.imports = sorted(imports)
+    facts.names = sorted(names)
+    return facts
+
+
+class ParseCache:
+    """SQLite-backed store of ModuleInfo and ModuleFacts per file."""
+
+    def __init__(self, cache_dir: Optional[Path]):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.hits = 0
+        self.misses = 0
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._trees: "OrderedDict[str, Tuple[int, int, ast.Module]]" = OrderedDict()
+
+    @property
+    def db_file(self) -> Optional[Path]:
+        return self.cache_dir / 'cache.db' if self.cache_dir else None
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._db is not None or self.cache_dir is None:
+            return self._db
+        try:
+            db = open_cache_db(self.cache_dir, self.db_file.name, check_same_thread=False)
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER,"
+                " digest TEXT, py TEXT, payload BLOB)"
+            )
+            self._db = db
+        except (OSError, sqlite3.Error):
+            self.cache_dir = None  # Read-only or broken location: run uncached
+        return self._db
+
+    # ------------------------------------------------------------------
+    # Syntax trees (per process)
+    # ------------------------------------------------------------------
+
+    def _read(self, key: str) -> Optional[Tuple[os.stat_result, bytes]]:
+        try:
+            st = os.stat(key)
+            with open(key, 'rb') as f:
+                return st, f.read()
+        except OSError:
+            return None
+
+    def tree(self, path: Path) -> Optional[ast.Module]:
+        """Parsed module, memoized while the file's mtime and size are unchanged."""
+        tree, _, _ = self._tree_and_source(path)
+        return tree
+
+    def tree_and_source(self, path: Path) -> Tuple[Optional[ast.Module], Optional[bytes], Optional[os.stat_result]]:
+        """
+        Parsed module (None if it does not parse) with the file's bytes and
+        stat, reading the file once. All three are None if it cannot be read.
+        """
+        tree, data, st = self._tree_and_source(path)
+        if st is not None and data is None:
+            # Tree came from the memo; the bytes are read but not parsed again
+            read = self._read(str(Path(path).resolve()))
+            if read is None:
+                return None, None, None
+            if (read[0].st_mtime_ns, read[0].st_size) != (st.st_mtime_ns, st.st_size):
+                return self.tree_and_source(path)  # Changed since it was memoized
+            st, data = read
+        return tree, data, st
+
+    def _tree_and_source(self, path: Path):
+        key = str(Path(path).resolve())
+        try:
+            st = os.stat(key)
+        except OSError:
+            return None, None, None
+
+        with self._lock:
+            memo = self._trees.get(key)
+            if memo and memo[0] == st.st_mtime_ns and memo[1] == st.st_size:
+                self._trees.move_to_end(key)
+                return memo[2], None, st
+
+        read = self._read(key)
+        if read is None:
+            return None, None, None
+        st, data = read
+        try:
+            tree = ast.parse(data.decode('utf-8'), filename=str(path))
+        except (SyntaxError, UnicodeDecodeError, ValueError):
+            return None, data, st
+
+        with self._lock:
+            self._trees[key] = (st.st_mtime_ns, st.st_size, tree)
+            if len(self._trees) > MAX_TREES:
+                self._trees.popitem(last=False)
+        return tree, data, st
+
+    # ------------------------------------------------------------------
+    # Persistent entries
+    # ------------------------------------------------------------------
+
+    def _lookup(self, key: str) -> Optional[Tuple[ModuleInfo, ModuleFacts]]:
+        db = self._connect()
+        if db is None:
+            return None
+        try:
+            st = os.stat(key)
+            with self._lock:
+                row = db.execute(
+                    "SELECT mtime_ns, size, digest, py, payload FROM entries WHERE path = ?", (key,)
+                ).fetchone()
+            if row is None or row[3] != PY_KEY or row[1] != st.st_size:
+                return None
+            if row[0] != st.st_mtime_ns:
+                # Touched but maybe not changed: compare contents
+                read = self._read(key)
+                if read is None or hashlib.sha1(read[1]).hexdigest() != row[2]:
+                    return None
+                with self._lock:
+                    db.execute("UPDATE entries SET mtime_ns = ? WHERE path = ?", (read[0].st_mtime_ns, key))
+                    db.commit()
+            return pickle.loads(row[4])
+        except (OSError, sqlite3.Error, pickle.PickleError, EOFError, AttributeError):
+            return None
+
+    def _store(self, key: str, st: os.stat_result, data: bytes, info: ModuleInfo, facts: ModuleFacts):
+        db = self._connect()
+        if db is None:
+            return
+        try:
+            payload = pickle.dumps((info, facts), protocol=pickle.HIGHEST_PROTOCOL)
+            with self._lock:
+                db.execute(
+                    "INSERT OR REPLACE INTO entries (path, mtime_ns, size, digest, py, payload) VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, st.st_mtime_ns, st.st_size, hashlib.sha1(data).hexdigest(), PY_KEY, payload)
+                )
+                db.commit()
+        except sqlite3.Error:
+            pass
+
+    def analyze(self, path: Path) -> Optional[Tuple[ModuleInfo, ModuleFacts]]:
+        """ModuleInfo and facts for a file, parsing only when the cache is stale."""
+        key = str(Path(path).resolve())
+        cached = self._lookup(key)
+        if cached is not None:
+            self.hits += 1
+            info, facts = cached
+            info.path = Path(path)
+            return info, facts
+
+        self.misses += 1
+        tree, data, st = self.tree_and_source(path)
+        if tree is None:
+            return None
+        info = build_module_info(tree, Path(path))
+        facts = compute_facts(tree)
+        self._store(key, st, data, info, facts)
+        return info, facts
+
+    def stats(self) -> Dict:
+        db = self._connect()
+        entries = 0
+        if db is not None:
+            with self._lock:
+                entries = db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {
+            'location': str(self.db_file) if self.db_file else None,
+            'entries': entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'trees_in_memory': len(self._trees)
+        }
+
+    def prune(self) -> int:
+        """Drop entries whose file no longer exists."""
+        db = self._connect()
+        if db is None:
+            return 0
+        with self._lock:
+            paths = [row[0] for row in db.execute("SELECT path FROM entries")]
+            gone = [(p,) for p in paths if not os.path.exists(p)]
+            db.executemany("DELETE FROM entries WHERE path = ?", gone)
+            db.commit()
+        return len(gone)
+
+    def clear(self):
+        db = self._connect()
+        if db is not None:
+            with self._lock:
+                db.execute("DELETE FROM entries")
+                db.commit()
+        self._trees.clear()
+
+
+_cache: Optional[ParseCache] = None
+
+
+def get_cache() -> ParseCache:
+    """
+    Process-wide cache. Entries persist under the project's .mcp directory
+    when it exists; otherwise only the in-memory tree memo is used.
+    """
+    global _cache
+    if _cache is None:
+        if os.environ.get('MCP_NO_PARSE_CACHE'):
+            cache_dir = None
+        else:
+            mcp_dir = get_mcp_data_dir()
+            cache_dir = mcp_dir / 'parse_cache' if mcp_dir else None
+        _cache = ParseCache(cache_dir)
+    return _cache
+
+
+def get_facts(path: Path) -> Optional[ModuleFacts]:
+    """Imports, definitions, call sites and referenced names for a file."""
+    result = get_cache().analyze(path)
+    return result[1] if result else None
+
+
+def main():
+    """CLI entry point."""
+    Console.header("Parse Cache")
+    cache = get_cache()
+
+    if '--clear' in sys.argv:
+        cache.clear()
+        Console.ok("Parse cache cleared")
+        return 0
+
+    if '--prune' in sys.argv:
+        Console.ok(f"Pruned {cache.prune()} entries")
+        return 0
+
+    stats = cache.stats()
+    if not stats['location']:
+        Console.warn("No .mcp directory found; parse results are cached in memory only")
+        return 0
+    Console.info(f"Location: {stats['location']}")
+    Console.info(f"Entries:  {stats['entries']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
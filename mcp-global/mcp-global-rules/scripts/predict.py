@@ -16,7 +16,7 @@ import ast
 import json
 import sys
 
-from .utils import Console, find_python_files, find_project_root
+from .utils import Console, find_python_files, find_project_root, parse_file
 
 
 @dataclass
@@ -254,13 +254,14 @@ def predict_bugs(file_path: Path) -> List[BugPrediction]:
     """Predict bugs in a file."""
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
-            source = f.read()
-            lines = source.split('\n')
-
-        tree = ast.parse(source)
+            lines = f.read().split('\n')
     except Exception:
         return []
 
+    tree = parse_file(file_path)
+    if tree is None:
+        return []
+
     predictor = BugPredictor(lines)
     predictor.current_file = str(file_path)
     predictor.visit(tree)
@@ -3,6 +3,11 @@ Code Review Automation
 ======================
 Pre-commit code review checklist - validates code quality before commit.
 
+Each file is read and parsed once; its nodes are grouped by type in a single
+walk that all checks share. Results are cached in .mcp/review_cache per file
+content hash and check configuration, so a repeated review only re-checks
+changed files. Large file sets are reviewed in worker processes.
+
 Usage:
     python review.py [path] [--strict]
     python -m scripts.review [path]
@@ -11,15 +16,22 @@ Usage:
 from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, Iterable, List, Dict, Optional, Tuple
 import ast
+import hashlib
+import heapq
+import json
+import os
 import sys
+import time
 
+from .parse_cache import get_cache
 from .utils import (
     find_python_files,
     find_project_root,
-    parse_file,
     get_staged_files,
+    open_cache_db,
+    parallel_map,
     analyze_module,
     Console,
     format_as_markdown_table
@@ -48,6 +60,12 @@ class ReviewReport:
     """Complete code review report."""
     issues: List[ReviewIssue] = field(default_factory=list)
     files_reviewed: int = 0
+    cached: int = 0  # Files whose results came from the cache
+    timings: Dict[str, float] = field(default_factory=dict)  # Check -> seconds, this run
+
+    @property
+    def slowest_checks(self) -> List[Tuple[str, float]]:
+        return sorted(self.timings.items(), key=lambda item: item[1], reverse=True)
 
     @property
     def errors(self) -> List[ReviewIssue]:
@@ -62,16 +80,57 @@ class ReviewReport:
         return len(self.errors) == 0
 
 
+# Bump when a check's behavior changes
+REVIEW_VERSION = 1
+
+MAX_FILE_LINES = 500
+MAX_FUNCTION_LINES = 50
+
+FUNCTION_NODES = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+
+class SourceFile:
+    """
+    A file read and parsed once for all checks. Its nodes are collected in
+    one walk and grouped by type, so each check visits only the node types
+    it inspects.
+    """
+
+    def __init__(self, path: Path, source: str, tree: ast.Module):
+        self.path = path
+        self.source = source
+        self.tree = tree
+        # Lines as iterating over the file yields them
+        self.lines = source.split('\n')
+        if self.lines and not self.lines[-1]:
+            self.lines.pop()
+        self._by_type: Dict[type, List[Tuple[int, ast.AST]]] = {}
+        for index, node in enumerate(ast.walk(tree)):
+            self._by_type.setdefault(type(node), []).append((index, node))
+
+    def nodes(self, *types: type) -> List[ast.AST]:
+        """Nodes of the given types, in ast.walk order."""
+        groups = [self._by_type[t] for t in types if t in self._by_type]
+        if len(groups) == 1:
+            return [node for _, node in groups[0]]
+        return [node for _, node in heapq.merge(*groups, key=lambda item: item[0])]
+
+
+def _walk(tree: ast.Module, src: Optional[SourceFile], *types: type) -> Iterable[ast.AST]:
+    """Candidate nodes for a check: the shared grouping if given, else a full walk."""
+    return src.nodes(*types) if src is not None else ast.walk(tree)
+
+
 # Review checks
 class ReviewChecks:
     """Collection of review check functions."""
 
     @staticmethod
-    def check_docstrings(path: Path, tree: ast.Module) -> List[ReviewIssue]:
+    def check_docstrings(path: Path, tree: ast.Module, src: Optional[SourceFile] = None) -> List[ReviewIssue]:
         """Check for missing docstrings."""
         issues = []
 
-        for node in ast.walk(tree):
+        for node in _walk(tree, src, *FUNCTION_NODES, ast.ClassDef):
             if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
                 # Skip private and dunder methods
                 if node.name.startswith('_'):
@@ -102,11 +161,11 @@ class ReviewChecks:
         return issues
 
     @staticmethod
-    def check_type_hints(path: Path, tree: ast.Module) -> List[ReviewIssue]:
+    def check_type_hints(path: Path, tree: ast.Module, src: Optional[SourceFile] = None) -> List[ReviewIssue]:
         """Check for missing type hints."""
         issues = []
 
-        for node in ast.walk(tree):
+        for node in _walk(tree, src, *FUNCTION_NODES):
             if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
                 # Skip private and dunder methods
                 if node.name.startswith('_'):
@@ -136,49 +195,51 @@ class ReviewChecks:
         return issues
 
     @staticmethod
-    def check_todo_fixme(path: Path) -> List[ReviewIssue]:
-        """Check for TODO/FIXME comments."""
+    def check_todo_fixme(path: Path, lines: Optional[List[str]] = None) -> List[ReviewIssue]:
+        """Check for TODO/FIXME comments (reads the file unless given its lines)."""
         issues = []
 
         try:
-            with open(path, 'r', encoding='utf-8') as f:
-                for i, line in enumerate(f, 1):
-                    line_upper = line.upper()
-                    if 'TODO' in line_upper:
-                        issues.append(ReviewIssue(
-                            file=path,
-                            line=i,
-                            severity=Severity.INFO,
-                            category="todo",
-                            message=f"TODO comment found: {line.strip()[:50]}..."
-                        ))
-                    elif 'FIXME' in line_upper:
-                        issues.append(ReviewIssue(
-                            file=path,
-                            line=i,
-                            severity=Severity.WARNING,
-                            category="fixme",
-                            message=f"FIXME comment found: {line.strip()[:50]}..."
-                        ))
-                    elif 'XXX' in line_upper or 'HACK' in line_upper:
-                        issues.append(ReviewIssue(
-                            file=path,
-                            line=i,
-                            severity=Severity.WARNING,
-                            category="hack",
-                            message=f"HACK/XXX comment found: {line.strip()[:50]}..."
-                        ))
+            if lines is None:
+                with open(path, 'r', encoding='utf-8') as f:
+                    lines = list(f)
+            for i, line in enumerate(lines, 1):
+                line_upper = line.upper()
+                if 'TODO' in line_upper:
+                    issues.append(ReviewIssue(
+                        file=path,
+                        line=i,
+                        severity=Severity.INFO,
+                        category="todo",
+                        message=f"TODO comment found: {line.strip()[:50]}..."
+                    ))
+                elif 'FIXME' in line_upper:
+                    issues.append(ReviewIssue(
+                        file=path,
+                        line=i,
+                        severity=Severity.WARNING,
+                        category="fixme",
+                        message=f"FIXME comment found: {line.strip()[:50]}..."
+                    ))
+                elif 'XXX' in line_upper or 'HACK' in line_upper:
+                    issues.append(ReviewIssue(
+                        file=path,
+                        line=i,
+                        severity=Severity.WARNING,
+                        category="hack",
+                        message=f"HACK/XXX comment found: {line.strip()[:50]}..."
+                    ))
         except Exception:
             pass
 
         return issues
 
     @staticmethod
-    def check_naming_conventions(path: Path, tree: ast.Module) -> List[ReviewIssue]:
+    def check_naming_conventions(path: Path, tree: ast.Module, src: Optional[SourceFile] = None) -> List[ReviewIssue]:
         """Check naming conventions."""
         issues = []
 
-        for node in ast.walk(tree):
+        for node in _walk(tree, src, ast.ClassDef, *FUNCTION_NODES):
             # Classes should be CamelCase
             if isinstance(node, ast.ClassDef):
                 if not node.name[0].isupper() or '_' in node.name:
@@ -208,13 +269,20 @@ class ReviewChecks:
         return issues
 
     @staticmethod
-    def check_file_length(path: Path, max_lines: int = 500) -> List[ReviewIssue]:
-        """Check file length."""
+    def check_file_length(
+        path: Path,
+        max_lines: int = MAX_FILE_LINES,
+        lines: Optional[List[str]] = None
+    ) -> List[ReviewIssue]:
+        """Check file length (reads the file unless given its lines)."""
         issues = []
 
         try:
-            with open(path, 'r', encoding='utf-8') as f:
-                line_count = sum(1 for _ in f)
+            if lines is not None:
+                line_count = len(lines)
+            else:
+                with open(path, 'r', encoding='utf-8') as f:
+                    line_count = sum(1 for _ in f)
 
             if line_count > max_lines:
                 issues.append(ReviewIssue(
@@ -230,11 +298,16 @@ class ReviewChecks:
         return issues
 
     @staticmethod
-    def check_function_length(path: Path, tree: ast.Module, max_lines: int = 50) -> List[ReviewIssue]:
+    def check_function_length(
+        path: Path,
+        tree: ast.Module,
+        max_lines: int = MAX_FUNCTION_LINES,
+        src: Optional[SourceFile] = None
+    ) -> List[ReviewIssue]:
         """Check function length."""
         issues = []
 
-        for node in ast.walk(tree):
+        for node in _walk(tree, src, *FUNCTION_NODES):
             if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
                 if node.end_lineno:
                     length = node.end_lineno - node.lineno
@@ -250,13 +323,13 @@ class ReviewChecks:
         return issues
 
     @staticmethod
-    def check_unused_imports(path: Path, tree: ast.Module) -> List[ReviewIssue]:
+    def check_unused_imports(path: Path, tree: ast.Module, src: Optional[SourceFile] = None) -> List[ReviewIssue]:
         """Check for potentially unused imports."""
         issues = []
 
         # Collect imports
         imports = {}
-        for node in ast.walk(tree):
+        for node in _walk(tree, src, ast.Import, ast.ImportFrom):
             if isinstance(node, ast.Import):
                 for alias in node.names:
                     name = alias.asname or alias.name.split('.')[0]
@@ -269,7 +342,7 @@ class ReviewChecks:
 
         # Collect all used names
         used_names = set()
-        for node in ast.walk(tree):
+        for node in _walk(tree, src, ast.Name, ast.Attribute):
             if isinstance(node, ast.Name):
                 used_names.add(node.id)
             elif isinstance(node, ast.Attribute):
@@ -290,11 +363,11 @@ class ReviewChecks:
         return issues
 
     @staticmethod
-    def check_security_issues(path: Path, tree: ast.Module) -> List[ReviewIssue]:
+    def check_security_issues(path: Path, tree: ast.Module, src: Optional[SourceFile] = None) -> List[ReviewIssue]:
         """Check for common security issues."""
         issues = []
 
-        for node in ast.walk(tree):
+        for node in _walk(tree, src, ast.Call, ast.Assign):
             # Check for eval/exec
             if isinstance(node, ast.Call):
                 if isinstance(node.func, ast.Name):
@@ -334,43 +407,214 @@ class ReviewChecks:
         return issues
 
 
-def review_file(path: Path, strict: bool = False) -> List[ReviewIssue]:
+# Checks in the order they run: (name, strict mode only, check)
+CHECKS: Tuple[Tuple[str, bool, Callable[[SourceFile], List[ReviewIssue]]], ...] = (
+    ('docstrings', False, lambda src: ReviewChecks.check_docstrings(src.path, src.tree, src)),
+    ('todo_fixme', False, lambda src: ReviewChecks.check_todo_fixme(src.path, src.lines)),
+    ('naming', False, lambda src: ReviewChecks.check_naming_conventions(src.path, src.tree, src)),
+    ('file_length', False, lambda src: ReviewChecks.check_file_length(src.path, MAX_FILE_LINES, src.lines)),
+    ('function_length', False, lambda src: ReviewChecks.check_function_length(src.path, src.tree, MAX_FUNCTION_LINES, src)),
+    ('unused_imports', False, lambda src: ReviewChecks.check_unused_imports(src.path, src.tree, src)),
+    ('security', False, lambda src: ReviewChecks.check_security_issues(src.path, src.tree, src)),
+    ('type_hints', True, lambda src: ReviewChecks.check_type_hints(src.path, src.tree, src)),
+)
+
+
+def check_config(strict: bool = False) -> str:
+    """Key of the checks a review runs; cached results are only reused under the same key."""
+    names = [name for name, strict_only, _ in CHECKS if strict or not strict_only]
+    spec = json.dumps([REVIEW_VERSION, names, MAX_FILE_LINES, MAX_FUNCTION_LINES])
+    return hashlib.sha1(spec.encode('utf-8')).hexdigest()[:16]
+
+
+def review_source(src: SourceFile, strict: bool = False, timings: Optional[Dict[str, float]] = None) -> List[ReviewIssue]:
+    """Run all checks on a parsed file, adding the seconds each took to timings."""
+    issues = []
+    for name, strict_only, check in CHECKS:
+        if strict_only and not strict:
+            continue
+        start = time.perf_counter()
+        issues.extend(check(src))
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+    return issues
+
+
+def _load_source(path: Path) -> Tuple[Optional[SourceFile], Optional[bytes], Optional[os.stat_result]]:
+    """Read and parse a file once: (SourceFile or None if it does not parse, bytes, stat)."""
+    tree, data, st = get_cache().tree_and_source(path)
+    if tree is None:
+        return None, data, st
+    # Same text as reading in text mode (universal newlines)
+    source = data.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+    return SourceFile(path, source, tree), data, st
+
+
+def review_file(path: Path, strict: bool = False, timings: Optional[Dict[str, float]] = None) -> List[ReviewIssue]:
     """
     Review a single Python file.
 
     Args:
         path: Path to file
         strict: Enable strict mode (more checks)
+        timings: Optional dict to add per-check seconds to
 
     Returns:
         List of review issues
     """
-    issues = []
+    src, _, _ = _load_source(path)
+    if src is None:
+        return []
+    return review_source(src, strict, timings)
 
-    tree = parse_file(path)
-    if tree is None:
-        return issues
 
-    # Run all checks
-    issues.extend(ReviewChecks.check_docstrings(path, tree))
-    issues.extend(ReviewChecks.check_todo_fixme(path))
-    issues.extend(ReviewChecks.check_naming_conventions(path, tree))
-    issues.extend(ReviewChecks.check_file_length(path))
-    issues.extend(ReviewChecks.check_function_length(path, tree))
-    issues.extend(ReviewChecks.check_unused_imports(path, tree))
-    issues.extend(ReviewChecks.check_security_issues(path, tree))
+def _review_entry(
+    path: Path,
+    strict: bool = False,
+    known_digest: Optional[str] = None
+) -> Tuple[str, int, int, str, Optional[List[ReviewIssue]], Dict[str, float]]:
+    """
+    Review one file for the cache: (path, mtime_ns, size, digest, issues, timings).
+    issues is None when the contents still hash to known_digest.
+    Runs in worker processes, so everything returned must pickle.
+    """
+    timings: Dict[str, float] = {}
+    start = time.perf_counter()
+    src, data, st = _load_source(path)
+    timings['read+parse'] = time.perf_counter() - start
+    if st is None:
+        return str(path), 0, -1, '', [], {}
+    digest = hashlib.sha1(data).hexdigest()
+    if digest == known_digest:
+        return str(path), st.st_mtime_ns, st.st_size, digest, None, {}
+    issues = review_source(src, strict, timings) if src is not None else []
+    return str(path), st.st_mtime_ns, st.st_size, digest, issues, timings
+
+
+class ReviewCache:
+    """
+    Review findings keyed by content hash and check configuration, plus the
+    last known hash of each path (checked by mtime and size).
+    """
+
+    def __init__(self, cache_dir: Path):
+        self.db = open_cache_db(cache_dir, 'cache.db')
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, digest TEXT)"
+        )
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " digest TEXT, config TEXT, issues TEXT, PRIMARY KEY (digest, config))"
+        )
+        self.db.commit()
+
+    @classmethod
+    def for_root(cls, root: Path) -> "ReviewCache":
+        """Cache stored in the project's .mcp directory."""
+        project = find_project_root(root) or Path(root)
+        return cls(project / '.mcp' / 'review_cache')
+
+    def files(self) -> Dict[str, Tuple[int, int, str]]:
+        return {path: (mtime, size, digest) for path, mtime, size, digest in self.db.execute(
+            "SELECT path, mtime_ns, size, digest FROM files"
+        )}
+
+    def results(self, config: str) -> Dict[str, str]:
+        """Serialized issues per content hash, for one check configuration."""
+        return dict(self.db.execute("SELECT digest, issues FROM results WHERE config = ?", (config,)))
+
+    def store(
+        self,
+        config: str,
+        files: Iterable[Tuple[str, int, int, str]],
+        results: Iterable[Tuple[str, List[ReviewIssue]]]
+    ):
+        self.db.executemany("INSERT OR REPLACE INTO files (path, mtime_ns, size, digest) VALUES (?, ?, ?, ?)", files)
+        self.db.executemany(
+            "INSERT OR REPLACE INTO results (digest, config, issues) VALUES (?, ?, ?)",
+            ((digest, config, _dump_issues(issues)) for digest, issues in results)
+        )
+        # Results for contents no file has any more
+        self.db.execute("DELETE FROM results WHERE digest NOT IN (SELECT digest FROM files)")
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+
+def _dump_issues(issues: List[ReviewIssue]) -> str:
+    return json.dumps([[i.line, i.severity.value, i.category, i.message] for i in issues])
+
+
+def _load_issues(path: Path, data: str) -> List[ReviewIssue]:
+    return [
+        ReviewIssue(file=path, line=line, severity=Severity(severity), category=category, message=message)
+        for line, severity, category, message in json.loads(data)
+    ]
 
-    if strict:
-        issues.extend(ReviewChecks.check_type_hints(path, tree))
 
-    return issues
+def review_files(
+    paths: List[Path],
+    strict: bool = False,
+    cache: Optional[ReviewCache] = None,
+    workers: Optional[int] = None
+) -> ReviewReport:
+    """Review files, re-checking only contents the cache has no results for."""
+    report = ReviewReport(files_reviewed=len(paths))
+    config = check_config(strict)
+    known = cache.files() if cache else {}
+    memo = cache.results(config) if cache else {}
+    found: List[List[ReviewIssue]] = [[] for _ in paths]
+    stale, digests = [], []
+
+    for index, path in enumerate(paths):
+        key = str(Path(path).resolve())
+        try:
+            st = os.stat(key)
+        except OSError:
+            continue
+        entry = known.get(key)
+        cached = memo.get(entry[2]) if entry else None
+        if cached is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            found[index] = _load_issues(path, cached)
+            report.cached += 1
+        else:
+            # Touched files whose contents hash the same keep their cached issues
+            stale.append(index)
+            digests.append(entry[2] if cached is not None else None)
+
+    stale_paths = [paths[index] for index in stale]
+    results = parallel_map(_review_entry, stale_paths, [strict] * len(stale), digests, workers=workers)
+
+    file_rows, result_rows = [], []
+    for index, (_, mtime, size, digest, issues, timings) in zip(stale, results):
+        if size < 0:
+            continue
+        path = paths[index]
+        if issues is None:
+            issues = _load_issues(path, memo[digest])
+            report.cached += 1
+        else:
+            result_rows.append((digest, issues))
+        for name, seconds in timings.items():
+            report.timings[name] = report.timings.get(name, 0.0) + seconds
+        file_rows.append((str(Path(path).resolve()), mtime, size, digest))
+        found[index] = issues
+    if cache is not None and file_rows:
+        cache.store(config, file_rows, result_rows)
+
+    for issues in found:
+        report.issues.extend(issues)
+    return report
 
 
 def review_project(
     root: Path,
     staged_only: bool = False,
     strict: bool = False,
-    exclude_patterns: List[str] = None
+    exclude_patterns: List[str] = None,
+    cache: Optional[ReviewCache] = None,
+    workers: Optional[int] = None
 ) -> ReviewReport:
     """
     Review a Python project.
@@ -380,12 +624,12 @@ def review_project(
         staged_only: Only review staged files
         strict: Enable strict mode
         exclude_patterns: Patterns to exclude
+        cache: Result cache (default: the project's)
+        workers: Worker processes for large file sets (default: CPU count)
 
     Returns:
         ReviewReport
     """
-    report = ReviewReport()
-
     if staged_only:
         Console.info("Reviewing staged files only...")
         staged = get_staged_files(cwd=root)
@@ -395,13 +639,15 @@ def review_project(
         files = list(find_python_files(root, exclude_patterns))
 
     Console.info(f"Found {len(files)} files to review")
-    report.files_reviewed = len(files)
 
-    for path in files:
-        issues = review_file(path, strict=strict)
-        report.issues.extend(issues)
-
-    return report
+    own_cache = cache is None
+    if own_cache:
+        cache = ReviewCache.for_root(root)
+    try:
+        return review_files(files, strict, cache, workers)
+    finally:
+        if own_cache:
+            cache.close()
 
 
 def format_report_console(report: ReviewReport) -> None:
@@ -443,6 +689,15 @@ def format_report_markdown(report: ReviewReport) -> str:
         "",
     ]
 
+    if report.timings:
+        lines.extend([
+            "## Check Timings",
+            "",
+        ])
+        rows = [[name, f"{seconds:.3f}"] for name, seconds in report.slowest_checks]
+        lines.append(format_as_markdown_table(["Check", "Seconds"], rows))
+        lines.append("")
+
     if report.errors:
         lines.extend([
             "## Errors (Must Fix)",
@@ -493,7 +748,10 @@ def main():
     print()
 
     # Summary
-    Console.info(f"Reviewed {report.files_reviewed} files")
+    Console.info(f"Reviewed {report.files_reviewed} files ({report.cached} unchanged, from cache)")
+    if report.timings:
+        timings = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in report.slowest_checks)
+        Console.info(f"Check timings: {timings}")
     Console.info(f"Found {len(report.issues)} issues ({len(report.errors)} errors, {len(report.warnings)} warnings)")
 
     if report.passed:
@@ -3,22 +3,35 @@ Security Auditor
 ================
 Deep security analysis for Python code - OWASP, secrets, injection detection.
 
+Text rules (secrets, SQL injection) are checked in one pass over the whole
+file: an alternation of the rules' keywords finds candidate lines, whose
+offsets are mapped to line numbers with a line-start table, and only those
+lines are matched against the combined rule patterns. Per-file findings are cached under .mcp/security_cache/
+by content hash and rule-set version, and changed files are audited across
+worker processes.
+
 Usage:
     python security.py [path] [--strict]
     python -m scripts.security src/
 """
 
+from bisect import bisect_right
 from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
-from typing import Dict, List, Optional, Set
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 import ast
+import hashlib
+import json
+import os
 import re
 import sys
 
 from .utils import (
     find_python_files,
     find_project_root,
+    open_cache_db,
+    parallel_map,
     parse_file,
     Console,
     format_as_markdown_table
@@ -159,6 +172,49 @@ SQL_INJECTION_PATTERNS = [
 ]
 
 
+def _case_insensitive(pattern: str) -> str:
+    # Rules are compiled with re.IGNORECASE; inline flags cannot appear mid-alternation
+    return pattern[4:] if pattern.startswith('(?i)') else pattern
+
+
+def _combined(patterns: List[str]) -> 're.Pattern':
+    """One alternation of patterns; the named group r<i> tells which one matched."""
+    return re.compile('|'.join(f'(?P<r{i}>{_case_insensitive(p)})' for i, p in enumerate(patterns)), re.IGNORECASE)
+
+
+def _literal_prefix(pattern: str) -> str:
+    """Literal text every match of pattern starts with (letters and dashes only)."""
+    pattern = _case_insensitive(pattern)
+    match = re.match(r'[A-Za-z-]+', pattern)
+    if not match:
+        return ''
+    if pattern[match.end():match.end() + 1] in ('?', '*', '{'):
+        return match.group()[:-1]  # The last character is optional
+    return match.group()
+
+
+def _keyword_re(patterns: List[str]) -> Optional['re.Pattern']:
+    """Alternation of the rules' literal prefixes, lowercased; None if a rule has none."""
+    prefixes = {_literal_prefix(p).lower() for p in patterns}
+    if '' in prefixes:
+        return None
+    return re.compile('|'.join(re.escape(p) for p in sorted(prefixes, key=len, reverse=True)))
+
+
+SECRET_RE = _combined([pattern for pattern, _ in SECRET_PATTERNS])
+SQL_INJECTION_RE = _combined(SQL_INJECTION_PATTERNS)
+_SECRET_RULES = [(re.compile(_case_insensitive(pattern), re.IGNORECASE), title) for pattern, title in SECRET_PATTERNS]
+
+# Lines without one of these cannot match any text rule
+KEYWORD_RE = _keyword_re([pattern for pattern, _ in SECRET_PATTERNS] + SQL_INJECTION_PATTERNS)
+
+# Bump when analysis changes in ways the patterns below do not show
+RULES_VERSION = 1
+RULESET = hashlib.sha1(repr((
+    RULES_VERSION, SECRET_PATTERNS, SQL_INJECTION_PATTERNS, sorted(DANGEROUS_FUNCTIONS)
+)).encode()).hexdigest()[:16]
+
+
 class SecurityAnalyzer(ast.NodeVisitor):
     """Analyze code for security issues."""
 
@@ -260,85 +316,247 @@ class SecurityAnalyzer(ast.NodeVisitor):
         return ""
 
 
-def check_secrets(path: Path, source: str) -> List[SecurityIssue]:
+def line_starts(source: str) -> List[int]:
+    """Offset at which each line of source starts."""
+    starts = [0]
+    pos = source.find('\n')
+    while pos >= 0:
+        starts.append(pos + 1)
+        pos = source.find('\n', pos + 1)
+    return starts
+
+
+def candidate_lines(source: str, starts: List[int]) -> List[int]:
+    """
+    Indexes of the lines that contain a rule keyword, found in one pass of
+    KEYWORD_RE over the lowercased source.
+    """
+    lowered = source.lower()
+    if KEYWORD_RE is None or len(lowered) != len(source):
+        return list(range(len(starts)))  # Offsets would not line up: check every line
+
+    lines = []
+    pos = 0
+    while True:
+        match = KEYWORD_RE.search(lowered, pos)
+        if match is None:
+            return lines
+        index = bisect_right(starts, match.start()) - 1
+        lines.append(index)
+        if index + 1 >= len(starts):
+            return lines
+        pos = starts[index + 1]
+
+
+def _line(source: str, starts: List[int], index: int) -> str:
+    end = starts[index + 1] - 1 if index + 1 < len(starts) else len(source)
+    return source[starts[index]:end]
+
+
+def check_secrets(path: Path, source: str, starts: List[int] = None,
+                  candidates: List[int] = None) -> List[SecurityIssue]:
     """Check for hardcoded secrets."""
     issues = []
-    lines = source.split('\n')
+    starts = starts or line_starts(source)
+    if candidates is None:
+        candidates = candidate_lines(source, starts)
+
+    for index in candidates:
+        line = _line(source, starts, index)
+        match = SECRET_RE.search(line)
+        if match is None:
+            continue
 
-    for i, line in enumerate(lines, 1):
         # Skip comments
-        stripped = line.strip()
-        if stripped.startswith('#'):
+        if line.strip().startswith('#'):
             continue
 
-        for pattern, title in SECRET_PATTERNS:
-            if re.search(pattern, line):
-                # Exclude obvious non-secrets
-                if 'example' in line.lower() or 'test' in line.lower():
-                    continue
-                if '""' in line or "''" in line:  # Empty strings
-                    continue
-                if 'os.environ' in line or 'getenv' in line:
-                    continue
-
-                issues.append(SecurityIssue(
-                    path=path,
-                    line=i,
-                    severity=Severity.CRITICAL,
-                    category="Hardcoded Secret",
-                    title=title,
-                    description=f"Potential secret found: {line.strip()[:50]}...",
-                    cwe="CWE-798",
-                    fix="Use environment variables or secret management"
-                ))
-                break  # One issue per line
+        # Exclude obvious non-secrets
+        lower = line.lower()
+        if 'example' in lower or 'test' in lower:
+            continue
+        if '""' in line or "''" in line:  # Empty strings
+            continue
+        if 'os.environ' in line or 'getenv' in line:
+            continue
+
+        # Rules are listed by priority: an earlier rule may match later in the line
+        rule = int(match.lastgroup[1:])
+        title = next((t for regex, t in _SECRET_RULES[:rule] if regex.search(line)), _SECRET_RULES[rule][1])
+        issues.append(SecurityIssue(
+            path=path,
+            line=index + 1,
+            severity=Severity.CRITICAL,
+            category="Hardcoded Secret",
+            title=title,
+            description=f"Potential secret found: {line.strip()[:50]}...",
+            cwe="CWE-798",
+            fix="Use environment variables or secret management"
+        ))
 
     return issues
 
 
-def check_sql_injection(path: Path, source: str) -> List[SecurityIssue]:
+def check_sql_injection(path: Path, source: str, starts: List[int] = None,
+                        candidates: List[int] = None) -> List[SecurityIssue]:
     """Check for SQL injection patterns."""
     issues = []
-    lines = source.split('\n')
-
-    for i, line in enumerate(lines, 1):
-        for pattern in SQL_INJECTION_PATTERNS:
-            if re.search(pattern, line, re.IGNORECASE):
-                issues.append(SecurityIssue(
-                    path=path,
-                    line=i,
-                    severity=Severity.HIGH,
-                    category="SQL Injection",
-                    title="Potential SQL injection",
-                    description="SQL query appears to use string formatting instead of parameterization",
-                    cwe="CWE-89",
-                    fix="Use parameterized queries with placeholders"
-                ))
-                break
+    starts = starts or line_starts(source)
+    if candidates is None:
+        candidates = candidate_lines(source, starts)
+
+    for index in candidates:
+        if SQL_INJECTION_RE.search(_line(source, starts, index)):
+            issues.append(SecurityIssue(
+                path=path,
+                line=index + 1,
+                severity=Severity.HIGH,
+                category="SQL Injection",
+                title="Potential SQL injection",
+                description="SQL query appears to use string formatting instead of parameterization",
+                cwe="CWE-89",
+                fix="Use parameterized queries with placeholders"
+            ))
 
     return issues
 
 
-def audit_file(path: Path) -> List[SecurityIssue]:
-    """Audit a single file for security issues."""
+def audit_source(path: Path, source: str, tree: Optional[ast.Module]) -> List[SecurityIssue]:
+    """All checks over one file's source and syntax tree (None if it does not parse)."""
     issues = []
 
-    try:
-        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-            source = f.read()
-    except Exception:
-        return issues
-
     # AST-based analysis
-    tree = parse_file(path)
     if tree:
         analyzer = SecurityAnalyzer(path, source)
         analyzer.visit(tree)
         issues.extend(analyzer.issues)
 
-    # Pattern-based checks
-    issues.extend(check_secrets(path, source))
-    issues.extend(check_sql_injection(path, source))
+    # Pattern-based checks, on the lines one keyword pass picked out
+    starts = line_starts(source)
+    candidates = candidate_lines(source, starts)
+    issues.extend(check_secrets(path, source, starts, candidates))
+    issues.extend(check_sql_injection(path, source, starts, candidates))
+
+    return issues
+
+
+def audit_file(path: Path) -> List[SecurityIssue]:
+    """Audit a single file for security issues."""
+    try:
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            source = f.read()
+    except Exception:
+        return []
+
+    return audit_source(path, source, parse_file(path))
+
+
+def _audit_entry(path: Path, known_digest: Optional[str] = None) -> Tuple[str, int, int, str, Optional[List[SecurityIssue]]]:
+    """
+    Audit one file for the cache: (path, mtime_ns, size, digest, issues).
+    issues is None when the contents still hash to known_digest.
+    Runs in worker processes, so everything returned must pickle.
+    """
+    try:
+        st = os.stat(path)
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return str(path), 0, -1, '', []
+    digest = hashlib.sha1(data).hexdigest()
+    if digest == known_digest:
+        return str(path), st.st_mtime_ns, st.st_size, digest, None
+    # Same text as reading in text mode (universal newlines)
+    source = data.decode('utf-8', errors='ignore').replace('\r\n', '\n').replace('\r', '\n')
+    return str(path), st.st_mtime_ns, st.st_size, digest, audit_source(path, source, parse_file(path))
+
+
+class SecurityCache:
+    """Per-file findings keyed by path, checked by mtime, size, hash and rule set."""
+
+    def __init__(self, cache_dir: Path):
+        self.db = open_cache_db(cache_dir, 'cache.db')
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, digest TEXT, ruleset TEXT, issues TEXT)"
+        )
+        self.db.commit()
+
+    @classmethod
+    def for_root(cls, root: Path) -> "SecurityCache":
+        """Cache stored in the project's .mcp directory."""
+        project = find_project_root(root) or Path(root)
+        return cls(project / '.mcp' / 'security_cache')
+
+    def entries(self) -> Dict[str, Tuple[int, int, str, str]]:
+        """Entries made with the current rule set."""
+        return {path: (mtime, size, digest, issues) for path, mtime, size, digest, issues in self.db.execute(
+            "SELECT path, mtime_ns, size, digest, issues FROM files WHERE ruleset = ?", (RULESET,)
+        )}
+
+    def store(self, rows: Iterable[Tuple[str, int, int, str, List[SecurityIssue]]]):
+        self.db.executemany(
+            "INSERT OR REPLACE INTO files (path, mtime_ns, size, digest, ruleset, issues) VALUES (?, ?, ?, ?, ?, ?)",
+            ((path, mtime, size, digest, RULESET, _dump_issues(issues))
+             for path, mtime, size, digest, issues in rows)
+        )
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+
+def _dump_issues(issues: List[SecurityIssue]) -> str:
+    return json.dumps([
+        [i.line, i.severity.value, i.category, i.title, i.description, i.cwe, i.fix] for i in issues
+    ])
+
+
+def _load_issues(path: Path, data: str) -> List[SecurityIssue]:
+    return [
+        SecurityIssue(path=path, line=line, severity=Severity(severity), category=category,
+                      title=title, description=description, cwe=cwe, fix=fix)
+        for line, severity, category, title, description, cwe, fix in json.loads(data)
+    ]
+
+
+def audit_files(
+    paths: List[Path],
+    cache: Optional[SecurityCache] = None,
+    workers: Optional[int] = None
+) -> List[SecurityIssue]:
+    """Audit files, re-auditing only files the cache has not seen unchanged."""
+    known = cache.entries() if cache else {}
+    issues, stale = [], []
+
+    for path in paths:
+        key = str(Path(path).resolve())
+        entry = known.get(key)
+        try:
+            st = os.stat(key)
+        except OSError:
+            continue
+        if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            issues.extend(_load_issues(path, entry[3]))
+        else:
+            stale.append(path)
+
+    # Touched files whose contents hash the same keep their cached issues
+    digests = [known.get(str(Path(path).resolve()), (None, None, None))[2] for path in stale]
+
+    results = parallel_map(_audit_entry, stale, digests, workers=workers)
+
+    rows = []
+    for path, (_, mtime, size, digest, file_issues) in zip(stale, results):
+        if size < 0:
+            continue
+        key = str(Path(path).resolve())
+        if file_issues is None:
+            file_issues = _load_issues(path, known[key][3])
+        rows.append((key, mtime, size, digest, file_issues))
+        issues.extend(file_issues)
+    if cache is not None and rows:
+        cache.store(rows)
 
     return issues
 
@@ -346,9 +564,11 @@ def audit_file(path: Path) -> List[SecurityIssue]:
 def security_audit(
     root: Path,
     strict: bool = False,
-    exclude_patterns: List[str] = None
+    exclude_patterns: List[str] = None,
+    cache: Optional[SecurityCache] = None,
+    workers: Optional[int] = None
 ) -> SecurityReport:
-    """Perform security audit on a project."""
+    """Perform security audit on a project (cached per file; default: the project's cache)."""
     report = SecurityReport()
 
     Console.info(f"Security audit of {root}...")
@@ -357,14 +577,20 @@ def security_audit(
     report.files_scanned = len(files)
     Console.info(f"Scanning {len(files)} files...")
 
-    for path in files:
-        issues = audit_file(path)
-
-        # In strict mode, include all issues; otherwise filter INFO
-        if strict:
-            report.issues.extend(issues)
-        else:
-            report.issues.extend([i for i in issues if i.severity != Severity.INFO])
+    own_cache = cache is None
+    if own_cache:
+        cache = SecurityCache.for_root(root)
+    try:
+        issues = audit_files(files, cache, workers)
+    finally:
+        if own_cache:
+            cache.close()
+
+    # In strict mode, include all issues; otherwise filter INFO
+    if strict:
+        report.issues.extend(issues)
+    else:
+        report.issues.extend([i for i in issues if i.severity != Severity.INFO])
 
     return report
 
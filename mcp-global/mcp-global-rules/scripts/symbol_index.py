@@ -0,0 +1,359 @@
+"""
+Symbol Index
+============
+Persistent symbol table for name searches.
+
+Every function, method, class and import in the project's Python files is
+stored with its qualified name, kind, signature, docstring summary and line
+in SQLite under .mcp/symbol_index/. Names are indexed by trigram (substring
+and fuzzy matches) and by their snake_case / camelCase parts (token and
+prefix matches), so a search never opens source files. Files are re-indexed
+when their mtime or size changes, either by sync() before a query or by the
+watcher as files are saved.
+
+Usage:
+    python mcp.py symbols <query> [path]     # Search symbols
+    python mcp.py symbols --stats [path]
+"""
+
+from dataclasses import dataclass
+from math import ceil
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import os
+import sys
+
+from .context_index import tokenize
+from .utils import Console, FunctionInfo, analyze_module, find_project_root, find_python_files, open_cache_db
+
+
+# Bump when the schema or what gets indexed changes; the index is rebuilt
+INDEX_VERSION = 1
+
+# Share of a query's trigrams a name must contain to count as a fuzzy match
+FUZZY_THRESHOLD = 0.6
+
+# Score of a single query term against a symbol
+SCORE_EXACT = 6.0       # Name equals the term
+SCORE_TOKEN = 4.0       # A name part equals the term (getUserName ~ user)
+SCORE_SUBSTRING = 3.0   # Term occurs inside the name
+SCORE_PREFIX = 2.0      # A name part starts with the term
+SCORE_FUZZY = 2.0       # Scaled by trigram overlap
+SCORE_DOC = 0.5         # Term appears in the docstring summary
+
+KIND_WEIGHTS = {
+    'class': 1.0,
+    'function': 1.0,
+    'method': 1.0,
+    'import': 0.5,
+}
+
+
+@dataclass
+class SymbolHit:
+    """A symbol matching a query."""
+    path: Path
+    name: str
+    qualname: str
+    kind: str  # 'function', 'method', 'class', 'import'
+    signature: str
+    summary: str
+    line: int
+    score: float = 0.0
+
+
+def trigrams(text: str) -> set:
+    """Lowercase character trigrams of text."""
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _summary(docstring: Optional[str]) -> str:
+    if not docstring:
+        return ''
+    return docstring.strip().split('\n', 1)[0].strip()
+
+
+def _function_signature(func: FunctionInfo) -> str:
+    args = [f"{arg}: {func.arg_types[arg]}" if arg in func.arg_types else arg for arg in func.args]
+    signature = f"{'async ' if func.is_async else ''}def {func.name}({', '.join(args)})"
+    if func.return_type:
+        signature += f" -> {func.return_type}"
+    return signature
+
+
+def module_symbols(path: Path, module_name: str) -> List[Tuple[str, str, str, str, str, int]]:
+    """(name, qualname, kind, signature, summary, line) for each symbol in a file."""
+    info = analyze_module(path)
+    if info is None:
+        return []
+
+    symbols = []
+    for func in info.functions:
+        symbols.append((func.name, f"{module_name}.{func.name}", 'function',
+                        _function_signature(func), _summary(func.docstring), func.lineno))
+    for cls in info.classes:
+        bases = f"({', '.join(cls.bases)})" if cls.bases else ''
+        symbols.append((cls.name, f"{module_name}.{cls.name}", 'class',
+                        f"class {cls.name}{bases}", _summary(cls.docstring), cls.lineno))
+        for method in cls.methods:
+            symbols.append((method.name, f"{module_name}.{cls.name}.{method.name}", 'method',
+                            _function_signature(method), _summary(method.docstring), method.lineno))
+    for imp in info.imports:
+        symbols.append((imp, imp, 'import', f"import {imp}", '', 1))
+    return symbols
+
+
+class SymbolIndex:
+    """Symbol table with trigram and name-part indexes."""
+
+    def __init__(self, index_dir: Path, root: Path):
+        self.index_dir = Path(index_dir)
+        self.root = Path(root).resolve()
+        self.db = open_cache_db(self.index_dir, 'index.db', INDEX_VERSION)
+        self._init_schema()
+
+    @classmethod
+    def for_root(cls, root: Path) -> "SymbolIndex":
+        """Index stored in the project's .mcp directory."""
+        project = find_project_root(root) or Path(root)
+        return cls(project / '.mcp' / 'symbol_index', project)
+
+    def _init_schema(self):
+        db = self.db
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " id INTEGER PRIMARY KEY, path TEXT UNIQUE, mtime_ns INTEGER, size INTEGER)"
+        )
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS symbols ("
+            " id INTEGER PRIMARY KEY, file INTEGER, name TEXT, qualname TEXT, kind TEXT,"
+            " signature TEXT, summary TEXT, line INTEGER)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS symbols_file ON symbols (file)")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS grams ("
+            " gram TEXT, symbol INTEGER, PRIMARY KEY (gram, symbol)) WITHOUT ROWID"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS grams_symbol ON grams (symbol)")
+        # field is 'name' for name parts, 'doc' for docstring summary words
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS tokens ("
+            " token TEXT, symbol INTEGER, field TEXT, PRIMARY KEY (token, symbol, field)) WITHOUT ROWID"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS tokens_symbol ON tokens (symbol)")
+        db.commit()
+
+    def close(self):
+        self.db.close()
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def _module_name(self, key: str) -> str:
+        try:
+            rel = Path(key).relative_to(self.root)
+        except ValueError:
+            rel = Path(Path(key).name)
+        parts = list(rel.with_suffix('').parts)
+        if parts and parts[-1] == '__init__' and len(parts) > 1:
+            parts.pop()
+        return '.'.join(parts)
+
+    def _remove(self, key: str):
+        row = self.db.execute("SELECT id FROM files WHERE path = ?", (key,)).fetchone()
+        if row:
+            owned = "SELECT id FROM symbols WHERE file = ?"
+            self.db.execute(f"DELETE FROM grams WHERE symbol IN ({owned})", (row[0],))
+            self.db.execute(f"DELETE FROM tokens WHERE symbol IN ({owned})", (row[0],))
+            self.db.execute("DELETE FROM symbols WHERE file = ?", (row[0],))
+            self.db.execute("DELETE FROM files WHERE id = ?", (row[0],))
+
+    def _add(self, path: Path, key: str) -> bool:
+        try:
+            st = os.stat(key)
+        except OSError:
+            return False
+
+        symbols = module_symbols(path, self._module_name(key))
+        self._remove(key)
+        file_id = self.db.execute(
+            "INSERT INTO files (path, mtime_ns, size) VALUES (?, ?, ?)",
+            (key, st.st_mtime_ns, st.st_size)
+        ).lastrowid
+
+        for name, qualname, kind, signature, summary, line in symbols:
+            symbol = self.db.execute(
+                "INSERT INTO symbols (file, name, qualname, kind, signature, summary, line)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (file_id, name, qualname, kind, signature, summary, line)
+            ).lastrowid
+            self.db.executemany(
+                "INSERT OR IGNORE INTO grams (gram, symbol) VALUES (?, ?)",
+                ((gram, symbol) for gram in trigrams(name))
+            )
+            rows = [(token, symbol, 'name') for token in set(tokenize(name))]
+            rows += [(token, symbol, 'doc') for token in set(tokenize(summary))]
+            self.db.executemany("INSERT OR IGNORE INTO tokens (token, symbol, field) VALUES (?, ?, ?)", rows)
+        return True
+
+    def update_files(self, paths: Iterable[Path]) -> int:
+        """Re-index the given files; files that no longer exist are dropped."""
+        count = 0
+        for path in paths:
+            path = Path(path)
+            key = str(path.resolve())
+            if path.exists():
+                count += self._add(path, key)
+            else:
+                self._remove(key)
+        self.db.commit()
+        return count
+
+    def sync(self, files: Iterable[Path], scope: Optional[Path] = None) -> int:
+        """
+        Bring the index in line with files (all Python files under scope):
+        new or modified files are re-indexed by mtime/size, and indexed files
+        under scope that are not in files are dropped. Returns files re-indexed.
+        """
+        known = {path: (mtime, size) for path, mtime, size in
+                 self.db.execute("SELECT path, mtime_ns, size FROM files")}
+        seen, changed = set(), []
+        for path in files:
+            key = str(Path(path).resolve())
+            seen.add(key)
+            try:
+                st = os.stat(key)
+            except OSError:
+                continue
+            if known.get(key) != (st.st_mtime_ns, st.st_size):
+                changed.append(path)
+
+        prefix = str(Path(scope or self.root).resolve()) + os.sep
+        removed = [key for key in known if key.startswith(prefix) and key not in seen]
+
+        for key in removed:
+            self._remove(key)
+        for path in changed:
+            self._add(Path(path), str(Path(path).resolve()))
+        self.db.commit()
+        return len(changed)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _term_scores(self, term: str) -> Dict[int, float]:
+        """Best score of one lowercase query term against each matching symbol."""
+        scores: Dict[int, float] = {}
+
+        def offer(symbol: int, score: float):
+            if score > scores.get(symbol, 0.0):
+                scores[symbol] = score
+
+        for symbol, field in self.db.execute("SELECT symbol, field FROM tokens WHERE token = ?", (term,)):
+            offer(symbol, SCORE_TOKEN if field == 'name' else SCORE_DOC)
+        for (symbol,) in self.db.execute(
+            "SELECT DISTINCT symbol FROM tokens WHERE field = 'name' AND token > ? AND token < ?",
+            (term, term + '\uffff')
+        ):
+            offer(symbol, SCORE_PREFIX)
+
+        grams = trigrams(term)
+        if grams:
+            needed = max(1, ceil(len(grams) * FUZZY_THRESHOLD))
+            placeholders = ','.join('?' * len(grams))
+            rows = self.db.execute(
+                f"SELECT g.symbol, COUNT(*), s.name FROM grams g JOIN symbols s ON s.id = g.symbol"
+                f" WHERE g.gram IN ({placeholders}) GROUP BY g.symbol HAVING COUNT(*) >= ?",
+                (*grams, needed)
+            )
+            for symbol, shared, name in rows:
+                name = name.lower()
+                if name == term:
+                    offer(symbol, SCORE_EXACT)
+                elif term in name:
+                    offer(symbol, SCORE_SUBSTRING + (1.0 if name.startswith(term) else 0.0))
+                else:
+                    offer(symbol, SCORE_FUZZY * shared / max(len(grams), len(trigrams(name))))
+        else:
+            for (symbol,) in self.db.execute("SELECT id FROM symbols WHERE lower(name) = ?", (term,)):
+                offer(symbol, SCORE_EXACT)
+        return scores
+
+    def search(self, terms: Iterable[str], limit: int = 20, scope: Optional[Path] = None,
+               kinds: Optional[Iterable[str]] = None) -> List[SymbolHit]:
+        """Symbols ranked by how well their names match terms, best first."""
+        totals: Dict[int, float] = {}
+        for term in {t.lower() for t in terms if t}:
+            for symbol, score in self._term_scores(term).items():
+                totals[symbol] = totals.get(symbol, 0.0) + score
+        if not totals:
+            return []
+
+        prefix = str(Path(scope).resolve()) + os.sep if scope else None
+        kinds = set(kinds) if kinds else None
+        hits = []
+        ids = list(totals)
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            rows = self.db.execute(
+                "SELECT s.id, f.path, s.name, s.qualname, s.kind, s.signature, s.summary, s.line"
+                f" FROM symbols s JOIN files f ON f.id = s.file WHERE s.id IN ({','.join('?' * len(chunk))})",
+                chunk
+            )
+            for symbol, path, name, qualname, kind, signature, summary, line in rows:
+                if prefix and not path.startswith(prefix):
+                    continue
+                if kinds and kind not in kinds:
+                    continue
+                score = totals[symbol] * KIND_WEIGHTS.get(kind, 1.0)
+                hits.append(SymbolHit(Path(path), name, qualname, kind, signature, summary, line, score))
+
+        hits.sort(key=lambda h: (-h.score, len(h.name), h.qualname))
+        return hits[:limit]
+
+    def stats(self) -> Dict:
+        files = self.db.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+        kinds = dict(self.db.execute("SELECT kind, COUNT(*) FROM symbols GROUP BY kind").fetchall())
+        return {'files': files, 'symbols': sum(kinds.values()), 'by_kind': kinds}
+
+
+def main():
+    """CLI entry point."""
+    Console.header("Symbol Index")
+
+    args = [a for a in sys.argv[1:] if not a.startswith('-')]
+    stats_only = '--stats' in sys.argv
+    if not args and not stats_only:
+        Console.fail("Usage: mcp symbols <query> [path]")
+        return 1
+
+    query = None if stats_only else args.pop(0)
+    root = Path(args[0]) if args else (find_project_root() or Path.cwd())
+
+    index = SymbolIndex.for_root(root)
+    changed = index.sync(find_python_files(root), scope=root)
+    if changed:
+        Console.info(f"Re-indexed {changed} files")
+
+    if stats_only:
+        stats = index.stats()
+        Console.info(f"Files: {stats['files']}, symbols: {stats['symbols']}")
+        for kind, count in sorted(stats['by_kind'].items()):
+            print(f"  {kind}: {count}")
+    else:
+        hits = index.search(tokenize(query), scope=root)
+        for hit in hits:
+            print(f"{hit.path}:{hit.line}  {hit.qualname}  [{hit.kind}]  {hit.score:.2f}")
+            if hit.summary:
+                print(f"    {hit.summary[:100]}")
+        Console.ok(f"Found {len(hits)} symbols")
+
+    index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,20 +3,26 @@ TODO/FIXME Index
 ================
 Scan and index all TODOs, FIXMEs, HACKs, and NOTEs in code.
 
+The tree is walked once with directory pruning, each line is matched
+against one combined pattern, and per-file results are cached under
+.mcp/todo_cache/ by mtime, size and content hash, so only changed files
+are rescanned. Changed files are scanned across worker processes.
+
 Usage:
     python mcp.py todos
     python mcp.py todos --priority high
 """
 
-from collections import Counter
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, asdict
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
+import hashlib
 import json
+import os
 import re
 import sys
 
-from .utils import Console, find_python_files, find_project_root
+from .utils import EXCLUDE_DIRS, EXCLUDE_DIR_SUFFIXES, Console, find_project_root, open_cache_db, parallel_map
 
 
 @dataclass
@@ -31,12 +37,17 @@ class TodoItem:
     context: str = ""
 
 
-# Patterns to detect
-TODO_PATTERNS = [
-    (r'#\s*(TODO|FIXME|HACK|XXX|NOTE)(?:\(([^)]+)\))?:\s*(.+?)$', 'python'),
-    (r'//\s*(TODO|FIXME|HACK|XXX|NOTE)(?:\(([^)]+)\))?:\s*(.+?)$', 'js'),
-    (r'/\*\s*(TODO|FIXME|HACK|XXX|NOTE)(?:\(([^)]+)\))?:\s*(.+?)\*/', 'block'),
-]
+# Marker with optional (author), e.g. "TODO(alice): message"
+_MARKER = r'(TODO|FIXME|HACK|XXX|NOTE)(?:\(([^)]+)\))?:[^\S\n]*'
+
+# Line comments (# or //) run to end of line; block comments (/* */) to the
+# closing */. Groups 1-3 are (type, author, message) for line comments,
+# groups 4-6 for block comments.
+TODO_RE = re.compile(
+    r'(?:#|//)[^\S\n]*' + _MARKER + r'(.+?)$'
+    r'|/\*[^\S\n]*' + _MARKER + r'(.+?)\*/',
+    re.IGNORECASE | re.MULTILINE
+)
 
 PRIORITY_MAP = {
     'FIXME': 1,
@@ -75,70 +86,193 @@ def detect_priority(todo_type: str, message: str, author: str = None) -> int:
     return priority
 
 
-def scan_file(file_path: Path) -> List[TodoItem]:
-    """Scan a file for TODOs."""
-    todos = []
+# File types scanned for TODOs
+TODO_EXTENSIONS = ['.py', '.js', '.ts', '.jsx', '.tsx', '.java', '.go', '.rs', '.c', '.cpp', '.h']
 
-    try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            lines = f.readlines()
-    except Exception:
-        return todos
+
+def scan_text(text: str, file_path: Path) -> List[TodoItem]:
+    """Scan already-read file contents for TODOs."""
+    # Most files have none: one pass over the whole text rules them out
+    if TODO_RE.search(text) is None:
+        return []
+
+    todos = []
+    lines = text.splitlines(keepends=True)
 
     for i, line in enumerate(lines, 1):
-        for pattern, _ in TODO_PATTERNS:
-            match = re.search(pattern, line, re.IGNORECASE)
-            if match:
-                todo_type = match.group(1).upper()
-                author = match.group(2) if match.lastindex >= 2 else None
-                message = match.group(3) if match.lastindex >= 3 else match.group(2)
-
-                if message:
-                    # Get context (surrounding lines)
-                    context_start = max(0, i - 2)
-                    context_end = min(len(lines), i + 2)
-                    context = ''.join(lines[context_start:context_end])
-
-                    todos.append(TodoItem(
-                        type=todo_type,
-                        message=message.strip(),
-                        file=str(file_path),
-                        line=i,
-                        author=author,
-                        priority=detect_priority(todo_type, message, author),
-                        context=context[:200]
-                    ))
-                break
+        match = TODO_RE.search(line)
+        if not match:
+            continue
+        groups = match.groups()
+        todo_type, author, message = groups[:3] if groups[0] else groups[3:]
+        todo_type = todo_type.upper()
+
+        # Get context (surrounding lines)
+        context_start = max(0, i - 2)
+        context_end = min(len(lines), i + 2)
+        context = ''.join(lines[context_start:context_end])
+
+        todos.append(TodoItem(
+            type=todo_type,
+            message=message.strip(),
+            file=str(file_path),
+            line=i,
+            author=author,
+            priority=detect_priority(todo_type, message, author),
+            context=context[:200]
+        ))
+
+    return todos
+
+
+def walk_sources(root: Path, exclude_patterns: List[str] = None) -> List[Path]:
+    """
+    Files with a TODO_EXTENSIONS suffix under root, in one walk.
+    EXCLUDE_DIRS are never descended into; paths containing any of
+    exclude_patterns are skipped as well.
+    """
+    extensions = set(TODO_EXTENSIONS)
+    patterns = exclude_patterns or []
+    files = []
+    stack = [str(root)]
+
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+
+        subdirs = []
+        for entry in entries:
+            if patterns and any(pattern in entry.path for pattern in patterns):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in EXCLUDE_DIRS and not entry.name.endswith(EXCLUDE_DIR_SUFFIXES):
+                    subdirs.append(entry.path)
+            elif os.path.splitext(entry.name)[1] in extensions:
+                files.append(Path(entry.path))
+        stack.extend(reversed(subdirs))
+
+    return files
+
+
+def _scan_entry(path: Path, known_digest: Optional[str] = None) -> Tuple[str, int, int, str, Optional[List[TodoItem]]]:
+    """
+    Scan one file for the cache: (path, mtime_ns, size, digest, todos).
+    todos is None when the contents still hash to known_digest.
+    Runs in worker processes, so everything returned must pickle.
+    """
+    try:
+        st = os.stat(path)
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return str(path), 0, -1, '', []
+    digest = hashlib.sha1(data).hexdigest()
+    if digest == known_digest:
+        return str(path), st.st_mtime_ns, st.st_size, digest, None
+    # Same text as reading in text mode (universal newlines)
+    text = data.decode('utf-8', errors='ignore').replace('\r\n', '\n').replace('\r', '\n')
+    return str(path), st.st_mtime_ns, st.st_size, digest, scan_text(text, path)
+
+
+class TodoCache:
+    """Per-file scan results keyed by path, checked by mtime, size and hash."""
+
+    def __init__(self, cache_dir: Path):
+        self.db = open_cache_db(cache_dir, 'cache.db')
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, digest TEXT, items TEXT)"
+        )
+        self.db.commit()
+
+    @classmethod
+    def for_root(cls, root: Path) -> "TodoCache":
+        return cls(Path(root) / '.mcp' / 'todo_cache')
+
+    def entries(self) -> Dict[str, Tuple[int, int, str, str]]:
+        return {path: (mtime, size, digest, items) for path, mtime, size, digest, items in
+                self.db.execute("SELECT path, mtime_ns, size, digest, items FROM files")}
+
+    def store(self, rows: Iterable[Tuple[str, int, int, str, List[TodoItem]]]):
+        self.db.executemany(
+            "INSERT OR REPLACE INTO files (path, mtime_ns, size, digest, items) VALUES (?, ?, ?, ?, ?)",
+            ((path, mtime, size, digest, json.dumps([asdict(t) for t in todos]))
+             for path, mtime, size, digest, todos in rows)
+        )
+        self.db.commit()
+
+    def drop(self, paths: Iterable[str]):
+        self.db.executemany("DELETE FROM files WHERE path = ?", ((p,) for p in paths))
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+
+def _load_items(items: str) -> List[TodoItem]:
+    return [TodoItem(**item) for item in json.loads(items)]
+
+
+def scan_files(
+    paths: List[Path],
+    cache: Optional[TodoCache] = None,
+    workers: Optional[int] = None
+) -> List[TodoItem]:
+    """Scan files for TODOs, rescanning only files the cache has not seen unchanged."""
+    known = cache.entries() if cache else {}
+    todos, stale = [], []
+
+    for path in paths:
+        entry = known.get(str(path))
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            todos.extend(_load_items(entry[3]))
+        else:
+            stale.append(path)
+
+    # Touched files whose contents hash the same keep their cached items
+    digests = [known[str(path)][2] if str(path) in known else None for path in stale]
+
+    results = parallel_map(_scan_entry, stale, digests, workers=workers)
+
+    scanned = []
+    for path, mtime, size, digest, file_todos in results:
+        if size < 0:
+            continue
+        if file_todos is None:
+            file_todos = _load_items(known[path][3])
+        scanned.append((path, mtime, size, digest, file_todos))
+        todos.extend(file_todos)
+    results = scanned
+    if cache is not None and results:
+        cache.store(results)
 
     return todos
 
 
 def scan_project(
     root: Path,
-    exclude_patterns: List[str] = None
+    exclude_patterns: List[str] = None,
+    workers: Optional[int] = None,
+    cache: Optional[TodoCache] = None
 ) -> List[TodoItem]:
     """Scan entire project for TODOs."""
-    all_todos = []
-
-    # Find all code files
-    extensions = ['.py', '.js', '.ts', '.jsx', '.tsx', '.java', '.go', '.rs', '.c', '.cpp', '.h']
-
-    for ext in extensions:
-        for file_path in root.rglob(f'*{ext}'):
-            # Skip excluded
-            if exclude_patterns:
-                skip = False
-                for pattern in exclude_patterns:
-                    if pattern in str(file_path):
-                        skip = True
-                        break
-                if skip:
-                    continue
+    files = walk_sources(root, exclude_patterns)
+    todos = scan_files(files, cache, workers)
 
-            todos = scan_file(file_path)
-            all_todos.extend(todos)
+    if cache is not None:
+        # Forget files that were deleted or are now excluded
+        seen = {str(path) for path in files}
+        prefix = str(root) + os.sep
+        cache.drop(p for p in cache.entries() if p.startswith(prefix) and p not in seen)
 
-    return all_todos
+    return todos
 
 
 def group_by_priority(todos: List[TodoItem]) -> Dict[int, List[TodoItem]]:
@@ -159,14 +293,38 @@ def group_by_type(todos: List[TodoItem]) -> Dict[str, List[TodoItem]]:
     return groups
 
 
-def index_todos(root: Path = None) -> Dict:
-    """Build TODO index and save to disk."""
-    root = root or find_project_root() or Path.cwd()
+def index_todos(root: Path = None, changed_files: Iterable[Path] = None) -> Dict:
+    """
+    Build TODO index and save to disk.
 
-    Console.info(f"Scanning for TODOs in {root}...")
+    With changed_files, update the saved index for just those files
+    (deleted files lose their TODOs) instead of scanning the project.
+    """
+    root = root or find_project_root() or Path.cwd()
+    index_path = root / '.mcp' / 'todo_index.json'
+    cache = TodoCache.for_root(root)
 
-    exclude = ['node_modules', 'venv', '.venv', '__pycache__', '.git', 'vendor']
-    todos = scan_project(root, exclude)
+    try:
+        if changed_files is not None and index_path.exists():
+            changed = {str(Path(p).resolve()): Path(p) for p in changed_files}
+            with open(index_path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            todos = [TodoItem(**item) for item in saved.get('items', [])
+                     if str(Path(item['file']).resolve()) not in changed]
+            rescan = [p for p in changed.values() if p.suffix in TODO_EXTENSIONS and p.exists()]
+            todos.extend(scan_files(rescan, cache))
+        else:
+            Console.info(f"Scanning for TODOs in {root}...")
+            todos = scan_project(root, cache=cache)
+    finally:
+        cache.close()
+
+    return build_index(root, todos)
+
+
+def build_index(root: Path, todos: List[TodoItem]) -> Dict:
+    """Aggregate scanned TODOs into the index and save it to disk."""
+    todos = sorted(todos, key=lambda t: (t.file, t.line))
 
     # Build index
     index = {
@@ -218,8 +376,9 @@ def main():
         return 0
 
     # Scan and display
-    exclude = ['node_modules', 'venv', '.venv', '__pycache__', '.git', 'vendor']
-    todos = scan_project(root, exclude)
+    cache = TodoCache.for_root(root)
+    todos = scan_project(root, cache=cache)
+    cache.close()
 
     if not todos:
         Console.ok("No TODOs found!")
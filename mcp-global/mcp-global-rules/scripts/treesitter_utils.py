@@ -165,8 +165,8 @@ def parse_source(source: bytes, language: str) -> Optional[Tree]:
     return parser.parse(source)
 
 
-def parse_file(path: Path) -> ParsedFile:
-    """Parse a source file."""
+def parse_file(path: Path, source: Optional[bytes] = None) -> ParsedFile:
+    """Parse a source file (pass source when the contents were already read)."""
     result = ParsedFile(path=path, language="")
 
     # Detect language
@@ -178,13 +178,14 @@ def parse_file(path: Path) -> ParsedFile:
     result.language = language
 
     # Read file
-    try:
-        with open(path, 'rb') as f:
-            source = f.read()
-        result.source = source
-    except Exception as e:
-        result.error = f"Could not read file: {e}"
-        return result
+    if source is None:
+        try:
+            with open(path, 'rb') as f:
+                source = f.read()
+        except Exception as e:
+            result.error = f"Could not read file: {e}"
+            return result
+    result.source = source
 
     # Parse with tree-sitter if available
     if TREE_SITTER_AVAILABLE:
@@ -9,10 +9,11 @@ Python 3.11+ compatible, uses only stdlib.
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Iterator, Tuple
+from typing import Callable, Dict, List, Optional, Any, Iterator, Tuple
 import ast
 import json
 import os
+import sqlite3
 import subprocess
 
 
@@ -75,6 +76,17 @@ class GitCommit:
 # FILE DISCOVERY
 # =============================================================================
 
+# Directories never descended into by the project walks (index-all, impact, todos)
+EXCLUDE_DIRS = {
+    '__pycache__', '.venv', 'venv', '.git', 'node_modules', 'vendor',
+    '.eggs', 'dist', 'build', '.tox', '.pytest_cache', '.mcp'
+}
+EXCLUDE_DIR_SUFFIXES = ('.egg-info',)
+
+# Below this many files, worker start-up costs more than it saves
+PARALLEL_MIN_FILES = 64
+
+
 def find_python_files(
     root: Path,
     exclude_patterns: List[str] = None
@@ -194,18 +206,17 @@ def parse_file(path: Path) -> Optional[ast.Module]:
     """
     Parse a Python file into an AST.
 
+    Trees are memoized per process (see parse_cache), so callers must not
+    modify the returned tree.
+
     Args:
         path: Path to Python file
 
     Returns:
         AST module or None if parsing fails
     """
-    try:
-        with open(path, 'r', encoding='utf-8') as f:
-            source = f.read()
-        return ast.parse(source, filename=str(path))
-    except (SyntaxError, UnicodeDecodeError, FileNotFoundError):
-        return None
+    from .parse_cache import get_cache
+    return get_cache().tree(path)
 
 
 def get_type_annotation(node: ast.expr) -> str:
@@ -331,16 +342,31 @@ def analyze_module(path: Path) -> Optional[ModuleInfo]:
     """
     Analyze a Python module and extract all information.
 
+    Results are cached on disk by content (see parse_cache), so an unchanged
+    file is not parsed again.
+
     Args:
         path: Path to Python file
 
     Returns:
         ModuleInfo dataclass or None if parsing fails
     """
-    tree = parse_file(path)
-    if tree is None:
-        return None
+    from .parse_cache import get_cache
+    result = get_cache().analyze(path)
+    return result[0] if result else None
+
+
+def build_module_info(tree: ast.Module, path: Path) -> ModuleInfo:
+    """
+    Extract module information from a parsed file.
 
+    Args:
+        tree: Parsed module
+        path: Path to Python file
+
+    Returns:
+        ModuleInfo dataclass
+    """
     info = ModuleInfo(
         path=path,
         docstring=ast.get_docstring(tree)
@@ -473,6 +499,96 @@ def get_staged_files(cwd: Path = None) -> List[str]:
     return [f for f in (output or '').split('\n') if f.strip()]
 
 
+# =============================================================================
+# CACHE STORAGE
+# =============================================================================
+
+def open_cache_db(
+    cache_dir: Path,
+    name: str,
+    version: Optional[int] = None,
+    **kwargs
+) -> sqlite3.Connection:
+    """
+    Open (creating it if needed) a SQLite cache in a git-ignored directory.
+
+    Args:
+        cache_dir: Directory holding the cache, usually under .mcp
+        name: Database file name
+        version: Schema version; when the stored one differs, every table
+            is dropped so the caller recreates its schema from scratch
+        **kwargs: Extra arguments for sqlite3.connect
+
+    Returns:
+        Connection in WAL mode, with the meta table created when versioned
+    """
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    ignore = cache_dir / '.gitignore'
+    if not ignore.exists():
+        ignore.write_text('*\n')
+
+    db = sqlite3.connect(str(cache_dir / name), timeout=5, **kwargs)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    if version is None:
+        return db
+
+    db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    row = db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+    if row is None or int(row[0]) != version:
+        tables = [table for (table,) in db.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name != 'meta'"
+        )]
+        for table in tables:
+            db.execute(f"DROP TABLE IF EXISTS {table}")
+        db.execute("DELETE FROM meta")
+        db.execute("INSERT INTO meta (key, value) VALUES ('version', ?)", (str(version),))
+        db.commit()
+    return db
+
+
+# =============================================================================
+# PARALLEL EXECUTION
+# =============================================================================
+
+def parallel_map(func: Callable, *iterables, workers: Optional[int] = None) -> List:
+    """
+    map() across worker processes when there are enough items to pay for them.
+
+    Args:
+        func: Module-level function (it is pickled to the workers)
+        *iterables: Argument lists, as for map()
+        workers: Worker processes (default: CPU count)
+
+    Returns:
+        Results in input order. If the pool cannot start or breaks, the
+        items run in-process; errors raised by func itself propagate.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+    import pickle
+
+    items = [list(it) for it in iterables]
+    count = min(len(it) for it in items) if items else 0
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and count >= PARALLEL_MIN_FILES:
+        try:
+            # Checked up front: inside the pool this fails like an error in func
+            pickle.dumps(func)
+        except (pickle.PicklingError, AttributeError, TypeError) as e:
+            Console.warn(f"Cannot send {func.__name__} to worker processes ({e}); running in-process")
+            workers = 1
+    if workers > 1 and count >= PARALLEL_MIN_FILES:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                chunksize = max(1, count // (workers * 8))
+                return list(pool.map(func, *items, chunksize=chunksize))
+        except (BrokenProcessPool, OSError, NotImplementedError, pickle.PicklingError) as e:
+            Console.warn(f"Worker processes failed ({e}); running {func.__name__} in-process")
+    return list(map(func, *items))
+
+
 # =============================================================================
 # OUTPUT FORMATTERS
 # =============================================================================
@@ -12,10 +12,12 @@ Usage:
 """
 
 import json
+import os
 import sys
+from array import array
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional, Set, Tuple
+from dataclasses import dataclass, field
 import hashlib
 
 from .utils import Console, find_python_files, find_project_root
@@ -37,6 +39,21 @@ except ImportError:
     NUMPY_AVAILABLE = False
 
 
+# On-disk layout (version 3):
+#   chunks.json  - manifest + chunk table, one row per vector slot, null for free slots (written last)
+#   vectors.f32  - raw little-endian float32 matrix, slots x dim, memory-mapped on load
+#   index.faiss  - IndexIDMap over the normalized vectors; the FAISS id of a chunk is its slot
+# Version 2 had no free slots or content hashes and is read as is.
+# Version 1 stored chunks.json as a dict and every vector as JSON in embeddings.json.
+FORMAT_VERSION = 3
+CHUNK_FIELDS = ['id', 'path', 'content', 'chunk_type', 'line_start', 'line_end', 'language', 'name', 'content_hash']
+
+
+def content_hash(text: str) -> str:
+    """Hash of the text a chunk is embedded from; equal hashes share a vector."""
+    return hashlib.sha1(text.encode('utf-8', errors='ignore')).hexdigest()
+
+
 @dataclass
 class CodeChunk:
     """A chunk of code with metadata."""
@@ -48,6 +65,11 @@ class CodeChunk:
     line_end: int
     language: str = ""
     name: str = ""
+    content_hash: str = ""
+
+    def __post_init__(self):
+        if not self.content_hash:
+            self.content_hash = content_hash(self.content)
 
 
 @dataclass
@@ -58,8 +80,87 @@ class SearchResult:
     rank: int
 
 
+def extract_chunks(path: Path, source: Optional[bytes] = None) -> List[CodeChunk]:
+    """Extract code chunks from a file (pass source when the contents were already read)."""
+    chunks = []
+
+    if source is None:
+        try:
+            with open(path, 'rb') as f:
+                source = f.read()
+        except Exception:
+            return chunks
+    # Same newline handling as reading in text mode
+    content = source.decode('utf-8', errors='ignore').replace('\r\n', '\n').replace('\r', '\n')
+
+    # Detect language
+    ext = path.suffix.lower()
+    lang_map = {'.py': 'python', '.js': 'javascript', '.ts': 'typescript',
+                '.go': 'go', '.rs': 'rust', '.java': 'java'}
+    language = lang_map.get(ext, 'unknown')
+
+    # Create file-level chunk
+    file_id = hashlib.md5(str(path).encode()).hexdigest()[:12]
+    chunks.append(CodeChunk(
+        id=f"{file_id}_file",
+        path=str(path),
+        content=content[:2000],  # First 2000 chars
+        chunk_type='file',
+        line_start=1,
+        line_end=content.count('\n') + 1,
+        language=language,
+        name=path.name
+    ))
+
+    # Try to extract functions/classes using treesitter
+    try:
+        from .treesitter_utils import parse_file
+        parsed = parse_file(path, source)
+
+        lines = content.split('\n')
+
+        for func in parsed.functions:
+            func_content = '\n'.join(lines[func.line_start-1:func.line_end])
+            chunks.append(CodeChunk(
+                id=f"{file_id}_func_{func.name}",
+                path=str(path),
+                content=func_content[:1000],
+                chunk_type='function',
+                line_start=func.line_start,
+                line_end=func.line_end,
+                language=language,
+                name=func.name
+            ))
+
+        for cls in parsed.classes:
+            cls_content = '\n'.join(lines[cls.line_start-1:cls.line_end])
+            chunks.append(CodeChunk(
+                id=f"{file_id}_class_{cls.name}",
+                path=str(path),
+                content=cls_content[:1000],
+                chunk_type='class',
+                line_start=cls.line_start,
+                line_end=cls.line_end,
+                language=language,
+                name=cls.name
+            ))
+
+    except Exception:
+        pass  # Fall back to file-level only
+
+    return chunks
+
+
+
 class VectorStore:
-    """Local vector store for semantic code search."""
+    """
+    Local vector store for semantic code search.
+
+    Every chunk owns a slot: a row of the vector matrix and its id in the FAISS
+    IndexIDMap. update() removes and re-adds only the slots of chunks that
+    changed, re-embeds a chunk only when its content hash is new, and save()
+    patches just the touched rows of vectors.f32.
+    """
 
     def __init__(self, index_path: Optional[Path] = None):
         if index_path is None:
@@ -69,13 +170,161 @@ class VectorStore:
             self.index_path = Path(index_path)
 
         self.chunks: Dict[str, CodeChunk] = {}
-        self.embeddings: Dict[str, List[float]] = {}
+        self._vectors = None  # slots x dim float32 matrix (np.memmap after load), or rows without numpy
         self._faiss_index = None
-        self._id_to_idx: Dict[str, int] = {}
-        self._idx_to_id: Dict[int, str] = {}
+        self._reset()
+
+    def _reset(self):
+        self.chunks = {}
+        self._vectors = None
+        self._faiss_index = None
+        self._dim = 0
+        self._slot_count = 0  # slots in use or free; the matrix may have spare capacity beyond
+        self._id_to_idx: Dict[str, int] = {}  # chunk id -> slot
+        self._idx_to_id: Dict[int, str] = {}  # slot -> chunk id
+        self._by_path: Dict[str, Set[str]] = {}  # file path -> chunk ids
+        self._free: List[int] = []  # slots free on disk, safe to overwrite
+        self._released: List[int] = []  # slots freed since the last save; the saved manifest still uses them
+        self._dirty: Set[int] = set()  # slots written since the last save
+        self._saved_slots = 0
+        self._saved_dim = 0
+        self._unsaved = False
+
+    @property
+    def chunks_file(self) -> Path:
+        return self.index_path / "chunks.json"
+
+    @property
+    def vectors_file(self) -> Path:
+        return self.index_path / "vectors.f32"
+
+    @property
+    def faiss_file(self) -> Path:
+        return self.index_path / "index.faiss"
+
+    @property
+    def legacy_embeddings_file(self) -> Path:
+        return self.index_path / "embeddings.json"
+
+    @property
+    def embeddings(self) -> Dict[str, List[float]]:
+        """Embeddings by chunk id. Materializes every vector; prefer search() for lookups."""
+        return {chunk_id: [float(x) for x in self._vectors[slot]] for chunk_id, slot in self._id_to_idx.items()}
+
+    def paths(self) -> List[str]:
+        """Files that currently have chunks in the index."""
+        return list(self._by_path)
+
+    # ------------------------------------------------------------------
+    # Slots
+    # ------------------------------------------------------------------
+
+    def _store_vector(self, slot: int, vector):
+        if not NUMPY_AVAILABLE:
+            if self._vectors is None:
+                self._vectors = []
+            while len(self._vectors) <= slot:
+                self._vectors.append(None)
+            self._vectors[slot] = list(vector)
+            return
+
+        if self._vectors is None:
+            self._vectors = np.zeros((max(16, slot + 1), self._dim), dtype='float32')
+        elif isinstance(self._vectors, np.memmap) or slot >= len(self._vectors):
+            # First write after load copies out of the read-only map; growth doubles capacity
+            capacity = max(len(self._vectors), slot + 1)
+            if slot >= len(self._vectors):
+                capacity = max(capacity, 2 * len(self._vectors))
+            grown = np.zeros((capacity, self._dim), dtype='float32')
+            grown[:len(self._vectors)] = self._vectors
+            self._vectors = grown
+        self._vectors[slot] = vector
+
+    def _add_chunk(self, chunk: CodeChunk, vector) -> int:
+        if not self._dim:
+            self._dim = len(vector)
+        elif len(vector) != self._dim:
+            raise ValueError(f"Embedding dimension changed ({self._dim} -> {len(vector)}); run 'index' to rebuild")
+
+        if self._free:
+            slot = self._free.pop()
+        else:
+            slot = self._slot_count
+            self._slot_count += 1
+        self._store_vector(slot, vector)
+        self.chunks[chunk.id] = chunk
+        self._id_to_idx[chunk.id] = slot
+        self._idx_to_id[slot] = chunk.id
+        self._by_path.setdefault(chunk.path, set()).add(chunk.id)
+        self._dirty.add(slot)
+        return slot
+
+    def _remove_chunk(self, chunk_id: str) -> Optional[int]:
+        slot = self._id_to_idx.pop(chunk_id, None)
+        chunk = self.chunks.pop(chunk_id, None)
+        if slot is None:
+            return None
+        del self._idx_to_id[slot]
+        ids = self._by_path.get(chunk.path)
+        if ids is not None:
+            ids.discard(chunk_id)
+            if not ids:
+                del self._by_path[chunk.path]
+        self._dirty.discard(slot)
+        self._released.append(slot)
+        return slot
+
+    def _apply(self, paths: Set[str], new_chunks: List[CodeChunk]) -> int:
+        """
+        Make the chunks of `paths` equal to new_chunks.
+        Chunks whose content hash is unchanged keep their slot and vector; a
+        changed or new chunk reuses any vector just released with the same hash
+        (e.g. a function moved between files) and is embedded otherwise.
+        Returns the number of chunks embedded.
+        """
+        by_id = {c.id: c for c in new_chunks}  # ids are unique per file; last one wins
+        kept, released, reusable = set(), [], {}
+
+        for path in paths:
+            for chunk_id in list(self._by_path.get(path, ())):
+                old, new = self.chunks[chunk_id], by_id.get(chunk_id)
+                if new is not None and new.content_hash == old.content_hash:
+                    if new != old:
+                        self.chunks[chunk_id] = new  # Line numbers moved
+                        self._unsaved = True
+                    kept.add(chunk_id)
+                    continue
+                reusable[old.content_hash] = list(self._vectors[self._id_to_idx[chunk_id]])
+                released.append(self._remove_chunk(chunk_id))
+
+        pending = [c for c in by_id.values() if c.id not in kept]
+        for chunk_id in [c.id for c in pending if c.id in self.chunks]:
+            # Same id already indexed under another path
+            reusable.setdefault(self.chunks[chunk_id].content_hash, list(self._vectors[self._id_to_idx[chunk_id]]))
+            released.append(self._remove_chunk(chunk_id))
+
+        to_embed = [c for c in pending if c.content_hash not in reusable]
+        if to_embed:
+            for chunk, emb in zip(to_embed, embed_texts([c.content[:1000] for c in to_embed])):
+                reusable[chunk.content_hash] = emb
+
+        added = [self._add_chunk(c, reusable[c.content_hash]) for c in pending]
+        if released or added:
+            self._unsaved = True
+        if FAISS_AVAILABLE and NUMPY_AVAILABLE:
+            self._update_faiss_index(released, added)
+        return len(to_embed)
+
+    # ------------------------------------------------------------------
+    # Indexing
+    # ------------------------------------------------------------------
 
     def index_codebase(self, root: Path, exclude_patterns: List[str] = None) -> int:
-        """Index all code files in directory."""
+        """
+        Index all code files in directory.
+        An existing index is reused: only new or changed chunks are embedded and
+        files that no longer exist are dropped.
+        """
         Console.info(f"Indexing {root}...")
 
         files = list(find_python_files(root, exclude_patterns))
@@ -86,125 +335,65 @@ class VectorStore:
             file_chunks = self._extract_chunks(path)
             chunks.extend(file_chunks)
 
-        Console.info(f"Extracted {len(chunks)} code chunks")
-
-        if not chunks:
-            return 0
+        return self.index_chunks(files, chunks)
 
-        # Generate embeddings
-        Console.info("Generating embeddings...")
-        texts = [c.content[:1000] for c in chunks]  # Limit text length
-        embeddings = embed_texts(texts)
+    def index_chunks(self, files: List[Path], chunks: List[CodeChunk]) -> int:
+        """
+        Make the index hold exactly `chunks`, extracted from `files`.
+        Used by index_codebase() and by pipelines that extract chunks themselves.
+        """
+        if not self._id_to_idx and self.chunks_file.exists():
+            self.load()
 
-        # Store chunks and embeddings
-        for chunk, emb in zip(chunks, embeddings):
-            self.chunks[chunk.id] = chunk
-            self.embeddings[chunk.id] = emb
+        Console.info(f"Extracted {len(chunks)} code chunks")
 
-        # Build FAISS index if available
-        if FAISS_AVAILABLE and NUMPY_AVAILABLE:
-            self._build_faiss_index()
+        Console.info("Generating embeddings...")
+        paths = {str(p) for p in files} | set(self._by_path)
+        embedded = self._apply(paths, chunks)
+        Console.info(f"Embedded {embedded} new or changed chunks")
 
         # Save to disk
         self.save()
 
-        Console.ok(f"Indexed {len(chunks)} chunks")
-        return len(chunks)
+        Console.ok(f"Indexed {len(self.chunks)} chunks")
+        return len(self.chunks)
 
     def _extract_chunks(self, path: Path) -> List[CodeChunk]:
         """Extract code chunks from file."""
-        chunks = []
-
-        try:
-            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-        except Exception:
-            return chunks
-
-        # Detect language
-        ext = path.suffix.lower()
-        lang_map = {'.py': 'python', '.js': 'javascript', '.ts': 'typescript',
-                    '.go': 'go', '.rs': 'rust', '.java': 'java'}
-        language = lang_map.get(ext, 'unknown')
-
-        # Create file-level chunk
-        file_id = hashlib.md5(str(path).encode()).hexdigest()[:12]
-        chunks.append(CodeChunk(
-            id=f"{file_id}_file",
-            path=str(path),
-            content=content[:2000],  # First 2000 chars
-            chunk_type='file',
-            line_start=1,
-            line_end=content.count('\n') + 1,
-            language=language,
-            name=path.name
-        ))
-
-        # Try to extract functions/classes using treesitter
-        try:
-            from .treesitter_utils import parse_file
-            parsed = parse_file(path)
-
-            lines = content.split('\n')
-
-            for func in parsed.functions:
-                func_content = '\n'.join(lines[func.line_start-1:func.line_end])
-                chunks.append(CodeChunk(
-                    id=f"{file_id}_func_{func.name}",
-                    path=str(path),
-                    content=func_content[:1000],
-                    chunk_type='function',
-                    line_start=func.line_start,
-                    line_end=func.line_end,
-                    language=language,
-                    name=func.name
-                ))
-
-            for cls in parsed.classes:
-                cls_content = '\n'.join(lines[cls.line_start-1:cls.line_end])
-                chunks.append(CodeChunk(
-                    id=f"{file_id}_class_{cls.name}",
-                    path=str(path),
-                    content=cls_content[:1000],
-                    chunk_type='class',
-                    line_start=cls.line_start,
-                    line_end=cls.line_end,
-                    language=language,
-                    name=cls.name
-                ))
+        return extract_chunks(path)
 
-        except Exception:
-            pass  # Fall back to file-level only
-
-        return chunks
+    def _normalized(self, slots) -> "np.ndarray":
+        # Copy: normalize_L2 works in place and a loaded matrix is a read-only memmap
+        vectors = np.array(self._vectors[np.asarray(slots, dtype='int64')], dtype='float32')
+        faiss.normalize_L2(vectors)
+        return vectors
 
     def _build_faiss_index(self):
-        """Build FAISS index from embeddings."""
-        if not self.embeddings:
+        """Build FAISS index from embeddings, keyed by slot."""
+        if not self._id_to_idx:
+            self._faiss_index = None
             return
 
-        dim = len(next(iter(self.embeddings.values())))
-
-        # Create index
-        self._faiss_index = faiss.IndexFlatIP(dim)  # Inner product = cosine for normalized
-
-        # Add vectors
-        ids = list(self.embeddings.keys())
-        vectors = np.array([self.embeddings[id] for id in ids], dtype='float32')
-
-        # Normalize for cosine similarity
-        faiss.normalize_L2(vectors)
+        slots = np.fromiter(self._idx_to_id, dtype='int64', count=len(self._idx_to_id))
 
-        self._faiss_index.add(vectors)
+        # Inner product = cosine for normalized vectors
+        self._faiss_index = faiss.IndexIDMap(faiss.IndexFlatIP(self._dim))
+        self._faiss_index.add_with_ids(self._normalized(slots), slots)
 
-        # Build ID mappings
-        for idx, id in enumerate(ids):
-            self._id_to_idx[id] = idx
-            self._idx_to_id[idx] = id
+    def _update_faiss_index(self, removed: List[int], added: List[int]):
+        """Apply slot removals and additions in place instead of rebuilding."""
+        if self._faiss_index is None or self._faiss_index.d != self._dim:
+            self._build_faiss_index()
+            return
+        if removed:
+            self._faiss_index.remove_ids(np.array(removed, dtype='int64'))
+        if added:
+            slots = np.array(added, dtype='int64')
+            self._faiss_index.add_with_ids(self._normalized(slots), slots)
 
     def search(self, query: str, k: int = 10) -> List[SearchResult]:
         """Search for code matching query."""
-        if not self.embeddings:
+        if not self._id_to_idx:
             return []
 
         # Generate query embedding
@@ -224,7 +413,7 @@ class VectorStore:
         query_vec = np.array([query_emb], dtype='float32')
         faiss.normalize_L2(query_vec)
 
-        k = min(k, len(self.embeddings))
+        k = min(k, len(self._id_to_idx))
         distances, indices = self._faiss_index.search(query_vec, k)
 
         results = []
@@ -245,8 +434,8 @@ class VectorStore:
         """Brute force cosine similarity search."""
         scores = []
 
-        for chunk_id, emb in self.embeddings.items():
-            score = cosine_similarity(query_emb, emb)
+        for slot, chunk_id in self._idx_to_id.items():
+            score = cosine_similarity(query_emb, list(self._vectors[slot]))
             scores.append((chunk_id, score))
 
         # Sort by score descending
@@ -263,40 +452,162 @@ class VectorStore:
 
         return results
 
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _row_bytes(self, slot: int) -> bytes:
+        """Slot as little-endian float32; free slots are zeros."""
+        if NUMPY_AVAILABLE:
+            return np.asarray(self._vectors[slot], dtype='<f4').tobytes()
+        row = self._vectors[slot] if slot < len(self._vectors) else None
+        values = array('f', row if row is not None else [0.0] * self._dim)
+        if sys.byteorder != 'little':
+            values.byteswap()
+        return values.tobytes()
+
+    def _write_vectors(self, path: Path):
+        """Write all slots as raw little-endian float32."""
+        if NUMPY_AVAILABLE:
+            if self._vectors is not None:
+                np.ascontiguousarray(self._vectors[:self._slot_count], dtype='<f4').tofile(str(path))
+            else:
+                path.write_bytes(b"")
+            return
+        with open(path, 'wb') as f:
+            for slot in range(self._slot_count):
+                f.write(self._row_bytes(slot))
+
+    def _patch_vectors(self):
+        """Overwrite only the slots written since the last save, extending the file for new ones."""
+        row_size = self._dim * 4
+        with open(self.vectors_file, 'r+b') as f:
+            for slot in sorted(self._dirty):
+                f.seek(slot * row_size)
+                f.write(self._row_bytes(slot))
+            if f.seek(0, os.SEEK_END) < self._slot_count * row_size:
+                f.truncate(self._slot_count * row_size)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _read_vectors(self, count: int, dim: int):
+        """Map the matrix from disk; returns None if the file is too short for the manifest."""
+        if not self.vectors_file.exists() or self.vectors_file.stat().st_size < count * dim * 4:
+            return None
+        if count == 0:
+            return []
+        if NUMPY_AVAILABLE:
+            return np.memmap(str(self.vectors_file), dtype='<f4', mode='r', shape=(count, dim))
+        flat = array('f')
+        with open(self.vectors_file, 'rb') as f:
+            flat.fromfile(f, count * dim)
+        if sys.byteorder != 'little':
+            flat.byteswap()
+        return [flat[i * dim:(i + 1) * dim] for i in range(count)]
+
     def save(self):
-        """Save index to disk."""
+        """
+        Save index to disk.
+
+        Vectors and the FAISS index are written first and chunks.json last, so a
+        reader never sees a manifest that points at unwritten rows. When the
+        layout is unchanged only dirty slots are rewritten in place; those slots
+        are either new or were free in the previous manifest, so its rows stay
+        valid until the new manifest replaces it. Otherwise the matrix is
+        rewritten through a temp file and atomic rename.
+        """
         self.index_path.mkdir(parents=True, exist_ok=True)
 
-        # Save chunks
-        chunks_file = self.index_path / "chunks.json"
-        with open(chunks_file, 'w', encoding='utf-8') as f:
-            json.dump({k: asdict(v) for k, v in self.chunks.items()}, f)
-
-        # Save embeddings
-        emb_file = self.index_path / "embeddings.json"
-        with open(emb_file, 'w', encoding='utf-8') as f:
-            json.dump(self.embeddings, f)
+        in_place = (self._saved_dim == self._dim and self._saved_slots and self.vectors_file.exists()
+                    and self.vectors_file.stat().st_size >= self._saved_slots * self._dim * 4)
+        if in_place:
+            self._patch_vectors()
+        else:
+            tmp = self.vectors_file.with_suffix('.f32.tmp')
+            self._write_vectors(tmp)
+            os.replace(tmp, self.vectors_file)
+
+        if self._faiss_index is not None:
+            tmp = self.faiss_file.with_suffix('.faiss.tmp')
+            faiss.write_index(self._faiss_index, str(tmp))
+            os.replace(tmp, self.faiss_file)
+        elif self.faiss_file.exists():
+            self.faiss_file.unlink()
+
+        # Chunk table: positional rows instead of one dict per chunk, null for free slots
+        rows = []
+        for slot in range(self._slot_count):
+            chunk_id = self._idx_to_id.get(slot)
+            rows.append([getattr(self.chunks[chunk_id], name) for name in CHUNK_FIELDS] if chunk_id else None)
+        manifest = {
+            'version': FORMAT_VERSION,
+            'count': self._slot_count,
+            'dim': self._dim,
+            'fields': CHUNK_FIELDS,
+            'rows': rows
+        }
+        tmp = self.chunks_file.with_suffix('.json.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, separators=(',', ':'))
+        os.replace(tmp, self.chunks_file)
+
+        if self.legacy_embeddings_file.exists():
+            self.legacy_embeddings_file.unlink()
+
+        # Slots released before this save are now free on disk as well
+        self._free.extend(self._released)
+        self._released = []
+        self._dirty.clear()
+        self._saved_slots = self._slot_count
+        self._saved_dim = self._dim
+        self._unsaved = False
 
         Console.ok(f"Index saved to {self.index_path}")
 
     def load(self) -> bool:
-        """Load index from disk."""
-        chunks_file = self.index_path / "chunks.json"
-        emb_file = self.index_path / "embeddings.json"
-
-        if not chunks_file.exists() or not emb_file.exists():
+        """Load index from disk (memory-maps the vectors; migrates the JSON format)."""
+        if not self.chunks_file.exists():
             return False
 
         try:
-            with open(chunks_file, 'r', encoding='utf-8') as f:
+            with open(self.chunks_file, 'r', encoding='utf-8') as f:
                 data = json.load(f)
-                self.chunks = {k: CodeChunk(**v) for k, v in data.items()}
 
-            with open(emb_file, 'r', encoding='utf-8') as f:
-                self.embeddings = json.load(f)
+            if data.get('version') not in (2, FORMAT_VERSION):
+                return self._migrate_json(data)
+
+            vectors = self._read_vectors(data['count'], data['dim'])
+            if vectors is None:
+                Console.warn("Vector file does not match chunk table; re-index required")
+                return False
+
+            self._reset()
+            fields = data['fields']
+            for slot, row in enumerate(data['rows']):
+                if row is None:
+                    self._free.append(slot)
+                    continue
+                chunk = CodeChunk(**dict(zip(fields, row)))
+                self.chunks[chunk.id] = chunk
+                self._id_to_idx[chunk.id] = slot
+                self._idx_to_id[slot] = chunk.id
+                self._by_path.setdefault(chunk.path, set()).add(chunk.id)
+            self._free.reverse()  # Reuse low slots first
+            self._dim = data['dim']
+            self._slot_count = self._saved_slots = data['count']
+            self._saved_dim = self._dim
+            self._vectors = vectors if data['count'] else None
 
             if FAISS_AVAILABLE and NUMPY_AVAILABLE:
-                self._build_faiss_index()
+                if self.faiss_file.exists():
+                    index = faiss.read_index(str(self.faiss_file))
+                    # Version 2 indexes are positional; anything whose ids disagree with the slots is rebuilt
+                    if isinstance(faiss.downcast_index(index), faiss.IndexIDMap):
+                        ids = faiss.vector_to_array(faiss.downcast_index(index).id_map)
+                        if set(ids.tolist()) == set(self._idx_to_id) and len(ids) == len(self._idx_to_id):
+                            self._faiss_index = index
+                if self._faiss_index is None:
+                    self._build_faiss_index()
 
             Console.ok(f"Loaded {len(self.chunks)} chunks from index")
             return True
@@ -305,32 +616,49 @@ class VectorStore:
             Console.warn(f"Could not load index: {e}")
             return False
 
-    def update(self, changed_files: List[Path]):
-        """Update index for changed files."""
-        for path in changed_files:
-            # Remove old chunks for this file
-            to_remove = [k for k, v in self.chunks.items() if v.path == str(path)]
-            for k in to_remove:
-                del self.chunks[k]
-                if k in self.embeddings:
-                    del self.embeddings[k]
-
-            # Re-index file
-            if path.exists():
-                new_chunks = self._extract_chunks(path)
-                if new_chunks:
-                    texts = [c.content[:1000] for c in new_chunks]
-                    embeddings = embed_texts(texts)
-
-                    for chunk, emb in zip(new_chunks, embeddings):
-                        self.chunks[chunk.id] = chunk
-                        self.embeddings[chunk.id] = emb
-
-        # Rebuild FAISS index
+    def _migrate_json(self, chunk_data: Dict) -> bool:
+        """One-shot conversion of the version 1 JSON index to the binary layout."""
+        if not self.legacy_embeddings_file.exists():
+            return False
+
+        with open(self.legacy_embeddings_file, 'r', encoding='utf-8') as f:
+            embeddings = json.load(f)
+
+        self._reset()
+        for chunk_id, fields in chunk_data.items():
+            if chunk_id in embeddings:
+                self._add_chunk(CodeChunk(**fields), embeddings[chunk_id])
+
         if FAISS_AVAILABLE and NUMPY_AVAILABLE:
             self._build_faiss_index()
 
         self.save()
+        Console.ok(f"Migrated {len(self.chunks)} chunks to binary index format")
+        return True
+
+    def update(self, changed_files: List[Path], save: bool = True) -> int:
+        """
+        Update index for changed (or deleted) files.
+        Cost is proportional to the chunks of those files: their old ids are
+        looked up by path, unchanged chunks are left alone and only new content
+        is embedded. Pass save=False to batch several updates into one save().
+        Returns the number of chunks embedded.
+        """
+        paths = {str(p) for p in changed_files}
+        new_chunks = []
+        for path in changed_files:
+            if Path(path).exists():
+                new_chunks.extend(self._extract_chunks(Path(path)))
+
+        embedded = self._apply(paths, new_chunks)
+        if save:
+            self.save()
+        return embedded
+
+    @property
+    def dirty(self) -> bool:
+        """True when there are changes not yet written by save()."""
+        return self._unsaved
 
 
 def main():
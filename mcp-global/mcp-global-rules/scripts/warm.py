@@ -12,7 +12,7 @@ import sys
 import time
 
 from .utils import Console, find_project_root
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from .index_all import build_indexes
 
 
 def warm_all(root: Path = None) -> dict:
@@ -23,54 +23,25 @@ def warm_all(root: Path = None) -> dict:
     Console.info(f"Project: {root}")
 
     start_time = time.time()
-    results = {}
-
-    # Define warm-up tasks
-    tasks = {
-        'semantic': ('vector_store', 'VectorStore', 'index_codebase'),
-        'todos': ('todo_index', 'index_todos', None),
-        'impact': ('impact', 'save_impact_graph', None),
-        'docs': ('doc_index', 'index_documentation', None),
-        'config': ('config_index', 'index_configs', None),
-        'context': ('autocontext', 'warm_context', None),
-    }
-
-    def run_task(name, module_name, func_or_class, method):
-        try:
-            import importlib
-            module = importlib.import_module(f"scripts.{module_name}")
-
-            if method:
-                # Class with method
-                cls = getattr(module, func_or_class)
-                instance = cls(root / '.mcp' / 'vector_index')
-                getattr(instance, method)(root)
-            else:
-                # Direct function
-                func = getattr(module, func_or_class)
-                func(root)
-
-            return name, 'ok', None
-        except Exception as e:
-            return name, 'error', str(e)
-
-    # Run tasks in parallel
-    Console.info("Running warm-up tasks...")
-
-    with ThreadPoolExecutor(max_workers=4) as executor:
-        futures = {}
-        for name, (module, func, method) in tasks.items():
-            future = executor.submit(run_task, name, module, func, method)
-            futures[future] = name
-
-        for future in as_completed(futures):
-            name, status, error = future.result()
-            results[name] = status
 
-            if status == 'ok':
-                Console.ok(f"Warmed: {name}")
-            else:
-                Console.warn(f"Skipped: {name}")
+    # File-based indexes share one walk and one parse per file
+    Console.info("Running warm-up tasks...")
+    indexes = ['semantic', 'todos', 'impact', 'docs', 'config']
+    built, _ = build_indexes(root, include=indexes, verbose=False)
+    results = {name: built[name]['status'] for name in indexes}
+
+    try:
+        from .autocontext import warm_context
+        warm_context(root)
+        results['context'] = 'ok'
+    except Exception:
+        results['context'] = 'error'
+
+    for name, status in results.items():
+        if status == 'ok':
+            Console.ok(f"Warmed: {name}")
+        else:
+            Console.warn(f"Skipped: {name}")
 
     elapsed = time.time() - start_time
 
@@ -78,7 +49,7 @@ def warm_all(root: Path = None) -> dict:
 
     # Show status
     ok_count = sum(1 for s in results.values() if s == 'ok')
-    print(f"\n{ok_count}/{len(tasks)} indexes warmed")
+    print(f"\n{ok_count}/{len(results)} indexes warmed")
 
     return results
 
@@ -91,20 +62,11 @@ def main():
         # Quick warm - just semantic and todos
         Console.header("Quick Warm")
 
-        try:
-            from .vector_store import VectorStore
-            store = VectorStore(root / '.mcp' / 'vector_index')
-            store.index_codebase(root)
+        results, _ = build_indexes(root, include=['semantic', 'todos'], verbose=False)
+        if results['semantic']['status'] == 'ok':
             Console.ok("Semantic index warmed")
-        except Exception:
-            pass
-
-        try:
-            from .todo_index import index_todos
-            index_todos(root)
+        if results['todos']['status'] == 'ok':
             Console.ok("TODO index warmed")
-        except Exception:
-            pass
 
         return 0
 
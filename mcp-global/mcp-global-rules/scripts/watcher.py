@@ -42,7 +42,13 @@ class WatcherState:
 
 
 class CodeChangeHandler:
-    """Handles file changes for indexing."""
+    """
+    Handles file changes for indexing.
+
+    The vector store is loaded once and kept resident; each batch of changes
+    updates it in memory and it is written back every save_interval_s seconds
+    and on shutdown. The context index (BM25) is updated in the same batch.
+    """
 
     def __init__(self, root: Path, state: WatcherState):
         self.root = root
@@ -50,6 +56,10 @@ class CodeChangeHandler:
         self.pending_files: Set[Path] = set()
         self.last_change_time: float = 0
         self.file_hashes: Dict[str, str] = {}
+        self.store = None
+        self.context_index = None
+        self.symbol_index = None
+        self.last_save: float = time.time()
 
     def on_modified(self, path: Path):
         """Handle file modification."""
@@ -65,6 +75,15 @@ class CodeChangeHandler:
         self.pending_files.add(path)
         self.last_change_time = time.time()
 
+    def on_deleted(self, path: Path):
+        """Handle file deletion; update() drops the chunks of missing files."""
+        if not path.suffix == '.py':
+            return
+
+        self.file_hashes.pop(str(path), None)
+        self.pending_files.add(path)
+        self.last_change_time = time.time()
+
     def _get_file_hash(self, path: Path) -> str:
         """Get hash of file contents."""
         try:
@@ -90,16 +109,63 @@ class CodeChangeHandler:
         Console.info(f"Updating index for {len(files)} files...")
 
         try:
-            from .vector_store import VectorStore
-            store = VectorStore(self.state.index_path)
-            store.load()
-            store.update(files)
-            Console.ok(f"Index updated")
+            self._get_context_index().update_files(files)
+        except Exception as e:
+            Console.warn(f"Context index update failed: {e}")
+
+        try:
+            self._get_symbol_index().update_files(files)
+        except Exception as e:
+            Console.warn(f"Symbol index update failed: {e}")
+
+        if (self.root / '.mcp' / 'todo_index.json').exists():
+            try:
+                from .todo_index import index_todos
+                index_todos(self.root, changed_files=files)
+            except Exception as e:
+                Console.warn(f"TODO index update failed: {e}")
+
+        try:
+            embedded = self._get_store().update(files, save=False)
+            Console.ok(f"Index updated ({embedded} chunks embedded)")
             return len(files)
         except Exception as e:
             Console.warn(f"Index update failed: {e}")
             return 0
 
+    def _get_context_index(self):
+        """Open the context index on first use and keep it for the watcher's lifetime."""
+        if self.context_index is None:
+            from .context_index import ContextIndex
+            self.context_index = ContextIndex.for_root(self.root)
+        return self.context_index
+
+    def _get_symbol_index(self):
+        """Open the symbol index on first use and keep it for the watcher's lifetime."""
+        if self.symbol_index is None:
+            from .symbol_index import SymbolIndex
+            self.symbol_index = SymbolIndex.for_root(self.root)
+        return self.symbol_index
+
+    def _get_store(self):
+        """Load the vector store on first use and keep it for the watcher's lifetime."""
+        if self.store is None:
+            from .vector_store import VectorStore
+            self.store = VectorStore(self.state.index_path)
+            self.store.load()
+        return self.store
+
+    def flush(self, force: bool = False):
+        """Write the resident store if it has changes and the save interval elapsed."""
+        if not force and time.time() - self.last_save < self.state.save_interval_s:
+            return
+        self.last_save = time.time()
+        if self.store is not None and self.store.dirty:
+            try:
+                self.store.save()
+            except Exception as e:
+                Console.warn(f"Index save failed: {e}")
+
 
 if WATCHDOG_AVAILABLE:
     class WatchdogHandler(FileSystemEventHandler):
@@ -116,11 +182,19 @@ if WATCHDOG_AVAILABLE:
             if not event.is_directory:
                 self.change_handler.on_modified(Path(event.src_path))
 
+        def on_deleted(self, event):
+            if not event.is_directory:
+                self.change_handler.on_deleted(Path(event.src_path))
+
+        def on_moved(self, event):
+            if not event.is_directory:
+                self.change_handler.on_deleted(Path(event.src_path))
+                self.change_handler.on_modified(Path(event.dest_path))
+
 
 def poll_watch(root: Path, state: WatcherState):
     """Polling-based file watcher (fallback)."""
     handler = CodeChangeHandler(root, state)
-    last_save = time.time()
 
     # Initial scan
     Console.info("Initial file scan...")
@@ -131,21 +205,27 @@ def poll_watch(root: Path, state: WatcherState):
     Console.info(f"Watching {root} (polling mode)...")
     Console.info("Press Ctrl+C to stop")
 
-    while state.running:
-        # Check for changes
-        for path in find_python_files(root):
-            current_hash = handler._get_file_hash(path)
-            if handler.file_hashes.get(str(path)) != current_hash:
-                handler.on_modified(path)
-
-        # Process pending
-        handler.process_pending()
+    try:
+        while state.running:
+            # Check for changes
+            seen = set()
+            for path in find_python_files(root):
+                seen.add(str(path))
+                current_hash = handler._get_file_hash(path)
+                if handler.file_hashes.get(str(path)) != current_hash:
+                    handler.on_modified(path)
+            for missing in set(handler.file_hashes) - seen:
+                handler.on_deleted(Path(missing))
+
+            # Process pending
+            handler.process_pending()
 
-        # Periodic save
-        if time.time() - last_save > state.save_interval_s:
-            last_save = time.time()
+            # Periodic save
+            handler.flush()
 
-        time.sleep(1)
+            time.sleep(1)
+    finally:
+        handler.flush(force=True)
 
 
 def watchdog_watch(root: Path, state: WatcherState):
@@ -163,10 +243,12 @@ def watchdog_watch(root: Path, state: WatcherState):
     try:
         while state.running:
             handler.process_pending()
+            handler.flush()
             time.sleep(0.5)
     finally:
         observer.stop()
         observer.join()
+        handler.flush(force=True)
 
 
 def start_watch(root: Path = None, background: bool = False):
@@ -132,6 +132,76 @@ class TestUtils:
         if "foo" not in table:
             raise AssertionError("Table should contain value 'foo'")
 
+    def test_open_cache_db_resets_on_version_change(self, temp_project):
+        """Test cache databases are git-ignored and dropped when the version changes."""
+        from scripts.utils import open_cache_db
+
+        cache_dir = temp_project / ".mcp" / "cache"
+        db = open_cache_db(cache_dir, "cache.db", 1)
+        db.execute("CREATE TABLE files (path TEXT)")
+        db.execute("INSERT INTO files VALUES ('a.py')")
+        db.commit()
+        db.close()
+        if (cache_dir / ".gitignore").read_text() != "*\n":
+            raise AssertionError("Cache directory should ignore its contents")
+
+        db = open_cache_db(cache_dir, "cache.db", 1)
+        if db.execute("SELECT COUNT(*) FROM files").fetchone()[0] != 1:
+            raise AssertionError("Same version should keep the tables")
+        db.close()
+
+        db = open_cache_db(cache_dir, "cache.db", 2)
+        tables = [name for (name,) in db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        if tables != ["meta"]:
+            raise AssertionError("New version should drop every table but meta")
+        db.close()
+
+    def test_parallel_map(self):
+        """Test pool results keep input order and worker errors propagate."""
+        from scripts.utils import parallel_map
+
+        numbers = list(range(-100, 0))
+        if parallel_map(abs, numbers, workers=2) != [abs(n) for n in numbers]:
+            raise AssertionError("Results should follow input order")
+        if parallel_map(divmod, numbers, [7] * len(numbers), workers=2) != [divmod(n, 7) for n in numbers]:
+            raise AssertionError("Several argument lists should be zipped as by map()")
+        if parallel_map(lambda n: -n, numbers, workers=2) != [-n for n in numbers]:
+            raise AssertionError("Unpicklable functions should run in-process")
+        with pytest.raises(ValueError):
+            parallel_map(int, ["1"] * 99 + ["x"], workers=2)
+
+
+class TestParseCache:
+    """Tests for parse_cache.py module."""
+
+    def test_unchanged_file_is_not_reparsed(self, temp_project, monkeypatch):
+        """Test that analysis persists across cache instances until the file changes."""
+        import ast
+        from scripts.parse_cache import ParseCache
+
+        cache_dir = temp_project / ".mcp" / "parse_cache"
+        sample = temp_project / "sample.py"
+        first = ParseCache(cache_dir).analyze(sample)
+        if first is None or "os" not in first[1].imports:
+            raise AssertionError("Facts should list imports")
+
+        def no_parse(*args, **kwargs):
+            raise AssertionError("Unchanged file should not be parsed")
+
+        # A fresh instance stands in for a later process
+        monkeypatch.setattr(ast, "parse", no_parse)
+        os.utime(sample, ns=(1, 1))  # Touched, same contents
+        info, facts = ParseCache(cache_dir).analyze(sample)
+        if [f.name for f in info.functions] != [f.name for f in first[0].functions]:
+            raise AssertionError("Cached ModuleInfo should match")
+        monkeypatch.undo()
+
+        sample.write_text(sample.read_text() + "\ndef added():\n    pass\n")
+        cache = ParseCache(cache_dir)
+        info, _ = cache.analyze(sample)
+        if cache.misses != 1 or "added" not in [f.name for f in info.functions]:
+            raise AssertionError("Changed file should be re-analyzed")
+
 
 class TestDeadCode:
     """Tests for dead_code.py module."""
@@ -155,6 +225,42 @@ class TestDeadCode:
         if "Dead Code Report" not in markdown:
             raise AssertionError("Markdown should contain 'Dead Code Report'")
 
+    def test_cross_module_references_and_cache(self, temp_project):
+        """Test import/attribute resolution and incremental summaries."""
+        from scripts.dead_code import SummaryCache, detect_dead_code
+
+        pkg = temp_project / "pkg"
+        pkg.mkdir()
+        (pkg / "__init__.py").write_text("")
+        (pkg / "helpers.py").write_text(
+            "def used_via_attr():\n    return 1\n\n"
+            "def used_via_import():\n    return 2\n\n"
+            "def helper():\n    return 3\n"
+        )
+        (pkg / "other.py").write_text("def helper():\n    return 4\n")
+        (pkg / "app.py").write_text(
+            "from . import helpers\n"
+            "from .helpers import used_via_import\n"
+            "from .other import helper\n\n"
+            "def run():\n    return helpers.used_via_attr() + used_via_import() + helper()\n"
+        )
+
+        cache = SummaryCache(temp_project / "cache")
+        report = detect_dead_code(temp_project, cache=cache)
+        unused = {(str(p), name) for p, _, name in report.unused_functions}
+        if (str(Path("pkg") / "helpers.py"), "helper") not in unused:
+            raise AssertionError("helper() is only used from pkg.other, not pkg.helpers")
+        if any(name in ("used_via_attr", "used_via_import") for _, name in unused):
+            raise AssertionError("Functions used through imports should not be reported")
+
+        files = sorted(temp_project.rglob("*.py"))
+        if cache.summaries(files)[1] != 0:
+            raise AssertionError("Unchanged files should not be summarized again")
+        (pkg / "other.py").write_text("def helper():\n    return 5\n")
+        if cache.summaries(files)[1] != 1:
+            raise AssertionError("Only the changed file should be summarized again")
+        cache.close()
+
 
 class TestAutoDocs:
     """Tests for auto_docs.py module."""
@@ -283,6 +389,69 @@ class TestDeps:
         if "# Dependency Analysis" not in markdown:
             raise AssertionError("Markdown should contain header")
 
+    def test_cycle_paths_and_condensed_diagram(self, temp_project):
+        """Test that a three-module cycle is reported as a full path."""
+        from scripts.deps import analyze_dependencies, generate_mermaid_diagram
+
+        pkg = temp_project / "pkg"
+        pkg.mkdir()
+        (pkg / "__init__.py").write_text("")
+        (pkg / "a.py").write_text("from . import b\n")
+        (pkg / "b.py").write_text("from .c import run\n")
+        (pkg / "c.py").write_text("import pkg.a\n\ndef run():\n    pass\n")
+
+        report = analyze_dependencies(temp_project)
+        if report.circular_deps != [["pkg.a", "pkg.b", "pkg.c"]]:
+            raise AssertionError(f"Expected one a -> b -> c cycle, got {report.circular_deps}")
+
+        condensed = generate_mermaid_diagram(report, max_nodes=2)
+        if "cycle: 3 modules" not in condensed or '["pkg.a"]' in condensed:
+            raise AssertionError("Large graphs should draw a cycle as one node")
+        if "circular" not in generate_mermaid_diagram(report, max_nodes=50):
+            raise AssertionError("Small graphs should mark cycle edges")
+
+
+class TestSecurity:
+    """Tests for security.py module."""
+
+    def test_single_pass_text_rules(self):
+        """Test line numbers and rule priority from the keyword pass."""
+        from scripts.security import check_secrets, check_sql_injection
+
+        source = (
+            "import os\n"
+            "token = 'abc'; password = 'hunter2'\n"
+            "# password = 'commented'\n"
+            "key = os.environ['password']\n"
+            "cursor.execute(\"SELECT * FROM t WHERE id = %s\" % uid)\n"
+        )
+        secrets = check_secrets(Path("app.py"), source)
+        if [(i.line, i.title) for i in secrets] != [(2, "Hardcoded password")]:
+            raise AssertionError("The first rule in priority order should title the line")
+        if [i.line for i in check_sql_injection(Path("app.py"), source)] != [5]:
+            raise AssertionError("SQL formatting should be reported on its line")
+
+    def test_audit_cache(self, temp_project):
+        """Test that unchanged files are served from the cache."""
+        from scripts import security
+        from scripts.security import SecurityCache, security_audit
+
+        (temp_project / "danger.py").write_text("def run(code):\n    return eval(code)\n")
+        cache = SecurityCache(temp_project / "cache")
+        first = security_audit(temp_project, cache=cache, workers=1)
+        if not any(i.title == "Code Injection" and i.line == 2 for i in first.issues):
+            raise AssertionError("eval() should be reported")
+
+        original = security.audit_source
+        security.audit_source = None  # Any re-audit would fail
+        try:
+            second = security_audit(temp_project, cache=cache, workers=1)
+        finally:
+            security.audit_source = original
+        if [(str(i.path), i.line, i.title) for i in second.issues] != [(str(i.path), i.line, i.title) for i in first.issues]:
+            raise AssertionError("Cached findings should match a fresh audit")
+        cache.close()
+
 
 class TestReview:
     """Tests for review.py module."""
@@ -324,6 +493,512 @@ eval(user_input)
 
             os.unlink(f.name)
 
+    def test_review_cache_and_timings(self, temp_project, monkeypatch):
+        """Test that results are reused per content hash and check config, with per-check timings."""
+        from scripts import review
+        from scripts.review import ReviewCache, review_files, review_file
+
+        files = sorted(temp_project.rglob("*.py"))
+        cache = ReviewCache(temp_project / ".mcp" / "review_cache")
+        first = review_files(files, strict=True, cache=cache, workers=1)
+        expected = [(i.file, i.line, i.message) for path in files for i in review_file(path, strict=True)]
+        if [(i.file, i.line, i.message) for i in first.issues] != expected:
+            raise AssertionError("Cached runner should match reviewing each file")
+        if "type_hints" not in first.timings or "docstrings" not in first.timings:
+            raise AssertionError("Per-check timings should be reported")
+
+        # Unchanged files are not read or checked again
+        monkeypatch.setattr(review, "review_source", None)
+        second = review_files(files, strict=True, cache=cache, workers=1)
+        if second.cached != len(files) or len(second.issues) != len(first.issues):
+            raise AssertionError("Unchanged files should come from the cache")
+
+        # Another check configuration is reviewed separately
+        monkeypatch.undo()
+        standard = review_files(files, strict=False, cache=cache, workers=1)
+        if standard.cached != 0 or any(i.category == "types" for i in standard.issues):
+            raise AssertionError("Standard mode should not reuse strict results")
+        cache.close()
+
+
+
+class TestCheck:
+    """Tests for check.py module."""
+
+    def test_check_staged_files(self, temp_project):
+        """Test that only staged files are checked, in one combined report."""
+        import subprocess
+        from scripts.check import CheckOptions, check_files, staged_python_files
+
+        (temp_project / "risky.py").write_text('"""Risky."""\n\ndef run(cmd: str) -> None:\n    """Run."""\n    eval(cmd)   \n')
+        subprocess.run(["git", "init", "-q"], cwd=temp_project, check=True)
+        subprocess.run(["git", "add", "risky.py"], cwd=temp_project, check=True)
+
+        files = staged_python_files(temp_project)
+        if [p.name for p in files] != ["risky.py"]:
+            raise AssertionError("Only the staged file should be selected")
+
+        report = check_files(files, CheckOptions(), workers=1)
+        if not report.fixes or "   \n" in (temp_project / "risky.py").read_text():
+            raise AssertionError("Safe fixes should be applied before analysis")
+        if not report.blocking_security or report.passed:
+            raise AssertionError("eval() should be reported and fail the check")
+        if set(report.timings) != {"fix", "predict", "security", "review"}:
+            raise AssertionError("Each analyzer should be timed")
+        if "## Timing" not in report.to_markdown():
+            raise AssertionError("Report should include timings")
+
+
+class TestContext:
+    """Tests for context.py and context_index.py modules."""
+
+    def test_bm25_index_ranks_and_updates(self, temp_project):
+        """Test ranking from the inverted index and incremental updates."""
+        from scripts.context_index import ContextIndex
+        from scripts.utils import find_python_files
+
+        auth = temp_project / "auth.py"
+        auth.write_text('def authenticate_user(token):\n    """Check a login token."""\n    return token\n')
+
+        index = ContextIndex(temp_project / ".mcp" / "context_index", temp_project)
+        index.sync(find_python_files(temp_project), scope=temp_project)
+        ranked = index.search(["auth"])
+        if not ranked or ranked[0][0].name != "auth.py":
+            raise AssertionError("Prefix match on an identifier should rank auth.py first")
+        if index.sync(find_python_files(temp_project), scope=temp_project) != 0:
+            raise AssertionError("Unchanged files should not be re-indexed")
+
+        auth.unlink()
+        index.update_files([auth])
+        if any(path.name == "auth.py" for path, _ in index.search(["auth"])):
+            raise AssertionError("Deleted files should leave the index")
+        index.close()
+
+    def test_load_context(self, temp_project):
+        """Test context extraction for a query."""
+        from scripts.context import load_context
+
+        result = load_context("sample function", temp_project)
+        if not any("sample_function" in item.content for item in result.items):
+            raise AssertionError("Should return the matching function")
+
+    def test_recent_boost_with_relative_root(self, temp_project, monkeypatch):
+        """Test that recently changed files are boosted when the root is relative."""
+        from scripts import context
+
+        monkeypatch.chdir(temp_project)
+        root = Path(".")
+
+        def score():
+            result = context.load_context("sample function", root)
+            return max(i.relevance_score for i in result.items if "sample_function" in i.content)
+
+        monkeypatch.setattr(context, "get_recent_files", lambda r, limit=10: [])
+        plain = score()
+        monkeypatch.setattr(context, "get_recent_files", lambda r, limit=10: [r / "sample.py"])
+        if not score() > plain:
+            raise AssertionError("Recent files should be boosted")
+
+
+class TestSymbolIndex:
+    """Tests for symbol_index.py and finder.py modules."""
+
+    def test_symbol_search(self, temp_project):
+        """Test token, substring and fuzzy name matches and incremental updates."""
+        from scripts.symbol_index import SymbolIndex
+        from scripts.utils import find_python_files
+
+        users = temp_project / "users.py"
+        users.write_text(
+            'class UserAccount:\n'
+            '    """A registered user."""\n\n'
+            '    def getDisplayName(self, style: str) -> str:\n'
+            '        return style\n'
+        )
+
+        index = SymbolIndex(temp_project / ".mcp" / "symbol_index", temp_project)
+        index.sync(find_python_files(temp_project), scope=temp_project)
+
+        hits = index.search(["display"])
+        if not hits or hits[0].qualname != "users.UserAccount.getDisplayName":
+            raise AssertionError("camelCase part should match the method")
+        if "style: str" not in hits[0].signature:
+            raise AssertionError("Signature should be stored")
+        if index.search(["ccount"])[0].name != "UserAccount":
+            raise AssertionError("Substring should match through trigrams")
+        if index.search(["useracount"], kinds=["class"])[0].name != "UserAccount":
+            raise AssertionError("Misspelling should match fuzzily")
+
+        users.write_text('def remove_user():\n    pass\n')
+        index.update_files([users])
+        if index.search(["display"]):
+            raise AssertionError("Old symbols should be dropped on update")
+        if index.search(["remove"])[0].kind != "function":
+            raise AssertionError("New symbols should be indexed")
+        index.close()
+
+    def test_find_files(self, temp_project):
+        """Test finder results from the symbol index."""
+        from scripts.finder import find_files
+
+        results = find_files("sample", temp_project)
+        if not any(r.match_type == 'function' and r.line for r in results.results):
+            raise AssertionError("Should find sample_function by name")
+
+
+class TestVectorStore:
+    """Tests for vector_store.py module."""
+
+    def test_binary_roundtrip(self, temp_project):
+        """Test saving and loading the binary index."""
+        from scripts.vector_store import VectorStore
+
+        index_path = temp_project / ".mcp" / "vector_index"
+        store = VectorStore(index_path)
+        count = store.index_codebase(temp_project)
+        if not (index_path / "vectors.f32").exists():
+            raise AssertionError("Vectors should be stored as a binary matrix")
+        if (index_path / "embeddings.json").exists():
+            raise AssertionError("JSON embeddings should no longer be written")
+
+        loaded = VectorStore(index_path)
+        if not loaded.load():
+            raise AssertionError("Index should load")
+        if len(loaded.chunks) != count:
+            raise AssertionError("All chunks should be loaded")
+        original = store.embeddings
+        for chunk_id, vector in loaded.embeddings.items():
+            if vector != pytest.approx(original[chunk_id], abs=1e-6):
+                raise AssertionError("Vectors should survive the round trip (as float32)")
+
+    def test_migrates_json_index(self, temp_project):
+        """Test one-shot migration of the JSON format."""
+        import json
+        from scripts.vector_store import VectorStore
+
+        index_path = temp_project / "legacy_index"
+        index_path.mkdir()
+        chunk = {"id": "a_file", "path": "a.py", "content": "def a(): pass", "chunk_type": "file",
+                 "line_start": 1, "line_end": 1, "language": "python", "name": "a.py"}
+        (index_path / "chunks.json").write_text(json.dumps({"a_file": chunk}))
+        (index_path / "embeddings.json").write_text(json.dumps({"a_file": [0.5, 0.25]}))
+
+        store = VectorStore(index_path)
+        if not store.load():
+            raise AssertionError("Legacy index should load")
+        if store.embeddings != {"a_file": [0.5, 0.25]}:
+            raise AssertionError("Legacy vectors should be preserved")
+        if (index_path / "embeddings.json").exists():
+            raise AssertionError("Legacy embeddings file should be removed after migration")
+        if not VectorStore(index_path).load():
+            raise AssertionError("Migrated index should load in binary format")
+
+    def test_incremental_update(self, temp_project, monkeypatch):
+        """Test that update() only embeds changed chunks and drops deleted files."""
+        import scripts.vector_store as vector_store
+        from scripts.vector_store import VectorStore
+
+        index_path = temp_project / ".mcp" / "vector_index"
+        VectorStore(index_path).index_codebase(temp_project)
+
+        embedded = []
+        real_embed = vector_store.embed_texts
+        monkeypatch.setattr(vector_store, "embed_texts", lambda texts: embedded.extend(texts) or real_embed(texts))
+
+        store = VectorStore(index_path)
+        store.load()
+        sample = temp_project / "sample.py"
+        if store.update([sample]) != 0 or embedded:
+            raise AssertionError("Unchanged file should not be re-embedded")
+
+        sample.write_text(sample.read_text() + "\n\ndef added():\n    return 1\n")
+        store.update([sample])
+        if len(embedded) >= len(store._by_path[str(sample)]):
+            raise AssertionError("Only changed chunks should be re-embedded")
+
+        (temp_project / "no_docs.py").unlink()
+        store.update([temp_project / "no_docs.py"])
+        if any(c.path.endswith("no_docs.py") for c in store.chunks.values()):
+            raise AssertionError("Chunks of a deleted file should be removed")
+
+        reloaded = VectorStore(index_path)
+        if not reloaded.load() or set(reloaded.chunks) != set(store.chunks):
+            raise AssertionError("Incrementally saved index should reload")
+        for chunk_id, vector in reloaded.embeddings.items():
+            if vector != pytest.approx(store.embeddings[chunk_id], abs=1e-6):
+                raise AssertionError("Patched vectors should match the in-memory store")
+
+
+
+class TestTodoIndex:
+    """Tests for todo_index.py module."""
+
+    def test_scan_cache_and_incremental_update(self, temp_project):
+        """Test pruned walk, cached rescans and incremental index updates."""
+        from scripts.todo_index import TodoCache, index_todos, scan_project
+
+        (temp_project / "app.js").write_text("// FIXME(ana): urgent fix\n/* NOTE: block */\n")
+        (temp_project / "node_modules").mkdir()
+        (temp_project / "node_modules" / "lib.js").write_text("// TODO: vendored\n")
+        (temp_project / "sample.py").write_text("x = 1  # TODO: first\n")
+
+        index = index_todos(temp_project)
+        found = {(Path(item["file"]).name, item["type"], item["message"]) for item in index["items"]}
+        if found != {("app.js", "FIXME", "urgent fix"), ("app.js", "NOTE", "block"), ("sample.py", "TODO", "first")}:
+            raise AssertionError(f"Unexpected TODOs: {found}")
+        if index["items"][0]["author"] != "ana" or index["items"][0]["priority"] != 1:
+            raise AssertionError("Author and priority should be parsed")
+
+        # Cached results are returned for unchanged files, not rescanned
+        cache = TodoCache.for_root(temp_project)
+        key = str(temp_project / "app.js")
+        cache.db.execute("UPDATE files SET items = '[]' WHERE path = ?", (key,))
+        cache.db.commit()
+        if any(Path(t.file).name == "app.js" for t in scan_project(temp_project, cache=cache)):
+            raise AssertionError("Unchanged files should come from the cache")
+        cache.close()
+
+        (temp_project / "sample.py").write_text("x = 1  # HACK: second\n")
+        (temp_project / "app.js").unlink()
+        index = index_todos(temp_project, changed_files=[temp_project / "sample.py", temp_project / "app.js"])
+        if [item["message"] for item in index["items"]] != ["second"]:
+            raise AssertionError("Incremental update should rescan changed files and drop deleted ones")
+
+
+class TestImpact:
+    """Tests for impact.py module."""
+
+    def test_affected_by_relative_and_package_imports(self, temp_project):
+        """Test import resolution, persisted graph refresh and affected tests."""
+        from scripts.impact import affected_by, build_dependency_graph
+
+        pkg = temp_project / "pkg"
+        pkg.mkdir()
+        (pkg / "__init__.py").write_text("from .core import helper\n")
+        (pkg / "core.py").write_text("def helper():\n    return 1\n")
+        (pkg / "api.py").write_text("from . import core\n")
+        (temp_project / "tests").mkdir()
+        (temp_project / "tests" / "test_api.py").write_text("from pkg import api\n")
+
+        result = affected_by([pkg / "core.py"], temp_project)
+        if result["modules"] != [str(Path("pkg") / "__init__.py"), str(Path("pkg") / "api.py")]:
+            raise AssertionError(f"Relative imports should resolve: {result['modules']}")
+        if result["tests"] != [str(Path("tests") / "test_api.py")]:
+            raise AssertionError("Tests importing a dependent should be affected")
+
+        # The saved graph is reused; only the edited file is re-read
+        (pkg / "api.py").write_text("import json\n")
+        graph = build_dependency_graph(temp_project)
+        if graph.refresh(temp_project) != 0:
+            raise AssertionError("A refreshed graph should have nothing left to update")
+        if str(Path("pkg") / "api.py") in graph.get_transitive_dependents(str(Path("pkg") / "core.py")):
+            raise AssertionError("Edited imports should be picked up from disk")
+
+    def test_transitive_dependents_deep_chain(self):
+        """Test that long import chains do not hit the recursion limit."""
+        import sys
+        from scripts.impact import DependencyGraph
+
+        graph = DependencyGraph()
+        depth = sys.getrecursionlimit() * 2
+        for i in range(depth):
+            graph.imported_by[f"m{i}.py"].add(f"m{i + 1}.py")
+        if len(graph.get_transitive_dependents("m0.py")) != depth:
+            raise AssertionError("Every module in the chain should be a dependent")
+
+
+class TestGitIndex:
+    """Tests for git_index.py module."""
+
+    def test_incremental_history_index(self, temp_project):
+        """Test watermark updates and queries answered from the index."""
+        import subprocess
+        from scripts.git_index import GitIndex, get_file_history, search_commits
+
+        def git(*args):
+            subprocess.run(
+                ["git", "-c", "user.name=Ana", "-c", "user.email=ana@example.com", *args],
+                cwd=temp_project, check=True, capture_output=True
+            )
+
+        git("init", "-q")
+        git("add", "sample.py")
+        git("commit", "-q", "-m", "Add sample authentication helper")
+
+        index = GitIndex.for_root(temp_project)
+        if index.update() != 1 or not index.is_current():
+            raise AssertionError("First update should ingest the commit and record HEAD")
+
+        git("add", "src")
+        git("commit", "-q", "-m", "Wire module loader")
+        if index.is_current():
+            raise AssertionError("A new commit should be detected from .git without running git")
+        if index.update() != 1 or index.stats()["commit_count"] != 2:
+            raise AssertionError("Only commits after the watermark should be ingested")
+        if index.update() != 0:
+            raise AssertionError("An up-to-date index should ingest nothing")
+        if [c.message for c in index.by_author("Ana")] != ["Wire module loader", "Add sample authentication helper"]:
+            raise AssertionError("Author postings should list commits newest first")
+        index.close()
+
+        if [c.message for c in search_commits("auth sample", temp_project)] != ["Add sample authentication helper"]:
+            raise AssertionError("Message search should match word prefixes")
+        history = get_file_history(Path("src") / "module.py", temp_project)
+        if [c.message for c in history.commits] != ["Wire module loader"]:
+            raise AssertionError("File postings should give the file's commits")
+
+    def test_history_older_than_index_window(self, temp_project):
+        """Test file history and search fall back to git log outside the window."""
+        import os
+        import subprocess
+        from scripts.git_index import GitIndex, get_file_history, search_commits
+
+        env = dict(os.environ, GIT_AUTHOR_DATE="2001-01-01T00:00:00", GIT_COMMITTER_DATE="2001-01-01T00:00:00")
+        subprocess.run(["git", "init", "-q"], cwd=temp_project, check=True)
+        subprocess.run(["git", "add", "sample.py"], cwd=temp_project, check=True)
+        subprocess.run(
+            ["git", "-c", "user.name=Ana", "-c", "user.email=ana@example.com",
+             "commit", "-q", "-m", "Add legacy helper"],
+            cwd=temp_project, check=True, env=env
+        )
+
+        index = GitIndex.for_root(temp_project)
+        index.update()
+        if index.stats()["commit_count"] != 0:
+            raise AssertionError("A commit older than the window should not be indexed")
+        index.close()
+
+        if [c.message for c in get_file_history(Path("sample.py"), temp_project).commits] != ["Add legacy helper"]:
+            raise AssertionError("File history should fall back to the full git log")
+        if [c.message for c in search_commits("legacy", temp_project)] != ["Add legacy helper"]:
+            raise AssertionError("Search should fall back to the full git log")
+
+
+    def test_blame_cache_and_hunk_reblame(self, temp_project):
+        """Test cached blame, hunk-only re-blame and bulk blame."""
+        import subprocess
+        from scripts.git_index import GitIndex, get_blames, run_blame
+
+        def git(*args):
+            subprocess.run(
+                ["git", "-c", "user.name=Ana", "-c", "user.email=ana@example.com", *args],
+                cwd=temp_project, check=True, capture_output=True
+            )
+
+        git("init", "-q")
+        git("add", ".")
+        git("commit", "-q", "-m", "Initial")
+
+        sample = temp_project / "sample.py"
+        blames = get_blames([sample, temp_project / "no_docs.py"], temp_project)
+        if len(blames[str(sample)]) != len(sample.read_text().splitlines()):
+            raise AssertionError("Every line should be blamed")
+        if not all(len(b) for b in blames.values()):
+            raise AssertionError("Bulk mode should blame every file")
+
+        lines = sample.read_text().splitlines()
+        lines.insert(2, "# inserted")
+        sample.write_text("\n".join(lines) + "\n")
+
+        index = GitIndex.for_root(temp_project)
+        blamed = index.blame_files([sample])[sample]
+        full = run_blame("sample.py", temp_project)
+        if [(b.line_num, b.commit_hash, b.content) for b in blamed] != \
+                [(b.line_num, b.commit_hash, b.content) for b in full]:
+            raise AssertionError("Re-blaming changed hunks should match a full blame")
+        if blamed[2].commit_hash != "0" * 40:
+            raise AssertionError("The inserted line is not committed yet")
+
+        key, blob, head, _ = index.db.execute("SELECT path, blob, head, lines FROM blame WHERE path = 'sample.py'").fetchone()
+        index.db.execute("UPDATE blame SET lines = '[]' WHERE path = ?", (key,))
+        index.db.commit()
+        if index.blame_files([sample])[sample] != []:
+            raise AssertionError("Unchanged blob and HEAD should be served from the cache")
+        index.close()
+
+
+class TestMemory:
+    """Tests for memory.py module."""
+
+    def test_recall_ranks_and_batches_access(self, temp_project):
+        """Test recall ranking, batched access counts and forget."""
+        from scripts.memory import MemoryStore
+
+        storage = temp_project / "memory"
+        store = MemoryStore(storage)
+        store.remember("auth-flow", "Tokens are refreshed by the gateway", ["security"])
+        store.remember("deploy", "Run the release script after tagging auth changes")
+        store.remember("style", "Prefer small functions")
+
+        results = store.recall("auth")
+        if [m.key for m in results[:2]] != ["auth-flow", "deploy"]:
+            raise AssertionError("Key matches should rank above value matches")
+
+        saved = (storage / "knowledge.json").read_text()
+        store.flush()
+        if (storage / "knowledge.json").read_text() != saved:
+            raise AssertionError("Recall should not rewrite knowledge.json")
+        if MemoryStore(storage).memories["auth-flow"].access_count != 1:
+            raise AssertionError("Flushed access counts should survive a reload")
+
+        if not store.forget("deploy") or "deploy" in [m.key for m in store.recall("auth")]:
+            raise AssertionError("Forgotten memories should not be recalled")
+        store.remember("testing", "Run pytest before committing")
+        if MemoryStore(storage).recall("pytest")[0].key != "testing":
+            raise AssertionError("A reused embedding row should belong to the new memory")
+
+    def test_migrates_inline_embeddings(self, temp_project):
+        """Test that embeddings stored in knowledge.json move to the matrix."""
+        import json
+        from scripts.memory import MemoryStore
+
+        storage = temp_project / "memory"
+        storage.mkdir()
+        legacy = {"cache": {"key": "cache", "value": "Parse results are cached", "tags": [],
+                            "created": "", "updated": "", "access_count": 2,
+                            "embedding": [0.6, 0.8, 0.0]}}
+        (storage / "knowledge.json").write_text(json.dumps(legacy))
+
+        store = MemoryStore(storage)
+        if store.memories["cache"].slot != 0 or not (storage / "embeddings.f32").exists():
+            raise AssertionError("Inline embeddings should be written to the matrix")
+        if "embedding" in json.loads((storage / "knowledge.json").read_text())["cache"]:
+            raise AssertionError("knowledge.json should no longer hold embeddings")
+        if [m.key for m in store.recall("parse")] != ["cache"]:
+            raise AssertionError("Migrated memories should still be recalled")
+
+
+class TestIndexAll:
+    """Tests for index_all.py module."""
+
+    def test_single_pass_matches_standalone_indexes(self, temp_project):
+        """Test that the shared pipeline writes the same indexes as the standalone indexers."""
+        import json
+        from scripts.index_all import run_all_indexes
+        from scripts.todo_index import index_todos
+        from scripts.doc_index import index_documentation
+
+        (temp_project / "src" / "module.py").write_text("import sample\n# TODO: wire this up\n")
+
+        summary = run_all_indexes(temp_project, verbose=False, workers=2)
+        for stage in ("walk", "scan", "semantic", "todos", "impact", "docs", "config"):
+            if stage not in summary["timings"]:
+                raise AssertionError(f"Missing timing for {stage}")
+        saved = json.loads((temp_project / ".mcp" / "index_summary.json").read_text())
+        if saved["timings"] != summary["timings"]:
+            raise AssertionError("Timings should be saved in index_summary.json")
+
+        graph = json.loads((temp_project / ".mcp" / "impact_graph.json").read_text())
+        if graph["imported_by"].get("sample.py") != [str(Path("src") / "module.py")]:
+            raise AssertionError("Impact graph should be built from the shared parse")
+
+        pipeline_todos = summary["indexes"]["todos"]["items"]
+        pipeline_docs = summary["indexes"]["docs"]["items"]
+        if index_todos(temp_project)["total"] != pipeline_todos or pipeline_todos < 1:
+            raise AssertionError("TODO counts should match the standalone indexer")
+        if index_documentation(temp_project)["total_items"] != pipeline_docs:
+            raise AssertionError("Doc counts should match the standalone indexer")
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
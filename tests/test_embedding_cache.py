@@ -0,0 +1,73 @@
+from pathlib import Path
+import shutil
+import tempfile
+import unittest
+
+from agent_manager.models.base import BaseService, ServiceResponse
+from agent_manager.models.embedding_cache import EmbeddingCache
+from agent_manager.models.manager import ModelClientManager
+
+class _EmbedService(BaseService):
+    EMBED_MODEL = "fake-embed"
+
+    def __init__(self):
+        super().__init__(model_name="fake")
+        self.batches = []
+
+    def validate_config(self):
+        return True
+
+    def generate(self, prompt, system_prompt=None):
+        return ServiceResponse(text="")
+
+    def generate_stream(self, prompt, system_prompt=None):
+        yield from ()
+
+    def embed_batch(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(t)), 0.5, -1.0] for t in texts]
+
+class TestEmbeddingCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_roundtrip_and_persistence(self):
+        cache = EmbeddingCache(str(self.tmp), max_entries=10)
+        cache.put_many("m", ["a", "bb"], [[1.0, 2.0], [3.0, 4.0]])
+        self.assertEqual(cache.get_many("m", ["bb", "a", "c"]), [[3.0, 4.0], [1.0, 2.0], None])
+        # Keyed by model as well as text
+        self.assertEqual(cache.get_many("other", ["a"]), [None])
+        cache.close()
+
+        reopened = EmbeddingCache(str(self.tmp), max_entries=10)
+        self.assertEqual(reopened.get_many("m", ["a"]), [[1.0, 2.0]])
+        reopened.close()
+
+    def test_lru_eviction(self):
+        cache = EmbeddingCache(str(self.tmp), max_entries=2)
+        cache.put_many("m", ["a", "b"], [[1.0], [2.0]])
+        cache.get_many("m", ["a"]) # "b" is now least recently used
+        cache.put_many("m", ["c"], [[3.0]])
+
+        self.assertEqual(cache.get_many("m", ["a", "b", "c"]), [[1.0], None, [3.0]])
+        self.assertEqual(cache.stats()["entries"], 2)
+        cache.close()
+
+    def test_manager_batches_misses_and_serves_hits(self):
+        service = _EmbedService()
+        manager = ModelClientManager(providers=[service])
+        manager.embedding_cache = EmbeddingCache(str(self.tmp))
+
+        first = manager.embed_batch(["x", "yy", "x"])
+        self.assertEqual(service.batches, [["x", "yy"]])
+        self.assertEqual(first[0], first[2])
+
+        self.assertEqual(manager.embed("yy"), [2.0, 0.5, -1.0])
+        self.assertEqual(len(service.batches), 1)
+        manager.embedding_cache.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import threading
+import time
+import unittest
+
+from agent_manager.core.event_bus import EventBusService
+
+class TestEventBusDispatch(unittest.TestCase):
+    def setUp(self):
+        self.bus = EventBusService()
+
+    def tearDown(self):
+        self.bus.shutdown()
+
+    def test_default_is_inline(self):
+        """Without configuration, subscribers run on the publisher's thread."""
+        seen = []
+        self.bus.subscribe("ping", lambda et, data: seen.append(threading.current_thread()))
+        self.bus.publish("ping", {})
+        self.assertEqual(seen, [threading.current_thread()])
+
+    def test_async_topic_does_not_block_publisher(self):
+        """A slow subscriber on a pooled topic must not stall publish()."""
+        release = threading.Event()
+        done = []
+
+        def slow(event_type, data):
+            release.wait(2)
+            done.append(data)
+
+        self.bus.configure_topic("slow", concurrency=1)
+        self.bus.subscribe("slow", slow)
+
+        start = time.time()
+        self.bus.publish("slow", 1)
+        self.assertLess(time.time() - start, 0.5)
+        self.assertEqual(done, [])
+
+        release.set()
+        self.assertTrue(self.bus.flush(timeout=2))
+        self.assertEqual(done, [1])
+
+    def test_single_worker_preserves_order(self):
+        seen = []
+        self.bus.configure_topic("ordered", concurrency=1, max_queue=1000)
+        self.bus.subscribe("ordered", lambda et, data: seen.append(data))
+        for i in range(50):
+            self.bus.publish("ordered", i)
+        self.bus.flush(timeout=2)
+        self.assertEqual(seen, list(range(50)))
+
+    def test_coalesce_replaces_pending_event(self):
+        """Bursts of changes to the same path collapse into the latest payload."""
+        gate = threading.Event()
+        seen = []
+
+        def handler(event_type, data):
+            gate.wait(2)
+            seen.append(data)
+
+        self.bus.configure_topic("fs", concurrency=1, overflow="coalesce", coalesce_key=lambda d: d["path"])
+        self.bus.subscribe("fs", handler)
+
+        self.bus.publish("fs", {"path": "blocker", "n": 0})
+        time.sleep(0.1)  # Let the worker pick up the first event
+        for n in range(1, 6):
+            self.bus.publish("fs", {"path": "a.py", "n": n})
+
+        gate.set()
+        self.bus.flush(timeout=2)
+        self.assertEqual([d["n"] for d in seen], [0, 5])
+        self.assertEqual(self.bus.get_stats()["fs"]["coalesced"], 4)
+
+    def test_coalesce_keeps_keyless_events(self):
+        """Events without a coalesce key are queued, not merged with each other."""
+        gate = threading.Event()
+        seen = []
+
+        def handler(event_type, data):
+            gate.wait(2)
+            seen.append(data)
+
+        self.bus.configure_topic("fs", concurrency=1, overflow="coalesce", coalesce_key=lambda d: d.get("path"))
+        self.bus.subscribe("fs", handler)
+
+        self.bus.publish("fs", {"path": "blocker", "n": 0})
+        time.sleep(0.1)
+        for n in range(1, 4):
+            self.bus.publish("fs", {"n": n})
+
+        gate.set()
+        self.bus.flush(timeout=2)
+        self.assertEqual([d["n"] for d in seen], [0, 1, 2, 3])
+        self.assertEqual(self.bus.get_stats()["fs"]["coalesced"], 0)
+
+    def test_drop_newest_when_full(self):
+        gate = threading.Event()
+        self.bus.configure_topic("bounded", concurrency=1, max_queue=2, overflow="drop_newest")
+        self.bus.subscribe("bounded", lambda et, data: gate.wait(2))
+
+        self.bus.publish("bounded", 0)
+        time.sleep(0.1)
+        for i in range(1, 6):
+            self.bus.publish("bounded", i)
+
+        stats = self.bus.get_stats()["bounded"]
+        self.assertEqual(stats["dropped"], 3)
+        gate.set()
+
+    def test_publish_sync_bypasses_pool(self):
+        seen = []
+        self.bus.configure_topic("mixed", concurrency=1)
+        self.bus.subscribe("mixed", lambda et, data: seen.append(threading.current_thread()))
+        self.bus.publish_sync("mixed", {})
+        self.assertEqual(seen, [threading.current_thread()])
+
+    def test_invalid_policy_rejected(self):
+        with self.assertRaises(ValueError):
+            self.bus.configure_topic("x", overflow="explode")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import gzip
+import json
+import socket
+import threading
+import time
+import unittest
+
+from agent_manager.models.manager import ModelClientManager
+from agent_manager.models.openai import OpenAIService
+from agent_manager.models.transport import HTTPConnectionError, HTTPStatusError, HTTPTransport
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    fail_next = 0
+    hung = 0
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body: bytes, extra=None):
+        self.send_response(status)
+        for k, v in (extra or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+
+        if self.path == "/flaky" and _Handler.fail_next > 0:
+            _Handler.fail_next -= 1
+            return self._send(503, b"busy", {"Retry-After": "0"})
+        if self.path == "/missing":
+            return self._send(404, b"nope")
+        if self.path == "/hang":
+            _Handler.hung += 1
+            time.sleep(1.0)
+            return self._send(200, b"{}")
+
+        body = json.dumps({"echo": payload, "port": self.client_address[1]}).encode()
+        if "gzip" in (self.headers.get("Accept-Encoding") or ""):
+            return self._send(200, gzip.compress(body), {"Content-Encoding": "gzip"})
+        self._send(200, body)
+
+class TestHTTPTransport(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.transport = HTTPTransport(timeout=5, backoff_base=0.01)
+
+    def tearDown(self):
+        self.transport.close()
+
+    def test_keep_alive_reuses_connection(self):
+        first = self.transport.post_json(f"{self.base}/echo", {"n": 1})
+        second = self.transport.post_json(f"{self.base}/echo", {"n": 2})
+
+        self.assertEqual(second["echo"], {"n": 2})
+        # Same client socket means the TCP connection was reused
+        self.assertEqual(first["port"], second["port"])
+
+        stats = next(iter(self.transport.stats().values()))
+        self.assertEqual(stats["connections_created"], 1)
+        self.assertEqual(stats["connections_reused"], 1)
+
+    def test_retries_transient_status(self):
+        _Handler.fail_next = 2
+        result = self.transport.post_json(f"{self.base}/flaky", {"ok": True})
+        self.assertEqual(result["echo"], {"ok": True})
+        self.assertEqual(next(iter(self.transport.stats().values()))["retries"], 2)
+
+    def test_timeout_fails_fast_without_resending(self):
+        _Handler.hung = 0
+        start = time.monotonic()
+        with self.assertRaises(HTTPConnectionError):
+            self.transport.post_json(f"{self.base}/hang", {}, timeout=0.2)
+        self.assertLess(time.monotonic() - start, 0.8)
+        self.assertEqual(_Handler.hung, 1)
+
+    def test_retries_connection_refused(self):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        with self.assertRaises(HTTPConnectionError):
+            self.transport.post_json(f"http://127.0.0.1:{port}/x", {})
+        self.assertEqual(next(iter(self.transport.stats().values()))["retries"], 2)
+
+    def test_client_error_raises_status_error(self):
+        with self.assertRaises(HTTPStatusError) as ctx:
+            self.transport.post_json(f"{self.base}/missing", {})
+        self.assertEqual(ctx.exception.code, 404)
+        self.assertEqual(ctx.exception.body, "nope")
+
+    def test_ledger_reports_connection_reuse(self):
+        service = OpenAIService(api_key="test")
+        service.transport = self.transport
+        manager = ModelClientManager(providers=[service])
+
+        self.transport.post_json(f"{self.base}/echo", {})
+        self.transport.post_json(f"{self.base}/echo", {})
+
+        stats = manager.get_connection_stats()
+        self.assertEqual(stats["requests"], 2)
+        self.assertEqual(stats["reused"], 1)
+        self.assertIn("connections", manager.usage_ledger)
+
+if __name__ == "__main__":
+    unittest.main()
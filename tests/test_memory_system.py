@@ -2,8 +2,12 @@ from pathlib import Path
 from unittest.mock import MagicMock
 import os
 import shutil
+import threading
 import unittest
 
+import numpy as np
+
+from agent_manager.core.memory_index import TieredIndex
 from agent_manager.core.memory_service import MemoryService
 
 class TestMemoryService(unittest.TestCase):
@@ -15,6 +19,7 @@ class TestMemoryService(unittest.TestCase):
         self.model_client = MagicMock()
         # Mock embedding [0.1, 0.2, ...] with dimension 1536
         self.model_client.embed.return_value = [0.1] * 1536
+        self.model_client.embed_batch.side_effect = lambda texts: [[0.1] * 1536 for _ in texts]
 
         self.service = MemoryService(self.model_client, memory_path=str(self.test_path))
 
@@ -28,7 +33,7 @@ class TestMemoryService(unittest.TestCase):
 
         success = self.service.upsert(text, meta)
         self.assertTrue(success)
-        self.assertEqual(len(self.service.metadata), 1)
+        self.assertEqual(self.service.count(), 1)
 
         # Query
         results = self.service.query("vector search", top_k=1)
@@ -36,14 +41,123 @@ class TestMemoryService(unittest.TestCase):
         self.assertEqual(results[0]["text"], text)
         self.assertTrue("score" in results[0])
 
+    def test_upsert_batch_embeds_once(self):
+        items = [("first thought", {"n": 1}), ("second thought", {"n": 2})]
+
+        self.assertTrue(self.service.upsert_batch(items))
+        self.model_client.embed_batch.assert_called_once_with(["first thought", "second thought"])
+        self.assertEqual(self.service.index.ntotal, 2)
+        self.assertEqual([self.service.get(i)["n"] for i in (0, 1)], [1, 2])
+
     def test_persistence(self):
         self.service.upsert("Persistent thought", {"p": 1})
         self.service.save()
 
         # Create a new service instance pointing to same path
         new_service = MemoryService(self.model_client, memory_path=str(self.test_path))
-        self.assertEqual(len(new_service.metadata), 1)
-        self.assertEqual(new_service.metadata[0]["text"], "Persistent thought")
+        self.assertEqual(new_service.count(), 1)
+        self.assertEqual(new_service.get(0)["text"], "Persistent thought")
+
+    def test_log_replay_without_compaction(self):
+        self.service.upsert_batch([("one", {}), ("two", {})])
+        self.assertFalse(self.service.index_file.exists())
+
+        # No snapshot yet: the new instance rebuilds everything from the log
+        new_service = MemoryService(self.model_client, memory_path=str(self.test_path))
+        self.assertEqual([new_service.get(i)["text"] for i in (0, 1)], ["one", "two"])
+        self.assertEqual(new_service.index.ntotal, 2)
+
+    def test_compaction_keeps_later_records_and_drops_torn_tail(self):
+        self.service.upsert("compacted", {})
+        self.service.save()
+        self.service.upsert("logged", {})
+        self.service.flush()
+        with open(self.service.wal_file, 'a', encoding='utf-8') as f:
+            f.write('{"id": 2, "vec')
+
+        new_service = MemoryService(self.model_client, memory_path=str(self.test_path))
+        self.assertEqual([new_service.get(i)["text"] for i in (0, 1)], ["compacted", "logged"])
+        self.assertEqual(new_service.index.ntotal, 2)
+        with open(new_service.wal_file, 'rb') as f:
+            self.assertTrue(f.read().endswith(b"\n"))
+
+    def test_filtered_query_is_scoped(self):
+        self.service.upsert_batch([("mine", {"session": "a", "type": "thought"}),
+                                   ("theirs", {"session": "b", "type": "thought"})])
+
+        results = self.service.query("anything", top_k=5, session="b")
+        self.assertEqual([r["text"] for r in results], ["theirs"])
+        self.assertEqual(self.service.query("anything", type="command"), [])
+
+    def test_delete_and_ttl(self):
+        ids = self.service.upsert_batch([("keep", {}), ("drop", {})])
+        self.service.upsert("short lived", {}, ttl=-1)
+
+        self.assertEqual(self.service.delete([ids[1]]), 1)
+        self.assertEqual(self.service.expire(), 1)
+        self.assertEqual([r["text"] for r in self.service.query("x", top_k=5)], ["keep"])
+
+        # Deletions survive a restart even without a compaction
+        new_service = MemoryService(self.model_client, memory_path=str(self.test_path))
+        self.assertEqual(new_service.count(), 1)
+        self.assertEqual(new_service.index.ntotal, 1)
+
+class TestTieredIndex(unittest.TestCase):
+    def test_promotes_to_hnsw_and_reports_recall(self):
+        index = TieredIndex(8, {"hnsw_threshold": 50, "recall_sample": 10, "recall_k": 5})
+        vecs = np.random.RandomState(0).rand(60, 8).astype('float32')
+        index.add(vecs[:40], np.arange(40))
+        self.assertEqual(index.tier, "flat")
+
+        index.add(vecs[40:], np.arange(40, 60))
+        index.wait_for_build(timeout=30)
+        self.assertEqual(index.tier, "hnsw")
+        self.assertEqual(index.ntotal, 60)
+
+        _, ids = index.search(vecs[:1], 1)
+        self.assertEqual(ids[0][0], 0)
+        stats = index.stats()
+        self.assertGreater(stats["last_build"]["recall_at_k"], 0.8)
+        self.assertIsNotNone(stats["query_ms_p50"])
+
+        # HNSW cannot delete in place: removed ids are tombstoned and never returned
+        index.remove([0])
+        _, ids = index.search(vecs[:1], 1)
+        self.assertNotEqual(ids[0][0], 0)
+        self.assertEqual(index.ntotal, 59)
+
+        # Unknown ids are not tombstoned
+        index.remove([0, 12345])
+        self.assertEqual(index.ntotal, 59)
+        self.assertEqual(index.tombstones, {0})
+
+    def test_changes_during_build_are_replayed_by_id(self):
+        index = TieredIndex(8, {"hnsw_threshold": 50, "recall_sample": 10, "recall_k": 5})
+        vecs = np.random.RandomState(1).rand(70, 8).astype('float32')
+        started, release = threading.Event(), threading.Event()
+        build = index._build
+
+        def held_build(*args):
+            started.set()
+            release.wait(10)
+            return build(*args)
+
+        index._build = held_build
+        index.add(vecs[:50], np.arange(50))
+        self.assertTrue(started.wait(10))
+        # The Flat source compacts on delete, so row positions shift under the build
+        index.remove([3, 10])
+        index.add(vecs[50:], np.arange(50, 70))
+        index.remove([55])
+        release.set()
+        index.wait_for_build(timeout=30)
+
+        self.assertEqual(index.tier, "hnsw")
+        self.assertEqual(index.ntotal, 67)
+        live = set(index.ids().tolist()) - index.tombstones
+        self.assertEqual(live, set(range(70)) - {3, 10, 55})
+        _, ids = index.search(vecs[60:61], 1)
+        self.assertEqual(ids[0][0], 60)
 
 if __name__ == "__main__":
     unittest.main()
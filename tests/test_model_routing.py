@@ -0,0 +1,120 @@
+from pathlib import Path
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from agent_manager.models.base import BaseService, ServiceResponse
+from agent_manager.models.manager import ModelClientManager
+from agent_manager.models.routing import BREAKER_OPEN, HealthRouter
+
+class _Service(BaseService):
+    def __init__(self, name, delay=0.0, fail=False):
+        super().__init__(model_name=name)
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    def validate_config(self):
+        return True
+
+    def generate(self, prompt, system_prompt=None):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError(f"{self.model_name} down")
+        return ServiceResponse(text=self.model_name, model_name=self.model_name)
+
+    def generate_stream(self, prompt, system_prompt=None):
+        yield from ()
+
+class TestHealthRouting(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _manager(self, providers, **settings):
+        manager = ModelClientManager(providers=providers)
+        manager.router = HealthRouter(**settings)
+        return manager
+
+    def test_breaker_opens_and_skips_provider(self):
+        bad, good = _Service("bad", fail=True), _Service("good")
+        manager = self._manager([bad, good], failure_threshold=2, cooldown_seconds=60)
+
+        for _ in range(4):
+            self.assertEqual(manager.generate("hi").text, "good")
+
+        # Two failures trip the breaker; later calls never touch the bad provider
+        self.assertEqual(bad.calls, 2)
+        self.assertEqual(manager.get_health()["_Service:bad"]["state"], BREAKER_OPEN)
+
+    def test_half_open_probe_after_cooldown(self):
+        flaky, good = _Service("flaky", fail=True), _Service("good")
+        manager = self._manager([flaky, good], failure_threshold=1, cooldown_seconds=0.05)
+
+        manager.generate("hi")
+        self.assertEqual(flaky.calls, 1)
+
+        flaky.fail = False
+        time.sleep(0.1)
+        # The probe succeeds and closes the circuit; preference then puts flaky back first
+        self.assertEqual(manager.generate("hi").text, "flaky")
+        self.assertEqual(manager.get_health()["_Service:flaky"]["state"], "closed")
+
+    def test_degraded_provider_is_demoted(self):
+        slow, fast = _Service("slow"), _Service("fast")
+        router = HealthRouter(latency_scale=1.0)
+        for _ in range(5):
+            router.record_success(slow, 4.0)
+            router.record_success(fast, 0.1)
+        self.assertEqual(router.order([slow, fast]), [fast, slow])
+
+    def test_health_persists_across_restarts(self):
+        path = self.tmp / "health.json"
+        bad = _Service("bad", fail=True)
+        router = HealthRouter(state_path=str(path), failure_threshold=1)
+        router.record_failure(bad, 0.5)
+
+        reloaded = HealthRouter(state_path=str(path))
+        self.assertEqual(reloaded.snapshot()["_Service:bad"]["state"], BREAKER_OPEN)
+        self.assertTrue(reloaded.is_blocked(bad))
+
+    def test_concurrent_saves_do_not_collide(self):
+        path = self.tmp / "health.json"
+        routers = [HealthRouter(state_path=str(path)) for _ in range(4)]
+        for i, router in enumerate(routers):
+            router.record_success(_Service(f"p{i}"), 0.1)
+
+        threads = [threading.Thread(target=router.save) for router in routers for _ in range(10)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(HealthRouter(state_path=str(path)).snapshot()), 1)
+        self.assertEqual([p.name for p in self.tmp.iterdir()], ["health.json"])
+
+    def test_hedge_takes_first_success(self):
+        hung, fast = _Service("hung", delay=1.0), _Service("fast", delay=0.01)
+        manager = self._manager([hung, fast], hedge=True, hedge_min_delay=0.05, hedge_max_delay=0.05)
+
+        start = time.monotonic()
+        response = manager.generate("hi")
+        self.assertEqual(response.text, "fast")
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(hung.calls, 1)
+
+    def test_hedge_moves_on_immediately_after_failure(self):
+        bad, good = _Service("bad", fail=True), _Service("good")
+        manager = self._manager([bad, good], hedge=True, hedge_min_delay=5, hedge_max_delay=5)
+
+        start = time.monotonic()
+        self.assertEqual(manager.generate("hi").text, "good")
+        self.assertLess(time.monotonic() - start, 1.0)
+
+if __name__ == "__main__":
+    unittest.main()
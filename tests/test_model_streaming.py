@@ -0,0 +1,153 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import unittest
+
+from agent_manager.models.anthropic import AnthropicService
+from agent_manager.models.base import BaseService, ServiceResponse, StreamChunk
+from agent_manager.models.manager import ModelClientManager
+from agent_manager.models.ollama import OllamaService
+from agent_manager.models.openai import OpenAIService
+from agent_manager.models.routing import HealthRouter
+from agent_manager.models.transport import HTTPTransport
+
+def _sse(events):
+    return "".join(f"data: {e if isinstance(e, str) else json.dumps(e)}\n\n" for e in events).encode()
+
+OPENAI_STREAM = _sse([
+    {"choices": [{"delta": {"content": "Hel"}}]},
+    {"choices": [{"delta": {"content": "lo"}}]},
+    {"choices": [], "usage": {"prompt_tokens": 5, "completion_tokens": 2}},
+    "[DONE]",
+])
+
+ANTHROPIC_STREAM = (
+    b"event: message_start\ndata: " + json.dumps({"type": "message_start", "message": {"usage": {"input_tokens": 7, "output_tokens": 1}}}).encode() + b"\n\n"
+    b"event: content_block_delta\ndata: " + json.dumps({"type": "content_block_delta", "delta": {"type": "text_delta", "text": "Hi"}}).encode() + b"\n\n"
+    b"event: message_delta\ndata: " + json.dumps({"type": "message_delta", "usage": {"output_tokens": 3}}).encode() + b"\n\n"
+    b"event: message_stop\ndata: " + json.dumps({"type": "message_stop"}).encode() + b"\n\n"
+)
+
+OLLAMA_STREAM = b"\n".join(json.dumps(e).encode() for e in [
+    {"response": "a", "done": False},
+    {"response": "b", "done": False},
+    {"response": "", "done": True, "prompt_eval_count": 4, "eval_count": 2},
+]) + b"\n"
+
+class _StreamHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = {"/openai": OPENAI_STREAM, "/anthropic": ANTHROPIC_STREAM, "/ollama": OLLAMA_STREAM}[self.path]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class TestProviderStreaming(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _StreamHandler)
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def _collect(self, service):
+        service.transport = HTTPTransport(timeout=5)
+        return list(service.generate_stream("hi", system_prompt="be brief"))
+
+    def test_openai_sse(self):
+        service = OpenAIService(api_key="k")
+        service.BASE_URL = f"{self.base}/openai"
+        chunks = self._collect(service)
+
+        self.assertEqual("".join(c.text for c in chunks), "Hello")
+        self.assertTrue(chunks[-1].done)
+        self.assertEqual(chunks[-1].prompt_tokens, 5)
+        self.assertEqual(chunks[-1].completion_tokens, 2)
+        self.assertGreater(chunks[-1].cost_usd, 0)
+
+    def test_anthropic_sse(self):
+        service = AnthropicService(api_key="k")
+        service.BASE_URL = f"{self.base}/anthropic"
+        chunks = self._collect(service)
+
+        self.assertEqual("".join(c.text for c in chunks), "Hi")
+        self.assertEqual(chunks[-1].prompt_tokens, 7)
+        self.assertEqual(chunks[-1].completion_tokens, 3)
+
+    def test_ollama_ndjson(self):
+        service = OllamaService(base_url=f"{self.base}/ollama")
+        chunks = self._collect(service)
+
+        self.assertEqual([c.text for c in chunks if c.text], ["a", "b"])
+        self.assertTrue(chunks[-1].done)
+        self.assertEqual(chunks[-1].completion_tokens, 2)
+
+class _FakeStreamService(BaseService):
+    def __init__(self, name, chunks=(), fail_after=None):
+        super().__init__(model_name=name)
+        self.chunks = list(chunks)
+        self.fail_after = fail_after
+
+    def validate_config(self):
+        return True
+
+    def generate(self, prompt, system_prompt=None):
+        return ServiceResponse(text="".join(self.chunks), model_name=self.model_name)
+
+    def generate_stream(self, prompt, system_prompt=None):
+        for i, text in enumerate(self.chunks):
+            if self.fail_after is not None and i >= self.fail_after:
+                raise ConnectionError("stream dropped")
+            yield StreamChunk(text=text, completion_tokens=i + 1, model_name=self.model_name)
+        if self.fail_after is not None and self.fail_after >= len(self.chunks):
+            raise ConnectionError("stream dropped")
+        yield StreamChunk(text="", completion_tokens=len(self.chunks), model_name=self.model_name, done=True)
+
+class TestManagerStreaming(unittest.TestCase):
+    def test_fails_over_before_first_token(self):
+        broken = _FakeStreamService("broken", ["x"], fail_after=0)
+        good = _FakeStreamService("good", ["o", "k"])
+        manager = ModelClientManager(providers=[broken, good])
+
+        text = "".join(c.text for c in manager.generate_stream("hi"))
+        self.assertEqual(text, "ok")
+        self.assertEqual(manager.usage_ledger["total_completion_tokens"], 2)
+
+    def test_no_failover_after_first_token(self):
+        flaky = _FakeStreamService("flaky", ["a", "b"], fail_after=1)
+        good = _FakeStreamService("good", ["o", "k"])
+        manager = ModelClientManager(providers=[flaky, good])
+
+        received = []
+        with self.assertRaises(ConnectionError):
+            for chunk in manager.generate_stream("hi"):
+                received.append(chunk.text)
+        self.assertEqual(received, ["a"])
+
+    def test_closing_stream_early_frees_half_open_trial(self):
+        provider = _FakeStreamService("probe", ["a", "b", "c"])
+        manager = ModelClientManager(providers=[provider])
+        manager.router = HealthRouter(failure_threshold=1, cooldown_seconds=0)
+        manager.router.record_failure(provider)
+
+        stream = manager.generate_stream("hi")
+        self.assertEqual(next(stream).text, "a")
+        stream.close()
+
+        # The abandoned probe must not keep the breaker's only trial slot
+        self.assertFalse(manager.router.is_blocked(provider))
+        self.assertTrue(manager.router.allow(provider))
+
+if __name__ == "__main__":
+    unittest.main()
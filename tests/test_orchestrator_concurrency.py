@@ -0,0 +1,109 @@
+from unittest.mock import MagicMock
+import threading
+import time
+import unittest
+
+from agent_manager.core.event_bus import EventBusService
+from agent_manager.orchestrator import OrchestratorManager
+
+class TestOrchestratorLoop(unittest.TestCase):
+    def setUp(self):
+        self.bus = EventBusService()
+        self.model_client = MagicMock()
+        self.orchestrator = OrchestratorManager(event_bus=self.bus, model_client=self.model_client)
+        self.orchestrator.start()
+
+    def tearDown(self):
+        self.orchestrator.stop()
+
+    def _slow_generate(self, delay, log):
+        def generate(prompt, system_prompt=None):
+            log.append(("start", prompt, time.monotonic()))
+            time.sleep(delay)
+            log.append(("end", prompt, time.monotonic()))
+            return MagicMock(text="<message>ok</message>")
+        return generate
+
+    def test_sessions_run_in_parallel(self):
+        """Two sessions should overlap instead of queueing behind each other."""
+        log = []
+        self.model_client.generate.side_effect = self._slow_generate(0.3, log)
+
+        start = time.monotonic()
+        f1 = self.orchestrator.submit_request("a", source="telegram", session_id="tg_1")
+        f2 = self.orchestrator.submit_request("b", source="telegram", session_id="tg_2")
+        f1.result(timeout=5)
+        f2.result(timeout=5)
+
+        self.assertLess(time.monotonic() - start, 0.55)
+
+    def test_requests_within_session_are_ordered(self):
+        log = []
+        self.model_client.generate.side_effect = self._slow_generate(0.05, log)
+
+        futures = [self.orchestrator.submit_request(str(i), session_id="same") for i in range(4)]
+        for f in futures:
+            f.result(timeout=5)
+
+        starts = [p for kind, p, _ in log if kind == "start"]
+        self.assertEqual(starts, ["0", "1", "2", "3"])
+        # No request started before the previous one in the same session ended
+        for i in range(1, len(log), 2):
+            self.assertEqual(log[i][0], "end")
+
+    def test_idle_session_locks_are_released(self):
+        self.model_client.generate.side_effect = self._slow_generate(0.01, [])
+
+        futures = [self.orchestrator.submit_request("x", session_id=f"tg_{i % 3}") for i in range(6)]
+        for f in futures:
+            f.result(timeout=5)
+
+        self.assertEqual(self.orchestrator._session_locks, {})
+
+    def test_cancel_queued_request(self):
+        gate = threading.Event()
+
+        def blocking(prompt, system_prompt=None):
+            gate.wait(2)
+            return MagicMock(text="")
+
+        self.model_client.generate.side_effect = blocking
+        first = self.orchestrator.submit_request("first", session_id="s")
+        second = self.orchestrator.submit_request("second", session_id="s")
+
+        self.assertEqual(self.orchestrator.get_inflight().get("s"), 2)
+        self.assertGreaterEqual(self.orchestrator.cancel_session("s"), 1)
+        gate.set()
+
+        self.assertTrue(self.orchestrator.wait_idle(timeout=5))
+        self.assertTrue(first.done())
+        self.assertTrue(second.cancelled())
+        self.assertEqual(self.orchestrator.get_inflight(), {})
+
+    def test_reentrant_request_from_loop_does_not_deadlock(self):
+        """Follow-up requests issued from inside a request are queued, not nested."""
+        responses = iter([
+            MagicMock(text='<browser action="navigate" url="x"/>'),
+            MagicMock(text="<message>done</message>"),
+        ])
+        self.model_client.generate.side_effect = lambda *a, **k: next(responses)
+
+        browser = MagicMock()
+
+        async def run_action(*args, **attrs):
+            return "page"
+
+        async def stop():
+            return None
+
+        browser.run_action = run_action
+        browser.stop = stop
+        self.orchestrator.browser_service = browser
+        self.orchestrator.session_manager = MagicMock()
+
+        self.orchestrator.process_request("go", session_id="web")
+        self.assertTrue(self.orchestrator.wait_idle(timeout=5))
+        self.assertEqual(self.model_client.generate.call_count, 2)
+
+if __name__ == "__main__":
+    unittest.main()